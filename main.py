@@ -9,23 +9,21 @@ and AI analysis based on the provided configuration.
 
 import yaml
 import sys
-import importlib
 from pathlib import Path
 from datetime import datetime, timedelta
-import json
 from decimal import Decimal
 import re
 import logging
 import argparse
-import pkgutil
 import socket
 import getpass
-from utils.json_utils import UniversalJSONEncoder
+from utils.json_utils import SerializedFindings
+from utils.findings_stream import COMPRESSION_SUFFIXES, FindingsWriter, findings_path, resolve_compression
 from utils.dynamic_prompt_generator import generate_dynamic_prompt
-from utils.run_recommendation import run_recommendation
 from utils.report_builder import ReportBuilder
-from plugins.base import BasePlugin
-from output_handlers import trend_shipper
+from utils.incremental_cache import IncrementalCache, FINDINGS_KEY as INCREMENTAL_FINDINGS_KEY
+from utils.execution_profiler import FINDINGS_KEY as PROFILE_FINDINGS_KEY
+from plugins.registry import PluginRegistry, print_plugin_list
 
 try:
     APP_VERSION = (Path(__file__).parent / "VERSION").read_text().strip()
@@ -33,40 +31,21 @@ except FileNotFoundError:
     APP_VERSION = "unknown"
 
 def discover_plugins():
-    """Finds and loads all available plugins from the 'plugins' directory.
+    """Returns the registry of available plugins.
 
-    This function iterates through the subdirectories of the 'plugins' folder,
-    imports them as modules, and looks for classes that inherit from BasePlugin.
-    It instantiates each found plugin and returns a dictionary mapping the
-    plugin's technology name to its instance.
+    Plugins are listed from the manifest in `plugins/registry.py` and each
+    plugin package is imported only when its technology is first looked up,
+    so a run imports just the selected technology's driver.
 
     Returns:
-        dict: A dictionary of loaded plugin instances, keyed by technology name.
+        PluginRegistry: A mapping of plugin instances, keyed by technology name.
     """
-    plugins_path = Path(__file__).parent / "plugins"
-    discovered_plugins = {}
-    for _, name, _ in pkgutil.iter_modules([str(plugins_path)]):
-        if name != "base":
-            try:
-                module = importlib.import_module(f'plugins.{name}')
-                for item_name in dir(module):
-                    item = getattr(module, item_name)
-                    if isinstance(item, type) and issubclass(item, BasePlugin) and item is not BasePlugin:
-                        try:
-                            plugin_instance = item()
-                            discovered_plugins[plugin_instance.technology_name] = plugin_instance
-                            print(f"✅ Discovered and loaded plugin: {plugin_instance.technology_name}")
-                        except Exception as e:
-                            print(f"⚠️  Warning: Could not instantiate plugin '{name}'. Error: {e}. Skipping.")
-            except ImportError as e:
-                print(f"⚠️  Warning: Could not import plugin '{name}'. Missing dependency: {e}. Skipping.")
-            except Exception as e:
-                print(f"⚠️  Warning: Failed to load plugin '{name}' due to an unexpected error: {e}. Skipping.")
-    return discovered_plugins
+    return PluginRegistry()
 
 class HealthCheck:
     """Orchestrates the entire health check process from start to finish."""
-    def __init__(self, config_file, report_config_file=None):
+    def __init__(self, config_file, report_config_file=None, incremental=False, available_plugins=None, rules_cache=None,
+                 output_name=None):
         """Initializes the HealthCheck application.
 
         Args:
@@ -74,10 +53,23 @@ class HealthCheck:
             report_config_file (str, optional): Path to a custom report
                 configuration file. If not provided, the default for the
                 selected plugin will be used.
+            incremental (bool, optional): Reuse the previous run's results for
+                check modules whose fingerprint has not changed.
+            available_plugins (dict, optional): Already discovered plugins,
+                keyed by technology name. Discovered when not provided.
+            rules_cache (dict, optional): Loaded analysis rules keyed by
+                technology name, shared between HealthCheck instances (see
+                run_fleet.py). Rules missing from it are loaded and added.
+            output_name (str, optional): Subdirectory of the company's output
+                directory for this run's artifacts. Fleet runs use the target
+                name, so targets of the same company keep their own reports,
+                findings and incremental cache.
         """
+        self.output_name = output_name
         self.settings = self.load_settings(config_file)
         self.app_version = APP_VERSION
-        self.available_plugins = discover_plugins()
+        self.available_plugins = available_plugins if available_plugins is not None else discover_plugins()
+        self.rules_cache = rules_cache if rules_cache is not None else {}
         active_tech = self.settings.get('db_type')
         self.active_plugin = self.available_plugins.get(active_tech)
 
@@ -90,6 +82,10 @@ class HealthCheck:
         self.adoc_content = ""
         self.all_structured_findings = {}
         self.analysis_output = {}
+        self.incremental = incremental
+        self.incremental_cache = None
+        self.serialized_findings = None
+        self.findings_writer = None
 
     def load_settings(self, config_file):
         """Loads the main YAML configuration file."""
@@ -104,14 +100,21 @@ class HealthCheck:
         """Generates the output paths for report artifacts."""
         workdir = Path.cwd()
         sanitized_company_name = re.sub(r'\W+', '_', self.settings['company_name'].lower()).strip('_')
-        return { 'adoc_out': workdir / 'adoc_out' / sanitized_company_name }
+        adoc_out = workdir / 'adoc_out' / sanitized_company_name
+        if self.output_name:
+            adoc_out = adoc_out / self.output_name
+        return { 'adoc_out': adoc_out }
 
-    def run_report(self):
+    def run_report(self, ship_trends=True):
         """Orchestrates the main health check process.
 
         This method connects to the database, runs the report builder to
         collect data, optionally triggers AI analysis, embeds metadata, ships
         the data to a trend analysis platform, and saves the final output.
+
+        Args:
+            ship_trends (bool, optional): Hand the findings to the trend
+                shipper. Fleet runs ship from the parent process instead.
         """
         try:
             self.connector.connect()
@@ -124,8 +127,28 @@ class HealthCheck:
             print("Health check cannot proceed.")
             sys.exit(1)
 
-        builder = ReportBuilder(self.connector, self.settings, self.active_plugin, self.report_sections, self.app_version)
-        self.adoc_content, self.all_structured_findings = builder.build()
+        if self.incremental:
+            self.incremental_cache = IncrementalCache.load(self.paths['adoc_out'], self.settings, self.app_version)
+
+        # Module findings are streamed to disk as each check completes
+        self.findings_writer = FindingsWriter(
+            findings_path(self.paths['adoc_out'], resolve_compression(self.settings)),
+            compact=self.settings.get('findings_compact', False)
+        )
+        builder = ReportBuilder(self.connector, self.settings, self.active_plugin, self.report_sections, self.app_version,
+                                incremental_cache=self.incremental_cache, findings_writer=self.findings_writer)
+        try:
+            self.adoc_content, self.all_structured_findings = builder.build()
+        except BaseException:
+            self.findings_writer.abort()
+            raise
+        if builder.execution_profile is not None:
+            self.all_structured_findings[PROFILE_FINDINGS_KEY] = builder.execution_profile
+
+        if self.incremental_cache is not None:
+            self.all_structured_findings[INCREMENTAL_FINDINGS_KEY] = self.incremental_cache.summary()
+            reused_count = len(self.incremental_cache.reused)
+            print(f"♻️  Incremental run: reused {reused_count} check module(s) with unchanged fingerprints")
         
         ai_execution_metrics = {}
         if self.settings.get('ai_analyze', False):
@@ -134,28 +157,34 @@ class HealthCheck:
         # Always generate and embed metadata before shipping and saving.
         self.generate_and_embed_metadata(ai_execution_metrics)
 
-        try:
-            print("\n--- Handing off findings to Trend Shipper ---")
-            # Pass analysis_output to store triggered rules for trend analysis
-            trend_shipper.run(
-                self.all_structured_findings, 
-                self.settings, 
-                self.adoc_content,
-                analysis_results=self.analysis_output  # NEW: Pass analysis results for rule tracking
-            )
-        except Exception as e:
-            print(f"CRITICAL: The trend shipper module failed with an unexpected error: {e}")
+        if ship_trends:
+            from output_handlers import trend_shipper
+            try:
+                print("\n--- Handing off findings to Trend Shipper ---")
+                # Pass analysis_output to store triggered rules for trend analysis
+                trend_shipper.run(
+                    self.all_structured_findings, 
+                    self.settings, 
+                    self.adoc_content,
+                    analysis_results=self.analysis_output,  # NEW: Pass analysis results for rule tracking
+                    serialized_findings=self.get_serialized_findings()
+                )
+            except Exception as e:
+                print(f"CRITICAL: The trend shipper module failed with an unexpected error: {e}")
 
         self.save_structured_findings()
+        if self.incremental_cache is not None:
+            self.incremental_cache.save(self.paths['adoc_out'])
         self.connector.disconnect()
 
     def generate_and_embed_metadata(self, ai_execution_metrics={}):
         """Generates summarized findings and embeds all metadata into the findings object.""" 
         if not self.analysis_output:
             print("\n--- Generating Summarized Findings for Historical Record ---")
-            analysis_rules = self.active_plugin.get_rules_config()
+            analysis_rules = self.get_rules_config()
             db_metadata = self.connector.get_db_metadata()
-            self.analysis_output = generate_dynamic_prompt(self.all_structured_findings, self.settings, analysis_rules, db_metadata, self.active_plugin)
+            self.analysis_output = generate_dynamic_prompt(self.all_structured_findings, self.settings, analysis_rules, db_metadata, self.active_plugin,
+                                                           serialized_findings=self.get_serialized_findings())
 
         # Add db_metadata to structured findings for trend tracking
         if hasattr(self.connector, 'get_db_metadata'):
@@ -172,6 +201,24 @@ class HealthCheck:
             'ai_execution_metrics': ai_execution_metrics
         }
 
+    def get_serialized_findings(self):
+        """Returns the run's serialization stage, brought up to date with the findings.
+
+        The findings are normalized and each module is encoded once; the
+        prompt budgeter, the trend shipper and the findings file all reuse
+        those buffers (see `SerializedFindings` in utils/json_utils.py).
+        """
+        if self.serialized_findings is None:
+            self.serialized_findings = SerializedFindings(self.all_structured_findings)
+        return self.serialized_findings.refresh(self.all_structured_findings)
+
+    def get_rules_config(self):
+        """Returns the active plugin's analysis rules, loading them once per technology."""
+        technology = self.settings.get('db_type')
+        if technology not in self.rules_cache:
+            self.rules_cache[technology] = self.active_plugin.get_rules_config()
+        return self.rules_cache[technology]
+
     def run_ai_analysis(self):
         """Generates a prompt, sends it to the AI, and returns execution metrics.
 
@@ -183,6 +230,8 @@ class HealthCheck:
              # This will populate self.analysis_output
              self.generate_and_embed_metadata()
         
+        from utils.run_recommendation import run_recommendation
+
         print("\n--- Sending Prompt to AI for Analysis ---")
         full_prompt = self.analysis_output.get('prompt')
 
@@ -199,11 +248,27 @@ class HealthCheck:
         return ai_metrics
 
     def save_structured_findings(self):
-        """Saves the final structured findings object to a JSON file."""
-        output_path = self.paths['adoc_out'] / "structured_health_check_findings.json"
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w') as f:
-            json.dump(self.all_structured_findings, f, indent=2, cls=UniversalJSONEncoder)
+        """Completes the structured findings file.
+
+        Check modules were streamed to it during the build; the metadata
+        blocks added since (and any replaced entries) are appended before the
+        file is moved into place. See utils/findings_stream.py.
+        """
+        if self.findings_writer is None:
+            self.findings_writer = FindingsWriter(
+                findings_path(self.paths['adoc_out'], resolve_compression(self.settings)),
+                compact=self.settings.get('findings_compact', False)
+            )
+        self.findings_writer.write_missing(self.all_structured_findings)
+        self.findings_writer.close()
+        output_path = self.findings_writer.path
+        self.findings_writer = None
+
+        # Remove a previous run's file written with another compression setting
+        for compression in COMPRESSION_SUFFIXES:
+            stale_path = findings_path(output_path.parent, compression)
+            if stale_path != output_path:
+                stale_path.unlink(missing_ok=True)
         print(f"\nStructured health check findings saved to: {output_path}")
 
     def write_adoc(self, output_file):
@@ -219,10 +284,18 @@ def main():
     parser.add_argument('--config', default='config/config.yaml', help='Path to configuration file')
     parser.add_argument('--report-config', help='Path to a custom report configuration file.')
     parser.add_argument('--output', default='health_check.adoc', help='Output file name')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse the previous run\'s results for checks whose fingerprint is unchanged')
+    parser.add_argument('--list-plugins', action='store_true',
+                        help='List the available plugins and their drivers without loading them, then exit')
     args = parser.parse_args()
+
+    if args.list_plugins:
+        print_plugin_list()
+        return
     
     print(f"--- Running Health Check Tool v{APP_VERSION} ---")
-    health_check = HealthCheck(args.config, args.report_config)
+    health_check = HealthCheck(args.config, args.report_config, incremental=args.incremental)
     
     settings = health_check.load_settings(args.config)
     generate_report_flag = settings.get('generate_report', True)
@@ -10,10 +10,20 @@ import yaml
 import psycopg2
 import requests
 import json
+import atexit
+import os
 import re
+import time
 from decimal import Decimal
 from datetime import datetime, timedelta
-from utils.json_utils import UniversalJSONEncoder, safe_json_dumps
+from utils.json_utils import SerializedFindings, UniversalJSONEncoder, dumps_bytes, encode_object
+from utils.submission_protocol import (DEFAULT_CHUNK_SIZE, REDUNDANT_FINDINGS_KEYS, chunk_count, compress,
+                                       receiver_decodes, resolve_content_encoding, sha256_hex,
+                                       strip_analysis_results)
+from utils.execution_profiles import insert_execution_profile
+from utils.run_metrics import insert_run_metrics
+from utils.triggered_rules import insert_triggered_rules
+from output_handlers.trend_spool import REJECTED, RETRY, SENT, DEFAULTS as SPOOL_DEFAULTS, TrendSender, TrendSpool
 
 def load_config(config_path='config/trends.yaml'):
     """Loads the trend shipper configuration from a YAML file.
@@ -256,7 +266,8 @@ def _store_triggered_rules(cursor, run_id, analysis_results):
     
     This function extracts the triggered rules from the analysis results
     and inserts them into the health_check_triggered_rules table for
-    future trend analysis and querying.
+    future trend analysis and querying. All issues are sent in one batch
+    (see utils/triggered_rules.py).
     
     Args:
         cursor: PostgreSQL cursor object
@@ -269,73 +280,31 @@ def _store_triggered_rules(cursor, run_id, analysis_results):
         int: Total number of triggered rules stored
     """
     
-    if not analysis_results:
-        return 0
-    
-    insert_sql = """
-        INSERT INTO health_check_triggered_rules (
-            run_id, rule_config_name, metric_name, severity_level, 
-            severity_score, reasoning, recommendations, triggered_data
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    return insert_triggered_rules(cursor, run_id, analysis_results,
+                                  warn=lambda message: print(f"Warning: {message}"))
+
+
+def _store_execution_profile(cursor, run_id, structured_findings):
+    """Store the per-check execution profile of a run.
+
+    The rows come from the `execution_profile` block the ReportBuilder adds
+    to the structured findings (see utils/execution_profiles.py).
+
+    Args:
+        cursor: PostgreSQL cursor object
+        run_id (int): The ID of the health check run
+        structured_findings (dict): The structured findings of the run.
+
+    Returns:
+        int: Number of module profiles stored
     """
-    
-    total_stored = 0
-    
-    # Process critical issues
-    for issue in analysis_results.get('critical_issues', []):
-        try:
-            cursor.execute(insert_sql, (
-                run_id,
-                issue.get('rule_config_name', 'unknown'),
-                issue.get('metric', 'unknown'),
-                'critical',
-                issue.get('analysis', {}).get('score', 10),
-                issue.get('analysis', {}).get('reasoning', ''),
-                json.dumps(issue.get('analysis', {}).get('recommendations', [])),
-                json.dumps(issue.get('data', {}))
-            ))
-            total_stored += 1
-        except Exception as e:
-            print(f"Warning: Failed to store critical issue for run {run_id}: {e}")
-    
-    # Process high priority issues
-    for issue in analysis_results.get('high_priority_issues', []):
-        try:
-            cursor.execute(insert_sql, (
-                run_id,
-                issue.get('rule_config_name', 'unknown'),
-                issue.get('metric', 'unknown'),
-                'high',
-                issue.get('analysis', {}).get('score', 7),
-                issue.get('analysis', {}).get('reasoning', ''),
-                json.dumps(issue.get('analysis', {}).get('recommendations', [])),
-                json.dumps(issue.get('data', {}))
-            ))
-            total_stored += 1
-        except Exception as e:
-            print(f"Warning: Failed to store high priority issue for run {run_id}: {e}")
-    
-    # Process medium priority issues
-    for issue in analysis_results.get('medium_priority_issues', []):
-        try:
-            cursor.execute(insert_sql, (
-                run_id,
-                issue.get('rule_config_name', 'unknown'),
-                issue.get('metric', 'unknown'),
-                'medium',
-                issue.get('analysis', {}).get('score', 5),
-                issue.get('analysis', {}).get('reasoning', ''),
-                json.dumps(issue.get('analysis', {}).get('recommendations', [])),
-                json.dumps(issue.get('data', {}))
-            ))
-            total_stored += 1
-        except Exception as e:
-            print(f"Warning: Failed to store medium priority issue for run {run_id}: {e}")
-    
-    return total_stored
+
+    return insert_execution_profile(cursor, run_id, structured_findings,
+                                    warn=lambda message: print(f"Warning: {message}"))
 
 
-def ship_to_database(db_config, target_info, findings_json, structured_findings, adoc_content, analysis_results=None):
+def ship_to_database(db_config, target_info, findings_json, structured_findings, adoc_content, analysis_results=None,
+                     conn=None):
     """Connects to PostgreSQL and inserts the health check data.
 
     This function handles the entire database transaction, including creating
@@ -355,16 +324,20 @@ def ship_to_database(db_config, target_info, findings_json, structured_findings,
         analysis_results (dict, optional): Results from generate_dynamic_prompt()
             containing triggered rules. If provided, rules will be stored in
             health_check_triggered_rules table.
+        conn (psycopg2 connection, optional): An open connection to reuse
+            (the spool sender ships many runs over one); it is left open.
 
     Returns:
-        None
+        str: SENT, or RETRY when the transaction failed (see
+        output_handlers/trend_spool.py).
     """
 
-    conn = None
+    own_connection = conn is None
     try:
-        conn = psycopg2.connect(**db_config)
+        if own_connection:
+            conn = psycopg2.connect(**db_config)
+            print("Log: Successfully connected to PostgreSQL for trend shipping.")
         cursor = conn.cursor()
-        print("Log: Successfully connected to PostgreSQL for trend shipping.")
 
         company_name = target_info.get('company_name', 'Default Company')
         cursor.execute("SELECT get_or_create_company(%s);", (company_name,))
@@ -424,6 +397,15 @@ def ship_to_database(db_config, target_info, findings_json, structured_findings,
         run_id = cursor.fetchone()[0]
         print(f"Log: Successfully inserted health check run with ID: {run_id}")
 
+        profiles_stored = _store_execution_profile(cursor, run_id, structured_findings)
+        if profiles_stored:
+            print(f"Log: Stored execution profiles of {profiles_stored} check modules for run {run_id}")
+
+        metrics_stored = insert_run_metrics(cursor, run_id, structured_findings,
+                                            warn=lambda message: print(f"Warning: {message}"))
+        if metrics_stored:
+            print(f"Log: Stored {metrics_stored} run metrics for run {run_id}")
+
         # NEW: Store triggered rules if analysis results are provided
         if analysis_results:
             print("Log: Storing triggered rules for trend analysis...")
@@ -438,36 +420,148 @@ def ship_to_database(db_config, target_info, findings_json, structured_findings,
 
         conn.commit()
         print("Log: Successfully shipped all findings and the AsciiDoc report to the database.")
+        return SENT
 
     except psycopg2.Error as e:
         print(f"Error: Failed to ship data to PostgreSQL. {e}")
-        if conn: 
+        if conn and not conn.closed:
             conn.rollback()
+        return RETRY
     except Exception as e:
         print(f"Error: Unexpected error during database shipping. {e}")
-        if conn:
+        if conn and not conn.closed:
             conn.rollback()
+        return RETRY
     finally:
-        if conn: 
+        if conn and own_connection:
             conn.close()
 
 
-def ship_to_api(api_config, target_info, findings, adoc_content, analysis_results=None):
+def _send_with_retries(method, url, headers, body, timeout, retries):
+    """Sends a request body, retrying connection errors and 5xx responses."""
+    for attempt in range(retries + 1):
+        try:
+            response = method(url, headers=headers, data=body, timeout=timeout)
+            if response.status_code < 500 or attempt == retries:
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(min(2 ** attempt, 30))
+
+
+def _upload_in_chunks(http, endpoint_url, headers, body, encoding, chunk_size, timeout, retries):
+    """Sends a compressed submission with the chunked upload protocol.
+
+    Returns:
+        requests.Response | None: The response of the final `complete`
+        request, or None when the receiver does not support chunked uploads.
+    """
+    uploads_url = endpoint_url.rstrip('/') + '/uploads'
+    response = http.post(uploads_url, headers=headers, timeout=timeout, json={
+        'total_size': len(body),
+        'sha256': sha256_hex(body),
+        'content_encoding': encoding,
+        'chunk_size': chunk_size,
+    })
+    if response.status_code in (404, 405):
+        return None  # An older receiver: fall back to a single request
+    response.raise_for_status()
+    upload = response.json()
+    upload_url = f"{uploads_url}/{upload['upload_id']}"
+    chunk_headers = {key: value for key, value in headers.items() if key != 'Content-Type'}
+    chunk_headers['Content-Type'] = 'application/octet-stream'
+
+    def send_chunks(indexes):
+        for index in indexes:
+            chunk = body[index * chunk_size:(index + 1) * chunk_size]
+            _send_with_retries(http.put, f"{upload_url}/chunks/{index}", chunk_headers, chunk, timeout, retries).raise_for_status()
+
+    total_chunks = chunk_count(len(body), chunk_size)
+    print(f"Log: Uploading {len(body) / (1024 * 1024):.1f} MB in {total_chunks} chunks (upload {upload['upload_id']})")
+    send_chunks(range(total_chunks))
+    for _ in range(2):
+        response = _send_with_retries(http.post, f"{upload_url}/complete", headers, b'', timeout, retries)
+        if response.status_code != 409:
+            return response
+        # Chunks lost on the receiver's side: resend the missing ones and complete again
+        status = http.get(upload_url, headers=headers, timeout=timeout)
+        status.raise_for_status()
+        received = set(status.json().get('received_chunks', []))
+        send_chunks(index for index in range(total_chunks) if index not in received)
+    return response
+
+
+def _send_submission(api_config, headers, payload, session=None):
+    """Sends a submission payload, compressed and (when large) in chunks.
+
+    A compressed body answered with 415, or with 400 by a receiver that
+    predates compression (its response lists no Accept-Encoding with the
+    codec), is sent once more uncompressed. Other 400 responses are
+    validation failures and are returned as they are.
+    """
+    http = session or requests
+    endpoint_url = api_config['endpoint_url']
+    timeout = api_config.get('timeout', 30)
+    retries = api_config.get('retries', 3)
+    encoding = resolve_content_encoding(api_config.get('compression', 'gzip'))
+    chunk_size = int(api_config.get('chunk_size_mb', DEFAULT_CHUNK_SIZE / (1024 * 1024)) * 1024 * 1024)
+
+    body = compress(payload, encoding)
+    if encoding != 'identity':
+        print(f"Log: Submission compressed with {encoding} from {len(payload) / (1024 * 1024):.1f} MB "
+              f"to {len(body) / (1024 * 1024):.1f} MB")
+
+    if len(body) > chunk_size and api_config.get('chunked_upload', True):
+        response = _upload_in_chunks(http, endpoint_url, headers, body, encoding, chunk_size, timeout, retries)
+        if response is not None:
+            return response
+
+    body_headers = dict(headers)
+    if encoding != 'identity':
+        body_headers['Content-Encoding'] = encoding
+    response = _send_with_retries(http.post, endpoint_url, body_headers, body, timeout, retries)
+    if encoding != 'identity' and (response.status_code == 415 or (
+            response.status_code == 400
+            and not receiver_decodes(response.headers.get('Accept-Encoding'), encoding))):
+        print(f"Log: The API did not accept a {encoding} body ({response.status_code}). Sending it uncompressed.")
+        response = _send_with_retries(http.post, endpoint_url, headers, payload, timeout, retries)
+    return response
+
+
+def ship_to_api(api_config, target_info, findings, adoc_content, analysis_results=None, serialized_findings=None,
+                session=None):
     """Sends health check data and the AsciiDoc report to an API endpoint.
 
+    The payload is compressed (gzip by default) and, when it is larger than
+    one chunk, sent with the chunked upload protocol of
+    utils/submission_protocol.py. The rendered prompt and the summarized
+    findings, which the receiver never reads, are left out.
+
     Args:
         api_config (dict): Configuration for the API, including:
             - endpoint_url (str): The API endpoint URL
             - api_key (str, optional): API key for authentication
             - timeout (int, optional): Request timeout in seconds (default: 30)
+            - compression (str, optional): gzip (default), zstd or none
+            - chunk_size_mb (float, optional): Bodies larger than this are
+              uploaded in chunks of this size (default: 8)
+            - chunked_upload (bool, optional): Set false to always send a
+              single request (default: true)
+            - retries (int, optional): Retries of a failed request (default: 3)
         target_info (dict): Information about the target system.
         findings (dict): The complete structured findings dictionary.
         adoc_content (str): The full AsciiDoc report content.
         analysis_results (dict, optional): Results from generate_dynamic_prompt()
             containing triggered rules and issue lists. Defaults to None.
+        serialized_findings (SerializedFindings, optional): The findings'
+            encoded buffers, embedded in the payload without re-encoding.
+        session (requests.Session, optional): A pooled HTTP session to send
+            with (the spool sender keeps one per worker thread).
 
     Returns:
-        None
+        str: SENT, RETRY (the receiver may accept it later) or REJECTED
+        (see output_handlers/trend_spool.py).
     """
 
     try:
@@ -478,24 +572,20 @@ def ship_to_api(api_config, target_info, findings, adoc_content, analysis_result
         if api_key:
             headers['X-API-Key'] = api_key
 
+        if serialized_findings is None:
+            serialized_findings = SerializedFindings(findings)
+
         full_payload = {
             'target_info': target_info,
-            'findings': findings,
+            'findings': serialized_findings.dumps(exclude=REDUNDANT_FINDINGS_KEYS),
             'report_adoc': adoc_content
         }
 
         # Include analysis_results if provided (contains triggered rules for trend analysis)
         if analysis_results:
-            full_payload['analysis_results'] = analysis_results
+            full_payload['analysis_results'] = strip_analysis_results(analysis_results)
 
-        timeout = api_config.get('timeout', 30)
-
-        response = requests.post(
-            api_config['endpoint_url'],
-            headers=headers,
-            data=safe_json_dumps(full_payload),
-            timeout=timeout
-        )
+        response = _send_submission(api_config, headers, encode_object(full_payload), session=session)
         response.raise_for_status()
 
         result = response.json()
@@ -512,6 +602,7 @@ def ship_to_api(api_config, target_info, findings, adoc_content, analysis_result
             print(f"   Status: Queued for processing")
 
         print(f"Log: Successfully sent raw findings to API. Status: {response.status_code}")
+        return SENT
 
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 401:
@@ -523,16 +614,23 @@ def ship_to_api(api_config, target_info, findings, adoc_content, analysis_result
             print(f"⚠️  Service temporarily unavailable. Please try again later.")
         else:
             print(f"❌ API error: {e.response.status_code} - {e.response.text}")
+        # Client errors other than timeouts and rate limits will not succeed on a retry
+        if 400 <= e.response.status_code < 500 and e.response.status_code not in (408, 429):
+            return REJECTED
+        return RETRY
     except requests.exceptions.RequestException as e:
         print(f"Error: Failed to ship data to API. {e}")
+        return RETRY
 
 
-def run(structured_findings, target_info, adoc_content=None, analysis_results=None):
+def run(structured_findings, target_info, adoc_content=None, analysis_results=None, serialized_findings=None):
     """Main entry point for the trend shipper module.
 
     This function is called by the main application after a health check is
     complete. It loads the `trends.yaml` configuration and, based on the
     specified `destination`, calls the appropriate function to ship the results.
+    With `spool.enabled`, the run is queued on disk instead and shipped by a
+    background sender (see output_handlers/trend_spool.py).
     
     NEW: Accepts analysis_results parameter to store triggered rules.
 
@@ -544,6 +642,9 @@ def run(structured_findings, target_info, adoc_content=None, analysis_results=No
         adoc_content (str, optional): The full AsciiDoc report. Defaults to None.
         analysis_results (dict, optional): Results from generate_dynamic_prompt()
             containing triggered rules and issue lists. Defaults to None.
+        serialized_findings (SerializedFindings, optional): The run's shared
+            serialization stage; its cached buffers are reused instead of
+            serializing the findings again.
 
     Returns:
         None
@@ -556,9 +657,24 @@ def run(structured_findings, target_info, adoc_content=None, analysis_results=No
         return
 
     destination = config.get('destination')
+    if serialized_findings is None:
+        serialized_findings = SerializedFindings(structured_findings)
+    else:
+        serialized_findings.refresh(structured_findings)
 
-    if destination == "postgresql":
-        findings_as_json = safe_json_dumps(structured_findings)
+    if (config.get('spool') or {}).get('enabled') and destination in ("postgresql", "api"):
+        sender = _get_sender(config)
+        path = sender.spool.enqueue(encode_object({
+            'queued_at': datetime.utcnow().isoformat() + 'Z',
+            'target_info': target_info,
+            'findings': serialized_findings.dumps(),
+            'report_adoc': adoc_content,
+            'analysis_results': strip_analysis_results(analysis_results),
+        }))
+        print(f"Log: Run queued for trend shipping as {path.name}; sending in the background.")
+        sender.notify()
+    elif destination == "postgresql":
+        findings_as_json = serialized_findings.dumps().decode('utf-8')
         ship_to_database(
             config.get('database'),
             target_info,
@@ -573,9 +689,103 @@ def run(structured_findings, target_info, adoc_content=None, analysis_results=No
             target_info,
             structured_findings,
             adoc_content,
-            analysis_results  # Pass analysis results for rule tracking
+            analysis_results,  # Pass analysis results for rule tracking
+            serialized_findings=serialized_findings
         )
     else:
         print(f"Error: Unknown trend storage destination '{destination}'.")
         
     print("--- Trend Shipper Module Finished ---")
+
+
+def _deliver_spooled(config, entry, resources):
+    """Ships one spooled run; `resources` is the worker's HTTP session or connection holder."""
+    findings = entry['findings']
+    if config.get('destination') == "postgresql":
+        if resources['conn'] is None or resources['conn'].closed:
+            resources['conn'] = psycopg2.connect(**config.get('database'))
+        return ship_to_database(
+            config.get('database'), entry['target_info'], dumps_bytes(findings).decode('utf-8'), findings,
+            entry.get('report_adoc'), entry.get('analysis_results'), conn=resources['conn']
+        )
+    return ship_to_api(config.get('api'), entry['target_info'], findings, entry.get('report_adoc'),
+                       entry.get('analysis_results'), session=resources)
+
+
+def _close_resources(resources):
+    if isinstance(resources, dict):
+        if resources['conn'] is not None:
+            resources['conn'].close()
+    else:
+        resources.close()
+
+
+def create_sender(config):
+    """Builds a spool sender for a trend shipper configuration.
+
+    API runs are sent by `spool.workers` threads, each with a pooled
+    requests.Session; PostgreSQL runs by one thread over one connection.
+    """
+    spool_config = {**SPOOL_DEFAULTS, **(config.get('spool') or {})}
+    if config.get('destination') == "postgresql":
+        workers, open_resources = 1, lambda: {'conn': None}
+    else:
+        workers, open_resources = spool_config['workers'], requests.Session
+    sender = TrendSender(TrendSpool.from_config(spool_config), lambda entry, resources: _deliver_spooled(config, entry, resources),
+                         workers=workers, open_resources=open_resources, close_resources=_close_resources)
+    sender.exit_wait_seconds = spool_config['exit_wait_seconds']
+    return sender
+
+
+_sender = None
+
+
+def _get_sender(config):
+    """The process's spool sender, created on first use."""
+    global _sender
+    if _sender is None:
+        _sender = create_sender(config)
+        atexit.register(_wait_at_exit)
+    return _sender
+
+
+def _forget_sender():
+    """A forked child has none of the parent's sender threads and must not share its connections."""
+    global _sender
+    _sender = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_sender)
+
+
+def _wait_at_exit():
+    if _sender is not None and not _sender.stop(_sender.exit_wait_seconds):
+        print(f"⚠️  Trend runs still queued in {_sender.spool.directory}; they will be sent by the next run.")
+
+
+def stop():
+    """Closes the connections the spool sender keeps between runs.
+
+    Called at exit; processes that end without running atexit handlers
+    (e.g. multiprocessing children) call it themselves.
+    """
+    global _sender
+    if _sender is not None:
+        _sender.stop(_sender.exit_wait_seconds)
+        _sender = None
+
+
+def flush(timeout=None):
+    """Waits until the runs queued by this process are shipped.
+
+    Fleet runs call this once all targets are done. Runs that are waiting
+    for a retry are sent if their backoff ends within the timeout
+    (default: `spool.exit_wait_seconds`).
+
+    Returns:
+        bool: True if the spool is empty (or spooling is not enabled).
+    """
+    if _sender is None:
+        return True
+    return _sender.flush(_sender.exit_wait_seconds if timeout is None else timeout)
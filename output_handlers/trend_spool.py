@@ -0,0 +1,349 @@
+"""Durable local spool and background sender for the trend shipper.
+
+When `spool.enabled` is set in config/trends.yaml, `trend_shipper.run()` no
+longer ships a run inline: the submission is written to a spool directory
+(one gzip-compressed JSON file per run, renamed into place so a crash never
+leaves a partial entry) and a background thread sends it. A slow or
+unavailable trends database or API therefore no longer delays the health
+check, and nothing is lost while it is down:
+
+- Failed sends are retried with exponential backoff, up to `max_attempts`;
+  entries the receiver rejects outright (e.g. an invalid API key) and
+  entries that exhaust their attempts are moved to `failed/` for inspection.
+- API submissions are sent concurrently, each worker thread with its own
+  pooled HTTP session; PostgreSQL submissions share a single connection.
+- Entries left behind (process exit, outage) are sent by the next run, or
+  by draining the spool explicitly:
+
+      python -m output_handlers.trend_spool                 # send what is due, then exit
+      python -m output_handlers.trend_spool --loop 60       # keep draining every 60 seconds
+
+Configuration (config/trends.yaml):
+
+    spool:
+      enabled: true
+      directory: adoc_out/trend_spool
+      workers: 4               # concurrent API submissions
+      max_attempts: 10
+      backoff_seconds: 30      # doubled after every failed attempt, capped at max_backoff_seconds
+      max_backoff_seconds: 3600
+      exit_wait_seconds: 60    # how long a finishing process waits for its queued runs
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Delivery outcomes returned by the send function
+SENT = 'sent'
+RETRY = 'retry'
+REJECTED = 'rejected'
+
+ENTRY_SUFFIX = '.json.gz'
+INFLIGHT_SUFFIX = '.inflight'
+STATE_SUFFIX = '.state'
+
+DEFAULTS = {
+    'directory': 'adoc_out/trend_spool',
+    'workers': 4,
+    'max_attempts': 10,
+    'backoff_seconds': 30,
+    'max_backoff_seconds': 3600,
+    'exit_wait_seconds': 60,
+}
+
+# An in-flight entry older than this belongs to a sender that died; it is sent again
+STALE_INFLIGHT_SECONDS = 3600
+
+
+class TrendSpool:
+    """A directory of queued submissions with per-entry retry state."""
+
+    def __init__(self, directory, max_attempts=DEFAULTS['max_attempts'], backoff_seconds=DEFAULTS['backoff_seconds'],
+                 max_backoff_seconds=DEFAULTS['max_backoff_seconds']):
+        self.directory = Path(directory)
+        self.failed_directory = self.directory / 'failed'
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, spool_config):
+        settings = {**DEFAULTS, **(spool_config or {})}
+        return cls(settings['directory'], settings['max_attempts'], settings['backoff_seconds'],
+                   settings['max_backoff_seconds'])
+
+    def enqueue(self, encoded_submission):
+        """Adds a submission (encoded JSON bytes) to the spool and returns its path."""
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:12]}{ENTRY_SUFFIX}"
+        tmp_path = self.directory / f".{name}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(encoded_submission)
+        path = self.directory / name
+        os.replace(tmp_path, path)
+        return path
+
+    def _state_path(self, path):
+        return path.with_name(path.name + STATE_SUFFIX)
+
+    def _read_state(self, path):
+        try:
+            return json.loads(self._state_path(path).read_text())
+        except (OSError, ValueError):
+            return {'attempts': 0, 'next_attempt': 0}
+
+    def pending(self):
+        """All queued entries, oldest first."""
+        return sorted(self.directory.glob('*' + ENTRY_SUFFIX))
+
+    def due(self, now=None):
+        """Queued entries whose next attempt is due, oldest first."""
+        now = time.time() if now is None else now
+        self._recover_stale()
+        return [path for path in self.pending() if self._read_state(path)['next_attempt'] <= now]
+
+    def next_due_in(self):
+        """Seconds until the next queued entry is due (None when the spool is empty)."""
+        times = [self._read_state(path)['next_attempt'] for path in self.pending()]
+        return max(0.0, min(times) - time.time()) if times else None
+
+    def _recover_stale(self):
+        cutoff = time.time() - STALE_INFLIGHT_SECONDS
+        for inflight in self.directory.glob('*' + INFLIGHT_SUFFIX):
+            try:
+                if inflight.stat().st_mtime < cutoff:
+                    os.replace(inflight, inflight.with_name(inflight.name[:-len(INFLIGHT_SUFFIX)]))
+            except OSError:
+                continue
+
+    def claim(self, path):
+        """Marks an entry as being sent; returns the in-flight path, or None if another sender has it."""
+        inflight = path.with_name(path.name + INFLIGHT_SUFFIX)
+        try:
+            os.replace(path, inflight)  # Atomic: only one sender wins
+        except FileNotFoundError:
+            return None
+        os.utime(inflight)
+        return inflight
+
+    def load(self, inflight):
+        with gzip.open(inflight, 'rb') as f:
+            return json.loads(f.read())
+
+    def _entry_path(self, inflight):
+        return inflight.with_name(inflight.name[:-len(INFLIGHT_SUFFIX)])
+
+    def complete(self, inflight):
+        """Removes an entry that was sent."""
+        entry = self._entry_path(inflight)
+        inflight.unlink(missing_ok=True)
+        self._state_path(entry).unlink(missing_ok=True)
+
+    def release(self, inflight, error, permanent=False):
+        """Returns an entry that failed to send to the queue, or moves it to failed/.
+
+        Returns:
+            bool: True if the entry will be retried.
+        """
+        entry = self._entry_path(inflight)
+        state = self._read_state(entry)
+        state['attempts'] += 1
+        state['last_error'] = str(error)[:2000]
+        state['last_attempt'] = time.time()
+        if permanent or state['attempts'] >= self.max_attempts:
+            self.failed_directory.mkdir(exist_ok=True)
+            os.replace(inflight, self.failed_directory / entry.name)
+            (self.failed_directory / (entry.name + STATE_SUFFIX)).write_text(json.dumps(state))
+            self._state_path(entry).unlink(missing_ok=True)
+            return False
+        delay = min(self.backoff_seconds * 2 ** (state['attempts'] - 1), self.max_backoff_seconds)
+        state['next_attempt'] = time.time() + delay
+        tmp = self._state_path(entry).with_suffix('.tmp')
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self._state_path(entry))
+        os.replace(inflight, entry)
+        return True
+
+
+class TrendSender:
+    """Sends spooled submissions, concurrently, with a background thread on demand.
+
+    `send(entry, resources)` delivers one loaded entry and returns SENT,
+    RETRY or REJECTED (raising counts as RETRY). `open_resources()` creates
+    what one concurrent send needs (e.g. an HTTP session or a database
+    connection holder); at most `workers` are opened. They are kept between
+    drains and closed with `close_resources(resources)` by `stop()`, or
+    right away when a send raises.
+    """
+
+    def __init__(self, spool, send, workers=1, open_resources=None, close_resources=None):
+        self.spool = spool
+        self.send = send
+        self.workers = max(1, workers)
+        self.open_resources = open_resources or (lambda: None)
+        self.close_resources = close_resources or (lambda resources: None)
+        self._idle = []  # Opened resources not in use by a send
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._thread = None
+        self._wakeup = False
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.open_resources()
+
+    def _close(self, resources):
+        try:
+            self.close_resources(resources)
+        except Exception:
+            pass
+
+    def _send_one(self, path):
+        inflight = self.spool.claim(path)
+        if inflight is None:
+            return None
+        resources = None
+        try:
+            entry = self.spool.load(inflight)
+            resources = self._acquire()
+            outcome = self.send(entry, resources)
+            error = f"receiver answered {outcome}"
+        except Exception as e:
+            outcome, error = RETRY, e
+            if resources is not None:
+                self._close(resources)  # Reopened (e.g. reconnected) for the next entry
+                resources = None
+        if resources is not None:
+            with self._lock:
+                self._idle.append(resources)
+        if outcome == SENT:
+            self.spool.complete(inflight)
+        elif self.spool.release(inflight, error, permanent=(outcome == REJECTED)):
+            print(f"⚠️  Trend submission {path.name} will be retried: {error}")
+        else:
+            print(f"❌ Trend submission {path.name} moved to {self.spool.failed_directory}: {error}")
+        return outcome
+
+    def drain(self):
+        """Sends every entry that is due once.
+
+        Returns:
+            dict: Number of entries per outcome.
+        """
+        with self._drain_lock:
+            return self._drain()
+
+    def _drain(self):
+        due = self.spool.due()
+        counts = {SENT: 0, RETRY: 0, REJECTED: 0}
+        if not due:
+            return counts
+        if self.workers == 1 or len(due) == 1:
+            outcomes = [self._send_one(path) for path in due]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(due)), thread_name_prefix='trend-sender') as pool:
+                outcomes = list(pool.map(self._send_one, due))
+        for outcome in outcomes:
+            if outcome is not None:
+                counts[outcome] += 1
+        return counts
+
+    def _run(self):
+        while True:
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"⚠️  Trend sender error: {e}")
+            with self._lock:
+                if not self._wakeup:
+                    self._thread = None
+                    return
+                self._wakeup = False
+
+    def notify(self):
+        """Starts a background drain, or asks the running one to look again."""
+        with self._lock:
+            self._wakeup = True
+            if self._thread is None:
+                self._wakeup = False
+                self._thread = threading.Thread(target=self._run, name='trend-sender', daemon=True)
+                self._thread.start()
+
+    def wait(self, timeout=None):
+        """Waits for the background drain to finish (at most `timeout` seconds)."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._thread is None
+
+    def flush(self, timeout=None):
+        """Drains the spool, waiting for backoffs, until it is empty or `timeout` expires.
+
+        Returns:
+            bool: True if the spool is empty.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.wait(timeout)
+        while True:
+            self.drain()
+            next_due = self.spool.next_due_in()
+            if next_due is None:
+                return True
+            if deadline is not None and time.monotonic() + next_due > deadline:
+                return False
+            time.sleep(next_due)
+
+    def stop(self, timeout=None):
+        """Waits for the background drain (at most `timeout` seconds), then closes the kept resources.
+
+        Returns:
+            bool: True if no background drain is running anymore.
+        """
+        stopped = self.wait(timeout)
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for resources in idle:
+            self._close(resources)
+        return stopped
+
+
+def main():
+    """Drains the spool from the command line."""
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from output_handlers import trend_shipper
+
+    parser = argparse.ArgumentParser(description='Send the health check runs queued in the trend spool')
+    parser.add_argument('--config', default='config/trends.yaml', help='Trend shipper configuration file')
+    parser.add_argument('--loop', type=float, metavar='SECONDS',
+                        help='Keep running, draining the spool every SECONDS')
+    args = parser.parse_args()
+
+    config = trend_shipper.load_config(args.config)
+    if not config:
+        sys.exit(1)
+    sender = trend_shipper.create_sender(config)
+    try:
+        while True:
+            counts = sender.drain()
+            print(f"✅ Sent {counts[SENT]}, to retry {counts[RETRY]}, rejected {counts[REJECTED]}; "
+                  f"{len(sender.spool.pending())} queued")
+            if not args.loop:
+                break
+            time.sleep(args.loop)
+    finally:
+        sender.stop()
+
+
+if __name__ == '__main__':
+    main()
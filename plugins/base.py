@@ -34,8 +34,13 @@ class BasePlugin(ABC):
         """
         Returns a dictionary of weights for each check module to guide
         the AI prompt's token budgeting.
+
+        Read from each module's get_weight() through the shared, per-process
+        registry in utils/module_weights.py, so check modules are never
+        executed again just to read their weight.
         """
-        return {}
+        from utils.module_weights import weights_for_plugin
+        return weights_for_plugin(self)
 
     def get_db_version_from_findings(self, findings: dict) -> str:
         """
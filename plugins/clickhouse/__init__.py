@@ -24,6 +24,7 @@ class ClickHousePlugin(BasePlugin):
             dict: All rules merged into a single dictionary (only valid rules)
         """
         from utils.rule_validator import validate_and_load_rules
+        from utils.rule_compiler import compile_rules
         import logging
 
         logger = logging.getLogger(__name__)
@@ -53,7 +54,8 @@ class ClickHousePlugin(BasePlugin):
                 logger.error(f"Unexpected error loading rule file {rule_file.name}: {e}")
 
         logger.info(f"Loaded {len(all_rules)} rule metric(s) from {rules_dir}")
-        return all_rules
+        # Compile expressions and index keywords once, at load time
+        return compile_rules(all_rules)
 
     def get_template_path(self):
         return Path(__file__).parent.parent / "clickhouse" / "templates"
@@ -11,27 +11,47 @@ This module provides reusable components for:
 - Retry logic for API calls
 """
 
-from .ssh_handler import SSHConnectionManager
-from .shell_executor import ShellExecutor
-from .output_formatters import AsciiDocFormatter
-from .parsers import NodetoolParser, ShellCommandParser
-from .ssh_mixin import SSHSupportMixin
-from .check_helpers import (
-    require_ssh,
-    require_aws,
-    require_azure,
-    require_instaclustr,
-    format_check_header,
-    format_recommendations,
-    safe_execute_query,
-    merge_structured_data,
-    calculate_percentage,
-    format_bytes
-)
-from .aws_handler import AWSConnectionManager, AWSSupportMixin
-from .azure_handler import AzureConnectionManager, AzureSupportMixin
-from .instaclustr_handler import InstaclustrConnectionManager, InstaclustrSupportMixin
-from .retry_utils import retry_on_failure, should_retry_error
+import importlib
+
+# Exported name -> submodule. Submodules are imported on first access, so a
+# plugin importing e.g. plugins.common.check_helpers does not pull in boto3,
+# the Azure SDK or requests through the cloud integrations.
+_EXPORTS = {
+    'SSHConnectionManager': 'ssh_handler',
+    'ShellExecutor': 'shell_executor',
+    'AsciiDocFormatter': 'output_formatters',
+    'NodetoolParser': 'parsers',
+    'ShellCommandParser': 'parsers',
+    'SSHSupportMixin': 'ssh_mixin',
+    'require_ssh': 'check_helpers',
+    'require_aws': 'check_helpers',
+    'require_azure': 'check_helpers',
+    'require_instaclustr': 'check_helpers',
+    'format_check_header': 'check_helpers',
+    'format_recommendations': 'check_helpers',
+    'safe_execute_query': 'check_helpers',
+    'merge_structured_data': 'check_helpers',
+    'calculate_percentage': 'check_helpers',
+    'format_bytes': 'check_helpers',
+    'AWSConnectionManager': 'aws_handler',
+    'AWSSupportMixin': 'aws_handler',
+    'AzureConnectionManager': 'azure_handler',
+    'AzureSupportMixin': 'azure_handler',
+    'InstaclustrConnectionManager': 'instaclustr_handler',
+    'InstaclustrSupportMixin': 'instaclustr_handler',
+    'retry_on_failure': 'retry_utils',
+    'should_retry_error': 'retry_utils',
+}
+
+
+def __getattr__(name):
+    submodule = _EXPORTS.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{submodule}', __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     # SSH Infrastructure
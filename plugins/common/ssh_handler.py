@@ -34,6 +34,10 @@ class SSHConnectionManager:
         output, stderr, exit_code = ssh_manager.execute_command("df -h")
         ssh_manager.disconnect()
     """
+
+    # Callables notified with (host, command) before every remote command,
+    # e.g. the ReportBuilder's per-check execution profiler
+    command_observers = []
     
     def __init__(self, settings: Dict):
         """
@@ -200,6 +204,9 @@ class SSHConnectionManager:
             raise ConnectionError("SSH connection not established. Call connect() first.")
         
         command_timeout = timeout or self.settings.get('ssh_command_timeout', 30)
+
+        for observer in list(self.command_observers):
+            observer(self.settings.get('ssh_host'), command)
         
         try:
             # Execute command
@@ -4,6 +4,10 @@ from plugins.kafka.utils.qrylib.list_topics_queries import get_list_topics_query
 def get_weight():
     return 4
 
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the topic metadata is unchanged."""
+    return connector.get_metadata_fingerprint()
+
 def run_check_topic_count_and_naming(connector, settings):
     """
     Analyzes topic count and naming conventions.
@@ -852,6 +852,31 @@ class KafkaConnector(SSHSupportMixin, CVECheckMixin):
                 'db_name': 'N/A'
             }
 
+    def get_metadata_fingerprint(self):
+        """
+        Summarizes the cached cluster metadata for incremental re-runs.
+
+        kafka-python does not expose the controller's metadata epoch, so the
+        cluster ID, controller, broker IDs and topic partition counts stand in
+        for it: any topic or broker change produces a different fingerprint.
+
+        Returns:
+            dict: The metadata summary, or None if it cannot be read.
+        """
+        try:
+            cluster = self.admin_client._client.cluster
+            cluster_id = cluster.cluster_id() if callable(cluster.cluster_id) else cluster.cluster_id
+            controller = cluster.controller() if callable(cluster.controller) else cluster.controller
+            return {
+                'cluster_id': cluster_id,
+                'controller_id': getattr(controller, 'nodeId', None),
+                'brokers': sorted(broker.nodeId for broker in cluster.brokers()),
+                'topics': {topic: len(cluster.partitions_for_topic(topic) or ()) for topic in sorted(cluster.topics())},
+            }
+        except Exception as e:
+            logger.debug(f"Could not build metadata fingerprint: {e}")
+            return None
+
     def execute_query(self, query, params=None, return_raw=False):
         """
         Executes Kafka Admin API operations or shell commands via JSON dispatch.
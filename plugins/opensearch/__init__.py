@@ -24,6 +24,7 @@ class OpenSearchPlugin(BasePlugin):
             dict: All rules merged into a single dictionary (only valid rules)
         """
         from utils.rule_validator import validate_and_load_rules
+        from utils.rule_compiler import compile_rules
         import logging
 
         logger = logging.getLogger(__name__)
@@ -53,7 +54,8 @@ class OpenSearchPlugin(BasePlugin):
                 logger.error(f"Unexpected error loading rule file {rule_file.name}: {e}")
 
         logger.info(f"Loaded {len(all_rules)} rule metric(s) from {rules_dir}")
-        return all_rules
+        # Compile expressions and index keywords once, at load time
+        return compile_rules(all_rules)
 
     def get_report_definition(self, report_config_file=None):
         """
@@ -86,35 +88,6 @@ class OpenSearchPlugin(BasePlugin):
         return Path(__file__).parent / "templates"
 
     # Optional: Override these methods for enhanced functionality
-    def get_module_weights(self) -> dict:
-        """
-        Dynamically discovers check weights by importing each check module.
-        Override this if you want custom weight calculation logic.
-        """
-        weights = {}
-        try:
-            report_sections = self.get_report_definition()
-            for section in report_sections:
-                module_name = section.get('module')
-                if not module_name:
-                    continue
-
-                try:
-                    # Extract just the module name from full path
-                    if 'plugins.opensearch.checks.' in module_name:
-                        short_name = module_name.split('.')[-1]
-                        spec = importlib.util.find_spec(f"plugins.opensearch.checks.{short_name}")
-                        if spec:
-                            check_module = spec.loader.load_module()
-                            if hasattr(check_module, 'get_weight'):
-                                weights[short_name] = check_module.get_weight()
-                except Exception as e:
-                    print(f"⚠️ Could not load weight for '{module_name}': {e}")
-        except Exception:
-            pass  # Return empty dict if report loading fails
-
-        return weights
-
     def get_db_version_from_findings(self, findings: dict) -> str:
         """
         Extracts the OpenSearch version from the findings.
@@ -27,6 +27,7 @@ class PostgresPlugin(BasePlugin):
         from the 'rules' directory with validation.
         """
         from utils.rule_validator import validate_and_load_rules
+        from utils.rule_compiler import compile_rules
         import logging
 
         logger = logging.getLogger(__name__)
@@ -57,7 +58,8 @@ class PostgresPlugin(BasePlugin):
             except Exception as e:
                 logger.error(f"Unexpected error loading rule file {rule_file.name}: {e}")
 
-        return all_rules
+        # Compile expressions and index keywords once, at load time
+        return compile_rules(all_rules)
 
     def get_template_path(self) -> Path:
         """Returns the path to this plugin's templates directory."""
@@ -85,32 +87,6 @@ class PostgresPlugin(BasePlugin):
         return getattr(report_module, 'REPORT_SECTIONS')
 
 
-    def get_module_weights(self) -> dict:
-        """
-        Dynamically discovers the importance score for each check module by
-        calling the 'get_weight()' function within the module itself.
-        """
-        weights = {}
-        report_sections = self.get_report_definition()
-
-        for section in report_sections:
-            # Safely get the module name, skipping sections that are not modules
-            module_name = section.get('module')
-            if not module_name:
-                continue
-
-            try:
-                spec = importlib.util.find_spec(f"plugins.postgres.checks.{module_name}")
-                if spec:
-                    check_module = spec.loader.load_module()
-                    if hasattr(check_module, 'get_weight'):
-                        weights[module_name] = check_module.get_weight()
-            except Exception as e:
-                print(f"⚠️ Warning: Could not dynamically load weight for module '{module_name}'. Error: {e}")
-        
-        return weights
-
-
     def get_db_version_from_findings(self, findings: dict) -> str:
         """Extracts the PostgreSQL version from the findings."""
         try:
@@ -22,8 +22,10 @@ Use this check to:
 from plugins.common.check_helpers import CheckContentBuilder
 from plugins.common.output_formatters import AsciiDocFormatter
 from plugins.postgres.utils.qrylib.comprehensive_query_analysis import (
-    get_comprehensive_query_analysis_query
+    get_comprehensive_query_analysis
 )
+from plugins.postgres.utils.pg_stat_statements_snapshot import pg_stat_statements_fingerprint
+from plugins.postgres.utils.qrylib.pg_stat_statements import get_pg_stat_statements_snapshot_query
 
 
 def get_weight():
@@ -38,6 +40,11 @@ def get_weight():
     return 7
 
 
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the pg_stat_statements window is unchanged."""
+    return pg_stat_statements_fingerprint(connector)
+
+
 def check_comprehensive_query_analysis(connector, settings):
     """
     Analyzes query resource consumption with comprehensive metrics.
@@ -83,28 +90,20 @@ def check_comprehensive_query_analysis(connector, settings):
     builder.blank()
 
     try:
-        # Get the query
-        query = get_comprehensive_query_analysis_query(connector)
-
         # Optional: Show query if requested
         if settings.get('show_qry') == 'true':
-            builder.text("*Query:*")
+            builder.text("*pg_stat_statements snapshot query:*")
             builder.text("[source,sql]")
             builder.text("----")
-            builder.text(query.replace("%(limit)s", str(settings.get('row_limit', 5))))
+            builder.text(get_pg_stat_statements_snapshot_query(connector))
             builder.text("----")
             builder.blank()
 
-        # Execute query
-        params = {'limit': settings.get('row_limit', 5)}
-        formatted_result, raw_result = connector.execute_query(
-            query,
-            params=params,
-            return_raw=True
-        )
-
-        if "[ERROR]" in formatted_result:
-            builder.error(f"Query execution failed:\n{formatted_result}")
+        # Rank the shared pg_stat_statements snapshot
+        try:
+            snapshot = connector.get_pg_stat_statements_snapshot()
+        except Exception as e:
+            builder.error(f"Query execution failed:\n{e}")
             findings = {
                 'status': 'error',
                 'error_message': 'Query execution failed',
@@ -112,6 +111,8 @@ def check_comprehensive_query_analysis(connector, settings):
             }
             return builder.build(), findings
 
+        raw_result = get_comprehensive_query_analysis(connector, snapshot, settings.get('row_limit', 5))
+
         if not raw_result:
             builder.note(
                 "No query statistics found in `pg_stat_statements`. "
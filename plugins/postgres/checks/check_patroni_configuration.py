@@ -29,6 +29,11 @@ from plugins.postgres.utils.patroni_helpers import (
 logger = logging.getLogger(__name__)
 
 
+def get_dependencies():
+    """Returns the capabilities this module requires and provides."""
+    return {'requires': ['patroni']}
+
+
 # Best practice configuration values
 BEST_PRACTICES = {
     'ttl': {
@@ -41,6 +41,11 @@ from plugins.postgres.utils.patroni_helpers import (
 logger = logging.getLogger(__name__)
 
 
+def get_dependencies():
+    """Returns the capabilities this module requires and provides."""
+    return {'requires': ['patroni']}
+
+
 def check_patroni_dcs_health(connector, settings: Dict) -> Tuple[str, Dict]:
     """
     Check the health of Patroni's DCS backend.
@@ -28,6 +28,11 @@ from plugins.postgres.utils.patroni_helpers import (
 logger = logging.getLogger(__name__)
 
 
+def get_dependencies():
+    """Returns the capabilities this module requires and provides."""
+    return {'requires': ['patroni']}
+
+
 def check_patroni_health_status(connector, settings: Dict) -> Tuple[str, Dict]:
     """
     Check Patroni cluster health status across all nodes.
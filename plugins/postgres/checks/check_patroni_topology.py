@@ -21,6 +21,11 @@ from plugins.common.plantuml_helpers import ClusterTopologyDiagram, embed_diagra
 logger = logging.getLogger(__name__)
 
 
+def get_dependencies():
+    """Returns the capabilities this module requires and provides."""
+    return {'requires': ['patroni']}
+
+
 def check_patroni_topology(connector, settings):
     """
     Discover and analyze Patroni cluster topology.
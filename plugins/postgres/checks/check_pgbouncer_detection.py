@@ -31,6 +31,27 @@ from plugins.postgres.utils.pgbouncer_client import test_pgbouncer_connection
 logger = logging.getLogger(__name__)
 
 
+def get_dependencies():
+    """
+    Returns the capabilities this module requires and provides.
+
+    PgBouncer is provided when detection found it, and also when detection
+    failed with an error: the health check then runs and reports the
+    connection problem rather than being skipped.
+    """
+    return {'provides': ['pgbouncer'], 'provides_if': _pgbouncer_available}
+
+
+def _pgbouncer_available(structured_data: Dict) -> bool:
+    """Whether a detection result should let the PgBouncer health check run."""
+    if not isinstance(structured_data, dict):
+        return False
+    status = structured_data.get('status')
+    if status == 'error':
+        return True
+    return status == 'success' and bool((structured_data.get('data') or {}).get('detected'))
+
+
 def check_pgbouncer_detection(connector, settings: Dict) -> Tuple[str, Dict]:
     """
     Detect PgBouncer in the connection path.
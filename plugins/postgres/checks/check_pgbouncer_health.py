@@ -34,6 +34,16 @@ from plugins.postgres.utils.pgbouncer_client import PgBouncerClient
 logger = logging.getLogger(__name__)
 
 
+def get_dependencies():
+    """
+    Returns the capabilities this module requires and provides.
+
+    Runs after every other module so the fallback statistics include all
+    queries that were retried through the direct connection.
+    """
+    return {'requires': ['pgbouncer'], 'after': ['*']}
+
+
 def check_pgbouncer_health(connector, settings: Dict) -> Tuple[str, Dict]:
     """
     Monitor PgBouncer health and performance.
@@ -16,10 +16,12 @@ Weight: 8 (High value for optimization planning)
 import re
 from plugins.common.check_helpers import CheckContentBuilder
 from plugins.postgres.utils.qrylib.query_optimization_opportunities import (
-    get_user_resource_aggregation_query,
-    get_query_with_seqscan_correlation_query,
-    get_tables_with_high_seqscans_query
+    get_user_resource_aggregation,
+    get_query_details,
+    get_tables_with_high_seqscans_query,
+    get_table_activity_fingerprint_query
 )
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows, pg_stat_statements_fingerprint
 
 
 def get_weight():
@@ -34,6 +36,20 @@ def get_weight():
     return 8
 
 
+def get_fingerprint(connector, settings):
+    """
+    Incremental mode reuses the previous result while the pg_stat_statements
+    window is unchanged and the user tables saw no writes or (auto)analyze.
+    """
+    statements = pg_stat_statements_fingerprint(connector)
+    if statements is None:
+        return None
+    formatted, tables = connector.execute_query(get_table_activity_fingerprint_query(), return_raw=True)
+    if "[ERROR]" in formatted:
+        raise RuntimeError(f"pg_stat_user_tables fingerprint query failed: {tables.get('error', formatted)}")
+    return {'pg_stat_statements': statements, 'pg_stat_user_tables': tables}
+
+
 def _extract_table_names(query_text):
     """
     Extract table names from SQL query text.
@@ -296,21 +312,16 @@ def check_query_optimization_opportunities(connector, settings):
         )
         builder.blank()
 
-        user_agg_query = get_user_resource_aggregation_query(connector)
+        # Sections 1 and 3 rank the shared pg_stat_statements snapshot
+        snapshot = connector.get_pg_stat_statements_snapshot()
         params = {'limit': settings.get('row_limit', 10)}
 
-        user_agg_formatted, user_agg_raw = connector.execute_query(
-            user_agg_query,
-            params=params,
-            return_raw=True
-        )
+        user_agg_raw = get_user_resource_aggregation(snapshot, params['limit'])
 
-        if "[ERROR]" in user_agg_formatted:
-            builder.error(f"User aggregation query failed:\n{user_agg_formatted}")
-        elif not user_agg_raw:
+        if not user_agg_raw:
             builder.note("No users found consuming >1% of cluster CPU.")
         else:
-            builder.text(user_agg_formatted)
+            builder.text(format_rows(user_agg_raw))
             findings_data['user_aggregation'] = user_agg_raw
             builder.blank()
 
@@ -358,22 +369,13 @@ def check_query_optimization_opportunities(connector, settings):
         )
         builder.blank()
 
-        query_detail_query = get_query_with_seqscan_correlation_query(connector)
-        detail_params = {
-            'min_cpu_percent': settings.get('optimization_min_cpu_percent', 2.0),
-            'limit': settings.get('row_limit', 10)
-        }
-
-        query_detail_formatted, query_detail_raw = connector.execute_query(
-            query_detail_query,
-            params=detail_params,
-            return_raw=True
+        query_detail_raw = get_query_details(
+            snapshot,
+            min_cpu_percent=settings.get('optimization_min_cpu_percent', 2.0),
+            limit=settings.get('row_limit', 10)
         )
 
-        if "[ERROR]" in query_detail_formatted:
-            builder.error(f"Query detail analysis failed:\n{query_detail_formatted}")
-            findings_data['query_details'] = []
-        elif not query_detail_raw:
+        if not query_detail_raw:
             builder.note("No queries found consuming >2% of cluster CPU.")
             findings_data['query_details'] = []
         else:
@@ -2,7 +2,7 @@ from plugins.postgres.utils.qrylib.cpu_intensive_queries import (
     get_aurora_replica_status_query,
     get_active_connections_query
 )
-from plugins.postgres.utils.qrylib.pg_stat_statements import get_pg_stat_statements_query
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows
 
 def get_weight():
     """Returns the importance score for this module."""
@@ -36,19 +36,12 @@ def run_cpu_intensive_queries(connector, settings):
     if settings.get('has_pgstat'):
         try:
             adoc_content.append("\n==== Top Queries by Total Execution Time")
-            # Get base query from the pg_stat_statements qrylib
-            query = get_pg_stat_statements_query(connector, query_type='standard')
-            # Append the LIMIT clause
-            query += " LIMIT %(limit)s;"
-            params = {'limit': settings.get('row_limit', 10)}
-            
-            formatted, raw = connector.execute_query(query, params=params, return_raw=True)
+            # Rank the shared pg_stat_statements snapshot
+            snapshot = connector.get_pg_stat_statements_snapshot()
+            raw = snapshot.rank_standard('total_time', settings.get('row_limit', 10))
 
-            if "[ERROR]" in formatted:
-                adoc_content.append(formatted)
-            else:
-                adoc_content.append("[IMPORTANT]\n====\nQueries with high `total_exec_time` (or `total_time`) are the primary contributors to CPU load. Focus optimization efforts here first.\n====\n")
-                adoc_content.append(formatted)
+            adoc_content.append("[IMPORTANT]\n====\nQueries with high `total_exec_time` (or `total_time`) are the primary contributors to CPU load. Focus optimization efforts here first.\n====\n")
+            adoc_content.append(format_rows(raw))
             structured_data["top_queries_by_time"] = {"status": "success", "data": raw}
         except Exception as e:
             adoc_content.append(f"\n[ERROR]\n====\nCould not analyze pg_stat_statements: {e}\n====\n")
@@ -1,28 +1,30 @@
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows, pg_stat_statements_fingerprint
 from plugins.postgres.utils.qrylib.deep_query_analysis import (
-    get_queries_by_total_time_query,
-    get_queries_by_mean_time_query,
-    get_queries_by_calls_query,
-    get_hot_queries_query,
-    get_write_intensive_queries_query
+    get_queries_by_total_time,
+    get_queries_by_mean_time,
+    get_queries_by_calls,
+    get_hot_queries,
+    get_write_intensive_queries
 )
 
 def get_weight():
     """Returns the importance score for this module."""
     return 3
 
-def _run_sub_check(connector, adoc_content, structured_data, check_name, query_func, params):
-    """Helper to run a sub-check and append its content."""
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the pg_stat_statements window is unchanged."""
+    return pg_stat_statements_fingerprint(connector)
+
+def _run_sub_check(connector, snapshot, adoc_content, structured_data, check_name, rank_func, limit):
+    """Helper to rank one view of the snapshot and append its content."""
     try:
-        query = query_func(connector) + " LIMIT %(limit)s;"
-        formatted, raw = connector.execute_query(query, params=params, return_raw=True)
-        
-        if "[ERROR]" in formatted:
-            adoc_content.append(formatted)
-        elif not raw:
+        raw = rank_func(connector, snapshot, limit)
+
+        if not raw:
             adoc_content.append("[NOTE]\n====\nNo query data available for this view.\n====\n")
         else:
-            adoc_content.append(formatted)
-        
+            adoc_content.append(format_rows(raw))
+
         structured_data[check_name] = raw
     except Exception as e:
         adoc_content.append(f"\n[ERROR]\n====\nCould not perform analysis for {check_name}: {e}\n====\n")
@@ -38,20 +40,27 @@ def run_deep_query_analysis(connector, settings):
         adoc_content.append("[NOTE]\n====\n`pg_stat_statements` extension is not enabled. Analysis cannot be performed.\n====\n")
         return "\n".join(adoc_content), structured_data
     
-    params = {'limit': settings.get('row_limit', 10)}
-    
+    # All views rank the same pg_stat_statements snapshot
+    try:
+        snapshot = connector.get_pg_stat_statements_snapshot()
+    except Exception as e:
+        adoc_content.append(f"[ERROR]\n====\nCould not read pg_stat_statements: {e}\n====\n")
+        return "\n".join(adoc_content), structured_data
+
+    limit = settings.get('row_limit', 10)
+
     # Define all the sub-checks we want to run
     sub_checks = {
-        "queries_by_total_time": ("Top Queries by Total Execution Time", get_queries_by_total_time_query, "Queries with high `total_time` contribute most to overall system load."),
-        "queries_by_mean_time": ("Top Queries by Mean Execution Time", get_queries_by_mean_time_query, "Queries with high `mean_time` are your slowest individual operations and can impact latency."),
-        "queries_by_calls": ("Top Queries by Call Count", get_queries_by_calls_query, "Frequently called queries are central to your application's workload."),
-        "hot_queries": ("'Hot' Queries (by Buffer Hits)", get_hot_queries_query, "High `shared_blks_hit` indicates data is frequently read from cache, representing your application's hot data paths."),
-        "write_intensive_queries": ("Top Write-Intensive Queries", get_write_intensive_queries_query, "These queries generate the most write activity (WAL or disk writes), impacting I/O performance.")
+        "queries_by_total_time": ("Top Queries by Total Execution Time", get_queries_by_total_time, "Queries with high `total_time` contribute most to overall system load."),
+        "queries_by_mean_time": ("Top Queries by Mean Execution Time", get_queries_by_mean_time, "Queries with high `mean_time` are your slowest individual operations and can impact latency."),
+        "queries_by_calls": ("Top Queries by Call Count", get_queries_by_calls, "Frequently called queries are central to your application's workload."),
+        "hot_queries": ("'Hot' Queries (by Buffer Hits)", get_hot_queries, "High `shared_blks_hit` indicates data is frequently read from cache, representing your application's hot data paths."),
+        "write_intensive_queries": ("Top Write-Intensive Queries", get_write_intensive_queries, "These queries generate the most write activity (WAL or disk writes), impacting I/O performance.")
     }
 
-    for key, (title, query_func, tip) in sub_checks.items():
+    for key, (title, rank_func, tip) in sub_checks.items():
         adoc_content.append(f"\n==== {title}")
-        _run_sub_check(connector, adoc_content, structured_data, key, query_func, params)
+        _run_sub_check(connector, snapshot, adoc_content, structured_data, key, rank_func, limit)
         adoc_content.append(f"\n[TIP]\n====\n{tip}\n====\n")
 
     return "\n".join(adoc_content), structured_data
@@ -1,10 +1,16 @@
-from plugins.postgres.utils.qrylib.hot_queries import get_hot_queries_query
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows, pg_stat_statements_fingerprint
+from plugins.postgres.utils.qrylib.hot_queries import get_hot_queries
+from plugins.postgres.utils.qrylib.pg_stat_statements import get_pg_stat_statements_snapshot_query
 
 def get_weight():
     """Returns the importance score for this module."""
     # Performance tuning is an important activity.
     return 6
 
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the pg_stat_statements window is unchanged."""
+    return pg_stat_statements_fingerprint(connector)
+
 def run_hot_queries(connector, settings):
     """
     Identifies "hot" queries based on their high number of shared buffer hits,
@@ -26,19 +32,15 @@ def run_hot_queries(connector, settings):
             structured_data["hot_queries"] = {"status": "skipped", "reason": "Unsupported PostgreSQL version."}
             return "\n".join(adoc_content), structured_data
 
-        query = get_hot_queries_query(connector)
-        params = {'limit': settings.get('row_limit', 10)}
-        
         if settings.get('show_qry') == 'true':
-            adoc_content.append("Hot queries query:")
-            adoc_content.append(f"[,sql]\n----\n{query % params}\n----")
+            adoc_content.append("pg_stat_statements snapshot query (ranked by shared_blks_hit):")
+            adoc_content.append(f"[,sql]\n----\n{get_pg_stat_statements_snapshot_query(connector)}\n----")
 
-        formatted_result, raw_result = connector.execute_query(query, params=params, return_raw=True)
-        
-        if "[ERROR]" in formatted_result:
-            adoc_content.append(formatted_result)
-            structured_data["hot_queries"] = {"status": "error", "details": raw_result}
-        elif not raw_result:
+        snapshot = connector.get_pg_stat_statements_snapshot()
+        raw_result = get_hot_queries(connector, snapshot, settings.get('row_limit', 10))
+        formatted_result = format_rows(raw_result)
+
+        if not raw_result:
             adoc_content.append("[NOTE]\n====\nNo significant hot queries found in `pg_stat_statements`.\n====\n")
             structured_data["hot_queries"] = {"status": "success", "data": []}
         else:
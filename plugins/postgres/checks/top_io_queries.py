@@ -1,11 +1,16 @@
 # plugins/postgres/checks/top_io_queries.py
 
-from plugins.postgres.utils.qrylib.top_io_queries import get_top_io_queries_query
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows, pg_stat_statements_fingerprint
+from plugins.postgres.utils.qrylib.top_io_queries import get_top_io_queries
 
 def get_weight():
     """Return the base importance of the check."""
     return 7 # High I/O is a significant performance issue.
 
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the pg_stat_statements window is unchanged."""
+    return pg_stat_statements_fingerprint(connector)
+
 def run_top_io_queries(connector, settings):
     """
     Identifies queries consuming the most I/O time.
@@ -19,15 +24,19 @@ def run_top_io_queries(connector, settings):
         structured_data["top_io_queries"] = {"status": "skipped", "data": []}
         return "\n".join(adoc_content), structured_data
     
-    query = get_top_io_queries_query(connector)
-    params = (settings.get('row_limit', 10),)
-    formatted, raw = connector.execute_query(query, params=params, return_raw=True)
-    
+    try:
+        snapshot = connector.get_pg_stat_statements_snapshot()
+    except Exception as e:
+        adoc_content.append(f"[ERROR]\n====\nQuery failed: {e}\n====\n")
+        structured_data["top_io_queries"] = {"error": str(e)}
+        return "\n".join(adoc_content), structured_data
+
+    raw = get_top_io_queries(snapshot, settings.get('row_limit', 10))
+    formatted = format_rows(raw)
+
     structured_data["top_io_queries"] = raw
 
-    if "[ERROR]" in formatted:
-        adoc_content.append(formatted)
-    elif not raw:
+    if not raw:
         adoc_content.append("[NOTE]\n====\nNo I/O intensive queries were found in pg_stat_statements.\n====\n")
     else:
         adoc_content.append("[IMPORTANT]\n====\nThe following queries spend the most time on I/O operations. Consider optimizing these queries or improving the underlying storage performance.\n====\n")
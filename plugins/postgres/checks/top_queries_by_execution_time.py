@@ -1,9 +1,14 @@
-from plugins.postgres.utils.qrylib.pg_stat_statements import get_pg_stat_statements_query
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows, pg_stat_statements_fingerprint
+from plugins.postgres.utils.qrylib.pg_stat_statements import get_pg_stat_statements_snapshot_query
 
 def get_weight():
     """Returns the importance score for this module."""
     return 3
 
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the pg_stat_statements window is unchanged."""
+    return pg_stat_statements_fingerprint(connector)
+
 def run_top_queries_by_execution_time(connector, settings):
     """
     Identifies the most resource-intensive queries based on their total cumulative execution time.
@@ -18,26 +23,17 @@ def run_top_queries_by_execution_time(connector, settings):
             structured_data["top_queries"] = {"status": "not_applicable", "reason": "pg_stat_statements not enabled."}
             return "\n".join(adoc_content), structured_data
         
-        # MODIFIED: Removed the explicit version check. The query library already handles this.
-        
-        # Pass the entire connector to the utility function
-        top_queries_query = get_pg_stat_statements_query(connector, 'standard') + " LIMIT %(limit)s;"
-
+        # The shared snapshot handles the version-specific column names.
         if settings.get('show_qry') == 'true':
-            adoc_content.append("Top queries by execution time query:")
+            adoc_content.append("pg_stat_statements snapshot query (ranked by total_time):")
             adoc_content.append("[,sql]\n----")
-            adoc_content.append(top_queries_query % {'limit': settings.get('row_limit', 10)})
+            adoc_content.append(get_pg_stat_statements_snapshot_query(connector))
             adoc_content.append("----")
 
-        params_for_query = {'limit': settings.get('row_limit', 10)}
-        formatted_result, raw_result = connector.execute_query(top_queries_query, params=params_for_query, return_raw=True)
-        
-        if "[ERROR]" in formatted_result:
-            adoc_content.append(f"Top Queries by Execution Time\n{formatted_result}")
-            structured_data["top_queries"] = {"status": "error", "details": raw_result}
-        else:
-            adoc_content.append(formatted_result)
-            structured_data["top_queries"] = {"status": "success", "data": raw_result}
+        snapshot = connector.get_pg_stat_statements_snapshot()
+        raw_result = snapshot.rank_standard('total_time', settings.get('row_limit', 10))
+        adoc_content.append(format_rows(raw_result))
+        structured_data["top_queries"] = {"status": "success", "data": raw_result}
     
     except Exception as e:
         error_msg = f"Failed during top queries analysis: {e}"
@@ -1,9 +1,13 @@
-from plugins.postgres.utils.qrylib.pg_stat_statements import get_pg_stat_statements_query
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows, pg_stat_statements_fingerprint
 
 def get_weight():
     """Returns the importance score for this module."""
     return 3
 
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the pg_stat_statements window is unchanged."""
+    return pg_stat_statements_fingerprint(connector)
+
 def run_top_queries_by_mean_time(connector, settings):
     """
     Identifies the slowest individual queries based on their mean (average) execution time.
@@ -16,18 +20,11 @@ def run_top_queries_by_mean_time(connector, settings):
             adoc_content.append("[NOTE]\n====\n`pg_stat_statements` extension is not enabled. Analysis cannot be performed.\n====\n")
             return "\n".join(adoc_content), {}
         
-        # Call the qrylib function telling it to order by mean time
-        query = get_pg_stat_statements_query(connector, 'standard', order_by='mean_time') + " LIMIT %(limit)s;"
-
-        params = {'limit': settings.get('row_limit', 10)}
-        formatted, raw = connector.execute_query(query, params=params, return_raw=True)
-        
-        if "[ERROR]" in formatted:
-            adoc_content.append(formatted)
-            structured_data["top_queries_by_mean_time"] = {"status": "error", "details": raw}
-        else:
-            adoc_content.append(formatted)
-            structured_data["top_queries_by_mean_time"] = {"status": "success", "data": raw}
+        # Rank the shared snapshot by mean time
+        snapshot = connector.get_pg_stat_statements_snapshot()
+        raw = snapshot.rank_standard('mean_time', settings.get('row_limit', 10))
+        adoc_content.append(format_rows(raw))
+        structured_data["top_queries_by_mean_time"] = {"status": "success", "data": raw}
     
     except Exception as e:
         adoc_content.append(f"[ERROR]\n====\nFailed during mean time query analysis: {e}\n====\n")
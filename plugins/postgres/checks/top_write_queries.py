@@ -1,9 +1,14 @@
-from plugins.postgres.utils.qrylib.top_write_queries import get_top_write_queries_query
+from plugins.postgres.utils.pg_stat_statements_snapshot import format_rows, pg_stat_statements_fingerprint
+from plugins.postgres.utils.qrylib.top_write_queries import get_top_write_queries
 
 def get_weight():
     """Returns the importance score for this module."""
     return 5 # Symtom, not disease
 
+def get_fingerprint(connector, settings):
+    """Incremental mode reuses the previous result while the pg_stat_statements window is unchanged."""
+    return pg_stat_statements_fingerprint(connector)
+
 def run_top_write_queries(connector, settings):
     """
     Identifies top write-intensive queries from pg_stat_statements, adapting to PostgreSQL versions.
@@ -17,14 +22,11 @@ def run_top_write_queries(connector, settings):
             structured_data["top_write_queries"] = {"status": "not_applicable", "reason": "pg_stat_statements not enabled."}
             return "\n".join(adoc_content), structured_data
 
-        query = get_top_write_queries_query(connector)
-        params = {'limit': settings.get('row_limit', 10)}
-        formatted, raw = connector.execute_query(query, params=params, return_raw=True)
+        snapshot = connector.get_pg_stat_statements_snapshot()
+        raw = get_top_write_queries(connector, snapshot, settings.get('row_limit', 10))
+        formatted = format_rows(raw)
 
-        if "[ERROR]" in formatted:
-            adoc_content.append(formatted)
-            structured_data["top_write_queries"] = {"status": "error", "data": raw}
-        elif not raw:
+        if not raw:
             adoc_content.append("[NOTE]\n====\nNo significant write-intensive queries found in `pg_stat_statements`.\n====\n")
             structured_data["top_write_queries"] = {"status": "success", "data": []}
         else:
@@ -1,12 +1,16 @@
+import copy
 import psycopg2
 import subprocess
 import logging
 import re
+import threading
 from datetime import datetime
 from plugins.base import BasePlugin
 from plugins.common.ssh_mixin import SSHSupportMixin
 from plugins.common.cve_mixin import CVECheckMixin
 from plugins.common.output_formatters import AsciiDocFormatter
+from plugins.postgres.utils.pg_stat_statements_snapshot import PgStatStatementsSnapshot
+from plugins.postgres.utils.typecasters import register_fast_typecasters
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,11 @@ class PostgresConnector(SSHSupportMixin, CVECheckMixin):
         self.has_pgstat_legacy_io_time = False
         self.has_pgstat_new_io_time = False
 
+        # Per-run pg_stat_statements snapshot. The holder dict and lock are shared
+        # (not copied) with worker connectors, so parallel checks fetch it once.
+        self._pgstat_snapshot_holder = {}
+        self._pgstat_snapshot_lock = threading.Lock()
+
         # Direct connection (bypasses proxies for Patroni/cluster checks)
         self.patroni_direct_conn = None
         self.patroni_direct_cursor = None
@@ -79,42 +88,7 @@ class PostgresConnector(SSHSupportMixin, CVECheckMixin):
         """
         try:
             # 1. Connect to primary database
-            timeout = self.settings.get('statement_timeout', 30000)
-
-            # Check if connecting via PgBouncer (doesn't support options parameter)
-            is_pgbouncer = bool(self.settings.get('pgbouncer_host'))
-
-            if is_pgbouncer:
-                # PgBouncer doesn't support startup parameters in options
-                # Explicitly pass empty options to override PGOPTIONS environment variable
-                self.conn = psycopg2.connect(
-                    host=self.settings['host'],
-                    port=self.settings['port'],
-                    dbname=self.settings['database'],
-                    user=self.settings['user'],
-                    password=self.settings['password'],
-                    options=""  # Override PGOPTIONS env var
-                )
-            else:
-                # Direct PostgreSQL connection - can use options
-                self.conn = psycopg2.connect(
-                    host=self.settings['host'],
-                    port=self.settings['port'],
-                    dbname=self.settings['database'],
-                    user=self.settings['user'],
-                    password=self.settings['password'],
-                    options=f"-c statement_timeout={timeout}"
-                )
-
-            self.conn.autocommit = self.settings.get('autocommit', True)
-            self.cursor = self.conn.cursor()
-
-            # Set statement timeout after connection for PgBouncer
-            if is_pgbouncer and timeout:
-                try:
-                    self.cursor.execute(f"SET statement_timeout = {timeout}")
-                except Exception as e:
-                    logger.debug(f"Could not set statement_timeout via SET command: {e}")
+            self.conn, self.cursor = self._open_primary_connection()
 
             # 2. Get version info
             self.version_info = self._get_version_info()
@@ -152,6 +126,92 @@ class PostgresConnector(SSHSupportMixin, CVECheckMixin):
             print(f"❌ Error connecting to PostgreSQL: {e}")
             raise
 
+    def _open_primary_connection(self):
+        """
+        Open a new connection to the primary database using the configured settings.
+
+        Shared by connect(), _reconnect_primary() and create_worker_connector()
+        so every primary connection gets the same PgBouncer handling and
+        statement timeout.
+
+        Returns:
+            tuple: (connection, cursor)
+        """
+        timeout = self.settings.get('statement_timeout', 30000)
+
+        # Check if connecting via PgBouncer (doesn't support options parameter)
+        is_pgbouncer = bool(self.settings.get('pgbouncer_host'))
+
+        if is_pgbouncer:
+            # PgBouncer doesn't support startup parameters in options
+            # Explicitly pass empty options to override PGOPTIONS environment variable
+            conn = psycopg2.connect(
+                host=self.settings['host'],
+                port=self.settings['port'],
+                dbname=self.settings['database'],
+                user=self.settings['user'],
+                password=self.settings['password'],
+                options=""  # Override PGOPTIONS env var
+            )
+        else:
+            # Direct PostgreSQL connection - can use options
+            conn = psycopg2.connect(
+                host=self.settings['host'],
+                port=self.settings['port'],
+                dbname=self.settings['database'],
+                user=self.settings['user'],
+                password=self.settings['password'],
+                options=f"-c statement_timeout={timeout}"
+            )
+
+        conn.autocommit = self.settings.get('autocommit', True)
+        if self.settings.get('fast_numeric_typecast', False):
+            # Opt-in: NUMERIC arrives as int/float instead of Decimal (see utils/typecasters.py)
+            register_fast_typecasters(conn)
+        cursor = conn.cursor()
+
+        # Set statement timeout after connection for PgBouncer
+        if is_pgbouncer and timeout:
+            try:
+                cursor.execute(f"SET statement_timeout = {timeout}")
+            except Exception as e:
+                logger.debug(f"Could not set statement_timeout via SET command: {e}")
+
+        return conn, cursor
+
+    def create_worker_connector(self):
+        """
+        Create a connector for a parallel check worker.
+
+        The worker shares everything detected during connect() (version info,
+        environment, topology, SSH and AWS clients) but owns its own primary
+        connection and cursor, so checks can run concurrently without sharing
+        a psycopg2 cursor. Patroni checks get a private cursor on the shared
+        direct connection.
+
+        Returns:
+            PostgresConnector: A worker connector. Release it with
+            close_worker_connector(), never disconnect().
+        """
+        worker = copy.copy(self)
+        worker.conn, worker.cursor = self._open_primary_connection()
+        if self.has_direct_connection and self.patroni_direct_conn:
+            worker.patroni_direct_cursor = self.patroni_direct_conn.cursor()
+        return worker
+
+    def close_worker_connector(self):
+        """
+        Close the connection owned by a worker from create_worker_connector().
+
+        Shared resources (replica and Patroni connections, SSH sessions) stay
+        open; they are closed by disconnect() on the parent connector.
+        """
+        if self.conn:
+            try:
+                self.conn.close()
+            except Exception as e:
+                logger.debug(f"Error closing worker connection: {e}")
+
     def _connect_patroni_direct(self):
         """
         Establish direct connection to Patroni, bypassing proxies.
@@ -909,6 +969,37 @@ class PostgresConnector(SSHSupportMixin, CVECheckMixin):
 
         return endpoints
 
+    def get_capabilities(self):
+        """
+        Report the capabilities detected during connect().
+
+        Check modules list these names in the 'requires' entry of their
+        get_dependencies() declaration; ReportBuilder skips modules whose
+        requirements are not met.
+
+        Returns:
+            set: Capability names, e.g. {'patroni', 'pg_stat_statements', 'ssh'}
+        """
+        capabilities = set()
+        if self.environment:
+            capabilities.add(self.environment)  # 'aurora', 'rds', 'patroni', 'bare_metal', ...
+        if self._cloudwatch_client or self._rds_client:
+            capabilities.add('aws')
+        if self.has_pgstat:
+            capabilities.add('pg_stat_statements')
+        if self.has_direct_connection:
+            capabilities.add('patroni_direct')
+        if self.replica_conns:
+            capabilities.add('replicas')
+        if (self.settings.get('pgbouncer_host') or self.settings.get('pgbouncer_admin_user')
+                or self.settings.get('pgbouncer_port')):
+            capabilities.add('pgbouncer')  # Explicitly configured (as in skip_if_not_pgbouncer); detection may also provide it
+        if self.has_ssh_support():
+            capabilities.add('ssh')
+        if self.has_cve_support():
+            capabilities.add('cve')
+        return capabilities
+
     def get_patroni_connection(self):
         """
         Get the appropriate connection for Patroni checks.
@@ -971,39 +1062,7 @@ class PostgresConnector(SSHSupportMixin, CVECheckMixin):
                     pass
 
             # Reconnect using same logic as initial connection
-            timeout = self.settings.get('statement_timeout', 30000)
-            is_pgbouncer = bool(self.settings.get('pgbouncer_host'))
-
-            if is_pgbouncer:
-                # PgBouncer doesn't support startup parameters in options
-                self.conn = psycopg2.connect(
-                    host=self.settings['host'],
-                    port=self.settings['port'],
-                    dbname=self.settings['database'],
-                    user=self.settings['user'],
-                    password=self.settings['password'],
-                    options=""  # Override PGOPTIONS env var
-                )
-            else:
-                # Direct PostgreSQL connection - can use options
-                self.conn = psycopg2.connect(
-                    host=self.settings['host'],
-                    port=self.settings['port'],
-                    dbname=self.settings['database'],
-                    user=self.settings['user'],
-                    password=self.settings['password'],
-                    options=f"-c statement_timeout={timeout}"
-                )
-
-            self.conn.autocommit = self.settings.get('autocommit', True)
-            self.cursor = self.conn.cursor()
-
-            # Set statement timeout after connection for PgBouncer
-            if is_pgbouncer and timeout:
-                try:
-                    self.cursor.execute(f"SET statement_timeout = {timeout}")
-                except Exception as e:
-                    logger.debug(f"Could not set statement_timeout via SET command: {e}")
+            self.conn, self.cursor = self._open_primary_connection()
 
             logger.info(f"Primary connection successfully reconnected (attempt #{self.reconnection_count})")
 
@@ -1077,6 +1136,30 @@ class PostgresConnector(SSHSupportMixin, CVECheckMixin):
             self.has_pgstat_legacy_io_time = False
             self.has_pgstat_new_io_time = False
 
+    def get_pg_stat_statements_snapshot(self):
+        """
+        Return this run's pg_stat_statements snapshot, fetching it on first use.
+
+        Query checks rank and filter the snapshot locally rather than each
+        scanning pg_stat_statements. A failed fetch is not cached, so the next
+        caller retries.
+
+        Returns:
+            PgStatStatementsSnapshot: The shared snapshot.
+
+        Raises:
+            RuntimeError: If pg_stat_statements is not enabled or the fetch fails.
+        """
+        if not self.has_pgstat:
+            raise RuntimeError("pg_stat_statements extension is not enabled")
+
+        with self._pgstat_snapshot_lock:
+            snapshot = self._pgstat_snapshot_holder.get('snapshot')
+            if snapshot is None:
+                snapshot = PgStatStatementsSnapshot.fetch(self)
+                self._pgstat_snapshot_holder['snapshot'] = snapshot
+            return snapshot
+
     def get_db_metadata(self):
         """
         Fetches cluster-level metadata including environment information.
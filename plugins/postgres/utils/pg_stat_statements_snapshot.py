@@ -0,0 +1,218 @@
+"""
+pg_stat_statements Snapshot
+
+A per-run, in-memory copy of pg_stat_statements. The connector fetches it
+once (see PostgresConnector.get_pg_stat_statements_snapshot()) and every
+query check ranks and filters it locally, instead of each check running its
+own ORDER BY ... LIMIT scan with its own regexp_replace over the query text.
+"""
+
+import heapq
+import logging
+import re
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from plugins.postgres.utils.qrylib.pg_stat_statements import (
+    get_pg_stat_statements_fingerprint_query,
+    get_pg_stat_statements_snapshot_query,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statement columns kept in the snapshot, aliased by the snapshot query so
+# they are the same on every PostgreSQL version (total_time is
+# total_exec_time on PG14+, wal_bytes is None before PG13, io_time is 0
+# when I/O timing columns are unavailable). query is the raw statement text.
+StatementRow = namedtuple('StatementRow', [
+    'queryid', 'username', 'query', 'calls', 'total_time', 'mean_time', 'rows',
+    'shared_blks_hit', 'shared_blks_read', 'shared_blks_written',
+    'local_blks_written', 'temp_blks_written', 'wal_bytes', 'io_time'
+])
+
+# Length the short query text is trimmed to in ranked tables
+SHORT_QUERY_LENGTH = 120
+
+ColumnSpec = Union[str, tuple]
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalized_query(row: StatementRow) -> Optional[str]:
+    """Query text with whitespace runs collapsed, like regexp_replace(query, '\\s+', ' ', 'g')."""
+    return None if row.query is None else _WHITESPACE.sub(' ', row.query)
+
+
+def short_query(row: StatementRow) -> Optional[str]:
+    """Whitespace-normalized query text trimmed for table display."""
+    query = normalized_query(row)
+    return None if query is None else query[:SHORT_QUERY_LENGTH]
+
+
+# Columns of the standard top-queries view (see rank_standard())
+STANDARD_COLUMNS = (('query', short_query), 'calls', 'total_time', 'mean_time', 'rows')
+
+
+def cpu_time(row: StatementRow) -> float:
+    """Estimated CPU time in ms: execution time minus I/O wait."""
+    return (row.total_time or 0) - (row.io_time or 0)
+
+
+def percent(numerator, denominator) -> Optional[float]:
+    """numerator / denominator * 100 rounded to 2 places, None when undefined (like NULLIF)."""
+    if numerator is None or not denominator:
+        return None
+    return round(float(numerator) / float(denominator) * 100, 2)
+
+
+def round2(value) -> Optional[float]:
+    """Round to 2 decimal places, passing None through."""
+    return None if value is None else round(float(value), 2)
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    """
+    Format ranked rows as an AsciiDoc table.
+
+    Produces the same table (or "No results" note) as
+    PostgresConnector.execute_query(), so report output does not change
+    when a check moves from SQL to the snapshot.
+    """
+    if not rows:
+        return "[NOTE]\n====\nNo results returned.\n====\n"
+
+    columns = list(rows[0].keys())
+    table = ['|===', '|' + '|'.join(columns)]
+    for row in rows:
+        sanitized_row = [str(row[col]).replace('|', '\\|') if row[col] is not None else '' for col in columns]
+        table.append('|' + '|'.join(sanitized_row))
+    table.append('|===')
+    return '\n'.join(table)
+
+
+class PgStatStatementsSnapshot:
+    """
+    Compact in-memory table of pg_stat_statements for a single run.
+
+    Rows are StatementRow tuples. Checks use rank() to get the equivalent of
+    SELECT <columns> ... WHERE <where> ORDER BY <order_by> DESC LIMIT <limit>.
+    """
+
+    def __init__(self, rows: Iterable[StatementRow], stats_start_time=None, hours_since_reset=None):
+        self.rows = list(rows)
+        self.stats_start_time = stats_start_time
+        # None when stats were reset this instant, mirroring NULLIF(..., 0)
+        self.hours_since_reset = hours_since_reset or None
+
+    @classmethod
+    def fetch(cls, connector) -> 'PgStatStatementsSnapshot':
+        """
+        Capture pg_stat_statements through the connector in one round trip.
+
+        Raises:
+            RuntimeError: If the snapshot query fails.
+        """
+        query = get_pg_stat_statements_snapshot_query(connector)
+        formatted, raw = connector.execute_query(query, return_raw=True)
+        if "[ERROR]" in formatted:
+            raise RuntimeError(f"pg_stat_statements snapshot query failed: {raw.get('error', formatted)}")
+
+        stats_start_time = raw[0]['stats_start_time'] if raw else None
+        hours_since_reset = raw[0]['hours_since_reset'] if raw else None
+        rows = (StatementRow(*(record[field] for field in StatementRow._fields)) for record in raw)
+        snapshot = cls(rows, stats_start_time, hours_since_reset)
+        logger.debug(f"Captured pg_stat_statements snapshot with {len(snapshot.rows)} statements")
+        return snapshot
+
+    def __len__(self):
+        return len(self.rows)
+
+    def filter(self, where: Optional[Callable[[StatementRow], bool]] = None) -> List[StatementRow]:
+        """Rows matching a predicate (all rows when where is None)."""
+        return self.rows if where is None else [row for row in self.rows if where(row)]
+
+    def total(self, value: Callable[[StatementRow], Any]) -> float:
+        """Sum a per-row value over every statement in the snapshot."""
+        return sum(value(row) or 0 for row in self.rows)
+
+    def top(self, order_by: Union[str, Sequence[str], Callable], limit: int,
+            where: Optional[Callable[[StatementRow], bool]] = None) -> List[StatementRow]:
+        """
+        The `limit` largest rows, like ORDER BY ... DESC LIMIT.
+
+        Args:
+            order_by: A column name, a sequence of column names (tie-breakers
+                follow the first), or a callable returning the sort key.
+                None values of named columns rank first, as NULLs do in
+                ORDER BY ... DESC.
+            limit: Maximum number of rows to return.
+            where: Optional row predicate applied before ranking.
+        """
+        if callable(order_by):
+            key = order_by
+        else:
+            fields = [order_by] if isinstance(order_by, str) else list(order_by)
+            key = lambda row: tuple(_desc_nulls_first(getattr(row, field)) for field in fields)
+        return heapq.nlargest(int(limit), self.filter(where), key=key)
+
+    def rank(self, columns: Sequence[ColumnSpec], order_by, limit: int,
+             where: Optional[Callable[[StatementRow], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        Rank the snapshot and project the top rows into result dicts.
+
+        Args:
+            columns: Output columns. A plain name copies that StatementRow
+                field; an (alias, source) pair renames a field or, when
+                source is callable, computes the value from the row.
+            order_by, limit, where: As for top().
+
+        Returns:
+            list: Row dicts in the same shape execute_query(return_raw=True) returns.
+        """
+        return project(self.top(order_by, limit, where), columns)
+
+    def rank_standard(self, order_by: str = 'total_time', limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        The standard top-queries view: query, calls, total_time, mean_time, rows.
+
+        Local equivalent of get_pg_stat_statements_query(connector, 'standard')
+        with a LIMIT, shared by the top-queries and deep analysis checks.
+
+        Args:
+            order_by: Any StatementRow column, e.g. 'total_time', 'mean_time' or 'calls'.
+            limit: Maximum number of rows to return.
+        """
+        return self.rank(STANDARD_COLUMNS, order_by, limit, where=lambda row: row.calls > 0)
+
+
+def _desc_nulls_first(value):
+    """Sort key for nlargest() that ranks None above every value."""
+    return (value is None, 0 if value is None else value)
+
+
+def project(rows: Iterable[StatementRow], columns: Sequence[ColumnSpec]) -> List[Dict[str, Any]]:
+    """Project StatementRows into dicts using rank()'s column specs."""
+    getters = []
+    for column in columns:
+        alias, source = (column, column) if isinstance(column, str) else column
+        getters.append((alias, source if callable(source) else (lambda row, f=source: getattr(row, f))))
+    return [{alias: getter(row) for alias, getter in getters} for row in rows]
+
+
+def pg_stat_statements_fingerprint(connector) -> Optional[List[Dict[str, Any]]]:
+    """
+    The incremental-mode fingerprint shared by the pg_stat_statements checks.
+
+    Returns the pg_stat_statements_info reset/deallocation state, or None
+    (always re-run) when pg_stat_statements is unavailable or too old to
+    expose it.
+    """
+    if not connector.has_pgstat:
+        return None
+    query = get_pg_stat_statements_fingerprint_query(connector)
+    if query is None:
+        return None
+    formatted, raw = connector.execute_query(query, return_raw=True)
+    if "[ERROR]" in formatted:
+        raise RuntimeError(f"pg_stat_statements fingerprint query failed: {raw.get('error', formatted)}")
+    return raw
@@ -10,17 +10,17 @@ Provides a holistic view of query resource consumption including:
 - Temp/WAL write analysis
 - User attribution
 
-This query is optimized for strategic workload analysis and optimization
-prioritization, as opposed to incident response diagnostics.
+This analysis is optimized for strategic workload analysis and optimization
+prioritization, as opposed to incident response diagnostics. It is computed
+from the shared pg_stat_statements snapshot.
 """
 
-def get_comprehensive_query_analysis_query(connector):
-    """
-    Get comprehensive query analysis query based on PostgreSQL version.
+from plugins.postgres.utils.pg_stat_statements_snapshot import cpu_time, normalized_query, percent, round2
+
 
-    This query provides a holistic view of resource consumption patterns,
-    ideal for identifying optimization opportunities and understanding
-    workload characteristics.
+def get_comprehensive_query_analysis(connector, snapshot, limit):
+    """
+    Get the top queries by estimated CPU time with comprehensive metrics.
 
     Version compatibility:
     - PG 13+: Full support (exec_time, I/O timing, WAL bytes)
@@ -29,163 +29,60 @@ def get_comprehensive_query_analysis_query(connector):
 
     Args:
         connector: The PostgresConnector instance with version info
+        snapshot: The run's PgStatStatementsSnapshot
+        limit: Maximum number of queries to return
 
     Returns:
-        str: SQL query for comprehensive query analysis
+        list: One dict per query, ordered by estimated_cpu_time_ms descending
     """
-    compatibility = connector.version_info
-
-    # Handle column name differences between PG 13 and 14+
-    if compatibility.get('is_pg14_or_newer'):
-        exec_time_col = 'total_exec_time'
-    else:
-        exec_time_col = 'total_time'
-
-    # I/O time columns - check both PG17+ (new) and legacy styles
-    # These columns were added in PG 13, but pg_stat_statements must be updated
-    if connector.has_pgstat_new_io_time:
-        # PG 17+ has granular I/O timing columns
-        io_time_expr = '(pss.shared_blk_read_time + pss.shared_blk_write_time + pss.local_blk_read_time + pss.local_blk_write_time + pss.temp_blk_read_time + pss.temp_blk_write_time)'
-    elif connector.has_pgstat_legacy_io_time:
-        # PG 13-16 has legacy I/O timing columns
-        io_time_expr = '(pss.blk_read_time + pss.blk_write_time)'
-    else:
-        # PG <13 or track_io_timing = off
-        io_time_expr = '0'
-
-    # WAL bytes column added in PG 13
-    if compatibility.get('major_version', 0) >= 13:
-        wal_column = """
-    -- Total WAL written in MB
-    ROUND((pss.wal_bytes / 1024 / 1024)::numeric, 2) AS total_wal_written_mb,"""
-    else:
-        wal_column = """
-    -- WAL bytes not available in PostgreSQL < 13
-    NULL AS total_wal_written_mb,"""
-
-    query = f"""
--- Comprehensive Query Analysis
--- Use a CTE to find the earliest non-null stats start time
-WITH stats_start_time AS (
-  SELECT
-    COALESCE(
-      (
-        SELECT stats_reset
-        FROM pg_stat_database
-        WHERE datname = current_database()
-      ),
-      (
-        SELECT stats_reset
-        FROM pg_stat_bgwriter
-      ),
-      (
-        SELECT pg_postmaster_start_time()
-      )
-    ) AS start_time
-),
--- CTE to get cluster-wide totals for percentage calculations
-cluster_totals AS (
-  SELECT
-    -- Total estimated CPU time used by all queries
-    SUM(
-      pss.{exec_time_col} - {io_time_expr}
-    ) AS total_cluster_cpu_time_ms,
-    -- Total hours since the last stats reset
-    (
-      NULLIF(
-        EXTRACT(
-          EPOCH
-          FROM (now() - (SELECT start_time FROM stats_start_time))
-        ),
-        0
-      ) / 3600
-    ) AS total_hours_since_reset
-  FROM pg_stat_statements pss
-)
-SELECT
-  -- Who ran it
-  r.rolname AS username,
-
-  -- Frequency calculations
-  (SELECT start_time FROM stats_start_time) AS stats_collection_start_time,
-  pss.calls AS total_executions,
-  ROUND(
-    (pss.calls / ct.total_hours_since_reset)::numeric,
-    2
-  ) AS calls_per_hour,
-
-  -- CPU calculations
-  ROUND(
-    (pss.{exec_time_col} - {io_time_expr})::numeric,
-    2
-  ) AS estimated_cpu_time_ms,
-  ROUND(
-    (
-      (pss.{exec_time_col} - {io_time_expr}) / 3600000
-    )::numeric,
-    2
-  ) AS estimated_cpu_time_hours,
-
-  -- Percentage of total cluster CPU
-  ROUND(
-    (
-      (pss.{exec_time_col} - {io_time_expr}) /
-      NULLIF(ct.total_cluster_cpu_time_ms, 0) * 100
-    )::numeric,
-    2
-  ) AS percent_of_total_cluster_cpu,
-
-  -- I/O calculations
-  ROUND(
-    {io_time_expr}::numeric,
-    2
-  ) AS total_io_wait_time_ms,
-
-  -- I/O as percentage of this query's total time
-  ROUND(
-    (
-      {io_time_expr} /
-      NULLIF(pss.{exec_time_col}, 0) * 100
-    )::numeric,
-    2
-  ) AS io_wait_percent_of_total,
-
-  -- Cache Hit Rate
-  ROUND(
-    (
-      (pss.shared_blks_hit * 100) /
-      NULLIF(pss.shared_blks_hit + pss.shared_blks_read, 0)
-    )::numeric,
-    2
-  ) AS cache_hit_rate_percent,
-
-  -- Rows
-  pss.rows AS total_rows,
-
-  -- Average rows per call
-  ROUND(
-    (pss.rows / NULLIF(pss.calls, 0))::numeric,
-    2
-  ) AS avg_rows_returned,
-
-  -- Total temp written in MB (1 block = 8KB)
-  ROUND(
-    (pss.temp_blks_written * 8192 / 1024 / 1024)::numeric,
-    2
-  ) AS total_temp_written_mb,
-  {wal_column}
-
-  -- Query Text (full text with whitespace normalized)
-  regexp_replace(pss.query, '\\s+', ' ', 'g') AS query
-FROM
-  pg_stat_statements pss
-  JOIN pg_roles r ON pss.userid = r.oid
-  CROSS JOIN cluster_totals ct
-WHERE
-  pss.calls > 0
-ORDER BY
-  estimated_cpu_time_ms DESC
-LIMIT %(limit)s
-"""
+    # Total estimated CPU time used by all queries
+    total_cluster_cpu_time_ms = snapshot.total(cpu_time)
+    hours_since_reset = snapshot.hours_since_reset
+    has_wal_bytes = connector.version_info.get('major_version', 0) >= 13
+
+    # Statements whose role was dropped are excluded, as with a JOIN on pg_roles
+    top_queries = snapshot.top(
+        cpu_time, limit, where=lambda row: row.calls > 0 and row.username is not None
+    )
+
+    results = []
+    for row in top_queries:
+        hit_and_read = row.shared_blks_hit + row.shared_blks_read
+        results.append({
+            # Who ran it
+            'username': row.username,
+
+            # Frequency calculations
+            'stats_collection_start_time': snapshot.stats_start_time,
+            'total_executions': row.calls,
+            'calls_per_hour': round2(row.calls / hours_since_reset) if hours_since_reset else None,
+
+            # CPU calculations
+            'estimated_cpu_time_ms': round2(cpu_time(row)),
+            'estimated_cpu_time_hours': round2(cpu_time(row) / 3600000),
+
+            # Percentage of total cluster CPU
+            'percent_of_total_cluster_cpu': percent(cpu_time(row), total_cluster_cpu_time_ms),
+
+            # I/O calculations
+            'total_io_wait_time_ms': round2(row.io_time),
+            'io_wait_percent_of_total': percent(row.io_time, row.total_time),
+
+            # Cache Hit Rate (whole percent, as integer arithmetic in SQL gave)
+            'cache_hit_rate_percent': round2(row.shared_blks_hit * 100 // hit_and_read) if hit_and_read else None,
+
+            # Rows
+            'total_rows': row.rows,
+            'avg_rows_returned': round2(row.rows // row.calls),
+
+            # Total temp written in MB (1 block = 8KB)
+            'total_temp_written_mb': round2(row.temp_blks_written * 8192 // 1024 // 1024),
+
+            # Total WAL written in MB (not available in PostgreSQL < 13)
+            'total_wal_written_mb': round2(row.wal_bytes / 1024 / 1024) if has_wal_bytes and row.wal_bytes is not None else None,
+
+            # Query Text (full text with whitespace normalized)
+            'query': normalized_query(row)
+        })
 
-    return query
+    return results
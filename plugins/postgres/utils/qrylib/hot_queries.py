@@ -1,31 +1,27 @@
 """
 Query library for the hot_queries check.
+
+Ranks the shared pg_stat_statements snapshot rather than querying the view.
 """
 
-def get_hot_queries_query(connector):
+from plugins.postgres.utils.pg_stat_statements_snapshot import short_query
+
+
+def get_hot_queries(connector, snapshot, limit):
     """
-    Returns a version-aware query to find "hot" queries based on shared
-    buffer hits from the pg_stat_statements extension.
+    Returns the top "hot" queries based on shared buffer hits, using the
+    version-appropriate execution time column names.
     """
     version_info = connector.version_info
 
-    # Determine the correct column name for execution time based on PG version
+    # Keep the PG version's own column names, which the rules reference
     time_column = 'total_exec_time' if version_info.get('is_pg14_or_newer') else 'total_time'
     mean_time_column = 'mean_exec_time' if version_info.get('is_pg14_or_newer') else 'mean_time'
 
-    # The `limit` parameter is supplied by the calling check module.
-    return f"""
-        SELECT
-            substring(regexp_replace(query, '\\s+', ' ', 'g') for 120) AS query, -- MODIFIED
-            -- query,
-            calls,
-            {time_column},
-            {mean_time_column},
-            rows,
-            shared_blks_hit,
-            shared_blks_read
-        FROM pg_stat_statements
-        WHERE calls > 0
-        ORDER BY shared_blks_hit DESC
-        LIMIT %(limit)s;
-    """
+    return snapshot.rank(
+        [('query', short_query), 'calls', (time_column, 'total_time'), (mean_time_column, 'mean_time'),
+         'rows', 'shared_blks_hit', 'shared_blks_read'],
+        order_by='shared_blks_hit',
+        limit=limit,
+        where=lambda row: row.calls > 0
+    )
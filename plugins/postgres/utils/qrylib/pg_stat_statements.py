@@ -61,3 +61,79 @@ def get_pg_stat_statements_query(connector, query_type='standard', order_by='tot
 
     else:
         return get_pg_stat_statements_query(connector, 'standard', order_by=order_by)
+
+
+def get_pg_stat_statements_snapshot_query(connector):
+    """
+    Get the query that captures pg_stat_statements once per health check run.
+
+    Every statement is returned (no ORDER BY or LIMIT) with version-aware
+    columns aliased to stable names, so the query checks can rank and filter
+    the snapshot locally instead of each scanning pg_stat_statements.
+
+    Args:
+        connector (PostgresConnector): The active database connector instance.
+    """
+    compatibility = connector.version_info
+    total_time_col = 'total_exec_time' if compatibility.get('is_pg14_or_newer') else 'total_time'
+    mean_time_col = 'mean_exec_time' if compatibility.get('is_pg14_or_newer') else 'mean_time'
+    wal_bytes_col = 'pss.wal_bytes' if compatibility.get('major_version', 0) >= 13 else 'NULL::numeric'
+
+    if connector.has_pgstat_new_io_time:
+        io_time_expr = '(pss.shared_blk_read_time + pss.shared_blk_write_time + pss.local_blk_read_time + pss.local_blk_write_time + pss.temp_blk_read_time + pss.temp_blk_write_time)'
+    elif connector.has_pgstat_legacy_io_time:
+        io_time_expr = '(pss.blk_read_time + pss.blk_write_time)'
+    else:
+        io_time_expr = '0::float8'
+
+    return f"""
+        WITH stats_start_time AS (
+          SELECT COALESCE(
+            (SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()),
+            (SELECT stats_reset FROM pg_stat_bgwriter),
+            (SELECT pg_postmaster_start_time())
+          ) AS start_time
+        )
+        SELECT pss.queryid,
+               r.rolname AS username,
+               pss.query,
+               pss.calls,
+               pss.{total_time_col} AS total_time,
+               pss.{mean_time_col} AS mean_time,
+               pss.rows,
+               pss.shared_blks_hit,
+               pss.shared_blks_read,
+               pss.shared_blks_written,
+               pss.local_blks_written,
+               pss.temp_blks_written,
+               {wal_bytes_col} AS wal_bytes,
+               {io_time_expr} AS io_time,
+               sst.start_time AS stats_start_time,
+               (EXTRACT(EPOCH FROM (now() - sst.start_time)) / 3600)::float8 AS hours_since_reset
+        FROM pg_stat_statements pss
+        LEFT JOIN pg_roles r ON pss.userid = r.oid
+        CROSS JOIN stats_start_time sst
+    """
+
+
+def get_pg_stat_statements_fingerprint_query(connector):
+    """
+    Get the cheap query used as the fingerprint of the pg_stat_statements checks.
+
+    pg_stat_statements_info (PostgreSQL 14+) records when the statistics were
+    last reset and how many entries were deallocated; together with the
+    database's stats_reset they identify a statistics window. Returns None on
+    older versions, which have no such view.
+
+    Args:
+        connector (PostgresConnector): The active database connector instance.
+    """
+    if not connector.version_info.get('is_pg14_or_newer'):
+        return None
+
+    return """
+        SELECT psi.dealloc,
+               psi.stats_reset::text AS stats_reset,
+               (SELECT stats_reset::text FROM pg_stat_database WHERE datname = current_database()) AS database_stats_reset
+        FROM pg_stat_statements_info psi
+    """
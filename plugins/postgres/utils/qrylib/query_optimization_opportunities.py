@@ -9,236 +9,113 @@ This module provides queries to:
 
 Designed to complement comprehensive_query_analysis with actionable
 optimization recommendations and team/service attribution.
+
+User aggregation and query details are computed from the shared
+pg_stat_statements snapshot; only the sequential scan data is queried here.
 """
 
+import heapq
+
+from plugins.postgres.utils.pg_stat_statements_snapshot import cpu_time, percent, round2
 
-def get_user_resource_aggregation_query(connector):
+
+def get_user_resource_aggregation(snapshot, limit):
     """
     Aggregate resource consumption by database user/service.
 
     Shows which users/services are consuming the most cluster resources,
-    helping identify which teams to work with for optimization.
+    helping identify which teams to work with for optimization. Only users
+    consuming more than 1% of cluster CPU are returned.
 
     Args:
-        connector: The PostgresConnector instance with version info
+        snapshot: The run's PgStatStatementsSnapshot
+        limit: Maximum number of users to return
 
     Returns:
-        str: SQL query for user resource aggregation
+        list: One dict per user, ordered by percent_of_cluster_cpu descending
     """
-    compatibility = connector.version_info
-
-    # Handle column name differences between PG 13 and 14+
-    if compatibility.get('is_pg14_or_newer'):
-        exec_time_col = 'total_exec_time'
-    else:
-        exec_time_col = 'total_time'
-
-    # I/O time columns
-    if connector.has_pgstat_new_io_time:
-        io_time_expr = '(pss.shared_blk_read_time + pss.shared_blk_write_time + pss.local_blk_read_time + pss.local_blk_write_time + pss.temp_blk_read_time + pss.temp_blk_write_time)'
-    elif connector.has_pgstat_legacy_io_time:
-        io_time_expr = '(pss.blk_read_time + pss.blk_write_time)'
-    else:
-        io_time_expr = '0'
-
-    query = f"""
--- User/Service Resource Aggregation
-WITH stats_start_time AS (
-  SELECT
-    COALESCE(
-      (
-        SELECT stats_reset
-        FROM pg_stat_database
-        WHERE datname = current_database()
-      ),
-      (
-        SELECT stats_reset
-        FROM pg_stat_bgwriter
-      ),
-      (
-        SELECT pg_postmaster_start_time()
-      )
-    ) AS start_time
-),
-cluster_totals AS (
-  SELECT
-    SUM(pss.{exec_time_col} - {io_time_expr}) AS total_cluster_cpu_time_ms,
-    (
-      NULLIF(
-        EXTRACT(
-          EPOCH
-          FROM (now() - (SELECT start_time FROM stats_start_time))
-        ),
-        0
-      ) / 3600
-    ) AS total_hours_since_reset
-  FROM pg_stat_statements pss
-),
-user_aggregates AS (
-  SELECT
-    r.rolname AS username,
-    COUNT(*) AS query_count,
-    SUM(pss.calls) AS total_executions,
-    ROUND(
-      (SUM(pss.{exec_time_col} - {io_time_expr}) /
-       NULLIF((SELECT total_cluster_cpu_time_ms FROM cluster_totals), 0) * 100)::numeric,
-      2
-    ) AS percent_of_cluster_cpu,
-    ROUND(
-      (SUM(pss.calls) / NULLIF((SELECT total_hours_since_reset FROM cluster_totals), 0))::numeric,
-      2
-    ) AS avg_calls_per_hour,
-    ROUND(
-      (SUM(pss.{exec_time_col} - {io_time_expr}) / 1000)::numeric,
-      2
-    ) AS total_cpu_time_seconds,
-    ROUND(
-      (SUM({io_time_expr}) /
-       NULLIF(SUM(pss.{exec_time_col}), 0) * 100)::numeric,
-      2
-    ) AS avg_io_wait_percent,
-    ROUND(
-      (SUM(pss.shared_blks_hit)::numeric * 100 /
-       NULLIF(SUM(pss.shared_blks_hit) + SUM(pss.shared_blks_read), 0))::numeric,
-      2
-    ) AS avg_cache_hit_rate
-  FROM pg_stat_statements pss
-  JOIN pg_roles r ON pss.userid = r.oid
-  WHERE pss.calls > 0
-  GROUP BY r.rolname
-)
-SELECT
-  username,
-  query_count,
-  total_executions,
-  percent_of_cluster_cpu,
-  avg_calls_per_hour,
-  total_cpu_time_seconds,
-  avg_io_wait_percent,
-  avg_cache_hit_rate
-FROM user_aggregates
-WHERE percent_of_cluster_cpu > 1.0  -- Only show users consuming >1%% cluster CPU
-ORDER BY percent_of_cluster_cpu DESC
-LIMIT %(limit)s
-"""
-
-    return query
-
-
-def get_query_with_seqscan_correlation_query(connector):
+    total_cluster_cpu_time_ms = snapshot.total(cpu_time)
+    hours_since_reset = snapshot.hours_since_reset
+
+    user_totals = {}
+    for row in snapshot.filter(lambda row: row.calls > 0 and row.username is not None):
+        totals = user_totals.setdefault(row.username, {
+            'query_count': 0, 'calls': 0, 'cpu_time': 0.0, 'io_time': 0.0,
+            'total_time': 0.0, 'shared_blks_hit': 0, 'shared_blks_read': 0
+        })
+        totals['query_count'] += 1
+        totals['calls'] += row.calls
+        totals['cpu_time'] += cpu_time(row)
+        totals['io_time'] += row.io_time or 0
+        totals['total_time'] += row.total_time or 0
+        totals['shared_blks_hit'] += row.shared_blks_hit
+        totals['shared_blks_read'] += row.shared_blks_read
+
+    user_aggregates = []
+    for username, totals in user_totals.items():
+        percent_of_cluster_cpu = percent(totals['cpu_time'], total_cluster_cpu_time_ms)
+        if percent_of_cluster_cpu is None or percent_of_cluster_cpu <= 1.0:
+            continue
+        user_aggregates.append({
+            'username': username,
+            'query_count': totals['query_count'],
+            'total_executions': totals['calls'],
+            'percent_of_cluster_cpu': percent_of_cluster_cpu,
+            'avg_calls_per_hour': round2(totals['calls'] / hours_since_reset) if hours_since_reset else None,
+            'total_cpu_time_seconds': round2(totals['cpu_time'] / 1000),
+            'avg_io_wait_percent': percent(totals['io_time'], totals['total_time']),
+            'avg_cache_hit_rate': percent(totals['shared_blks_hit'], totals['shared_blks_hit'] + totals['shared_blks_read'])
+        })
+
+    return heapq.nlargest(int(limit), user_aggregates, key=lambda user: user['percent_of_cluster_cpu'])
+
+
+def get_query_details(snapshot, min_cpu_percent, limit):
     """
-    Get detailed query information correlated with sequential scan data.
+    Get detailed query information for correlation with sequential scan data.
 
-    Joins pg_stat_statements with pg_stat_user_tables to identify queries
-    that are likely causing sequential scans (missing indexes).
+    Returns the full query text of the highest CPU consumers so the check can
+    match them against pg_stat_user_tables to identify queries that are
+    likely causing sequential scans (missing indexes).
 
     Args:
-        connector: The PostgresConnector instance with version info
+        snapshot: The run's PgStatStatementsSnapshot
+        min_cpu_percent: Minimum percent of cluster CPU for a query to be included
+        limit: Maximum number of queries to return
 
     Returns:
-        str: SQL query for query-seqscan correlation
+        list: One dict per query, ordered by percent_of_cluster_cpu descending
     """
-    compatibility = connector.version_info
-
-    # Handle column name differences
-    if compatibility.get('is_pg14_or_newer'):
-        exec_time_col = 'total_exec_time'
-    else:
-        exec_time_col = 'total_time'
-
-    # I/O time columns
-    if connector.has_pgstat_new_io_time:
-        io_time_expr = '(pss.shared_blk_read_time + pss.shared_blk_write_time + pss.local_blk_read_time + pss.local_blk_write_time + pss.temp_blk_read_time + pss.temp_blk_write_time)'
-    elif connector.has_pgstat_legacy_io_time:
-        io_time_expr = '(pss.blk_read_time + pss.blk_write_time)'
-    else:
-        io_time_expr = '0'
-
-    query = f"""
--- Query details with full text and sequential scan correlation
-WITH stats_start_time AS (
-  SELECT
-    COALESCE(
-      (
-        SELECT stats_reset
-        FROM pg_stat_database
-        WHERE datname = current_database()
-      ),
-      (
-        SELECT stats_reset
-        FROM pg_stat_bgwriter
-      ),
-      (
-        SELECT pg_postmaster_start_time()
-      )
-    ) AS start_time
-),
-cluster_totals AS (
-  SELECT
-    SUM(pss.{exec_time_col} - {io_time_expr}) AS total_cluster_cpu_time_ms,
-    (
-      NULLIF(
-        EXTRACT(
-          EPOCH
-          FROM (now() - (SELECT start_time FROM stats_start_time))
-        ),
-        0
-      ) / 3600
-    ) AS hours_since_reset
-  FROM pg_stat_statements pss
-),
-query_details AS (
-  SELECT
-    pss.queryid,
-    r.rolname AS username,
-    pss.query AS full_query_text,
-    pss.calls AS total_executions,
-    ROUND((pss.calls / ct.hours_since_reset)::numeric, 2) AS calls_per_hour,
-    ROUND((pss.{exec_time_col} - {io_time_expr})::numeric, 2) AS cpu_time_ms,
-    ROUND(((pss.{exec_time_col} - {io_time_expr}) / 3600000)::numeric, 2) AS cpu_time_hours,
-    ROUND(
-      ((pss.{exec_time_col} - {io_time_expr}) /
-       NULLIF(ct.total_cluster_cpu_time_ms, 0) * 100)::numeric,
-      2
-    ) AS percent_of_cluster_cpu,
-    ROUND((pss.{exec_time_col} / NULLIF(pss.calls, 0))::numeric, 2) AS avg_exec_time_ms,
-    ROUND(({io_time_expr})::numeric, 2) AS io_wait_time_ms,
-    ROUND(
-      ({io_time_expr} / NULLIF(pss.{exec_time_col}, 0) * 100)::numeric,
-      2
-    ) AS io_wait_percent,
-    ROUND(
-      (pss.shared_blks_hit * 100 /
-       NULLIF(pss.shared_blks_hit + pss.shared_blks_read, 0))::numeric,
-      2
-    ) AS cache_hit_rate_percent,
-    ROUND((pss.temp_blks_written * 8192 / 1024 / 1024)::numeric, 2) AS temp_written_mb
-  FROM pg_stat_statements pss
-  JOIN pg_roles r ON pss.userid = r.oid
-  CROSS JOIN cluster_totals ct
-  WHERE pss.calls > 0
-)
-SELECT
-  qd.queryid,
-  qd.username,
-  qd.full_query_text,
-  qd.total_executions,
-  qd.calls_per_hour,
-  qd.cpu_time_ms,
-  qd.cpu_time_hours,
-  qd.percent_of_cluster_cpu,
-  qd.avg_exec_time_ms,
-  qd.io_wait_time_ms,
-  qd.io_wait_percent,
-  qd.cache_hit_rate_percent,
-  qd.temp_written_mb
-FROM query_details qd
-WHERE qd.percent_of_cluster_cpu >= %(min_cpu_percent)s
-ORDER BY qd.percent_of_cluster_cpu DESC
-LIMIT %(limit)s
-"""
-
-    return query
+    total_cluster_cpu_time_ms = snapshot.total(cpu_time)
+    hours_since_reset = snapshot.hours_since_reset
+    min_cpu_percent = float(min_cpu_percent)
+
+    def is_candidate(row):
+        if row.calls <= 0 or row.username is None:
+            return False
+        cpu_percent = percent(cpu_time(row), total_cluster_cpu_time_ms)
+        return cpu_percent is not None and cpu_percent >= min_cpu_percent
+
+    query_details = []
+    for row in snapshot.top(cpu_time, limit, where=is_candidate):
+        hit_and_read = row.shared_blks_hit + row.shared_blks_read
+        query_details.append({
+            'queryid': row.queryid,
+            'username': row.username,
+            'full_query_text': row.query,
+            'total_executions': row.calls,
+            'calls_per_hour': round2(row.calls / hours_since_reset) if hours_since_reset else None,
+            'cpu_time_ms': round2(cpu_time(row)),
+            'cpu_time_hours': round2(cpu_time(row) / 3600000),
+            'percent_of_cluster_cpu': percent(cpu_time(row), total_cluster_cpu_time_ms),
+            'avg_exec_time_ms': round2(row.total_time / row.calls),
+            'io_wait_time_ms': round2(row.io_time),
+            'io_wait_percent': percent(row.io_time, row.total_time),
+            'cache_hit_rate_percent': round2(row.shared_blks_hit * 100 // hit_and_read) if hit_and_read else None,
+            'temp_written_mb': round2(row.temp_blks_written * 8192 // 1024 // 1024)
+        })
+
+    return query_details
 
 
 def get_tables_with_high_seqscans_query():
@@ -280,3 +157,22 @@ LIMIT %(limit)s
 """
 
     return query
+
+
+def get_table_activity_fingerprint_query():
+    """
+    Get the cheap query used to fingerprint the pg_stat_user_tables side of the check.
+
+    Writes to the user tables and the last (auto)analyze change the table
+    statistics the sequential scan correlation is based on; incremental
+    mode re-runs the check when either has moved.
+
+    Returns:
+        str: SQL query returning one row of table activity counters
+    """
+    return """
+SELECT
+  COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0) AS tuples_written,
+  GREATEST(MAX(last_analyze), MAX(last_autoanalyze))::text AS last_analyzed
+FROM pg_stat_user_tables
+"""
@@ -1,25 +1,21 @@
-def get_top_write_queries_query(connector):
+def _display_query(row):
+    """Query text sanitized for safe AsciiDoc table display."""
+    if row.query is None:
+        return None
+    return row.query[:150].replace('\n', ' ').replace('|', ' ') + '...'
+
+
+def get_top_write_queries(connector, snapshot, limit):
     """
-    Returns a version-aware query to find top write-intensive queries
-    from pg_stat_statements.
+    Returns the top write-intensive queries from the pg_stat_statements
+    snapshot, adapting the ranking to the PostgreSQL version.
     """
-    # Sanitize query text for safe AsciiDoc table display
-    query_select_prefix = "REPLACE(REPLACE(LEFT(query, 150), E'\\n', ' '), '|', ' ') || '...' AS query"
+    columns = [('query', _display_query), 'calls', ('total_exec_time', 'total_time'),
+               ('mean_exec_time', 'mean_time'), 'rows',
+               'shared_blks_written', 'local_blks_written', 'temp_blks_written']
 
     if connector.version_info.get('is_pg14_or_newer'):
-        return f"""
-            SELECT {query_select_prefix}, calls, total_exec_time, mean_exec_time, rows,
-                   shared_blks_written, local_blks_written, temp_blks_written, wal_bytes
-            FROM pg_stat_statements
-            ORDER BY wal_bytes DESC, shared_blks_written DESC
-            LIMIT %(limit)s;
-        """
-    else:
-        # For older versions, we rely on blocks written as the primary indicator
-        return f"""
-            SELECT {query_select_prefix}, calls, total_time AS total_exec_time, mean_time AS mean_exec_time, rows,
-                   shared_blks_written, local_blks_written, temp_blks_written
-            FROM pg_stat_statements
-            ORDER BY shared_blks_written DESC, rows DESC
-            LIMIT %(limit)s;
-        """
+        return snapshot.rank(columns + ['wal_bytes'], order_by=('wal_bytes', 'shared_blks_written'), limit=limit)
+
+    # For older versions, we rely on blocks written as the primary indicator
+    return snapshot.rank(columns, order_by=('shared_blks_written', 'rows'), limit=limit)
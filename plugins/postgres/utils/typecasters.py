@@ -0,0 +1,54 @@
+"""
+psycopg2 typecasters applied at fetch time.
+
+By default psycopg2 returns NUMERIC values (sum(), avg(), round(), numeric
+columns) as decimal.Decimal, which every later stage then has to convert
+before the findings can be serialized. Registering `FAST_NUMERIC` on a
+connection makes the driver return int for integral values and float
+otherwise, so Decimal never reaches the findings.
+
+Opt-in with `fast_numeric_typecast: true`, because it changes the output:
+
+- the AsciiDoc tables lose the scale of ROUND(x, 2) values ("12.50" is
+  shown as "12.5", "100.00" as "100.0"),
+- integral NUMERICs become JSON integers instead of floats in the findings.
+
+Values with more than 15 significant digits, which a float cannot hold
+exactly, stay Decimal.
+"""
+
+from decimal import Decimal
+
+import psycopg2.extensions
+
+NUMERIC_OID = 1700
+
+# Significant digits a float always represents exactly
+_FLOAT_DIGITS = 15
+
+
+def _significant_digits(value):
+    digits = value.lstrip('-+').replace('.', '').lstrip('0')
+    return len(digits)
+
+
+def _cast_numeric(value, cursor):
+    """Converts the text of a NUMERIC value to int or float (Decimal when a float would lose digits)."""
+    if value is None:
+        return None
+    if '.' in value:
+        if _significant_digits(value) > _FLOAT_DIGITS:
+            return Decimal(value)
+        return float(value)
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)  # 'NaN', 'Infinity', '-Infinity'
+
+
+FAST_NUMERIC = psycopg2.extensions.new_type((NUMERIC_OID,), 'FAST_NUMERIC', _cast_numeric)
+
+
+def register_fast_typecasters(conn):
+    """Registers the fetch-time typecasters on a psycopg2 connection."""
+    psycopg2.extensions.register_type(FAST_NUMERIC, conn)
@@ -0,0 +1,167 @@
+"""
+Plugin registry.
+
+Describes the database technology plugins without importing them, so that
+only the selected technology's package (and its driver) is ever loaded. A run
+against PostgreSQL no longer imports cassandra-driver, kafka-python,
+opensearch-py or clickhouse_connect.
+
+    registry = PluginRegistry()
+    registry.names()            # every known technology, nothing imported
+    registry.get('postgres')    # imports plugins.postgres only
+
+Plugin packages under plugins/ that are missing from PLUGIN_MANIFEST are
+still found; their technology name is assumed to be the package name.
+"""
+
+import importlib
+import importlib.machinery
+import importlib.util
+import pkgutil
+from collections.abc import Mapping
+from pathlib import Path
+
+from plugins.base import BasePlugin
+
+PLUGINS_PATH = Path(__file__).parent
+
+# Packages under plugins/ that are not technology plugins
+_NON_PLUGIN_PACKAGES = {'base', 'common', 'registry'}
+
+# technology name -> plugin package, description and the driver modules its
+# connector imports (checked with find_spec, never imported by the registry)
+PLUGIN_MANIFEST = {
+    'cassandra': {'package': 'plugins.cassandra', 'description': 'Apache Cassandra', 'drivers': ['cassandra']},
+    'clickhouse': {'package': 'plugins.clickhouse', 'description': 'ClickHouse', 'drivers': ['clickhouse_connect']},
+    'kafka': {'package': 'plugins.kafka', 'description': 'Apache Kafka', 'drivers': ['kafka']},
+    'mysql': {'package': 'plugins.mysql', 'description': 'MySQL', 'drivers': ['mysql.connector']},
+    'opensearch': {'package': 'plugins.opensearch', 'description': 'OpenSearch', 'drivers': ['opensearchpy']},
+    'postgres': {'package': 'plugins.postgres', 'description': 'PostgreSQL', 'drivers': ['psycopg2']},
+    'valkey': {'package': 'plugins.valkey', 'description': 'Valkey', 'drivers': ['valkey']},
+}
+
+
+def _module_available(name):
+    """True when a module can be imported, without importing it.
+
+    find_spec() imports the parent packages of a dotted name, so submodules
+    are looked up in their parent's search path instead.
+    """
+    try:
+        spec = importlib.util.find_spec(name.split('.')[0])
+        for part in name.split('.')[1:]:
+            if spec is None or not spec.submodule_search_locations:
+                return False
+            spec = importlib.machinery.PathFinder.find_spec(part, spec.submodule_search_locations)
+        return spec is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def plugin_manifest():
+    """The manifest entries of every plugin package present under plugins/."""
+    manifest = {}
+    packages = {name for _, name, is_package in pkgutil.iter_modules([str(PLUGINS_PATH)])
+                if is_package and name not in _NON_PLUGIN_PACKAGES}
+    for technology, entry in PLUGIN_MANIFEST.items():
+        if entry['package'].split('.')[-1] in packages:
+            manifest[technology] = entry
+    known_packages = {entry['package'].split('.')[-1] for entry in PLUGIN_MANIFEST.values()}
+    for package in sorted(packages - known_packages):
+        manifest[package] = {'package': f'plugins.{package}', 'description': package, 'drivers': []}
+    return manifest
+
+
+def load_plugin(package):
+    """Imports a plugin package and instantiates its BasePlugin subclass.
+
+    Returns:
+        BasePlugin | None: The plugin instance, or None if the package could
+        not be imported or defines no plugin (a warning is printed).
+    """
+    try:
+        module = importlib.import_module(package)
+        for item_name in dir(module):
+            item = getattr(module, item_name)
+            if isinstance(item, type) and issubclass(item, BasePlugin) and item is not BasePlugin:
+                try:
+                    plugin_instance = item()
+                    print(f"✅ Discovered and loaded plugin: {plugin_instance.technology_name}")
+                    return plugin_instance
+                except Exception as e:
+                    print(f"⚠️  Warning: Could not instantiate plugin '{package}'. Error: {e}. Skipping.")
+                    return None
+    except ImportError as e:
+        print(f"⚠️  Warning: Could not import plugin '{package}'. Missing dependency: {e}. Skipping.")
+    except Exception as e:
+        print(f"⚠️  Warning: Failed to load plugin '{package}' due to an unexpected error: {e}. Skipping.")
+    return None
+
+
+class PluginRegistry(Mapping):
+    """A read-only mapping of technology name -> plugin instance, loaded on first access.
+
+    Listing the registry (keys, `in`, len, describe()) never imports a
+    plugin; looking a technology up imports only that plugin's package.
+    Plugins that fail to load are reported once and behave as missing.
+    """
+
+    def __init__(self, manifest=None):
+        self.manifest = plugin_manifest() if manifest is None else manifest
+        self._loaded = {}
+
+    def __getitem__(self, technology):
+        if technology not in self.manifest:
+            raise KeyError(technology)
+        if technology not in self._loaded:
+            self._loaded[technology] = load_plugin(self.manifest[technology]['package'])
+        plugin = self._loaded[technology]
+        if plugin is None:
+            raise KeyError(technology)
+        return plugin
+
+    def __contains__(self, technology):
+        return technology in self.manifest
+
+    def __iter__(self):
+        return iter(self.manifest)
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def names(self):
+        return list(self.manifest)
+
+    def loaded(self):
+        """The plugins imported so far, keyed by technology name."""
+        return {technology: plugin for technology, plugin in self._loaded.items() if plugin is not None}
+
+    def load_all(self):
+        """Imports every plugin, returning those that loaded (the old eager discovery)."""
+        for technology in self.manifest:
+            self.get(technology)
+        return self.loaded()
+
+    def describe(self):
+        """One row per plugin with its driver status, without importing anything."""
+        rows = []
+        for technology, entry in self.manifest.items():
+            missing = [driver for driver in entry['drivers'] if not _module_available(driver)]
+            rows.append({
+                'technology': technology,
+                'description': entry['description'],
+                'package': entry['package'],
+                'drivers': entry['drivers'],
+                'missing_drivers': missing,
+            })
+        return rows
+
+
+def print_plugin_list(registry=None):
+    """Prints the known plugins and whether their drivers are installed."""
+    if registry is None:
+        registry = PluginRegistry()
+    print(f"{'Technology':<14}{'Description':<20}{'Drivers':<24}Status")
+    for row in registry.describe():
+        status = "✅ available" if not row['missing_drivers'] else f"⚠️  missing {', '.join(row['missing_drivers'])}"
+        print(f"{row['technology']:<14}{row['description']:<20}{', '.join(row['drivers']) or '-':<24}{status}")
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Fleet entry point for the Database Health Check Tool.
+
+Runs the health check against many targets concurrently. Plugins, analysis
+rules and the check modules of every report definition are loaded once in
+this process; each target then runs in its own forked worker process, so it
+starts with everything already imported. At most --workers targets run at a
+time, each is stopped after its timeout, and every result is handed to the
+trend shipper as soon as it completes. Shipping runs in a separate process,
+so a slow trend destination never delays starting or reaping workers. A
+summary of throughput and failures is printed at the end.
+
+Targets are either every *.yaml file of a directory:
+
+    python run_fleet.py --configs config/fleet/ --workers 8
+
+or listed in an inventory file:
+
+    python run_fleet.py --inventory config/fleet.yaml --workers 8 --timeout 1800
+
+    # config/fleet.yaml
+    targets:
+      - config: config/fleet/orders_pg.yaml
+      - config: config/fleet/events_kafka.yaml
+        report_config: config/kafka_short_report.py
+        timeout: 600
+        name: events-kafka
+
+Each worker's output goes to adoc_out/fleet_logs/<name>.log, and its
+report, findings and incremental cache to adoc_out/<company>/<name>/, so
+several targets of the same company do not overwrite each other.
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+
+import yaml
+
+# Add the project root to the path for correct module imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from main import APP_VERSION, HealthCheck, discover_plugins
+from output_handlers import trend_shipper
+from utils.json_utils import UniversalJSONEncoder
+
+DEFAULT_TIMEOUT_SECONDS = 1800
+LOG_DIR = Path.cwd() / 'adoc_out' / 'fleet_logs'
+
+
+def load_targets(configs_dir=None, inventory_file=None, default_timeout=DEFAULT_TIMEOUT_SECONDS):
+    """Builds the target list from a config directory or an inventory file.
+
+    Returns:
+        list[dict]: Targets with 'name', 'config', 'report_config' and 'timeout'.
+    """
+    entries = []
+    if configs_dir:
+        entries = [{'config': str(path)} for path in sorted(Path(configs_dir).glob('*.yaml'))]
+    if inventory_file:
+        with open(inventory_file, 'r') as f:
+            inventory = yaml.safe_load(f) or {}
+        base_dir = Path(inventory_file).parent
+        for entry in inventory.get('targets', []):
+            entry = {'config': entry} if isinstance(entry, str) else dict(entry)
+            config_path = Path(entry['config'])
+            if not config_path.is_absolute() and not config_path.exists():
+                config_path = base_dir / config_path
+            entry['config'] = str(config_path)
+            entries.append(entry)
+
+    targets, names = [], set()
+    for entry in entries:
+        # Names are also the log file and output directory names, so they are made unique
+        base_name = re.sub(r'[^\w.-]+', '_', str(entry.get('name') or Path(entry['config']).stem)).lstrip('.') or 'target'
+        name, suffix = base_name, 1
+        while name in names:
+            name = f"{base_name}_{suffix}"
+            suffix += 1
+        names.add(name)
+        targets.append({
+            'name': name,
+            'config': entry['config'],
+            'report_config': entry.get('report_config'),
+            'timeout': float(entry.get('timeout', default_timeout)),
+        })
+    return targets
+
+
+def preload(targets, available_plugins):
+    """Loads the rules and imports the check modules each target's plugin needs.
+
+    Returns:
+        dict: Analysis rules keyed by technology name.
+    """
+    rules_cache = {}
+    definitions = set()
+    for target in targets:
+        try:
+            with open(target['config'], 'r') as f:
+                technology = (yaml.safe_load(f) or {}).get('db_type')
+        except (OSError, yaml.YAMLError) as e:
+            print(f"⚠️  Warning: Could not read {target['config']}: {e}")
+            continue
+        plugin = available_plugins.get(technology)
+        if plugin is None:
+            continue
+        if technology not in rules_cache:
+            rules_cache[technology] = plugin.get_rules_config()
+        if (technology, target['report_config']) in definitions:
+            continue
+        definitions.add((technology, target['report_config']))
+        try:
+            sections = plugin.get_report_definition(target['report_config'])
+        except Exception as e:
+            print(f"⚠️  Warning: Could not load the report definition for {target['name']}: {e}")
+            continue
+        for section in sections:
+            for action in section.get('actions', []):
+                if action.get('type') == 'module':
+                    try:
+                        importlib.import_module(action['module'])
+                    except Exception:
+                        pass  # Reported by the ReportBuilder when the module runs
+    return rules_cache
+
+
+def _run_target(target, available_plugins, rules_cache, output_file, incremental, result_conn):
+    """Worker process: runs one health check and sends its results to the parent."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log_file = open(LOG_DIR / f"{target['name']}.log", 'w')
+    os.dup2(log_file.fileno(), sys.stdout.fileno())
+    os.dup2(log_file.fileno(), sys.stderr.fileno())
+
+    try:
+        health_check = HealthCheck(target['config'], target['report_config'], incremental=incremental,
+                                   available_plugins=available_plugins, rules_cache=rules_cache,
+                                   output_name=target['name'])
+        health_check.run_report(ship_trends=False)
+        if health_check.settings.get('generate_report', True):
+            health_check.write_adoc(output_file)
+        result = {
+            'status': 'success',
+            'settings': health_check.settings,
+            # Serialized here so database-specific types never need to be pickled
+            'findings': health_check.get_serialized_findings().dumps().decode('utf-8'),
+            'analysis_results': json.dumps(health_check.analysis_output, cls=UniversalJSONEncoder),
+            'adoc': health_check.adoc_content,
+        }
+    except SystemExit as e:
+        result = {'status': 'failed', 'error': f"Health check exited with status {e.code} (see log)"}
+    except Exception as e:
+        result = {'status': 'failed', 'error': str(e)}
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    result_conn.send(result)
+    result_conn.close()
+
+
+def ship_result(target, result):
+    """Hands one completed target's findings to the trend shipper."""
+    try:
+        trend_shipper.run(
+            json.loads(result['findings']),
+            result['settings'],
+            result['adoc'],
+            analysis_results=json.loads(result['analysis_results'])
+        )
+    except Exception as e:
+        print(f"⚠️  Warning: Trend shipping failed for {target['name']}: {e}")
+
+
+def _ship_results(conn):
+    """Shipper process: ships the results the parent forwards, then flushes the spool.
+
+    The trend shipper's background sender threads only ever run here, never
+    in the parent that forks the workers. A thread keeps reading the pipe
+    while a result is being shipped, so the parent's send() does not block.
+    """
+    received = queue.Queue()
+
+    def receive():
+        while True:
+            try:
+                item = conn.recv()
+            except EOFError:
+                item = None
+            received.put(item)
+            if item is None:
+                return
+
+    threading.Thread(target=receive, name='fleet-result-receiver', daemon=True).start()
+    while (item := received.get()) is not None:
+        ship_result(*item)
+    flushed = trend_shipper.flush()
+    trend_shipper.stop()  # Process children exit without running atexit handlers
+    conn.send(flushed)
+    conn.close()
+
+
+class ResultShipper:
+    """Hands completed results to the shipper process (see `_ship_results()`)."""
+
+    def __init__(self, context):
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_ship_results, args=(child_conn,), name='healthcheck-shipper')
+        self._process.start()
+        child_conn.close()
+
+    def submit(self, target, result):
+        try:
+            self._conn.send((target, result))
+        except OSError as e:
+            print(f"⚠️  Warning: Trend shipping failed for {target['name']}: {e}")
+
+    def close(self):
+        """Waits until every submitted result is shipped.
+
+        Returns:
+            bool: True if no trend submissions are left in the spool.
+        """
+        try:
+            self._conn.send(None)
+            flushed = self._conn.recv()
+        except (OSError, EOFError):
+            flushed = False
+        self._process.join()
+        self._conn.close()
+        return flushed
+
+
+def run_fleet(targets, workers, available_plugins, rules_cache, output_file='health_check.adoc',
+              incremental=False, ship=True):
+    """Runs the targets in worker processes, at most `workers` at a time.
+
+    Returns:
+        list[dict]: One outcome per target with 'name', 'status'
+        ('success', 'failed' or 'timeout'), 'seconds' and 'error'.
+    """
+    # Forked workers inherit the loaded plugins, rules and check modules. Where
+    # fork is unavailable each worker loads them itself (compiled rules cannot
+    # be pickled).
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+        available_plugins, rules_cache = None, None
+
+    # Started before any worker is forked
+    shipper = ResultShipper(context) if ship else None
+    pending = list(targets)
+    running = {}  # result connection -> (target, process, start time)
+    outcomes = []
+
+    def finish(conn, status, error=None, result=None):
+        target, process, started = running.pop(conn)
+        seconds = time.monotonic() - started
+        if status == 'timeout':
+            process.terminate()
+        process.join(5)
+        conn.close()
+        if result is not None and shipper is not None:
+            shipper.submit(target, result)
+        icon = '✅' if status == 'success' else '❌'
+        print(f"{icon} {target['name']}: {status} in {seconds:.1f}s" + (f" ({error})" if error else ""))
+        outcomes.append({'name': target['name'], 'status': status, 'seconds': seconds, 'error': error})
+
+    while pending or running:
+        while pending and len(running) < workers:
+            target = pending.pop(0)
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_target,
+                args=(target, available_plugins, rules_cache, output_file, incremental, child_conn),
+                name=f"healthcheck-{target['name']}",
+            )
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (target, process, time.monotonic())
+            print(f"▶️  Started {target['name']} (pid {process.pid})")
+
+        now = time.monotonic()
+        next_deadline = min(started + target['timeout'] for target, _, started in running.values())
+        ready = wait(list(running), timeout=max(0.0, next_deadline - now))
+
+        for conn in ready:
+            try:
+                result = conn.recv()
+            except EOFError:
+                process = running[conn][1]
+                process.join(5)
+                finish(conn, 'failed', f"worker exited with code {process.exitcode}")
+                continue
+            if result['status'] == 'success':
+                finish(conn, 'success', result=result)
+            else:
+                finish(conn, 'failed', result['error'])
+
+        now = time.monotonic()
+        for conn, (target, _, started) in list(running.items()):
+            if now - started >= target['timeout']:
+                finish(conn, 'timeout', f"exceeded {target['timeout']:.0f}s")
+
+    if shipper is not None and not shipper.close():
+        print("⚠️  Some trend submissions are still queued; they will be sent by the next run.")
+    return outcomes
+
+
+def print_summary(outcomes, elapsed, workers):
+    """Prints per-target results, throughput and failures."""
+    print(f"\n{'Target':<32}{'Status':<10}{'Seconds':>10}  Error")
+    for outcome in sorted(outcomes, key=lambda o: o['name']):
+        print(f"{outcome['name'][:31]:<32}{outcome['status']:<10}{outcome['seconds']:>10.1f}  {outcome['error'] or ''}")
+
+    succeeded = sum(1 for o in outcomes if o['status'] == 'success')
+    timed_out = sum(1 for o in outcomes if o['status'] == 'timeout')
+    failed = len(outcomes) - succeeded - timed_out
+    per_minute = len(outcomes) / elapsed * 60 if elapsed > 0 else 0.0
+    busy = sum(o['seconds'] for o in outcomes)
+    print(f"\n{len(outcomes)} targets in {elapsed:.1f}s with {workers} workers: {per_minute:.1f} targets/min, "
+          f"{busy / elapsed if elapsed > 0 else 0.0:.1f}x concurrency")
+    print(f"✅ Succeeded: {succeeded}   ❌ Failed: {failed}   ⏱️  Timed out: {timed_out}")
+
+
+def main():
+    """Parses command line arguments and runs the fleet."""
+    parser = argparse.ArgumentParser(description='Run the Database Health Check Tool against many targets')
+    source = parser.add_argument_group('targets (at least one)')
+    source.add_argument('--configs', help='Directory whose *.yaml files are target configurations')
+    source.add_argument('--inventory', help='YAML inventory with a "targets" list')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='Targets to run concurrently (default: half the CPUs)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT_SECONDS,
+                        help=f'Per-target timeout in seconds (default: {DEFAULT_TIMEOUT_SECONDS})')
+    parser.add_argument('--output', default='health_check.adoc', help='Report file name in each target\'s output directory')
+    parser.add_argument('--incremental', action='store_true', help='Run every target in incremental mode')
+    parser.add_argument('--no-ship', action='store_true', help='Do not send results to the trend shipper')
+    args = parser.parse_args()
+
+    if not args.configs and not args.inventory:
+        parser.error('one of --configs or --inventory is required')
+
+    targets = load_targets(args.configs, args.inventory, args.timeout)
+    if not targets:
+        print("❌ Error: No target configurations found")
+        sys.exit(1)
+
+    print(f"--- Running Health Check Tool v{APP_VERSION} against {len(targets)} targets ---")
+    start = time.monotonic()
+    available_plugins = discover_plugins()
+    rules_cache = preload(targets, available_plugins)
+    print(f"✅ Loaded {len(available_plugins.loaded())} plugins and rules for {len(rules_cache)} technologies "
+          f"in {time.monotonic() - start:.1f}s")
+
+    workers = max(1, min(args.workers, len(targets)))
+    outcomes = run_fleet(targets, workers, available_plugins, rules_cache, args.output,
+                         incremental=args.incremental, ship=not args.no_ship)
+    print_summary(outcomes, time.monotonic() - start, workers)
+
+    if any(o['status'] != 'success' for o in outcomes):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+JSON Encoding Benchmark
+
+Compares the type-dispatch conversion and encoders in utils/json_utils.py
+with the previous isinstance/hasattr implementation on synthetic findings
+shaped like real PostgreSQL results (Decimal, datetime and timedelta columns)
+and Cassandra results (driver map/set types and UUIDs), and checks that both
+produce identical documents.
+
+Usage:
+    python scripts/benchmark_json_encoding.py --rows 200000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add the project root to the path for correct module imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import json_utils
+from utils.json_utils import UniversalJSONEncoder, convert_to_json_serializable, dumps_bytes
+
+try:
+    from cassandra.util import OrderedMapSerializedKey, SortedSet
+    CASSANDRA_TYPES = 'cassandra-driver'
+except ImportError:
+    CASSANDRA_TYPES = 'stand-ins'
+
+    class OrderedMapSerializedKey(Mapping):
+        """Dict-like but not a dict, like the driver's map type."""
+
+        def __init__(self, items):
+            self._items = dict(items)
+
+        def __getitem__(self, key):
+            return self._items[key]
+
+        def __iter__(self):
+            return iter(self._items)
+
+        def __len__(self):
+            return len(self._items)
+
+    class SortedSet:
+        """Iterable only, like the driver's set type."""
+
+        def __init__(self, items):
+            self._items = sorted(items)
+
+        def __iter__(self):
+            return iter(self._items)
+
+
+def legacy_convert(obj):
+    """convert_to_json_serializable() before the type-dispatch table."""
+    if obj is None:
+        return None
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, bytes):
+        try:
+            return obj.decode('utf-8')
+        except Exception:
+            return str(obj)
+    if isinstance(obj, dict):
+        return {k: legacy_convert(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, set)):
+        return [legacy_convert(item) for item in obj]
+    if hasattr(obj, 'items') and callable(getattr(obj, 'items')):
+        try:
+            return {k: legacy_convert(v) for k, v in obj.items()}
+        except Exception:
+            pass
+    if hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes)):
+        try:
+            return [legacy_convert(item) for item in obj]
+        except Exception:
+            pass
+    if isinstance(obj, (str, int, float, bool)):
+        return obj
+    try:
+        return str(obj)
+    except Exception:
+        return repr(obj)
+
+
+class LegacyEncoder(json.JSONEncoder):
+    """UniversalJSONEncoder.default() before the type-dispatch table."""
+
+    def default(self, obj):
+        return legacy_convert(obj)
+
+
+def build_postgres_findings(rows, rng, numeric=Decimal):
+    """Table statistics rows as psycopg2 returns them (NUMERIC as Decimal, or
+    as float with the fetch-time typecaster from plugins/postgres/utils/typecasters.py)."""
+    now = datetime(2026, 10, 16, 12, 0, 0)
+    data = [{
+        'schemaname': 'public',
+        'relname': f"table_{i}",
+        'n_live_tup': rng.randint(0, 10 ** 9),
+        'n_dead_tup': rng.randint(0, 10 ** 6),
+        'dead_pct': numeric(f"{rng.uniform(0, 100):.2f}"),
+        'total_size_mb': numeric(f"{rng.uniform(0, 10 ** 5):.3f}"),
+        'last_autovacuum': now - timedelta(seconds=rng.randint(0, 10 ** 6)),
+        'vacuum_age': timedelta(seconds=rng.randint(0, 10 ** 6)),
+    } for i in range(rows)]
+    return {'table_stats': {'bloat': {'status': 'success', 'data': data}}}
+
+
+def build_cassandra_findings(rows, rng):
+    """Schema rows as the Cassandra driver returns them."""
+    data = [{
+        'keyspace_name': f"ks_{i % 50}",
+        'table_name': f"table_{i}",
+        'id': uuid.UUID(int=rng.getrandbits(128)),
+        'replication': OrderedMapSerializedKey([('class', 'NetworkTopologyStrategy'), ('dc1', '3'), ('dc2', '3')]),
+        'compaction': OrderedMapSerializedKey([('class', 'SizeTieredCompactionStrategy'), ('max_threshold', '32')]),
+        'flags': SortedSet(['compound']),
+        'gc_grace_seconds': 864000,
+    } for i in range(rows)]
+    return {'schema_overview': {'tables': {'status': 'success', 'data': data}}}
+
+
+def timed(label, func, *args, repeat=3):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return label, best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the type-dispatch JSON conversion against the previous implementation')
+    parser.add_argument('--rows', type=int, default=200000, help='Rows per synthetic findings set (default: 200000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic findings')
+    args = parser.parse_args()
+
+    print(f"✅ JSON backend: {json_utils.JSON_BACKEND}; Cassandra types: {CASSANDRA_TYPES}")
+    failed = False
+    for name, builder in (('postgres', build_postgres_findings), ('cassandra', build_cassandra_findings)):
+        findings = builder(args.rows, random.Random(args.seed))
+        results = [
+            timed('legacy convert', legacy_convert, findings),
+            timed('dispatch convert', convert_to_json_serializable, findings),
+            timed('legacy dumps', lambda f: json.dumps(f, cls=LegacyEncoder).encode('utf-8'), findings),
+            timed('encoder dumps', lambda f: json.dumps(f, cls=UniversalJSONEncoder).encode('utf-8'), findings),
+            timed(f"dumps_bytes ({json_utils.JSON_BACKEND})", dumps_bytes, findings),
+        ]
+
+        if name == 'postgres':
+            typecast = build_postgres_findings(args.rows, random.Random(args.seed), numeric=float)
+            results.append(timed('dumps_bytes, typecast', dumps_bytes, typecast))
+
+        print(f"\n{name}: {args.rows:,} rows")
+        print(f"{'Stage':<24}{'Seconds':>10}{'Rows/sec':>14}{'Speedup':>10}")
+        for label, elapsed, _ in results:
+            baseline = results[0][1] if 'convert' in label else results[2][1]
+            print(f"{label:<24}{elapsed:>10.3f}{args.rows / elapsed:>14,.0f}{baseline / elapsed:>9.1f}x")
+
+        expected = results[0][2]
+        outputs = {label: result for label, _, result in results}
+        if outputs['dispatch convert'] != expected:
+            print("❌ Dispatch conversion differs from the legacy conversion")
+            failed = True
+        for label, result in outputs.items():
+            if 'dumps' in label and json.loads(result) != expected:
+                print(f"❌ {label} output differs from the legacy conversion")
+                failed = True
+        if not failed:
+            print("✅ All stages produce identical documents")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Rule Engine Benchmark
+
+Compares the compiled rule engine (utils/rule_compiler.py), row by row and
+with columnar batch evaluation (utils/columnar_rules.py), with the previous
+eval-per-row implementation of analyze_metric_severity() on synthetic
+findings built from a plugin's real rule files, and checks that all of them
+produce identical findings and rule statistics.
+
+Usage:
+    python scripts/benchmark_rule_engine.py --db-type postgres --rows 100000
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the path for correct module imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.columnar_rules import np
+from utils.rule_compiler import compile_rules
+from utils.rule_validator import validate_and_load_rules
+
+DATA_KEY_PATTERN = re.compile(r"data(?:\.get\(|\[)\s*['\"](\w+)['\"]")
+
+
+def legacy_analyze_metric_severity(metric_name, data_row, settings, all_findings, analysis_rules, rule_stats):
+    """The engine before compilation: keyword scan and eval() of every rule, for every row."""
+    highest_severity_finding = {'level': 'info', 'score': 0, 'reasoning': '', 'recommendations': [], 'rule_config_name': None}
+
+    for config_name, config in analysis_rules.items():
+        keyword_match = any(keyword in metric_name.lower() for keyword in config.get('metric_keywords', []))
+        if keyword_match:
+            conditions_met = all(cond.get('key') in data_row for cond in config.get('data_conditions', []) if cond.get('exists'))
+            if conditions_met:
+                for rule in config.get('rules', []):
+                    if config_name not in rule_stats:
+                        rule_stats[config_name] = {'checked': 0, 'triggered': 0, 'errors': 0}
+                    try:
+                        rule_stats[config_name]['checked'] += 1
+                        expression_result = eval(rule['expression'], {"data": data_row, "settings": settings, "all_structured_findings": all_findings})
+                        if expression_result:
+                            rule_stats[config_name]['triggered'] += 1
+                            evaluated_reasoning = eval(f"f\"{rule['reasoning']}\"", {"data": data_row, "settings": settings})
+                            current_finding = {
+                                'level': rule.get('level', 'info'),
+                                'score': rule.get('score', 0),
+                                'reasoning': evaluated_reasoning,
+                                'recommendations': rule.get('recommendations', []),
+                                'rule_config_name': config_name
+                            }
+                            if current_finding['score'] > highest_severity_finding['score']:
+                                highest_severity_finding = current_finding
+                    except Exception as e:
+                        rule_stats[config_name]['errors'] += 1
+                        print(f"Warning: Error evaluating rule '{config_name}' for metric '{metric_name}': {e}")
+
+    return highest_severity_finding
+
+
+def load_rules(db_type):
+    """Load and validate a plugin's rule files without importing the plugin (no driver needed)."""
+    rules_dir = Path(__file__).parent.parent / 'plugins' / db_type / 'rules'
+    all_rules = {}
+    for rule_file in sorted(rules_dir.glob('*.json')):
+        with open(rule_file, 'r') as f:
+            all_rules.update(validate_and_load_rules(json.load(f), str(rule_file)))
+    return all_rules
+
+
+def build_synthetic_findings(analysis_rules, total_rows, seed=42):
+    """
+    Build findings with one metric per rule config, named from its first
+    keyword, whose rows carry random values for every data key the config's
+    expressions reference.
+    """
+    rng = random.Random(seed)
+    metrics = []
+    for config_name, config in analysis_rules.items():
+        keywords = config.get('metric_keywords') or []
+        if not keywords:
+            continue
+        data_keys = set()
+        for rule in config.get('rules', []):
+            data_keys.update(DATA_KEY_PATTERN.findall(rule.get('expression', '')))
+        for cond in config.get('data_conditions', []):
+            if cond.get('key'):
+                data_keys.add(cond['key'])
+        metrics.append((f"{config_name}_check", keywords[0], sorted(data_keys)))
+
+    findings = {}
+    rows_per_metric = max(1, total_rows // max(1, len(metrics)))
+    for module_name, sub_name, data_keys in metrics:
+        rows = [{key: rng.randint(0, 1000) for key in data_keys} for _ in range(rows_per_metric)]
+        findings.setdefault(module_name, {})[sub_name] = {'status': 'success', 'data': rows}
+    return findings
+
+
+def run_engine(analyze, findings, settings, rules):
+    """Walk module -> sub-check -> rows the way generate_dynamic_prompt() does."""
+    results, rule_stats = [], {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # Rule error warnings would dominate the timing
+        for module_name, module_data in findings.items():
+            for sub_name, sub_data in module_data.items():
+                metric_name = f"{module_name}_{sub_name}"
+                for row in sub_data['data']:
+                    results.append(analyze(metric_name, row, settings, findings, rules, rule_stats))
+    return time.perf_counter() - start, results, rule_stats
+
+
+def run_batch_engine(compiled, findings, settings):
+    """Evaluate each data list with evaluate_batch(), expanding back to one finding per row."""
+    results, rule_stats = [], {}
+    default_finding = {'level': 'info', 'score': 0, 'reasoning': '', 'recommendations': [], 'rule_config_name': None}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for module_name, module_data in findings.items():
+            for sub_name, sub_data in module_data.items():
+                rows = sub_data['data']
+                triggered = {id(row): finding for row, finding in
+                             compiled.evaluate_batch(f"{module_name}_{sub_name}", rows, settings, findings, rule_stats)}
+                results.extend(triggered.get(id(row), default_finding) for row in rows)
+    return time.perf_counter() - start, results, rule_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compiled rule engine against the eval-per-row engine')
+    parser.add_argument('--db-type', default='postgres', help='Plugin whose rules/ directory to load (default: postgres)')
+    parser.add_argument('--rows', type=int, default=100000, help='Approximate number of synthetic data rows (default: 100000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic findings')
+    args = parser.parse_args()
+
+    analysis_rules = load_rules(args.db_type)
+    if not analysis_rules:
+        print(f"❌ Error: No rules found for db_type '{args.db_type}'")
+        sys.exit(1)
+
+    findings = build_synthetic_findings(analysis_rules, args.rows, args.seed)
+    row_count = sum(len(sub['data']) for module in findings.values() for sub in module.values())
+    settings = {'row_limit': 10}
+    print(f"✅ Loaded {len(analysis_rules)} rule configurations; {row_count:,} synthetic rows across {len(findings)} metrics")
+
+    legacy_time, legacy_results, legacy_stats = run_engine(legacy_analyze_metric_severity, findings, settings, analysis_rules)
+
+    compile_start = time.perf_counter()
+    compiled = compile_rules(analysis_rules).compiled
+    compile_time = time.perf_counter() - compile_start
+
+    def compiled_analyze(metric_name, row, settings, all_findings, rules, rule_stats):
+        return compiled.evaluate(metric_name, row, settings, all_findings, rule_stats)
+
+    compiled_time, compiled_results, compiled_stats = run_engine(compiled_analyze, findings, settings, compiled)
+    batch_time, batch_results, batch_stats = run_batch_engine(compiled, findings, settings)
+
+    columnar_label = 'columnar' + (' (numpy)' if np is not None else ' (array)')
+    print(f"\n{'Engine':<20}{'Seconds':>10}{'Rows/sec':>14}{'Speedup':>10}")
+    for label, elapsed in (('legacy', legacy_time), ('compiled', compiled_time), (columnar_label, batch_time)):
+        print(f"{label:<20}{elapsed:>10.3f}{row_count / elapsed:>14,.0f}{legacy_time / elapsed:>9.1f}x")
+    print(f"\nCompile time: {compile_time * 1000:.1f} ms")
+
+    failed = False
+    for label, results, stats in (('Compiled', compiled_results, compiled_stats), ('Columnar', batch_results, batch_stats)):
+        if results == legacy_results and stats == legacy_stats:
+            print(f"✅ {label} engine findings and rule statistics match the legacy engine")
+        else:
+            mismatches = sum(1 for a, b in zip(legacy_results, results) if a != b)
+            print(f"❌ {label} results differ: {mismatches} row findings, stats equal: {stats == legacy_stats}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Triggered Rules Insert Benchmark
+
+Inserts synthetic issues into a local PostgreSQL database one INSERT per
+issue (the previous implementation), with execute_values and with COPY
+(utils/triggered_rules.py), and checks that every method stores the same
+rows. The rows go to a temporary health_check_triggered_rules table that
+shadows the real one for this session only, and every transaction is
+rolled back, so the database is left unchanged.
+
+Usage:
+    python scripts/benchmark_triggered_rules.py --dsn "dbname=health_trends" --issues 10000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+# Add the project root to the path for correct module imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import triggered_rules
+
+TEMP_TABLE_SQL = """
+    CREATE TEMP TABLE health_check_triggered_rules (
+        id SERIAL PRIMARY KEY,
+        run_id INTEGER NOT NULL,
+        rule_config_name TEXT NOT NULL,
+        metric_name TEXT NOT NULL,
+        severity_level TEXT NOT NULL,
+        severity_score INTEGER NOT NULL,
+        reasoning TEXT,
+        recommendations JSONB,
+        triggered_data JSONB,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+    ) ON COMMIT DROP
+"""
+
+
+def build_analysis_results(issues, rng):
+    """Synthetic analysis results: a few critical and high issues, the rest medium (one per unused index)."""
+    def issue(i, level, rule, metric):
+        return {
+            'rule_config_name': rule,
+            'metric': metric,
+            'analysis': {'level': level, 'score': rng.randint(1, 10), 'reasoning': f"{rule} triggered on object {i}",
+                         'recommendations': [f"Review object {i}", "Check the documentation"]},
+            'data': {'schema': 'public', 'index_name': f"idx_{i}", 'size_bytes': rng.randint(8192, 10 ** 9), 'scans': 0},
+        }
+    critical = max(1, issues // 100)
+    high = max(1, issues // 20)
+    return {
+        'critical_issues': [issue(i, 'critical', 'wraparound', 'transaction_wraparound') for i in range(critical)],
+        'high_priority_issues': [issue(i, 'high', 'bloat', 'table_bloat') for i in range(high)],
+        'medium_priority_issues': [issue(i, 'medium', 'unused_index', 'unused_indexes')
+                                   for i in range(max(0, issues - critical - high))],
+    }
+
+
+def insert_per_row(cursor, run_id, analysis_results):
+    """The previous implementation: one INSERT per issue."""
+    for row in triggered_rules.triggered_rule_rows(run_id, analysis_results):
+        cursor.execute(triggered_rules.ROW_INSERT_SQL, row)
+
+
+def insert_execute_values(cursor, run_id, analysis_results):
+    rows = triggered_rules.triggered_rule_rows(run_id, analysis_results)
+    execute_values(cursor, triggered_rules.INSERT_SQL, rows, page_size=triggered_rules.EXECUTE_VALUES_PAGE_SIZE)
+
+
+def insert_copy(cursor, run_id, analysis_results):
+    triggered_rules._copy_rows(cursor, triggered_rules.triggered_rule_rows(run_id, analysis_results))
+
+
+def timed(conn, label, insert, analysis_results):
+    """Runs one method in its own rolled-back transaction and returns (label, seconds, stored rows)."""
+    with conn.cursor() as cursor:
+        cursor.execute(TEMP_TABLE_SQL)
+        start = time.perf_counter()
+        insert(cursor, 1, analysis_results)
+        elapsed = time.perf_counter() - start
+        cursor.execute("""
+            SELECT rule_config_name, metric_name, severity_level, severity_score, reasoning,
+                   recommendations::text, triggered_data::text
+            FROM health_check_triggered_rules ORDER BY id
+        """)
+        rows = cursor.fetchall()
+    conn.rollback()
+    return label, elapsed, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched triggered-rule inserts against one INSERT per issue')
+    parser.add_argument('--dsn', default='dbname=postgres', help='libpq connection string of a local PostgreSQL (default: dbname=postgres)')
+    parser.add_argument('--issues', type=int, default=10000, help='Issues to insert (default: 10000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic issues')
+    args = parser.parse_args()
+
+    analysis_results = build_analysis_results(args.issues, random.Random(args.seed))
+    conn = psycopg2.connect(args.dsn)
+    try:
+        results = [
+            timed(conn, 'per-row INSERT', insert_per_row, analysis_results),
+            timed(conn, 'execute_values', insert_execute_values, analysis_results),
+            timed(conn, 'COPY', insert_copy, analysis_results),
+        ]
+        results.append(timed(conn, 'insert_triggered_rules',
+                             lambda cursor, run_id, results: triggered_rules.insert_triggered_rules(cursor, run_id, results),
+                             analysis_results))
+    finally:
+        conn.close()
+
+    print(f"\n{args.issues:,} issues")
+    print(f"{'Method':<24}{'Seconds':>10}{'Rows/sec':>14}{'Speedup':>10}")
+    baseline = results[0][1]
+    for label, elapsed, _ in results:
+        print(f"{label:<24}{elapsed:>10.3f}{args.issues / elapsed:>14,.0f}{baseline / elapsed:>9.1f}x")
+
+    expected = results[0][2]
+    failed = False
+    for label, _, rows in results[1:]:
+        if [row[:5] + (json.loads(row[5]), json.loads(row[6])) for row in rows] != \
+                [row[:5] + (json.loads(row[5]), json.loads(row[6])) for row in expected]:
+            print(f"❌ {label} stored different rows than per-row INSERT")
+            failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ All methods store identical rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,33 +9,13 @@ import json
 import argparse
 import sys
 from pathlib import Path
-import pkgutil
-import importlib
 
 # Add the project root to the path for correct module imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.dynamic_prompt_generator import generate_dynamic_prompt
-from plugins.base import BasePlugin
-
-def discover_plugins():
-    """Finds and loads all available plugins."""
-    project_root = Path(__file__).parent.parent
-    plugins_path = project_root / "plugins"
-    
-    discovered_plugins = {}
-    for _, name, _ in pkgutil.iter_modules([str(plugins_path)]):
-        if name != "base":
-            try:
-                module = importlib.import_module(f'plugins.{name}')
-                for item_name in dir(module):
-                    item = getattr(module, item_name)
-                    if isinstance(item, type) and issubclass(item, BasePlugin) and item is not BasePlugin:
-                        plugin_instance = item()
-                        discovered_plugins[plugin_instance.technology_name] = plugin_instance
-            except Exception as e:
-                print(f"⚠️ Warning: Failed to load plugin '{name}': {e}. Skipping.")
-    return discovered_plugins
+from plugins.registry import PluginRegistry
+from utils.findings_stream import load_findings
 
 def main():
     parser = argparse.ArgumentParser(description='Health Check Rule and Prompt Tester')
@@ -48,14 +28,13 @@ def main():
 
     # --- Load Structured Findings ---
     try:
-        with open(args.findings, 'r') as f:
-            all_structured_findings = json.load(f)
+        all_structured_findings = load_findings(args.findings)
     except Exception as e:
         print(f"❌ Error loading findings file: {e}")
         sys.exit(1)
 
     # --- Discover and Activate the Correct Plugin ---
-    available_plugins = discover_plugins()
+    available_plugins = PluginRegistry()
     active_plugin = available_plugins.get(args.db_type)
 
     if not active_plugin:
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# test_bulk_summaries.py: Unit tests for the cached per-run summaries of bulk AI reports
+
+import unittest
+from contextlib import nullcontext
+from datetime import datetime
+from unittest import mock
+
+try:
+    import trends_app  # noqa: F401  (its package imports need flask, psycopg2, boto3, cryptography)
+    TRENDS_APP_AVAILABLE = True
+except ImportError:
+    TRENDS_APP_AVAILABLE = False
+
+RUN_COLUMNS = ('id', 'run_timestamp', 'company_name', 'target_host', 'target_port', 'target_db_name', 'db_technology')
+
+RULES = {'high_dead_tuples': {'metric_keywords': ['dead_tuples'], 'rules': [
+    {'expression': "data['n_dead_tup'] > 1000", 'level': 'critical', 'score': 10,
+     'reasoning': "{data['relname']} has {data['n_dead_tup']} dead tuples", 'recommendations': ['VACUUM']}]}}
+
+FINDINGS = {'vacuum': {'status': 'success', 'data': {'dead_tuples': {'data': [
+    {'relname': 'orders', 'n_dead_tup': 5000}, {'relname': 'users', 'n_dead_tup': 10}]}}}}
+
+
+def _run(run_id, day):
+    return (run_id, datetime(2026, 1, day), 'Acme', 'db1', 5432, 'app', 'postgres')
+
+
+class _Cursor:
+    """Answers the summary queries from canned rows, recording the statements."""
+
+    def __init__(self, runs, rules, rule_sets):
+        self.runs, self.rules, self.rule_sets = runs, rules, rule_sets
+        self.description = [(column,) for column in RUN_COLUMNS]
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        if 'FROM health_check_runs' in sql:
+            self._rows = [run for run in self.runs if run[0] in params[0]]
+        elif 'FROM health_check_triggered_rules' in sql:
+            self._rows = [rule for rule in self.rules if rule[0] in params[0]]
+        else:
+            self._rows = self.rule_sets
+
+    def fetchall(self):
+        return self._rows
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestRunSummaries(unittest.TestCase):
+    def setUp(self):
+        from trends_app import bulk_summaries
+        from trends_app.findings_cache import FindingsCache
+        self.bulk = bulk_summaries
+        self.cursor = _Cursor(
+            runs=[_run(2, 2), _run(1, 1)],  # Newest first, as selected
+            rules=[(1, 'high_dead_tuples', 'vacuum_dead_tuples', 'high', 'Too many dead tuples', ['VACUUM'])],
+            rule_sets=[('postgres', 3, '2026-01-01', RULES)])
+        conn = mock.Mock()
+        conn.cursor.return_value = self.cursor
+        app = mock.Mock()
+        app.app_context.return_value = nullcontext()
+        self.fetch = mock.Mock(return_value=[{'id': 2, 'findings': FINDINGS}])
+        patches = [
+            mock.patch.object(bulk_summaries, 'get_db_connection', return_value=conn),
+            mock.patch.object(bulk_summaries, '_summary_cache', FindingsCache()),
+            mock.patch.object(bulk_summaries, 'fetch_runs_by_ids', self.fetch),
+            mock.patch.object(bulk_summaries, 'load_trends_config', return_value={}),
+            mock.patch.object(bulk_summaries, 'current_app', new=mock.Mock(**{'_get_current_object.return_value': app})),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_runs_are_summarized_from_triggered_rules_or_findings(self):
+        summaries = self.bulk.load_run_summaries({}, [1, 2], [7])
+
+        self.assertEqual([summary['id'] for summary in summaries], [2, 1])
+        analyzed, stored = summaries
+        self.assertEqual(stored['issues_source'], 'triggered_rules')
+        self.assertEqual((stored['critical_count'], stored['high_count']), (0, 1))
+        self.assertEqual(analyzed['issues_source'], 'findings')
+        self.assertEqual(analyzed['issues'], [{
+            'check': 'high_dead_tuples', 'metric': 'vacuum_dead_tuples', 'severity': 'critical',
+            'issue': 'orders has 5000 dead tuples', 'recommendations': ['VACUUM']}])
+        # Only the run without triggered rules had its findings decrypted
+        self.fetch.assert_called_once_with({}, [2], [7])
+
+    def test_summaries_are_reused_while_the_rule_set_is_unchanged(self):
+        first = self.bulk.load_run_summaries({}, [1, 2], [7])
+        statements = len(self.cursor.statements)
+        second = self.bulk.load_run_summaries({}, [1, 2], [7])
+
+        self.assertEqual(second, first)
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertNotIn('health_check_triggered_rules', ' '.join(sql for sql, _ in self.cursor.statements[statements:]))
+
+        self.cursor.rule_sets = [('postgres', 3, '2026-02-01', RULES)]
+        self.bulk.load_run_summaries({}, [1, 2], [7])
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_access_is_checked_every_time(self):
+        self.bulk.load_run_summaries({}, [1, 2], [7])
+        self.cursor.runs = [_run(1, 1)]
+
+        summaries = self.bulk.load_run_summaries({}, [1, 2], [7])
+
+        self.assertEqual([summary['id'] for summary in summaries], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# test_columnar_rules.py: Unit tests for batched, column-mask rule evaluation
+
+import contextlib
+import io
+import random
+import unittest
+from unittest import mock
+
+from utils import columnar_rules
+from utils.columnar_rules import ColumnBatch, plan_expression
+from utils.rule_compiler import compile_rules
+
+RULES = {
+    'bloat': {
+        'metric_keywords': ['bloat'],
+        'data_conditions': [{'key': 'bloat_pct', 'exists': True}],
+        'rules': [
+            {'expression': "data['bloat_pct'] > 50 and data.get('size_mb', 0) >= 100", 'level': 'critical', 'score': 9,
+             'reasoning': "Index {data['index']} is {data['bloat_pct']}% bloated.", 'recommendations': ['REINDEX']},
+            {'expression': "20 < data['bloat_pct'] <= 50 or not data['size_mb'] < 500", 'level': 'high', 'score': 7,
+             'reasoning': "Index {data['index']} is bloated.", 'recommendations': []},
+            {'expression': "data['index'].startswith('tmp_')", 'level': 'medium', 'score': 5,
+             'reasoning': "Temporary index {data['index']}.", 'recommendations': []},
+            {'expression': "data['bloat_pct'] > 90", 'level': 'critical', 'score': 10,
+             'reasoning': "{data['missing']}", 'recommendations': []},
+        ]
+    },
+}
+
+
+def _rows(count, seed=7):
+    rng = random.Random(seed)
+    rows = [{'index': f"{rng.choice(['idx', 'tmp'])}_{i}", 'bloat_pct': rng.uniform(0, 100), 'size_mb': rng.randint(0, 1000)}
+            for i in range(count)]
+    rows[3]['size_mb'] = None  # A NULL column value makes that column fall back to row-by-row evaluation
+    return rows
+
+
+class TestPlanExpression(unittest.TestCase):
+    def test_simple_comparisons_are_planned(self):
+        self.assertIsNotNone(plan_expression("data['a'] > 5"))
+        self.assertIsNotNone(plan_expression("data.get('a', 0) >= -1.5 and (data['b'] < 3 or not data['c'] == 1)"))
+        self.assertIsNotNone(plan_expression("0 < data['a'] < 10"))
+
+    def test_other_expressions_are_not_planned(self):
+        for expression in ["data['a'] > settings['limit']", "len(data['a']) > 1", "data['a'] == 'x'",
+                           "data['a'] in (1, 2)", "data['a'] and data['a'] > 1", "data['a'] >", "1 > 0", None]:
+            self.assertIsNone(plan_expression(expression), expression)
+
+
+class TestEvaluateBatch(unittest.TestCase):
+    def setUp(self):
+        self.compiled = compile_rules(RULES).compiled
+
+    def _compare_with_row_by_row(self, rows):
+        scalar_stats, batch_stats = {}, {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = [(row, finding) for row in rows
+                        for finding in [self.compiled.evaluate('index_bloat', row, {}, {}, scalar_stats)]
+                        if finding['rule_config_name'] is not None]
+            actual = self.compiled.evaluate_batch('index_bloat', rows, {}, {}, batch_stats)
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(batch_stats, scalar_stats)
+        return actual, batch_stats
+
+    def test_matches_row_by_row_evaluation(self):
+        actual, stats = self._compare_with_row_by_row(_rows(500))
+
+        self.assertTrue(actual)
+        self.assertEqual(stats['bloat']['checked'], 2000)
+        self.assertGreater(stats['bloat']['errors'], 0)  # The reasoning of the last rule always fails
+
+    def test_matches_row_by_row_without_numpy(self):
+        with mock.patch.object(columnar_rules, 'np', None):
+            self._compare_with_row_by_row(_rows(300, seed=11))
+
+    def test_mixed_rows_fall_back_to_row_by_row(self):
+        rows = _rows(50)
+        rows[10] = {'index': 'idx_x', 'bloat_pct': 99.0}  # Different keys
+        rows[20] = 'not a row'
+
+        self.assertIsNone(ColumnBatch.from_rows(rows))
+        self._compare_with_row_by_row(rows)
+
+    def test_only_triggered_rows_are_returned(self):
+        rows = [{'index': 'idx_a', 'bloat_pct': 1.0, 'size_mb': 1}, {'index': 'idx_b', 'bloat_pct': 60.0, 'size_mb': 200}]
+        actual = self.compiled.evaluate_batch('index_bloat', rows, {}, {}, {})
+
+        self.assertEqual([(row['index'], finding['level']) for row, finding in actual], [('idx_b', 'critical')])
+        self.assertEqual(actual[0][1]['reasoning'], 'Index idx_b is 60.0% bloated.')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# test_db_pool.py: Unit tests for the web app's pooled connections and cached configuration
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+try:
+    import trends_app  # noqa: F401  (its package imports need flask, psycopg2, boto3, cryptography)
+    TRENDS_APP_AVAILABLE = True
+except ImportError:
+    TRENDS_APP_AVAILABLE = False
+
+
+def _fake_connection():
+    import psycopg2.extensions
+    conn = mock.Mock(closed=0, autocommit=False)
+    conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    return conn
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        from trends_app import db_pool
+        self.db_pool = db_pool
+        patcher = mock.patch.object(db_pool.psycopg2, 'connect', side_effect=lambda **kwargs: _fake_connection())
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = db_pool.ConnectionPool({'dbname': 'trends'}, max_idle=1)
+
+    def test_closed_connections_are_reused(self):
+        first = self.pool.connect()
+        raw = first._conn
+        first.cursor()
+        first.close()
+
+        raw.reset.assert_called_once()
+        raw.set_session.assert_called_once_with(isolation_level='DEFAULT', readonly='DEFAULT', deferrable='DEFAULT',
+                                                autocommit=False)
+        raw.close.assert_not_called()
+        self.assertTrue(first.closed)
+        self.assertIs(self.pool.connect()._conn, raw)
+        self.assertEqual(self.connect.call_count, 1)
+
+    def test_pool_never_refuses_and_keeps_max_idle(self):
+        first, second = self.pool.connect(), self.pool.connect()
+        raw_second = second._conn
+        first.close()
+        second.close()
+
+        self.assertEqual(self.connect.call_count, 2)
+        raw_second.close.assert_called_once()  # Beyond max_idle
+
+    def test_broken_and_old_connections_are_discarded(self):
+        conn = self.pool.connect()
+        raw = conn._conn
+        raw.closed = 2
+        conn.close()
+        self.assertIsNot(self.pool.connect()._conn, raw)
+
+        self.pool.recycle_seconds = 0
+        conn = self.pool.connect()
+        raw = conn._conn
+        time.sleep(0.01)
+        conn.close()
+        raw.close.assert_called_once()
+
+    def test_connections_that_cannot_be_reset_are_discarded(self):
+        conn = self.pool.connect()
+        raw = conn._conn
+        raw.reset.side_effect = self.db_pool.psycopg2.Error('server closed the connection unexpectedly')
+        conn.close()
+
+        raw.close.assert_called_once()
+        self.assertIsNot(self.pool.connect()._conn, raw)
+
+    def test_pools_are_per_database(self):
+        with mock.patch.object(self.db_pool, '_pool_settings', return_value=dict(self.db_pool.DEFAULTS)):
+            pool = self.db_pool.get_pool({'dbname': 'trends', 'port': 5432})
+            self.assertIs(self.db_pool.get_pool({'port': 5432, 'dbname': 'trends'}), pool)
+            self.assertIsNot(self.db_pool.get_pool({'dbname': 'other'}), pool)
+        self.db_pool.close_all_pools()
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestLoadTrendsConfig(unittest.TestCase):
+    def setUp(self):
+        from trends_app import utils
+        self.utils = utils
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.path = self.tmp / 'trends.yaml'
+        self.path.write_text("database:\n  dbname: trends\n")
+
+    def test_config_is_parsed_once_until_the_file_changes(self):
+        with mock.patch.object(self.utils.yaml, 'safe_load', wraps=self.utils.yaml.safe_load) as safe_load:
+            first = self.utils.load_trends_config(str(self.path))
+            first['database']['dbname'] = 'changed by a caller'
+            self.assertEqual(self.utils.load_trends_config(str(self.path)), {'database': {'dbname': 'trends'}})
+            self.assertEqual(safe_load.call_count, 1)
+
+            self.path.write_text("database:\n  dbname: trends_v2\n")
+            os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+            self.assertEqual(self.utils.load_trends_config(str(self.path))['database']['dbname'], 'trends_v2')
+            self.assertEqual(safe_load.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
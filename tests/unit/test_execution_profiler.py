@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# test_execution_profiler.py: Unit tests for per-check timing, query and SSH instrumentation
+
+import contextlib
+import copy
+import io
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from utils.execution_profiler import ExecutionProfiler
+from utils.findings_stream import FindingsWriter
+from utils.json_utils import dumps_bytes
+from utils.report_builder import ReportBuilder
+
+
+class FakeConnector:
+    def __init__(self, name='primary'):
+        self.name = name
+        self.queried_by = []
+        self._lock = threading.Lock()
+
+    def execute_query(self, query, return_raw=False):
+        self.queried_by.append(self.name)
+        rows = [{'n': i} for i in range(3)]
+        return ("formatted", rows) if return_raw else "formatted"
+
+    def create_worker_connector(self):
+        # Like the real connectors: a shallow copy with its own connection
+        with self._lock:
+            worker = copy.copy(self)
+            worker.name = f"worker-{threading.get_ident()}"
+            return worker
+
+    def close_worker_connector(self):
+        pass
+
+
+def _make_check_module(name, queries):
+    module = types.ModuleType(name)
+
+    def run(connector, settings):
+        for _ in range(queries):
+            connector.execute_query("SELECT 1", return_raw=True)
+        connector.execute_query("SELECT 1")
+        return f"=== {name}", {'status': 'success', 'data': [{'connector': connector.name}]}
+
+    module.run = run
+    sys.modules[name] = module
+    return name
+
+
+class TestExecutionProfile(unittest.TestCase):
+    def setUp(self):
+        self.modules = [_make_check_module(f"profiled_checks.mod_{i}", queries=i + 1) for i in range(4)]
+        self.sections = [{'title': 'Checks', 'actions': [{'type': 'module', 'module': m, 'function': 'run'} for m in self.modules]}]
+
+    def tearDown(self):
+        for name in self.modules:
+            sys.modules.pop(name, None)
+
+    def _build(self, connector, findings_writer=None, **settings):
+        builder = ReportBuilder(connector, settings, MagicMock(), self.sections, '1.0', findings_writer=findings_writer)
+        with contextlib.redirect_stdout(io.StringIO()):
+            adoc, findings = builder.build()
+        return adoc, findings, builder.execution_profile
+
+    def test_profile_counts_queries_rows_and_bytes_per_module(self):
+        connector = FakeConnector()
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = FindingsWriter(Path(tmp) / 'findings.json', compact=True)
+            adoc, findings, profile = self._build(connector, findings_writer=writer)
+            writer.close()
+
+        self.assertNotIn('execution_profile', findings)  # main.py adds the block to the findings
+        for i in range(4):
+            module = profile['modules'][f"mod_{i}"]
+            self.assertEqual(module['queries'], i + 2)
+            self.assertEqual(module['rows'], 3 * (i + 1))  # Only raw results are counted
+            # The size of the entry the findings writer encoded
+            self.assertEqual(module['bytes'], len(f'"mod_{i}": '.encode()) + len(dumps_bytes(findings[f"mod_{i}"])))
+            self.assertEqual(module['ssh_commands'], 0)
+        self.assertEqual(profile['totals']['queries'], sum(i + 2 for i in range(4)))
+        self.assertNotIn('execute_query', connector.__dict__)  # Instrumentation is removed after the build
+        self.assertNotIn('Execution Profile', adoc)
+
+    def test_bytes_are_zero_when_findings_are_not_streamed(self):
+        _, _, profile = self._build(FakeConnector())
+
+        self.assertEqual(profile['totals']['bytes'], 0)
+
+    def test_parallel_workers_keep_their_own_connection(self):
+        connector = FakeConnector()
+        _, findings, profile = self._build(connector, max_parallel_checks=3)
+
+        self.assertEqual(profile['parallel_workers'], 3)
+        self.assertNotIn('primary', connector.queried_by)
+        for i in range(4):
+            module = findings[f"mod_{i}"]['data'][0]
+            self.assertNotEqual(module['connector'], 'primary')
+            self.assertEqual(profile['modules'][f"mod_{i}"]['queries'], i + 2)
+
+    def test_appendix_and_opt_out(self):
+        adoc, _, _ = self._build(FakeConnector(), execution_profile_appendix=True)
+        self.assertIn("== Appendix: Check Execution Profile", adoc)
+        self.assertIn("|mod_3 |", adoc)
+
+        _, _, profile = self._build(FakeConnector(), execution_profile=False)
+        self.assertIsNone(profile)
+
+    def test_ssh_commands_are_attributed_to_the_running_module(self):
+        profiler = ExecutionProfiler()
+        with profiler.profile_module('nodetool_status'):
+            profiler._record_ssh_command('10.0.0.1', 'nodetool status')
+        profiler._record_ssh_command('10.0.0.1', 'uptime')  # Outside any module
+
+        self.assertEqual(profiler.modules['nodetool_status']['ssh_commands'], 1)
+        self.assertEqual(profiler.totals()['ssh_commands'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
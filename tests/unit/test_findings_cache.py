@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# test_findings_cache.py: Unit tests for the cache of decrypted findings and of KMS data keys
+
+import json
+import unittest
+from unittest import mock
+
+try:
+    import trends_app  # noqa: F401  (its package imports need flask, psycopg2, boto3, cryptography)
+    TRENDS_APP_AVAILABLE = True
+except ImportError:
+    TRENDS_APP_AVAILABLE = False
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestFindingsCache(unittest.TestCase):
+    def setUp(self):
+        from trends_app.findings_cache import FindingsCache
+        self.cache = FindingsCache(max_runs=3, max_bytes=100)
+
+    def test_least_recently_used_runs_are_evicted(self):
+        for run_id in (1, 2, 3):
+            self.cache.put(run_id, {'id': run_id}, 10)
+        self.cache.get(1)
+        self.cache.put(4, {'id': 4}, 10)
+
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get(1), {'id': 1})
+        self.assertEqual(self.cache.stats(), {'runs': 3, 'bytes': 30})
+
+    def test_size_is_bounded(self):
+        self.cache.put(1, {'id': 1}, 60)
+        self.cache.put(2, {'id': 2}, 60)
+        self.cache.put(3, {'id': 3}, 101)
+
+        self.assertIsNone(self.cache.get(1))
+        self.assertIsNone(self.cache.get(3))
+        self.assertEqual(self.cache.stats(), {'runs': 1, 'bytes': 60})
+        self.cache.discard(2)
+        self.assertEqual(self.cache.stats(), {'runs': 0, 'bytes': 0})
+
+
+def _run(run_id, findings):
+    return {'id': run_id, 'run_timestamp': f"2026-01-0{run_id}T00:00:00", 'decrypted_findings': findings,
+            'target_host': 'db1', 'target_port': 5432, 'target_db_name': 'app', 'encryption_mode': 'pgcrypto'}
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestFetchRunsByIds(unittest.TestCase):
+    def setUp(self):
+        from trends_app import database
+        from trends_app.findings_cache import FindingsCache
+        self.database = database
+        self.cursor = mock.Mock()
+        conn = mock.Mock()
+        conn.cursor.return_value = self.cursor
+        patches = [
+            mock.patch.object(database, 'get_db_connection', return_value=conn),
+            mock.patch.object(database, 'get_findings_cache', return_value=FindingsCache()),
+            mock.patch.object(database, 'load_trends_config', return_value={}),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_cached_runs_are_not_decrypted_again(self):
+        self.cursor.fetchall.side_effect = [[(1,), (2,)], [(1,), (2,)], [(2,)]]
+        self.cursor.fetchone.return_value = [[_run(1, {'a': 1}), _run(2, {'b': 2})]]
+
+        first = self.database.fetch_runs_by_ids({}, [1, 2], [7])
+        second = self.database.fetch_runs_by_ids({}, [1, 2], [7])
+        # Access is checked again: run 1 no longer belongs to an accessible company
+        third = self.database.fetch_runs_by_ids({}, [1, 2], [8])
+
+        self.assertEqual([run['id'] for run in first], [2, 1])
+        self.assertEqual(second, first)
+        self.assertEqual([run['id'] for run in third], [2])
+        decrypting = [call for call in self.cursor.execute.call_args_list if 'get_runs_by_ids' in call.args[0]]
+        self.assertEqual(len(decrypting), 1)
+        self.assertEqual(self.cursor.execute.call_args_list[-1].args[1], ([1, 2], [8]))
+
+    def test_kms_data_keys_are_reused(self):
+        from cryptography.fernet import Fernet
+        key = Fernet.generate_key()
+        kms = mock.Mock()
+        kms.decrypt.return_value = {'Plaintext': key}
+        runs = []
+        for run_id in (1, 2):
+            run = _run(run_id, Fernet(key).encrypt(json.dumps({'run': run_id}).encode()).decode())
+            run.update(encryption_mode='kms', encrypted_data_key=b'wrapped')
+            runs.append(run)
+        self.cursor.fetchall.return_value = [(1,), (2,)]
+        self.cursor.fetchone.return_value = [runs]
+
+        with mock.patch.object(self.database, 'get_kms_client', return_value=kms), \
+                mock.patch.dict(self.database._data_keys, clear=True):
+            fetched = self.database.fetch_runs_by_ids({}, [1, 2], [7])
+
+        self.assertEqual([run['findings'] for run in fetched], [{'run': 2}, {'run': 1}])
+        kms.decrypt.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# test_findings_diff.py: Unit tests for the structural diff of run findings
+
+import json
+import unittest
+from unittest import mock
+
+from utils import findings_diff
+from utils.findings_diff import (ITEM_ADDED, ITEM_REMOVED, VALUE_CHANGED, Change, FindingsDiffCache,
+                                 diff_findings, format_change_path)
+
+
+def _findings(tables, settings_status='success'):
+    return {
+        'table_metrics': {'status': 'success', 'data': {'table_sizes': {'status': 'success', 'data': tables}}},
+        'general_config_settings': {'status': settings_status, 'data': {'general_settings': {'data': [
+            {'name': 'work_mem', 'setting': '4MB'}, {'name': 'shared_buffers', 'setting': '1GB'}]}}},
+    }
+
+
+ORDERS = {'schemaname': 'public', 'relname': 'orders', 'size': 100}
+USERS = {'schemaname': 'public', 'relname': 'users', 'size': 10}
+EVENTS = {'schemaname': 'audit', 'relname': 'events', 'size': 5}
+
+
+class TestFindingsDiff(unittest.TestCase):
+    def test_identical_runs_have_no_changes(self):
+        self.assertEqual(diff_findings(_findings([ORDERS, USERS]), _findings([USERS, ORDERS])), [])
+
+    def test_rows_are_matched_by_natural_key(self):
+        old = _findings([ORDERS, USERS, EVENTS])
+        new = _findings([dict(USERS, size=20), {'schemaname': 'public', 'relname': 'items', 'size': 1}, ORDERS])
+
+        changes = diff_findings(old, new)
+
+        table_path = ('table_metrics', 'data', 'table_sizes', 'data')
+        self.assertEqual(changes, [
+            Change(VALUE_CHANGED, table_path + ('schemaname=public, relname=users', 'size'), 10, 20),
+            Change(ITEM_REMOVED, table_path + ('schemaname=audit, relname=events',), EVENTS, None),
+            Change(ITEM_ADDED, table_path + ('schemaname=public, relname=items',), None,
+                   {'schemaname': 'public', 'relname': 'items', 'size': 1}),
+        ])
+        self.assertEqual(format_change_path(changes[0].path),
+                         'table_metrics[data][table_sizes][data][schemaname=public, relname=users][size]')
+
+    def test_checks_declare_their_own_keys(self):
+        old = {'check_partition_balance': {'data': {'brokers': [{'broker_id': 1, 'partition_count': 10}]}}}
+        new = {'check_partition_balance': {'data': {'brokers': [{'broker_id': 1, 'partition_count': 12}]}}}
+
+        changes = diff_findings(old, new)
+
+        self.assertEqual([change.path[-2:] for change in changes], [('broker_id=1', 'partition_count')])
+
+    def test_rows_without_a_unique_key_are_compared_as_multisets(self):
+        old = {'check': {'data': [{'count': 1}, {'count': 1}, {'count': 2}]}}
+        new = {'check': {'data': [{'count': 2}, {'count': 1}, {'count': 3}]}}
+
+        changes = diff_findings(old, new)
+
+        self.assertEqual(changes, [Change(ITEM_REMOVED, ('check', 'data'), {'count': 1}, None),
+                                   Change(ITEM_ADDED, ('check', 'data'), None, {'count': 3})])
+
+    def test_values_of_a_different_type_are_changes(self):
+        changes = diff_findings({'check': {'enabled': 1}}, {'check': {'enabled': True, 'new': 'x'}})
+
+        self.assertEqual(changes, [Change(VALUE_CHANGED, ('check', 'enabled'), 1, True),
+                                   Change(ITEM_ADDED, ('check', 'new'), None, 'x')])
+
+    def test_unchanged_modules_are_not_walked(self):
+        old, new = _findings([ORDERS]), _findings([ORDERS], settings_status='error')
+
+        with mock.patch.object(findings_diff._Differ, 'diff', autospec=True,
+                               side_effect=findings_diff._Differ.diff) as walk:
+            changes = diff_findings(old, new)
+
+        self.assertEqual({call.args[3][0] for call in walk.call_args_list}, {'general_config_settings'})
+        self.assertEqual(changes, [Change(VALUE_CHANGED, ('general_config_settings', 'status'), 'success', 'error')])
+
+
+class TestFindingsDiffCache(unittest.TestCase):
+    def test_pairs_of_stored_runs_are_diffed_once(self):
+        cache = FindingsDiffCache(max_pairs=1)
+        old, new = _findings([ORDERS]), _findings([USERS])
+
+        with mock.patch.object(findings_diff, 'diff_findings', wraps=diff_findings) as diff:
+            first = cache.diff(1, old, 2, new)
+            self.assertIs(cache.diff(1, old, 2, new), first)
+            cache.diff(2, new, 3, old)  # Evicts (1, 2)
+            cache.diff(1, old, 2, new)
+            cache.diff(None, old, 2, new)
+            cache.diff(None, old, 2, new)
+
+        self.assertEqual(diff.call_count, 5)
+        self.assertEqual(len(first), 2)
+
+    def test_summaries_are_cached_instead_of_changes(self):
+        cache = FindingsDiffCache(summarize=lambda changes: [format_change_path(c.path) for c in changes])
+        old, new = _findings([ORDERS]), _findings([USERS])
+
+        summary = cache.diff(1, old, 2, new)
+
+        self.assertTrue(all(isinstance(line, str) for line in summary))
+        self.assertIs(cache.diff(1, old, 2, new), summary)
+
+    def test_results_are_bounded_by_size(self):
+        old, new = _findings([ORDERS]), _findings([USERS])
+        size = len(json.dumps(FindingsDiffCache().diff(1, old, 2, new), separators=(',', ':'), default=str))
+        cache = FindingsDiffCache(max_bytes=size + size // 2)
+
+        cache.diff(1, old, 2, new)
+        cache.diff(2, new, 1, old)  # Evicts (1, 2) by size, not by count
+
+        self.assertEqual(cache.stats()['pairs'], 1)
+        self.assertLessEqual(cache.stats()['bytes'], cache.max_bytes)
+
+        too_small = FindingsDiffCache(max_bytes=size - 1)
+        self.assertEqual(len(too_small.diff(1, old, 2, new)), 2)
+        self.assertEqual(too_small.stats()['pairs'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
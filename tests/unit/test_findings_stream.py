@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# test_findings_stream.py: Unit tests for the streaming findings writer and lazy reader
+
+import contextlib
+import gzip
+import io
+import json
+import sys
+import tempfile
+import types
+import unittest
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from utils import findings_stream
+from utils.findings_stream import FindingsReader, FindingsWriter, find_findings_file, findings_path
+from utils.report_builder import ReportBuilder
+
+
+def _findings():
+    return {
+        'postgres_overview': {'version_info': {'status': 'success', 'data': [{'version': '16.2', 'size': Decimal('1.5')}]}},
+        'table_stats': {'tables': {'status': 'success', 'data': [{'name': 'a "quoted" }\n name'}, {'name': 'b'}]}},
+        'prompt_template_name': 'default_prompt.j2',
+        'db_metadata': {},
+    }
+
+
+class TestFindingsStream(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, findings, compression='none', compact=False):
+        writer = FindingsWriter(findings_path(self.tmp, compression), compact=compact)
+        for key, value in findings.items():
+            writer.write_entry(key, value)
+        writer.close()
+        return writer.path
+
+    def test_round_trip_in_every_layout(self):
+        expected = json.loads(json.dumps(_findings(), default=float))
+        for compression in ('none', 'gzip'):
+            for compact in (False, True):
+                path = self._write(_findings(), compression, compact)
+                opener = gzip.open if compression == 'gzip' else open
+                with opener(path, 'rb') as f:
+                    self.assertEqual(json.loads(f.read()), expected)  # Plain JSON for any reader
+                self.assertEqual(FindingsReader(path).to_dict(), expected)
+                self.assertFalse(path.with_name(path.name + '.partial').exists())
+
+    def test_entries_are_parsed_on_access(self):
+        path = self._write(_findings())
+        reader = FindingsReader(path)
+
+        self.assertEqual(list(reader), list(_findings()))
+        self.assertEqual(reader._parsed, {})
+        self.assertEqual(reader['table_stats']['tables']['data'][1], {'name': 'b'})
+        self.assertEqual(list(reader._parsed), ['table_stats'])
+
+    def test_earlier_json_dump_files_and_replaced_entries(self):
+        legacy = self.tmp / 'legacy.json'
+        legacy.write_text(json.dumps(_findings(), indent=2, default=float))
+        self.assertEqual(FindingsReader(legacy)['postgres_overview']['version_info']['data'][0]['size'], 1.5)
+
+        findings = _findings()
+        writer = FindingsWriter(findings_path(self.tmp))
+        writer.write_missing(findings)
+        findings['db_metadata'] = {'version': '16.2'}  # Replaced after streaming
+        writer.write_missing(findings)
+        writer.close()
+        self.assertEqual(FindingsReader(writer.path)['db_metadata'], {'version': '16.2'})
+        self.assertEqual(find_findings_file(self.tmp), writer.path)
+
+    def test_entries_changed_in_place_are_written_again_once_touched(self):
+        findings = _findings()
+        writer = FindingsWriter(findings_path(self.tmp))
+        writer.write_missing(findings)
+        findings['db_metadata']['version'] = '16.3'  # Same object, new content
+        writer.touch('db_metadata')
+        with patch.object(writer, 'write_entry', wraps=writer.write_entry) as write_entry:
+            writer.write_missing(findings)
+            writer.write_missing(findings)
+        writer.close()
+
+        write_entry.assert_called_once_with('db_metadata', findings['db_metadata'])
+        self.assertEqual(FindingsReader(writer.path)['db_metadata']['version'], '16.3')
+
+    def test_aborted_writer_leaves_no_file(self):
+        writer = FindingsWriter(findings_path(self.tmp))
+        writer.write_entry('postgres_overview', {})
+        writer.abort()
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+    @unittest.skipUnless(findings_stream.zstandard is not None, "zstandard is not installed")
+    def test_zstd(self):
+        path = self._write(_findings(), 'zstd', compact=True)
+        self.assertEqual(FindingsReader(path)['prompt_template_name'], 'default_prompt.j2')
+
+    def test_report_builder_streams_each_module(self):
+        names = [f"streamed_checks.mod_{i}" for i in range(4)]
+        for i, name in enumerate(names):
+            module = types.ModuleType(name)
+            module.run = lambda connector, settings, i=i: (f"=== {i}", {'status': 'success', 'data': [{'i': i}]})
+            sys.modules[name] = module
+        self.addCleanup(lambda: [sys.modules.pop(name, None) for name in names])
+        sections = [{'title': 'Checks', 'actions': [{'type': 'module', 'module': m, 'function': 'run'} for m in names]}]
+
+        writer = FindingsWriter(findings_path(self.tmp, 'gzip'))
+        builder = ReportBuilder(MagicMock(), {}, MagicMock(), sections, '1.0', findings_writer=writer)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, findings = builder.build()
+
+        self.assertEqual(sorted(writer.written), [f"mod_{i}" for i in range(4)])  # Before the file is closed
+        writer.write_missing(findings)
+        writer.close()
+        self.assertEqual(FindingsReader(writer.path).to_dict(), findings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# test_incremental_cache.py: Unit tests for reusing unchanged check results in incremental runs
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import types
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from utils.incremental_cache import IncrementalCache, mark_reused
+from utils.report_builder import ReportBuilder
+
+SETTINGS = {'company_name': 'Example', 'incremental_max_age_hours': 24}
+
+
+class IncrementalRunTest(unittest.TestCase):
+    def setUp(self):
+        self.fingerprints = {'fp_checks.stats': 'window-1'}
+        self.calls = []
+        self.statuses = {}
+        self.modules = [self._make_module('fp_checks.stats', fingerprint=True), self._make_module('fp_checks.live')]
+        self.sections = [{'title': 'Checks', 'actions': [{'type': 'module', 'module': m, 'function': 'run'} for m in self.modules]}]
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        for name in self.modules:
+            sys.modules.pop(name, None)
+        self.tmpdir.cleanup()
+
+    def _make_module(self, name, fingerprint=False):
+        module = types.ModuleType(name)
+        if fingerprint:
+            module.get_fingerprint = lambda connector, settings: self.fingerprints[name]
+
+        def run(connector, settings):
+            self.calls.append(name)
+            return f"=== {name}\nrun {len(self.calls)}", {'status': self.statuses.get(name, 'success'), 'data': [len(self.calls)]}
+
+        module.run = run
+        sys.modules[name] = module
+        return name
+
+    def _run(self, now):
+        """One incremental run: load, build, then save the findings and cache the way main.py does."""
+        cache = IncrementalCache.load(self.tmpdir.name, SETTINGS, '1.0')
+        cache.now = now
+        builder = ReportBuilder(MagicMock(), SETTINGS, MagicMock(), self.sections, '1.0', incremental_cache=cache)
+        self.calls.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            adoc, findings = builder.build()
+        findings['incremental_run'] = cache.summary()
+        with open(f"{self.tmpdir.name}/structured_health_check_findings.json", 'w') as f:
+            json.dump(findings, f)
+        cache.save(self.tmpdir.name)
+        return adoc, findings
+
+    def test_unchanged_fingerprint_reuses_previous_results(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        _, first = self._run(start)
+        self.assertEqual(self.calls, ['fp_checks.stats', 'fp_checks.live'])
+        self.assertEqual(first['incremental_run']['reused_modules'], {})
+
+        adoc, second = self._run(start + timedelta(hours=1))
+
+        self.assertEqual(self.calls, ['fp_checks.live'])  # Modules without a fingerprint always run
+        self.assertEqual(second['stats'], first['stats'])
+        self.assertEqual(second['incremental_run']['reused_modules'], {'stats': {'collected_at': start.isoformat()}})
+        self.assertIn(f"=== fp_checks.stats\n[NOTE]\n====\nResults reused from the run at {start.isoformat()}", adoc)
+        self.assertNotIn('reused', adoc.split('=== fp_checks.live')[1])
+
+        # The cache keeps the unmarked content, so notes do not pile up across runs
+        adoc, _ = self._run(start + timedelta(hours=2))
+        self.assertEqual(adoc.count('Results reused'), 1)
+
+    def test_changed_fingerprint_reruns_module(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self._run(start)
+        self.fingerprints['fp_checks.stats'] = 'window-2'
+
+        _, findings = self._run(start + timedelta(hours=1))
+
+        self.assertIn('fp_checks.stats', self.calls)
+        self.assertEqual(findings['incremental_run']['reused_modules'], {})
+
+    def test_results_older_than_max_age_are_not_reused(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self._run(start)
+        self._run(start + timedelta(hours=12))  # Reused; the age counts from the original run
+
+        self._run(start + timedelta(hours=25))
+
+        self.assertIn('fp_checks.stats', self.calls)
+
+    def test_failed_results_are_not_cached(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.statuses['fp_checks.stats'] = 'error'
+        self._run(start)
+
+        self._run(start + timedelta(hours=1))
+
+        self.assertIn('fp_checks.stats', self.calls)
+
+
+class TestQueryOptimizationFingerprint(unittest.TestCase):
+    def setUp(self):
+        from plugins.postgres.checks import check_query_optimization_opportunities
+        self.check = check_query_optimization_opportunities
+        self.tables = [{'tuples_written': 100, 'last_analyzed': '2026-10-01 02:00:00+00'}]
+        self.connector = MagicMock(has_pgstat=True, version_info={'is_pg14_or_newer': True})
+        self.connector.execute_query.side_effect = self._execute_query
+
+    def _execute_query(self, query, params=None, return_raw=False):
+        if 'pg_stat_user_tables' in query:
+            return '', [dict(row) for row in self.tables]
+        return '', [{'dealloc': 0, 'stats_reset': '2026-09-01 00:00:00+00', 'database_stats_reset': None}]
+
+    def test_table_activity_changes_the_fingerprint(self):
+        first = self.check.get_fingerprint(self.connector, {})
+        self.assertEqual(self.check.get_fingerprint(self.connector, {}), first)
+
+        self.tables[0]['tuples_written'] = 150
+        self.assertNotEqual(self.check.get_fingerprint(self.connector, {}), first)
+
+    def test_no_fingerprint_without_pg_stat_statements_window(self):
+        self.connector.version_info = {'is_pg14_or_newer': False}
+
+        self.assertIsNone(self.check.get_fingerprint(self.connector, {}))
+
+
+class TestMarkReused(unittest.TestCase):
+    def test_note_goes_under_the_heading(self):
+        self.assertTrue(mark_reused("=== Title\nbody", 'T').startswith("=== Title\n[NOTE]\n====\nResults reused from the run at T"))
+        self.assertTrue(mark_reused("plain body", 'T').endswith("====\n\nplain body"))
+
+
+if __name__ == '__main__':
+    unittest.main()
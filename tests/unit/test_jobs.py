@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# test_jobs.py: Unit tests for the background jobs of report generation
+
+import unittest
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+try:
+    import trends_app  # noqa: F401  (its package imports need flask, psycopg2, boto3, cryptography)
+    TRENDS_APP_AVAILABLE = True
+except ImportError:
+    TRENDS_APP_AVAILABLE = False
+
+
+class _QueueStandIn:
+    """In-process stand-in for the worker pool: runs the submitted jobs when told to."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run_all(self):
+        tasks, self.tasks = self.tasks, []
+        for fn, args in tasks:
+            fn(*args)
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        from trends_app import jobs
+        self.jobs = jobs
+        self.app = mock.Mock()
+        self.app.app_context.return_value = nullcontext()
+        patcher = mock.patch.object(jobs, 'current_app', new=mock.Mock(**{'_get_current_object.return_value': self.app}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.workers = _QueueStandIn()
+        self.queue = jobs.JobQueue(jobs.MemoryJobStore(), max_pending=2, executor=self.workers)
+
+    def test_job_result_is_available_to_its_user_once_finished(self):
+        job_id = self.queue.submit('ai_report', 5, lambda run_id: {'report_id': 9, 'run_id': run_id}, 42)
+
+        self.assertEqual(self.queue.get(job_id, 5)['status'], self.jobs.QUEUED)
+        self.workers.run_all()
+
+        job = self.queue.get(job_id, 5)
+        self.assertEqual(job['status'], self.jobs.SUCCEEDED)
+        self.assertEqual(job['result'], {'report_id': 9, 'run_id': 42})
+        self.assertIsNone(self.queue.get(job_id, 6))
+        self.assertEqual(self.queue.pending(), 0)
+
+    def test_failed_jobs_report_their_error(self):
+        def refused():
+            raise self.jobs.JobError("Error: AI provider refused the request")
+
+        def broken():
+            raise KeyError('report_id')
+
+        refused_id = self.queue.submit('slides', 5, refused)
+        broken_id = self.queue.submit('slides', 5, broken)
+        self.workers.run_all()
+
+        self.assertEqual(self.queue.get(refused_id, 5)['error'], "Error: AI provider refused the request")
+        # Unexpected errors are logged, not shown to the user
+        self.assertEqual(self.queue.get(broken_id, 5)['error'], self.jobs.UNEXPECTED_ERROR)
+        self.app.logger.error.assert_called_once()
+
+    def test_pending_jobs_are_bounded(self):
+        self.queue.submit('slides', 5, dict)
+        self.queue.submit('slides', 5, dict)
+
+        with self.assertRaises(self.jobs.JobQueueFull):
+            self.queue.submit('slides', 5, dict)
+
+        self.workers.run_all()
+        self.queue.submit('slides', 5, dict)
+        self.assertEqual(self.queue.pending(), 1)
+
+    def test_stale_jobs_are_reported_as_failed(self):
+        job_id = self.queue.submit('trend_analysis', 5, dict)
+        self.queue.store._jobs[job_id]['created_at'] -= timedelta(hours=1)
+
+        job = self.queue.get(job_id, 5)
+
+        self.assertEqual((job['status'], job['error']), (self.jobs.FAILED, self.jobs.INTERRUPTED_ERROR))
+
+    def test_long_running_job_that_started_recently_is_not_stale(self):
+        job_id = self.queue.submit('bulk_ai_report', 5, dict)
+        self.queue.store.start(job_id)
+        self.queue.store._jobs[job_id]['created_at'] -= timedelta(hours=1)  # Waited long in the queue
+
+        self.assertEqual(self.queue.get(job_id, 5)['status'], self.jobs.RUNNING)
+
+        self.queue.store._jobs[job_id]['started_at'] -= timedelta(hours=1)
+        self.assertEqual(self.queue.get(job_id, 5)['error'], self.jobs.INTERRUPTED_ERROR)
+
+    def test_old_jobs_are_purged_on_submit(self):
+        old_id = self.queue.submit('slides', 5, dict)
+        self.workers.run_all()
+        self.queue.store._jobs[old_id]['created_at'] = datetime.now(timezone.utc) - timedelta(days=2)
+
+        self.queue.submit('slides', 5, dict)
+
+        self.assertIsNone(self.queue.get(old_id, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# test_json_encoding.py: Unit tests for the type-dispatch JSON conversion and fast encoders
+
+import json
+import unittest
+import uuid
+from collections.abc import Mapping
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
+
+from utils import json_utils
+from utils.json_utils import UniversalJSONEncoder, convert_to_json_serializable, dumps_bytes
+
+try:
+    from plugins.postgres.utils.typecasters import _cast_numeric
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+
+class OrderedMapSerializedKey(Mapping):
+    """Stands in for the Cassandra driver's map type (dict-like, not a dict)."""
+
+    def __init__(self, items):
+        self._items = dict(items)
+
+    def __getitem__(self, key):
+        return self._items[key]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SortedSet:
+    """Stands in for the Cassandra driver's set type (iterable only)."""
+
+    def __init__(self, items):
+        self._items = sorted(items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class Opaque:
+    def __str__(self):
+        return 'opaque'
+
+
+def _sample():
+    return {
+        'size': Decimal('12.50'),
+        'collected': datetime(2026, 10, 16, 12, 30, tzinfo=timezone.utc),
+        'day': date(2026, 10, 16),
+        'age': timedelta(minutes=2),
+        'raw': b'bytes',
+        'bad_raw': b'\xff',
+        'tags': {'a'},
+        'pair': (1, Decimal('2')),
+        'replication': OrderedMapSerializedKey({'dc1': Decimal('3'), 'class': 'NetworkTopologyStrategy'}),
+        'replicas': SortedSet([Decimal('2'), Decimal('1')]),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'other': Opaque(),
+        'nested': [{'n': None, 'ok': True, 'rows': [Decimal('1.5')]}],
+    }
+
+
+EXPECTED = {
+    'size': 12.5,
+    'collected': '2026-10-16T12:30:00+00:00',
+    'day': '2026-10-16',
+    'age': 120.0,
+    'raw': 'bytes',
+    'bad_raw': "b'\\xff'",
+    'tags': ['a'],
+    'pair': [1, 2.0],
+    'replication': {'dc1': 3.0, 'class': 'NetworkTopologyStrategy'},
+    'replicas': [1.0, 2.0],
+    'id': '12345678-1234-5678-1234-567812345678',
+    'other': 'opaque',
+    'nested': [{'n': None, 'ok': True, 'rows': [1.5]}],
+}
+
+
+class TestTypeDispatch(unittest.TestCase):
+    def test_conversion_of_driver_and_standard_types(self):
+        self.assertEqual(convert_to_json_serializable(_sample()), EXPECTED)
+        self.assertEqual(json.loads(json.dumps(_sample(), cls=UniversalJSONEncoder)), EXPECTED)
+
+    def test_resolved_converters_are_cached_per_type(self):
+        convert_to_json_serializable(_sample())
+        for cached_type in (OrderedMapSerializedKey, SortedSet, uuid.UUID, date):
+            self.assertIn(cached_type, json_utils._CONVERTERS)
+
+        with mock.patch.object(json_utils, '_resolve_converter') as resolve:
+            convert_to_json_serializable(_sample())
+        resolve.assert_not_called()
+
+    def test_both_backends_produce_the_same_document(self):
+        with mock.patch.object(json_utils, 'orjson', None):
+            standard = dumps_bytes(_sample())
+            standard_indented = dumps_bytes(_sample(), indent=True)
+        self.assertEqual(json.loads(standard), EXPECTED)
+        self.assertEqual(json.loads(standard_indented), EXPECTED)
+        self.assertEqual(json.loads(dumps_bytes(_sample())), EXPECTED)
+        self.assertEqual(json.loads(dumps_bytes({'big': 2 ** 70})), {'big': 2 ** 70})  # Too wide for orjson
+
+    @unittest.skipUnless(PSYCOPG2_AVAILABLE, "psycopg2 is not installed")
+    def test_numeric_typecaster(self):
+        self.assertEqual(_cast_numeric('42', None), 42)
+        self.assertIsInstance(_cast_numeric('42', None), int)
+        self.assertEqual(_cast_numeric('12.50', None), 12.5)
+        self.assertIsNone(_cast_numeric(None, None))
+        self.assertNotEqual(_cast_numeric('NaN', None), _cast_numeric('NaN', None))
+        self.assertEqual(_cast_numeric('12345678901234.5678', None), Decimal('12345678901234.5678'))
+        self.assertIsInstance(_cast_numeric('0.000123456789012345', None), float)
+
+
+if __name__ == '__main__':
+    unittest.main()
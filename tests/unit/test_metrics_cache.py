@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# test_metrics_cache.py: Unit tests for the cached metric table lookups
+
+import unittest
+from unittest import mock
+
+try:
+    import trends_app  # noqa: F401  (its package imports need flask, psycopg2, boto3, cryptography)
+    TRENDS_APP_AVAILABLE = True
+except ImportError:
+    TRENDS_APP_AVAILABLE = False
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestMetricsCache(unittest.TestCase):
+    def setUp(self):
+        from trends_app import metrics
+        self.metrics = metrics
+        self.rows = [
+            {'name': 'token_estimation_chars_per_token', 'value': '3', 'module': 'ai'},
+            {'name': 'bulk_analysis_enabled', 'value': 'off', 'module': 'ai'},
+            {'name': 'aws_kms_key_arn', 'value': 'arn:aws:kms:key', 'module': None},
+            {'name': 'session_timeout_minutes', 'value': 'soon', 'module': None},
+        ]
+        patchers = [
+            mock.patch.object(metrics, '_fetch_metrics', side_effect=lambda module=None: list(self.rows)),
+            mock.patch.object(metrics, 'current_app', new=mock.MagicMock()),
+        ]
+        self.fetch = patchers[0].start()
+        patchers[1].start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        metrics.invalidate_metrics_cache()
+        self.addCleanup(metrics.invalidate_metrics_cache)
+
+    def test_lookups_share_one_bulk_load(self):
+        self.assertEqual(self.metrics.get_metric_int('token_estimation_chars_per_token', default=4), 3)
+        self.assertFalse(self.metrics.get_metric_bool('bulk_analysis_enabled', default=True))
+        self.assertEqual(self.metrics.get_metric_text('aws_kms_key_arn'), 'arn:aws:kms:key')
+        self.assertEqual(self.metrics.get_metric_int('missing', default=7), 7)
+        self.assertEqual(self.metrics.get_metric_int('session_timeout_minutes', default=30), 30)
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_cache_expires_and_is_invalidated(self):
+        self.metrics.get_metric_int('token_estimation_chars_per_token')
+        self.rows[0] = {'name': 'token_estimation_chars_per_token', 'value': '5', 'module': 'ai'}
+        self.assertEqual(self.metrics.get_metric_int('token_estimation_chars_per_token'), 3)
+
+        self.metrics.invalidate_metrics_cache()
+        self.assertEqual(self.metrics.get_metric_int('token_estimation_chars_per_token'), 5)
+
+        with mock.patch.object(self.metrics, 'METRIC_CACHE_TTL_SECONDS', 0):
+            self.metrics.get_metric_int('token_estimation_chars_per_token')
+        self.assertEqual(self.fetch.call_count, 3)
+
+    def test_failed_load_returns_defaults_and_is_not_cached(self):
+        self.fetch.side_effect = RuntimeError('database unavailable')
+        self.assertTrue(self.metrics.get_metric_bool('bulk_analysis_enabled', default=True))
+
+        self.fetch.side_effect = lambda module=None: list(self.rows)
+        self.assertFalse(self.metrics.get_metric_bool('bulk_analysis_enabled', default=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
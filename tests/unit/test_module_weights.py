@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# test_module_weights.py: Unit tests for the per-process check module weight registry
+
+import contextlib
+import io
+import sys
+import types
+import unittest
+from unittest.mock import MagicMock
+
+from utils import module_weights
+from utils.report_builder import ReportBuilder
+
+
+def _make_check_module(name, weight=None):
+    module = types.ModuleType(name)
+    module.run = lambda connector, settings: (f"=== {name}", {'status': 'success'})
+    if weight is not None:
+        module.get_weight = lambda: weight
+    sys.modules[name] = module
+    return name
+
+
+class FakePlugin:
+    """A plugin whose package is 'weighttest.fake' and whose report has three checks."""
+    __module__ = 'weighttest.fake'
+
+    def __init__(self, sections):
+        self.sections = sections
+        self.definition_loads = 0
+
+    def get_report_definition(self, report_config_file=None):
+        self.definition_loads += 1
+        return self.sections
+
+
+class TestModuleWeights(unittest.TestCase):
+    def setUp(self):
+        module_weights.clear()
+        self.modules = [
+            _make_check_module('weighttest.fake.checks.overview', weight=10),
+            _make_check_module('weighttest.fake.checks.vacuum', weight=5),
+            _make_check_module('weighttest.fake.checks.unweighted'),
+            _make_check_module('weighttest.other.checks.overview', weight=99),
+        ]
+        self.sections = [
+            {'title': '', 'actions': [{'type': 'header', 'file': 'report_header.txt'}]},
+            {'title': 'Checks', 'actions': [{'type': 'module', 'module': m, 'function': 'run'}
+                                            for m in self.modules[:3]]},
+        ]
+
+    def tearDown(self):
+        module_weights.clear()
+        for name in self.modules:
+            sys.modules.pop(name, None)
+
+    def test_weights_come_from_the_report_definition_once(self):
+        plugin = FakePlugin(self.sections)
+
+        first = module_weights.weights_for_plugin(plugin)
+        second = module_weights.weights_for_plugin(plugin)
+
+        self.assertEqual(first, {'overview': 10, 'vacuum': 5})  # Other plugins' modules are excluded
+        self.assertEqual(second, first)
+        self.assertEqual(plugin.definition_loads, 1)
+
+    def test_modules_run_by_the_report_builder_are_reused(self):
+        builder = ReportBuilder(MagicMock(), {'execution_profile': False}, MagicMock(), self.sections, '1.0')
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder.build()
+
+        plugin = FakePlugin(self.sections)
+        self.assertEqual(module_weights.weights_for_plugin(plugin), {'overview': 10, 'vacuum': 5})
+        self.assertEqual(plugin.definition_loads, 0)
+
+    def test_get_weight_is_called_once_per_module(self):
+        calls = []
+        sys.modules['weighttest.fake.checks.vacuum'].get_weight = lambda: calls.append(1) or 5
+
+        for _ in range(3):
+            module_weights.record_module(sys.modules['weighttest.fake.checks.vacuum'])
+
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
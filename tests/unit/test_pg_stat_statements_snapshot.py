@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# test_pg_stat_statements_snapshot.py: Unit tests for local ranking of the shared pg_stat_statements snapshot
+
+import datetime
+import unittest
+from decimal import Decimal
+
+try:
+    from plugins.postgres.utils.pg_stat_statements_snapshot import PgStatStatementsSnapshot, format_rows
+    from plugins.postgres.utils.qrylib.comprehensive_query_analysis import get_comprehensive_query_analysis
+    from plugins.postgres.utils.qrylib.query_optimization_opportunities import get_user_resource_aggregation
+    from plugins.postgres.utils.qrylib.top_write_queries import get_top_write_queries
+    IMPORT_ERROR = None
+except Exception as e:  # plugins.postgres needs psycopg2 (and plugins.common boto3/requests) to import
+    IMPORT_ERROR = e
+
+
+def _record(queryid, username='app', calls=10, total_time=100.0, io_time=10.0, **overrides):
+    record = {
+        'queryid': queryid, 'username': username, 'query': f"SELECT * FROM t{queryid} WHERE id = $1",
+        'calls': calls, 'total_time': total_time, 'mean_time': total_time / calls if calls else 0.0,
+        'rows': calls * 2, 'shared_blks_hit': 90, 'shared_blks_read': 10, 'shared_blks_written': 0,
+        'local_blks_written': 0, 'temp_blks_written': 0, 'wal_bytes': Decimal(0), 'io_time': io_time,
+        'stats_start_time': datetime.datetime(2026, 1, 1), 'hours_since_reset': 10.0,
+    }
+    record.update(overrides)
+    return record
+
+
+class FakeConnector:
+    def __init__(self, records, major_version=16):
+        self.records = records
+        self.version_info = {'major_version': major_version, 'is_pg14_or_newer': major_version >= 14}
+        self.has_pgstat_new_io_time = major_version >= 17
+        self.has_pgstat_legacy_io_time = 13 <= major_version < 17
+        self.queries = []
+
+    def execute_query(self, query, params=None, is_check=False, return_raw=False, allow_fallback=False):
+        self.queries.append(query)
+        return "|===", self.records
+
+
+@unittest.skipIf(IMPORT_ERROR is not None, f"postgres plugin unavailable: {IMPORT_ERROR}")
+class TestPgStatStatementsSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.records = [
+            _record(1, total_time=500.0),
+            _record(2, total_time=900.0, calls=0),
+            _record(3, total_time=700.0, calls=1),
+            _record(4, total_time=700.0, calls=50, username=None),
+        ]
+        self.connector = FakeConnector(self.records)
+        self.snapshot = PgStatStatementsSnapshot.fetch(self.connector)
+
+    def test_fetch_runs_one_query_with_version_aware_columns(self):
+        self.assertEqual(len(self.connector.queries), 1)
+        self.assertIn('total_exec_time AS total_time', self.connector.queries[0])
+        self.assertIn('blk_read_time + pss.blk_write_time', self.connector.queries[0])
+        self.assertEqual(len(self.snapshot), 4)
+        self.assertEqual(self.snapshot.hours_since_reset, 10.0)
+
+    def test_rank_standard_filters_orders_and_limits(self):
+        ranked = self.snapshot.rank_standard('total_time', limit=2)
+
+        self.assertEqual(list(ranked[0]), ['query', 'calls', 'total_time', 'mean_time', 'rows'])
+        # Statement 2 has no calls; 3 and 4 tie on total_time and keep snapshot order
+        self.assertEqual([row['calls'] for row in ranked], [1, 50])
+        self.assertEqual(len(self.snapshot.rank_standard('calls', limit=10)), 3)
+
+    def test_multi_column_order_breaks_ties(self):
+        records = [_record(1, wal_bytes=Decimal(5), shared_blks_written=1),
+                   _record(2, wal_bytes=Decimal(5), shared_blks_written=9),
+                   _record(3, wal_bytes=Decimal(1), shared_blks_written=99)]
+        connector = FakeConnector(records, major_version=15)
+        ranked = get_top_write_queries(connector, PgStatStatementsSnapshot.fetch(connector), limit=3)
+
+        self.assertEqual([row['shared_blks_written'] for row in ranked], [9, 1, 99])
+        self.assertTrue(ranked[0]['query'].endswith('...'))
+        self.assertIn('wal_bytes', ranked[0])
+
+    def test_null_metrics_rank_first_like_order_by_desc(self):
+        records = [_record(1, shared_blks_written=50),
+                   _record(2, wal_bytes=None, shared_blks_written=1),
+                   _record(3, wal_bytes=Decimal(0), shared_blks_written=99)]
+        connector = FakeConnector(records, major_version=15)
+        ranked = get_top_write_queries(connector, PgStatStatementsSnapshot.fetch(connector), limit=3)
+
+        self.assertEqual([row['shared_blks_written'] for row in ranked], [1, 99, 50])
+
+    def test_only_display_columns_normalize_the_query_text(self):
+        from plugins.postgres.utils.qrylib.query_optimization_opportunities import get_query_details
+        query = "SELECT *\n  FROM orders\n WHERE id = $1"
+        connector = FakeConnector([_record(1, query=query, total_time=1000.0, io_time=0.0)])
+        snapshot = PgStatStatementsSnapshot.fetch(connector)
+
+        self.assertEqual(snapshot.rank_standard(limit=1)[0]['query'], 'SELECT * FROM orders WHERE id = $1')
+        self.assertEqual(get_comprehensive_query_analysis(connector, snapshot, limit=1)[0]['query'],
+                         'SELECT * FROM orders WHERE id = $1')
+        self.assertEqual(get_top_write_queries(connector, snapshot, limit=1)[0]['query'],
+                         'SELECT *   FROM orders  WHERE id = $1...')
+        self.assertEqual(get_query_details(snapshot, 0, limit=1)[0]['full_query_text'], query)
+
+    def test_format_rows_matches_execute_query_table(self):
+        table = format_rows([{'query': 'SELECT a|b', 'calls': 3, 'wal_bytes': None}])
+
+        self.assertEqual(table, '|===\n|query|calls|wal_bytes\n|SELECT a\\|b|3|\n|===')
+        self.assertIn('No results returned.', format_rows([]))
+
+    def test_comprehensive_analysis_computes_cluster_percentages(self):
+        rows = get_comprehensive_query_analysis(self.connector, self.snapshot, limit=5)
+
+        # Dropped-role (username None) and zero-call statements are excluded
+        self.assertEqual([row['total_executions'] for row in rows], [1, 10])
+        cluster_cpu = sum(r['total_time'] - r['io_time'] for r in self.records)
+        self.assertEqual(rows[0]['percent_of_total_cluster_cpu'], round(690.0 / cluster_cpu * 100, 2))
+        self.assertEqual(rows[0]['cache_hit_rate_percent'], 90.0)
+        self.assertEqual(rows[1]['calls_per_hour'], 1.0)
+        self.assertEqual(rows[0]['query'], 'SELECT * FROM t3 WHERE id = $1')
+
+    def test_user_aggregation_applies_cpu_threshold(self):
+        records = [_record(1, username='app', total_time=1000.0, io_time=0.0),
+                   _record(2, username='app', total_time=1000.0, io_time=0.0),
+                   _record(3, username='cron', total_time=10.0, io_time=0.0)]
+        connector = FakeConnector(records)
+        users = get_user_resource_aggregation(PgStatStatementsSnapshot.fetch(connector), limit=10)
+
+        self.assertEqual([user['username'] for user in users], ['app'])
+        self.assertEqual(users[0]['query_count'], 2)
+        self.assertEqual(users[0]['percent_of_cluster_cpu'], 99.5)
+
+    def test_failed_fetch_raises(self):
+        class FailingConnector(FakeConnector):
+            def execute_query(self, query, params=None, is_check=False, return_raw=False, allow_fallback=False):
+                return "[ERROR]\n====\nQuery failed: boom\n====\n", {'error': 'boom', 'query': query}
+
+        with self.assertRaises(RuntimeError):
+            PgStatStatementsSnapshot.fetch(FailingConnector([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# test_plugin_registry.py: Unit tests for lazy plugin discovery and CLI startup imports
+
+import importlib.util
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from plugins.registry import PLUGIN_MANIFEST, PluginRegistry
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Driver and client packages that --list-plugins must never import
+HEAVY_MODULES = ['psycopg2', 'cassandra', 'kafka', 'opensearchpy', 'clickhouse_connect',
+                 'mysql', 'valkey', 'boto3', 'requests', 'paramiko']
+
+MAIN_DEPENDENCIES = ['yaml', 'jinja2']
+
+
+def _parse_importtime(stderr):
+    """Returns {top-level module name: cumulative microseconds} from -X importtime output."""
+    imported = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if not name.startswith(' ') and '.' not in name:
+            imported[name] = imported.get(name, 0) + int(cumulative)
+    return imported
+
+
+class TestPluginRegistry(unittest.TestCase):
+    def test_listing_does_not_import_plugins(self):
+        before = {name for name in sys.modules if name.startswith('plugins.')}
+        registry = PluginRegistry()
+
+        self.assertIn('postgres', registry)
+        self.assertEqual(sorted(registry.names()), sorted(PLUGIN_MANIFEST))
+        rows = {row['technology']: row for row in registry.describe()}
+        self.assertEqual(rows['kafka']['drivers'], ['kafka'])
+
+        newly_imported = {name for name in sys.modules if name.startswith('plugins.')} - before
+        self.assertEqual(newly_imported - {'plugins.registry'}, set())
+        self.assertEqual(registry.loaded(), {})
+
+    def test_unknown_technology_is_missing(self):
+        registry = PluginRegistry()
+        self.assertNotIn('oracle', registry)
+        self.assertIsNone(registry.get('oracle'))
+        with self.assertRaises(KeyError):
+            registry['oracle']
+
+
+@unittest.skipUnless(all(importlib.util.find_spec(m) for m in MAIN_DEPENDENCIES),
+                     "main.py dependencies are not installed")
+class TestStartupImports(unittest.TestCase):
+    def test_list_plugins_skips_heavy_drivers(self):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', 'main.py', '--list-plugins'],
+            cwd=REPO_ROOT, capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        self.assertIn('postgres', result.stdout)
+
+        imported = _parse_importtime(result.stderr)
+        self.assertIn('yaml', imported)  # Sanity check of the parser
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported, f"--list-plugins imported {module}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# test_prompt_budget.py: Unit tests for token budgeting of the AI prompt
+
+import unittest
+from unittest import mock
+
+from utils.json_utils import SerializedFindings
+from utils.prompt_budget import (PromptBudget, count_tokens_by_chars, load_tokenizer,
+                                 row_severities)
+
+
+def count_words(text):
+    """A custom tokenizer used through the 'module:function' setting."""
+    return len(text.split())
+
+
+def _findings(rows=40):
+    return {
+        'table_stats': {
+            'tables': {'status': 'success', 'data': [{'name': f"table_{i:03d}", 'dead_tuples': i} for i in range(rows)]},
+        },
+        'postgres_overview': {'version_info': {'status': 'success', 'data': [{'version': '16.2'}]}},
+    }
+
+
+class TestPromptBudget(unittest.TestCase):
+    def test_module_that_fits_is_included_whole(self):
+        findings = _findings()
+        budget = PromptBudget(SerializedFindings(findings), 100000)
+
+        self.assertIs(budget.add('table_stats', findings['table_stats']), findings['table_stats'])
+        self.assertEqual(budget.used, budget.module_cost('table_stats'))
+        self.assertEqual(budget.trimmed, {})
+
+    def test_trimming_keeps_the_most_severe_rows_that_fit(self):
+        findings = _findings()
+        rows = findings['table_stats']['tables']['data']
+        issues = ([{'data': rows[30], 'analysis': {'level': 'critical'}}],
+                  [{'data': rows[20], 'analysis': {'level': 'high'}}],
+                  [{'data': rows[30], 'analysis': {'level': 'medium'}}])
+        serialized = SerializedFindings(findings)
+        full_cost = PromptBudget(serialized, 100000).module_cost('table_stats')
+        budget = PromptBudget(serialized, full_cost // 3, reserved_tokens=0, severities=row_severities(issues))
+
+        trimmed = budget.add('table_stats', findings['table_stats'])
+
+        kept = trimmed['tables']['data']
+        self.assertTrue(2 < len(kept) < len(rows))
+        self.assertEqual(kept[:3], [rows[30], rows[20], rows[0]])
+        self.assertEqual(trimmed['tables']['status'], 'success')
+        self.assertEqual(len(rows), 40)  # The findings themselves are not modified
+        self.assertLessEqual(budget.used, budget.available)
+        self.assertIn("(2 of 2 rule-triggering rows kept)", budget.trimmed['table_stats'][0])
+
+    def test_module_is_skipped_when_one_row_does_not_fit(self):
+        findings = _findings()
+        budget = PromptBudget(SerializedFindings(findings), 10, reserved_tokens=0)
+
+        self.assertIsNone(budget.add('table_stats', findings['table_stats']))
+        self.assertIsNone(budget.add('postgres_overview', findings['postgres_overview']))  # Nothing to trim
+        self.assertEqual(budget.used, 0)
+
+    def test_module_costs_are_counted_once(self):
+        findings = _findings()
+        counter = mock.Mock(side_effect=count_tokens_by_chars)
+        budget = PromptBudget(SerializedFindings(findings), 100000, count_tokens=counter)
+
+        first = budget.module_cost('table_stats')
+        calls = counter.call_count
+        self.assertEqual(budget.module_cost('table_stats'), first)
+        self.assertEqual(counter.call_count, calls)
+
+
+class TestLoadTokenizer(unittest.TestCase):
+    def test_default_counts_characters(self):
+        self.assertIs(load_tokenizer(None), count_tokens_by_chars)
+        self.assertIs(load_tokenizer('chars'), count_tokens_by_chars)
+        self.assertEqual(count_tokens_by_chars('abcde'), 2)
+
+    def test_custom_function(self):
+        tokenizer = load_tokenizer(f"{__name__}:count_words")
+        self.assertEqual(tokenizer('three small words'), 3)
+
+    def test_unavailable_tokenizer_falls_back(self):
+        with mock.patch('builtins.print'):
+            self.assertIs(load_tokenizer('no_such_module:count'), count_tokens_by_chars)
+
+
+if __name__ == '__main__':
+    unittest.main()
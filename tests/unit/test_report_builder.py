@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# test_report_builder.py: Unit tests for serial and parallel ReportBuilder execution
+
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock
+
+from utils.findings_stream import FindingsReader, FindingsWriter
+from utils.report_builder import ReportBuilder, CheckScheduler
+
+
+def _make_check_module(name, delay, dependencies=None, status='success'):
+    """Registers a fake check module that records which connector ran it."""
+    module = types.ModuleType(name)
+    if dependencies is not None:
+        module.get_dependencies = lambda: dependencies
+
+    def run(connector, settings):
+        time.sleep(delay)
+        return f"content {name}", {'status': status, 'data': {'connector': connector.name}}
+
+    module.run = run
+    sys.modules[name] = module
+    return name
+
+
+class FakeConnector:
+    def __init__(self, name='primary'):
+        self.name = name
+        self.workers = []
+        self.closed = []
+        self._lock = threading.Lock()
+
+    def create_worker_connector(self):
+        with self._lock:
+            worker = FakeConnector(f"worker{len(self.workers)}")
+            worker.parent = self
+            self.workers.append(worker)
+            return worker
+
+    def close_worker_connector(self):
+        self.parent.closed.append(self.name)
+
+
+class TestReportBuilder(unittest.TestCase):
+    def setUp(self):
+        # Later modules finish first so out-of-order completion is exercised
+        self.modules = [_make_check_module(f"fake_checks.mod_{i}", 0.05 * (5 - i)) for i in range(5)]
+        self.sections = [
+            {'title': 'First', 'actions': [{'type': 'module', 'module': m, 'function': 'run'} for m in self.modules[:2]]},
+            {'title': 'Second', 'actions': [{'type': 'module', 'module': m, 'function': 'run'} for m in self.modules[2:]]},
+        ]
+        self.plugin = MagicMock()
+        self.plugin.technology_name = 'fake'
+
+    def tearDown(self):
+        for name in self.modules:
+            sys.modules.pop(name, None)
+
+    def test_serial_build_uses_primary_connector(self):
+        connector = FakeConnector()
+        adoc, findings = ReportBuilder(connector, {}, self.plugin, self.sections, '1.0').build()
+
+        self.assertEqual(list(findings), [m.split('.')[-1] for m in self.modules])
+        self.assertTrue(all(f['data']['connector'] == 'primary' for f in findings.values()))
+        self.assertEqual(connector.workers, [])
+
+    def test_parallel_build_preserves_definition_order(self):
+        serial_adoc, serial_findings = ReportBuilder(FakeConnector(), {}, self.plugin, self.sections, '1.0').build()
+
+        connector = FakeConnector()
+        settings = {'max_parallel_checks': 3}
+        adoc, findings = ReportBuilder(connector, settings, self.plugin, self.sections, '1.0').build()
+
+        self.assertEqual(adoc, serial_adoc)
+        self.assertEqual(list(findings), list(serial_findings))
+        self.assertTrue(all(f['data']['connector'].startswith('worker') for f in findings.values()))
+        self.assertLessEqual(len(connector.workers), 3)
+        self.assertEqual(sorted(connector.closed), sorted(w.name for w in connector.workers))
+
+    def test_parallel_build_streams_findings_in_definition_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = FindingsWriter(f"{tmp}/findings.json")
+            settings = {'max_parallel_checks': 3}
+            builder = ReportBuilder(FakeConnector(), settings, self.plugin, self.sections, '1.0', findings_writer=writer)
+            _, findings = builder.build()
+            writer.close()
+
+            streamed = FindingsReader(writer.path)
+            self.assertEqual(list(streamed), [m.split('.')[-1] for m in self.modules])
+            self.assertEqual(streamed.to_dict(), findings)
+            self.assertEqual(builder.execution_profile['modules']['mod_0']['bytes'],
+                             len(writer.encode_entry('mod_0', findings['mod_0'])))
+
+    def test_failed_worker_connection_is_not_retried(self):
+        connector = FakeConnector()
+        attempts = []
+
+        def refuse():
+            attempts.append(threading.current_thread().name)
+            raise RuntimeError('too many connections')
+
+        connector.create_worker_connector = refuse
+        with mock.patch('builtins.print'):
+            adoc, findings = ReportBuilder(connector, {'max_parallel_checks': 3}, self.plugin,
+                                           self.sections, '1.0').build()
+
+        self.assertEqual(len(attempts), 1)
+        self.assertTrue(all(f['data']['connector'] == 'primary' for f in findings.values()))
+
+    def test_parallel_falls_back_to_serial_without_worker_support(self):
+        connector = MagicMock(spec=['name'])
+        connector.name = 'primary'
+        adoc, findings = ReportBuilder(connector, {'max_parallel_checks': 4}, self.plugin, self.sections, '1.0').build()
+
+        self.assertTrue(all(f['data']['connector'] == 'primary' for f in findings.values()))
+
+    def test_cve_check_explains_how_to_enable_it_without_cve_support(self):
+        connector = FakeConnector()
+        connector.get_capabilities = lambda: {'bare_metal'}
+        connector.has_cve_support = lambda: False
+        sections = [{'title': '', 'actions': [
+            {'type': 'module', 'module': 'plugins.postgres.checks.check_cve_vulnerabilities', 'function': 'run'}]}]
+        adoc, findings = ReportBuilder(connector, {}, self.plugin, sections, '1.0').build()
+
+        self.assertIn('To enable CVE checks', adoc)
+        self.assertIn('nvd_api_key', adoc)
+        self.assertEqual(findings['check_cve_vulnerabilities'],
+                         {'status': 'unavailable', 'reason': 'cve_support_not_initialized'})
+
+    def test_failed_module_is_recorded_as_error(self):
+        sections = [{'title': '', 'actions': [{'type': 'module', 'module': 'fake_checks.missing', 'function': 'run'}]}]
+        adoc, findings = ReportBuilder(FakeConnector(), {'max_parallel_checks': 2}, self.plugin, sections, '1.0').build()
+
+        self.assertEqual(findings['missing']['status'], 'error')
+        self.assertIn('[ERROR]', adoc)
+
+
+class TestCheckScheduler(unittest.TestCase):
+    def setUp(self):
+        self.registered = []
+
+    def tearDown(self):
+        for name in self.registered:
+            sys.modules.pop(name, None)
+
+    def _actions(self, specs):
+        actions = []
+        for name, dependencies, status in specs:
+            self.registered.append(_make_check_module(f"fake_dag.{name}", 0, dependencies, status))
+            actions.append({'type': 'module', 'module': f"fake_dag.{name}", 'function': 'run'})
+        return actions
+
+    def _run(self, scheduler, max_workers=1):
+        order = []
+
+        def execute(action):
+            order.append(action['module'].split('.')[-1])
+            content, data = sys.modules[action['module']].run(FakeConnector(), {})
+            return action['module'].split('.')[-1], content, data
+
+        return scheduler.run(execute, max_workers=max_workers), order
+
+    def test_missing_connector_capability_prunes_subtree(self):
+        actions = self._actions([
+            ('topology', {'requires': ['patroni'], 'provides': ['patroni_members']}, 'success'),
+            ('members', {'requires': ['patroni_members']}, 'success'),
+            ('overview', None, 'success'),
+        ])
+        scheduler = CheckScheduler(actions, capabilities={'pg_stat_statements'})
+        results, order = self._run(scheduler)
+
+        self.assertEqual(order, ['overview'])
+        self.assertEqual(scheduler.pruned, ['topology', 'members'])
+        self.assertEqual(results[1][2]['missing_prerequisites'], ['patroni_members'])
+
+    def test_provider_runs_before_dependent_declared_earlier(self):
+        actions = self._actions([
+            ('health', {'requires': ['pgbouncer']}, 'success'),
+            ('detection', {'provides': ['pgbouncer']}, 'success'),
+        ])
+        results, order = self._run(CheckScheduler(actions, capabilities=set()))
+
+        self.assertEqual(order, ['detection', 'health'])
+        self.assertEqual(results[0][2]['status'], 'success')
+
+    def test_failed_provider_skips_dependent(self):
+        actions = self._actions([
+            ('detection', {'provides': ['pgbouncer']}, 'skipped'),
+            ('health', {'requires': ['pgbouncer']}, 'success'),
+        ])
+        results, order = self._run(CheckScheduler(actions, capabilities=set()))
+
+        self.assertEqual(order, ['detection'])
+        self.assertEqual(results[1][2]['status'], 'skipped')
+
+    def test_provides_if_decides_from_the_result(self):
+        detected = lambda data: data['data'].get('detected', False)
+        actions = self._actions([
+            ('detection', {'provides': ['pgbouncer'], 'provides_if': detected}, 'success'),
+            ('health', {'requires': ['pgbouncer']}, 'success'),
+        ])
+        results, order = self._run(CheckScheduler(actions, capabilities=set()))
+
+        self.assertEqual(order, ['detection'])  # Succeeded without detecting anything
+        self.assertEqual(results[1][2]['status'], 'skipped')
+
+    def test_pgbouncer_detection_provides_only_when_detected_or_failed(self):
+        from plugins.postgres.checks import check_pgbouncer_detection
+        available = check_pgbouncer_detection.get_dependencies()['provides_if']
+
+        self.assertTrue(available({'status': 'success', 'data': {'detected': True}}))
+        self.assertFalse(available({'status': 'success', 'data': {'detected': False}}))
+        self.assertTrue(available({'status': 'error', 'data': {'detected': False, 'error': 'timeout'}}))
+        self.assertFalse(available({'status': 'skipped', 'data': {'detected': False}}))
+
+    def test_after_wildcard_runs_last_in_parallel(self):
+        actions = self._actions([
+            ('last', {'after': ['*']}, 'success'),
+            ('a', None, 'success'),
+            ('b', None, 'success'),
+        ])
+        results, order = self._run(CheckScheduler(actions), max_workers=3)
+
+        self.assertEqual(order[-1], 'last')
+        self.assertEqual(sorted(results), [0, 1, 2])
+
+    def test_unknown_capabilities_do_not_prune(self):
+        actions = self._actions([('topology', {'requires': ['patroni']}, 'success')])
+        results, order = self._run(CheckScheduler(actions, capabilities=None))
+
+        self.assertEqual(order, ['topology'])
+
+    def test_cycle_falls_back_to_report_order(self):
+        actions = self._actions([
+            ('a', {'after': ['b']}, 'success'),
+            ('b', {'after': ['a']}, 'success'),
+        ])
+        results, order = self._run(CheckScheduler(actions))
+
+        self.assertEqual(order, ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
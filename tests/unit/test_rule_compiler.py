@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# test_rule_compiler.py: Unit tests for the compiled, keyword-indexed rule engine
+
+import contextlib
+import io
+import json
+import unittest
+
+from utils.rule_compiler import CompiledRuleSet, compile_rules, get_compiled_rules
+
+RULES = {
+    'cache_ratio': {
+        'metric_keywords': ['cache_hit'],
+        'data_conditions': [{'key': 'ratio', 'exists': True}],
+        'rules': [
+            {'expression': "data['ratio'] < 90", 'level': 'high', 'score': 7,
+             'reasoning': "Cache hit ratio is {data['ratio']}%.", 'recommendations': ['Increase shared_buffers']},
+            {'expression': "data['ratio'] < 50", 'level': 'critical', 'score': 9,
+             'reasoning': "Cache hit ratio is only {data['ratio']}%.", 'recommendations': []},
+        ]
+    },
+    'generic_ratio': {
+        'metric_keywords': ['ratio', 'hit'],
+        'rules': [
+            {'expression': "data.get('ratio', 100) < 90", 'level': 'medium', 'score': 7,
+             'reasoning': "Ratio below {settings['target']}.", 'recommendations': []},
+        ]
+    },
+    'broken': {
+        'metric_keywords': ['cache'],
+        'rules': [
+            {'expression': "data['ratio'] <", 'level': 'high', 'score': 8, 'reasoning': "x", 'recommendations': []},
+        ]
+    },
+    'threshold_format': {'critical': {'threshold': 90}},
+}
+
+
+class TestCompiledRuleSet(unittest.TestCase):
+    def setUp(self):
+        self.rules = compile_rules(RULES)
+        self.settings = {'target': 95}
+
+    def _evaluate(self, metric_name, row, rule_stats=None):
+        rule_stats = {} if rule_stats is None else rule_stats
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            finding = self.rules.compiled.evaluate(metric_name, row, self.settings, {}, rule_stats)
+        return finding, rule_stats, output.getvalue()
+
+    def test_highest_score_wins_and_first_wins_ties(self):
+        finding, stats, _ = self._evaluate('cache_hit_ratio', {'ratio': 40})
+
+        self.assertEqual(finding['level'], 'critical')
+        self.assertEqual(finding['reasoning'], 'Cache hit ratio is only 40%.')
+        self.assertEqual(finding['rule_config_name'], 'cache_ratio')
+
+        finding, _, _ = self._evaluate('cache_hit_ratio', {'ratio': 80})
+        # cache_ratio 'high' and generic_ratio 'medium' both score 7; definition order wins
+        self.assertEqual(finding['rule_config_name'], 'cache_ratio')
+        self.assertEqual(stats['generic_ratio'], {'checked': 1, 'triggered': 1, 'errors': 0})
+
+    def test_compile_errors_are_counted_per_evaluation(self):
+        _, stats, output = self._evaluate('cache_hit_ratio', {'ratio': 40})
+
+        self.assertEqual(stats['broken'], {'checked': 1, 'triggered': 0, 'errors': 1})
+        self.assertIn("Error evaluating rule 'broken'", output)
+
+    def test_unmet_data_conditions_skip_config(self):
+        finding, stats, _ = self._evaluate('cache_hit_ratio', {'other': 1})
+
+        self.assertNotIn('cache_ratio', stats)
+        self.assertEqual(stats['generic_ratio']['checked'], 1)
+        self.assertEqual(finding['level'], 'info')
+
+    def test_keyword_matches_are_cached_per_metric(self):
+        compiled = self.rules.compiled
+        matched = compiled.configs_for_metric('Index_Cache_Hit')
+
+        self.assertEqual([config.name for config in matched], ['cache_ratio', 'generic_ratio', 'broken'])
+        self.assertIs(compiled.configs_for_metric('Index_Cache_Hit'), matched)
+        self.assertEqual(compiled.configs_for_metric('vacuum_stats'), ())
+        self.assertEqual(compiled.keyword_index['hit'], [1])
+
+    def test_compiled_rules_remain_a_plain_rules_dict(self):
+        self.assertEqual(json.loads(json.dumps(self.rules)), RULES)
+        self.assertIs(get_compiled_rules(self.rules), self.rules.compiled)
+        self.assertIs(get_compiled_rules(self.rules.compiled), self.rules.compiled)
+        self.assertIsInstance(get_compiled_rules(dict(RULES)), CompiledRuleSet)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# test_run_fleet.py: Unit tests for concurrent fleet runs with per-target timeouts
+
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+try:
+    import run_fleet
+    FLEET_AVAILABLE = True
+except Exception:  # main.py needs the database drivers and HTTP client
+    FLEET_AVAILABLE = False
+
+
+def _fake_run_target(target, available_plugins, rules_cache, output_file, incremental, result_conn):
+    """Stands in for a health check: the target name says how it behaves."""
+    if target['name'].startswith('slow'):
+        time.sleep(30)
+    if target['name'].startswith('crash'):
+        os._exit(3)
+    if target['name'].startswith('fail'):
+        result_conn.send({'status': 'failed', 'error': 'connection refused'})
+        return
+    result_conn.send({'status': 'success', 'settings': {'rules': sorted(rules_cache)}, 'findings': '{}',
+                      'analysis_results': '{}', 'adoc': target['name']})
+
+
+class _ShipperStandIn:
+    """In-process stand-in for the shipper process."""
+
+    shipped = []
+
+    def __init__(self, context):
+        pass
+
+    def submit(self, target, result):
+        self.shipped.append(result['adoc'])
+
+    def close(self):
+        return True
+
+
+def _record_shipment(path):
+    def ship_result(target, result):
+        with open(path, 'a') as f:
+            f.write(target['name'] + '\n')
+    return ship_result
+
+
+@unittest.skipUnless(FLEET_AVAILABLE, "main.py dependencies are not installed")
+class TestRunFleet(unittest.TestCase):
+    def _targets(self, *names, timeout=10):
+        return [{'name': name, 'config': f"{name}.yaml", 'report_config': None, 'timeout': timeout} for name in names]
+
+    def test_outcomes_timeouts_and_streamed_shipping(self):
+        shipped = _ShipperStandIn.shipped = []
+        targets = self._targets('ok_1', 'slow_1', 'crash_1', 'fail_1', 'ok_2')
+        targets[1]['timeout'] = 0.5
+
+        with mock.patch.object(run_fleet, '_run_target', _fake_run_target), \
+                mock.patch.object(run_fleet, 'ResultShipper', _ShipperStandIn), \
+                contextlib.redirect_stdout(io.StringIO()):
+            start = time.monotonic()
+            outcomes = run_fleet.run_fleet(targets, 2, {}, {'postgres': {}})
+            elapsed = time.monotonic() - start
+
+        statuses = {o['name']: o['status'] for o in outcomes}
+        self.assertEqual(statuses, {'ok_1': 'success', 'slow_1': 'timeout', 'crash_1': 'failed',
+                                    'fail_1': 'failed', 'ok_2': 'success'})
+        self.assertEqual(sorted(shipped), ['ok_1', 'ok_2'])  # Only successful results are shipped
+        self.assertLess(elapsed, 10)
+        self.assertIn('exit', next(o['error'] for o in outcomes if o['name'] == 'crash_1'))
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "needs the fork start method")
+    def test_results_are_shipped_by_a_separate_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp, 'shipped.log')
+            with mock.patch.object(run_fleet, 'ship_result', _record_shipment(log)), \
+                    mock.patch.object(run_fleet.trend_shipper, 'flush', return_value=True):
+                shipper = run_fleet.ResultShipper(multiprocessing.get_context('fork'))
+                for target in self._targets('ok_1', 'ok_2'):
+                    shipper.submit(target, {'adoc': target['name']})
+                flushed = shipper.close()
+
+            self.assertTrue(flushed)
+            self.assertEqual(log.read_text().split(), ['ok_1', 'ok_2'])
+        self.assertNotEqual(shipper._process.pid, os.getpid())
+
+    def test_load_targets_from_directory_and_inventory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('b_pg', 'a_kafka'):
+                Path(tmp, f"{name}.yaml").write_text("db_type: postgres\n")
+            Path(tmp, 'fleet.yaml').write_text(
+                "targets:\n  - a_kafka.yaml\n  - config: b_pg.yaml\n    name: orders\n    timeout: 60\n"
+            )
+
+            from_dir = run_fleet.load_targets(configs_dir=tmp, default_timeout=5)
+            from_inventory = run_fleet.load_targets(inventory_file=str(Path(tmp, 'fleet.yaml')), default_timeout=5)
+
+        self.assertEqual([t['name'] for t in from_dir], ['a_kafka', 'b_pg', 'fleet'])
+        self.assertEqual([(t['name'], t['timeout']) for t in from_inventory], [('a_kafka', 5.0), ('orders', 60.0)])
+        self.assertTrue(from_inventory[1]['config'].endswith('b_pg.yaml'))
+
+    def test_target_names_are_unique_file_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, 'fleet.yaml').write_text(
+                "targets:\n  - config: a.yaml\n    name: orders db\n  - config: b.yaml\n    name: orders_db\n"
+                "  - config: c.yaml\n    name: ../orders\n"
+            )
+            targets = run_fleet.load_targets(inventory_file=str(Path(tmp, 'fleet.yaml')))
+
+        self.assertEqual([t['name'] for t in targets], ['orders_db', 'orders_db_1', '_orders'])
+
+
+if __name__ == '__main__':
+    unittest.main()
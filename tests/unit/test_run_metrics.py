@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# test_run_metrics.py: Unit tests for the per-run scalar metrics extracted at ingestion
+
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+try:
+    import psycopg2
+    from utils import run_metrics
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+
+def _postgres_findings():
+    return {
+        'check_comprehensive_query_analysis': {'data': {'queries': [
+            {'query': 'SELECT * FROM orders', 'avg_duration_ms': 6000, 'cache_hit_rate_percent': 80,
+             'percent_of_total_cluster_cpu': 12.5},
+            {'query': 'INSERT INTO events VALUES ($1)', 'avg_duration_ms': '700', 'calls_per_hour': 90000,
+             'percent_of_total_cluster_cpu': 2},
+            {'query': 'update accounts SET balance = $1', 'avg_duration_ms': 'n/a', 'calls_per_hour': 10000},
+            {'query': 'INSERT INTO events VALUES ($1)', 'avg_duration_ms': 10, 'calls_per_hour': 5},
+        ]}},
+        'check_table_bloat': {'data': {'bloated_tables': [
+            {'bloat_percent': 60, 'wasted_gb': 80}, {'bloat_percent': 25, 'wasted_gb': 30}, {'bloat_percent': 5},
+        ]}},
+        'check_autovacuum_config': {'data': {'issues_found': False}},
+        'check_connection_pooling': {'data': {'needs_pooling': 'yes'}},
+        'check_replication_status': {'data': {'replicas': [{'replication_lag_mb': 3}, {'replication_lag_mb': 12}]}},
+    }
+
+
+@unittest.skipUnless(PSYCOPG2_AVAILABLE, "psycopg2 is not installed")
+class TestRunMetrics(unittest.TestCase):
+    def test_postgres_metrics_mirror_the_view_expressions(self):
+        metrics = run_metrics.extract_run_metrics(_postgres_findings())
+
+        self.assertEqual(metrics['pg_queries_over_500ms'], 2)
+        self.assertEqual(metrics['pg_queries_over_1000ms'], 1)
+        self.assertEqual(metrics['pg_queries_over_5000ms'], 1)
+        self.assertEqual(metrics['pg_low_cache_hit_queries'], 1)
+        self.assertEqual(metrics['pg_inefficient_query_cpu_percent'], Decimal('14.5'))
+        self.assertEqual(metrics['pg_bloated_tables_over_20pct'], 2)
+        self.assertEqual(metrics['pg_bloated_tables_over_50pct'], 1)
+        self.assertEqual(metrics['pg_total_wasted_gb'], 110)
+        self.assertEqual(metrics['pg_autovacuum_issues'], 0)
+        self.assertEqual(metrics['pg_max_replication_lag_mb'], 12)
+        # Only JSON booleans cast to boolean
+        self.assertNotIn('pg_needs_connection_pooling', metrics)
+        # Missing arrays are not stored; the views read them as 0
+        self.assertNotIn('pg_missing_index_tables', metrics)
+
+    def test_write_volume_metrics(self):
+        metrics = run_metrics.extract_run_metrics(_postgres_findings())
+
+        self.assertEqual(metrics['pg_write_queries'], 2)
+        self.assertEqual(metrics['pg_write_calls_per_hour'], 100005)
+        self.assertEqual(metrics['pg_write_max_calls_per_hour'], 90000)
+        self.assertEqual(metrics['pg_write_cpu_percent_sum'], 2)
+        self.assertEqual(metrics['pg_write_cpu_percent_count'], 1)
+
+    def test_other_technologies(self):
+        metrics = run_metrics.extract_run_metrics({
+            'kafka_overview': {'data': {'under_replicated_partitions': 4}},
+            'check_partition_balance': {'data': {'brokers': [{'partition_count': 10}, {'partition_count': 25}]}},
+            'check_gc_pauses': {'data': {'brokers': [{'max_gc_pause_ms': 100}, {'max_gc_pause_ms': 300}]}},
+            'check_topic_configuration': {'data': {'topics_with_issues': []}},
+            'check_shard_allocation': {'data': {'unassigned_shards': 0, 'total_shards': '40'}},
+        })
+
+        self.assertEqual(metrics['kafka_under_replicated_partitions'], 4)
+        self.assertEqual(metrics['kafka_partition_imbalance'], 15)
+        self.assertEqual(metrics['kafka_avg_max_gc_pause_ms'], 200)
+        self.assertEqual(metrics['kafka_topic_config_issues'], 0)
+        self.assertEqual(metrics['opensearch_unassigned_shards'], 0)
+        self.assertNotIn('opensearch_total_shards', metrics)  # A JSON string does not cast to integer
+        self.assertEqual(run_metrics.extract_run_metrics(None), {})
+
+    def test_metrics_replace_the_previous_ones(self):
+        cursor = mock.Mock()
+        with mock.patch.object(run_metrics, 'execute_values') as execute_values:
+            stored = run_metrics.insert_run_metrics(cursor, 7, {'check_slow_queries': {'data': {'slow_queries': [{}]}}})
+
+        self.assertEqual(stored, 1)
+        cursor.execute.assert_any_call(run_metrics.DELETE_SQL, (7,))
+        self.assertEqual(execute_values.call_args.args[2], [(7, 'opensearch_slow_queries', 1)])
+
+    def test_missing_table_keeps_the_transaction(self):
+        cursor = mock.Mock()
+        cursor.execute.side_effect = lambda sql, *args: (_ for _ in ()).throw(psycopg2.Error('no table')) \
+            if sql == run_metrics.DELETE_SQL else None
+        warnings = []
+
+        self.assertEqual(run_metrics.insert_run_metrics(cursor, 7, _postgres_findings(), warn=warnings.append), 0)
+        cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT run_metrics")
+        self.assertEqual(len(warnings), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
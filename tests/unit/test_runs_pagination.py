@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# test_runs_pagination.py: Unit tests for the keyset cursors of /api/runs
+
+import os
+import re
+import unittest
+from unittest import mock
+
+try:
+    import trends_app  # noqa: F401  (its package imports need flask, psycopg2, boto3, cryptography)
+    TRENDS_APP_AVAILABLE = True
+except ImportError:
+    TRENDS_APP_AVAILABLE = False
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestRunsCursor(unittest.TestCase):
+    def setUp(self):
+        from trends_app import main
+        self.main = main
+
+    def test_cursor_round_trip(self):
+        cursor = self.main._encode_runs_cursor({'id': 4711, 'run_timestamp': '2026-01-31T02:00:00.123456+00:00'})
+
+        self.assertEqual(self.main._decode_runs_cursor(cursor), ('2026-01-31T02:00:00.123456+00:00', 4711))
+
+    def test_invalid_cursors_are_refused(self):
+        for cursor in ('not a cursor', 'W10=', 'WyIyMDI2IiwgImlkIl0=', 'é'):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                self.main._decode_runs_cursor(cursor)
+
+
+MIGRATION = os.path.join(os.path.dirname(__file__), '..', '..', 'trends_app', 'trends_db', 'migrations',
+                         '10_paginate_health_check_runs.sql')
+
+
+def _page_limit_cap():
+    """The limit cap of get_health_check_runs_page(), as written in its migration."""
+    with open(MIGRATION, encoding='utf-8') as f:
+        return int(re.search(r'LEAST\(GREATEST\(p_limit, 1\), (\d+)\)', f.read()).group(1))
+
+
+class _RunsCursor:
+    """Answers get_health_check_runs_page() from canned runs, applying its limit cap."""
+
+    def __init__(self, total_runs):
+        self.runs = [{'id': run_id, 'run_timestamp': f'2026-01-01T00:00:{run_id:06d}', 'target_host': 'db1',
+                      'target_port': 5432, 'target_db_name': 'app'} for run_id in range(total_runs, 0, -1)]
+        self.limits = []
+
+    def execute(self, sql, params):
+        limit = min(max(params[-1], 1), _page_limit_cap())
+        self.limits.append(params[-1])
+        self._result = self.runs[:limit]
+
+    def fetchone(self):
+        return (self._result,)
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestRunsPage(unittest.TestCase):
+    def setUp(self):
+        from flask import Flask
+        from trends_app import main
+        self.main = main
+        self.app = Flask(__name__)
+        self.cursor = _RunsCursor(total_runs=1500)
+        conn = mock.Mock()
+        conn.cursor.return_value = self.cursor
+        user = mock.Mock(id=5, accessible_companies=[{'id': 1}])
+        patches = [
+            mock.patch.object(main, 'get_db_connection', return_value=conn),
+            mock.patch.object(main, 'load_trends_config', return_value={}),
+            mock.patch.object(main, 'current_user', new=user),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _get_page(self, limit):
+        with self.app.test_request_context(f'/api/runs?limit={limit}'):
+            return self.main.get_all_runs.__wrapped__().get_json()
+
+    def test_next_cursor_at_maximum_page_size(self):
+        page = self._get_page(self.main.RUNS_MAX_PAGE_SIZE)
+
+        self.assertEqual(len(page['runs']), self.main.RUNS_MAX_PAGE_SIZE)
+        self.assertEqual(self.cursor.limits, [self.main.RUNS_MAX_PAGE_SIZE + 1])
+        self.assertEqual(self.main._decode_runs_cursor(page['next_cursor'])[1], page['runs'][-1]['id'])
+
+    def test_limit_above_maximum_is_clamped(self):
+        page = self._get_page(5000)
+
+        self.assertEqual(len(page['runs']), self.main.RUNS_MAX_PAGE_SIZE)
+        self.assertIsNotNone(page['next_cursor'])
+
+    def test_last_page_has_no_next_cursor(self):
+        self.cursor.runs = self.cursor.runs[:3]
+
+        page = self._get_page(3)
+
+        self.assertEqual(len(page['runs']), 3)
+        self.assertIsNone(page['next_cursor'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# test_serialized_findings.py: Unit tests for the single-pass findings serialization stage
+
+import io
+import json
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+from utils import json_utils
+from utils.json_utils import EncodedJSON, SerializedFindings, encode_object
+
+
+def _findings():
+    return {
+        'postgres_overview': {'version_info': {'status': 'success', 'data': [{'version': '16.2', 'size': Decimal('1.5')}]}},
+        'table_stats': {'tables': {'status': 'success', 'data': [{'name': f"t{i}", 'seen': datetime(2026, 1, 1)} for i in range(3)]}},
+        'execution_context': {'tool_version': '2.1.0'},
+    }
+
+
+class TestSerializedFindings(unittest.TestCase):
+    def test_document_matches_a_plain_dump(self):
+        findings = _findings()
+        serialized = SerializedFindings(findings)
+
+        expected = json.loads(json.dumps(findings, cls=json_utils.UniversalJSONEncoder))
+        self.assertEqual(json.loads(serialized.dumps()), expected)
+
+        out = io.BytesIO()
+        serialized.write(out)
+        self.assertEqual(json.loads(out.getvalue()), expected)
+        self.assertEqual(out.getvalue().count(b'\n'), len(findings) + 2)  # One module per line
+
+    def test_each_module_is_normalized_and_encoded_once(self):
+        findings = _findings()
+        serialized = SerializedFindings(findings)
+        normalized = dict(serialized.data)
+        buffers = {key: serialized.encoded(key) for key in findings}
+
+        with mock.patch.object(json_utils, 'convert_to_json_serializable',
+                               wraps=json_utils.convert_to_json_serializable) as convert:
+            serialized.dumps()
+            serialized.write(io.BytesIO())
+            findings['summarized_findings'] = {'table_stats': {}}  # Added after the prompt was built
+            serialized.refresh(findings).dumps()
+
+        # Only the new entry (and, recursively, its children) was normalized
+        self.assertIs(convert.call_args_list[0].args[0], findings['summarized_findings'])
+        self.assertEqual(convert.call_count, 2)
+        for key, buffer in buffers.items():
+            self.assertIs(serialized.data[key], normalized[key])
+            self.assertIs(serialized.encoded(key), buffer)
+
+    def test_replaced_and_removed_entries_are_refreshed(self):
+        findings = _findings()
+        serialized = SerializedFindings(findings)
+        before = serialized.size('execution_context')
+
+        findings['execution_context'] = {'tool_version': '2.1.0', 'run_by_user': 'postgres'}
+        del findings['table_stats']
+        serialized.refresh(findings)
+
+        self.assertGreater(serialized.size('execution_context'), before)
+        self.assertNotIn('table_stats', json.loads(serialized.dumps()))
+
+    def test_encoded_values_are_embedded_without_reencoding(self):
+        serialized = SerializedFindings(_findings())
+        payload = encode_object({'target_info': {'host': 'db1'}, 'findings': serialized.dumps()})
+
+        self.assertIsInstance(payload, EncodedJSON)
+        decoded = json.loads(payload)
+        self.assertEqual(decoded['findings']['postgres_overview']['version_info']['data'][0]['size'], 1.5)
+        self.assertEqual(decoded['target_info'], {'host': 'db1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# test_submission_protocol.py: Unit tests for compressed and chunked trend API submissions
+
+import gzip
+import importlib.util
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils.json_utils import SerializedFindings
+from utils.submission_protocol import (PayloadTooLarge, UnsupportedEncoding, chunk_count, compress, decompress,
+                                       resolve_content_encoding, sha256_hex, strip_analysis_results)
+
+SHIPPER_AVAILABLE = all(importlib.util.find_spec(m) for m in ('psycopg2', 'requests'))
+try:
+    import trends_app  # noqa: F401  (its package imports need flask, psycopg2, boto3, cryptography)
+    TRENDS_APP_AVAILABLE = True
+except ImportError:
+    TRENDS_APP_AVAILABLE = False
+
+
+class TestSubmissionProtocol(unittest.TestCase):
+    def test_compressed_round_trip(self):
+        body = json.dumps({'findings': ['x' * 100] * 100}).encode('utf-8')
+        compressed = compress(body, 'gzip')
+
+        self.assertLess(len(compressed), len(body) // 10)
+        self.assertEqual(decompress(compressed, 'gzip', len(body)), body)
+        self.assertEqual(decompress(body, None, len(body)), body)
+
+    def test_decompression_is_bounded(self):
+        bomb = gzip.compress(b'0' * (8 * 1024 * 1024))
+        with self.assertRaises(PayloadTooLarge):
+            decompress(bomb, 'gzip', 1024 * 1024)
+
+    def test_invalid_bodies(self):
+        with self.assertRaises(UnsupportedEncoding):
+            decompress(b'{}', 'br', 100)
+        with self.assertRaises(ValueError):
+            decompress(b'\x1f\x8b not gzip', 'gzip', 100)
+
+    def test_unknown_compression_setting_sends_uncompressed(self):
+        self.assertEqual(resolve_content_encoding('none'), 'identity')
+        self.assertEqual(resolve_content_encoding('GZIP'), 'gzip')
+        with mock.patch('builtins.print'):
+            self.assertEqual(resolve_content_encoding('lz4'), 'identity')
+
+    def test_redundant_parts_are_stripped(self):
+        results = {'prompt': 'x' * 1000, 'summarized_findings': {'a': 1}, 'critical_issues': [1]}
+        self.assertEqual(strip_analysis_results(results), {'critical_issues': [1]})
+        self.assertIn('prompt', results)  # The caller's dict is not modified
+
+        findings = {'table_stats': {'rows': 1}, 'summarized_findings': {'table_stats': {'rows': 1}}}
+        self.assertEqual(json.loads(SerializedFindings(findings).dumps(exclude={'summarized_findings'})),
+                         {'table_stats': {'rows': 1}})
+
+    def test_chunk_count(self):
+        self.assertEqual(chunk_count(1, 10), 1)
+        self.assertEqual(chunk_count(10, 10), 1)
+        self.assertEqual(chunk_count(11, 10), 2)
+
+
+def _response(status, body=None, headers=None):
+    response = mock.Mock(status_code=status, headers=headers or {})
+    response.json.return_value = body or {}
+    return response
+
+
+@unittest.skipUnless(SHIPPER_AVAILABLE, "psycopg2 and requests are not installed")
+class TestShipToApi(unittest.TestCase):
+    def setUp(self):
+        from output_handlers import trend_shipper
+        self.shipper = trend_shipper
+        self.payload = json.dumps({'findings': {f"check_{i}": list(range(200)) for i in range(300)}}).encode('utf-8')
+
+    def test_small_submission_is_one_compressed_request(self):
+        config = {'endpoint_url': 'https://trends.example.com/api/submit-health-check'}
+        with mock.patch.object(self.shipper.requests, 'post', return_value=_response(201)) as post:
+            self.shipper._send_submission(config, {'Content-Type': 'application/json'}, self.payload)
+
+        post.assert_called_once()
+        self.assertEqual(post.call_args.kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(post.call_args.kwargs['data']), self.payload)
+
+    def test_older_receiver_gets_an_uncompressed_retry(self):
+        config = {'endpoint_url': 'https://trends.example.com/api/submit-health-check'}
+        with mock.patch.object(self.shipper.requests, 'post', side_effect=[_response(400), _response(201)]) as post, \
+                mock.patch('builtins.print'):
+            response = self.shipper._send_submission(config, {'Content-Type': 'application/json'}, self.payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Content-Encoding', post.call_args.kwargs['headers'])
+        self.assertEqual(post.call_args.kwargs['data'], self.payload)
+
+    def test_validation_failures_are_not_resent_uncompressed(self):
+        config = {'endpoint_url': 'https://trends.example.com/api/submit-health-check'}
+        rejected = _response(400, headers={'Accept-Encoding': 'identity, gzip'})
+        with mock.patch.object(self.shipper.requests, 'post', return_value=rejected) as post:
+            response = self.shipper._send_submission(config, {'Content-Type': 'application/json'}, self.payload)
+
+        self.assertIs(response, rejected)
+        post.assert_called_once()
+
+    def test_unsupported_encoding_gets_an_uncompressed_retry(self):
+        config = {'endpoint_url': 'https://trends.example.com/api/submit-health-check', 'compression': 'gzip'}
+        refused = _response(415, headers={'Accept-Encoding': 'identity'})
+        with mock.patch.object(self.shipper.requests, 'post', side_effect=[refused, _response(201)]) as post, \
+                mock.patch('builtins.print'):
+            self.shipper._send_submission(config, {'Content-Type': 'application/json'}, self.payload)
+
+        self.assertEqual(post.call_args.kwargs['data'], self.payload)
+
+    def test_large_submission_is_uploaded_in_chunks(self):
+        config = {'endpoint_url': 'https://trends.example.com/api/submit-health-check',
+                  'compression': 'none', 'chunk_size_mb': 0.1}
+        chunks = {}
+
+        def put(url, headers, data, timeout):
+            chunks[int(url.rsplit('/', 1)[1])] = data
+            return _response(200)
+
+        with mock.patch.object(self.shipper.requests, 'post',
+                               side_effect=[_response(201, {'upload_id': 'u' * 32}), _response(201)]) as post, \
+                mock.patch.object(self.shipper.requests, 'put', side_effect=put), mock.patch('builtins.print'):
+            response = self.shipper._send_submission(config, {'X-API-Key': 'key'}, self.payload)
+
+        self.assertEqual(response.status_code, 201)
+        create = post.call_args_list[0].kwargs['json']
+        self.assertEqual(create['sha256'], sha256_hex(self.payload))
+        self.assertEqual(len(chunks), chunk_count(len(self.payload), create['chunk_size']))
+        self.assertEqual(b''.join(chunks[i] for i in sorted(chunks)), self.payload)
+        self.assertTrue(post.call_args_list[1].args[0].endswith(f"/uploads/{'u' * 32}/complete"))
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestUploadStore(unittest.TestCase):
+    def setUp(self):
+        from trends_app.submission_uploads import UploadError, UploadStore
+        self.UploadError = UploadError
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.store = UploadStore(self.tmp)
+        self.body = bytes(range(256)) * 1000
+
+    def _create(self):
+        return self.store.create('owner', len(self.body), sha256_hex(self.body), 'identity', 100000, 10 ** 9)
+
+    def test_chunks_are_assembled_in_any_order(self):
+        meta = self._create()
+        for index in reversed(range(meta['chunks'])):
+            self.store.write_chunk(meta, index, self.body[index * 100000:(index + 1) * 100000])
+
+        self.assertEqual(self.store.received_chunks(meta), [0, 1, 2])
+        self.assertEqual(self.store.assemble(meta), self.body)
+
+    def test_missing_chunks_and_other_owners_are_refused(self):
+        meta = self._create()
+        self.store.write_chunk(meta, 0, self.body[:100000])
+
+        with self.assertRaises(self.UploadError) as missing:
+            self.store.assemble(meta)
+        self.assertEqual(missing.exception.status, 409)
+        with self.assertRaises(self.UploadError) as other:
+            self.store.load(meta['upload_id'], 'someone else')
+        self.assertEqual(other.exception.status, 404)
+        with self.assertRaises(self.UploadError):
+            self.store.load('../../etc', 'owner')
+
+    def test_oversized_uploads_are_refused(self):
+        with self.assertRaises(self.UploadError) as error:
+            self.store.create('owner', 10 ** 10, sha256_hex(b''), 'gzip', 10 ** 7, 10 ** 9)
+        self.assertEqual(error.exception.status, 413)
+
+
+@unittest.skipUnless(TRENDS_APP_AVAILABLE, "trends_app dependencies are not installed")
+class TestCompleteUpload(unittest.TestCase):
+    SUBMITTER = {'key_id': 7, 'key_name': 'fleet', 'company_id': 3, 'company_name': 'Acme'}
+
+    def setUp(self):
+        from flask import Flask, request
+        from trends_app import main
+        from trends_app.submission_uploads import UploadStore, owner_token
+        self.request = request
+        self.main = main
+        self.app = Flask(__name__)
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.store = UploadStore(tmp)
+        body = json.dumps({'findings': {}}).encode('utf-8')
+        self.meta = self.store.create(owner_token('secret-key'), len(body), sha256_hex(body), 'identity',
+                                      len(body), 10 ** 9, submitter=self.SUBMITTER)
+        self.store.write_chunk(self.meta, 0, body)
+        self.process = mock.Mock(return_value=('submitted', 201))
+        self.connect = mock.Mock()
+        patches = [
+            mock.patch.object(main, 'get_upload_store', return_value=self.store),
+            mock.patch.object(main, 'get_submission_backend', return_value=mock.Mock()),
+            mock.patch.object(main, '_process_submission', new=self.process),
+            mock.patch.object(main, 'get_db_connection', new=self.connect),
+            mock.patch('trends_app.utils.load_trends_config', return_value={}),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _complete(self, api_key):
+        path = f"/api/submit-health-check/uploads/{self.meta['upload_id']}/complete"
+        with self.app.test_request_context(path, method='POST', headers={'X-API-Key': api_key}):
+            response = self.main.complete_submission_upload.__wrapped__(self.meta['upload_id'])
+            return response, {name: getattr(self.request, name, None) for name in
+                              ('api_key_id', 'api_key_name', 'api_company_id', 'api_company_name')}
+
+    def test_completion_submits_for_the_recorded_key_without_using_it_again(self):
+        response, identity = self._complete('secret-key')
+
+        self.assertEqual(response, ('submitted', 201))
+        self.assertEqual(identity, {'api_key_id': 7, 'api_key_name': 'fleet',
+                                    'api_company_id': 3, 'api_company_name': 'Acme'})
+        self.connect.assert_not_called()  # No API key validation or usage_count update
+
+    def test_other_keys_cannot_complete(self):
+        response, _ = self._complete('another-key')
+
+        self.assertEqual(response[1], 404)
+        self.process.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
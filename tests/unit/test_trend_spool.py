@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# test_trend_spool.py: Unit tests for the trend shipper's durable spool and background sender
+
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from output_handlers.trend_spool import REJECTED, RETRY, SENT, TrendSender, TrendSpool
+
+
+class TestTrendSpool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.spool = TrendSpool(self.tmp, max_attempts=3, backoff_seconds=10, max_backoff_seconds=15)
+
+    def _enqueue(self, payload):
+        return self.spool.enqueue(json.dumps(payload).encode('utf-8'))
+
+    def test_entries_are_claimed_once(self):
+        path = self._enqueue({'run': 1})
+        self.assertEqual(self.spool.pending(), [path])
+
+        inflight = self.spool.claim(path)
+        self.assertIsNone(self.spool.claim(path))
+        self.assertEqual(self.spool.load(inflight), {'run': 1})
+        self.assertEqual(self.spool.pending(), [])
+
+        self.spool.complete(inflight)
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+    def test_failed_entries_back_off_then_move_to_failed(self):
+        path = self._enqueue({'run': 1})
+
+        self.assertTrue(self.spool.release(self.spool.claim(path), 'timeout'))
+        self.assertEqual(self.spool.due(), [])
+        self.assertGreater(self.spool.next_due_in(), 5)
+        self.assertEqual(self.spool.due(now=time.time() + 11), [path])
+
+        self.assertTrue(self.spool.release(self.spool.claim(path), 'timeout'))
+        self.assertLessEqual(self.spool.next_due_in(), 15)  # Capped at max_backoff_seconds
+        self.assertFalse(self.spool.release(self.spool.claim(path), 'timeout'))
+
+        self.assertEqual(self.spool.pending(), [])
+        self.assertTrue((self.spool.failed_directory / path.name).exists())
+        state = json.loads((self.spool.failed_directory / (path.name + '.state')).read_text())
+        self.assertEqual(state['attempts'], 3)
+
+    def test_rejected_entries_are_not_retried(self):
+        path = self._enqueue({'run': 1})
+        self.assertFalse(self.spool.release(self.spool.claim(path), 'invalid API key', permanent=True))
+        self.assertTrue((self.spool.failed_directory / path.name).exists())
+
+
+class TestTrendSender(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.spool = TrendSpool(self.tmp, max_attempts=3, backoff_seconds=60)
+        self.print_patch = mock.patch('builtins.print')
+        self.print_patch.start()
+        self.addCleanup(self.print_patch.stop)
+
+    def test_entries_are_sent_concurrently_with_one_resource_per_worker(self):
+        for run in range(8):
+            self.spool.enqueue(json.dumps({'run': run}).encode('utf-8'))
+        sent, opened, closed = [], [], []
+        barrier = threading.Barrier(4, timeout=5)
+
+        def send(entry, resources):
+            barrier.wait()  # Only passes if four sends run at once
+            sent.append(entry['run'])
+            return SENT
+
+        def open_resources():
+            opened.append(object())
+            return opened[-1]
+
+        sender = TrendSender(self.spool, send, workers=4, open_resources=open_resources,
+                             close_resources=closed.append)
+        counts = sender.drain()
+
+        self.assertEqual(counts[SENT], 8)
+        self.assertEqual(sorted(sent), list(range(8)))
+        self.assertEqual(len(opened), 4)
+        self.assertEqual(closed, [])  # Kept for the next drain
+        self.assertEqual(self.spool.pending(), [])
+
+        sender.stop()
+        self.assertEqual(sorted(map(id, closed)), sorted(map(id, opened)))
+
+    def test_resources_are_kept_between_drains_unless_a_send_raises(self):
+        opened, closed = [], []
+
+        def send(entry, resources):
+            if entry['run'] == 2:
+                raise ConnectionError('server closed the connection')
+            return SENT
+
+        def open_resources():
+            opened.append(object())
+            return opened[-1]
+
+        sender = TrendSender(self.spool, send, open_resources=open_resources, close_resources=closed.append)
+        for run in range(3):
+            self.spool.enqueue(json.dumps({'run': run}).encode('utf-8'))
+            sender.drain()
+
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(closed, opened)  # Closed when the send raised
+
+        self.spool.enqueue(b'{"run": 3}')
+        sender.drain()
+        sender.stop()
+        self.assertEqual(len(opened), 2)  # Reopened for the next entry
+        self.assertEqual(closed, opened)
+
+    def test_outcomes_and_errors(self):
+        outcomes = {0: SENT, 1: RETRY, 2: REJECTED}
+
+        def send(entry, resources):
+            if entry['run'] == 3:
+                raise ConnectionError('refused')
+            return outcomes[entry['run']]
+
+        for run in range(4):
+            self.spool.enqueue(json.dumps({'run': run}).encode('utf-8'))
+        counts = TrendSender(self.spool, send).drain()
+
+        self.assertEqual(counts, {SENT: 1, RETRY: 2, REJECTED: 1})
+        self.assertEqual(len(self.spool.pending()), 2)
+        self.assertEqual(len(list(self.spool.failed_directory.glob('*.json.gz'))), 1)
+
+    def test_background_sender_and_flush(self):
+        sent = []
+        sender = TrendSender(self.spool, lambda entry, resources: sent.append(entry) or SENT)
+        self.spool.enqueue(b'{"run": 1}')
+        sender.notify()
+        self.assertTrue(sender.wait(5))
+        self.spool.enqueue(b'{"run": 2}')
+
+        self.assertTrue(sender.flush(5))
+        self.assertEqual(sent, [{'run': 1}, {'run': 2}])
+
+    def test_flush_gives_up_on_backoff_beyond_the_timeout(self):
+        self.spool.enqueue(b'{"run": 1}')
+        sender = TrendSender(self.spool, lambda entry, resources: RETRY)
+        self.assertFalse(sender.flush(1))
+        self.assertEqual(len(self.spool.pending()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
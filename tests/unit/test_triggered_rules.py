@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# test_triggered_rules.py: Unit tests for the batched triggered-rule loader
+
+import csv
+import io
+import json
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+try:
+    import psycopg2
+    from utils import triggered_rules
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+
+def _analysis_results(medium=3):
+    return {
+        'critical_issues': [{'rule_config_name': 'wraparound', 'metric': 'xid_age',
+                             'analysis': {'level': 'critical', 'score': 10, 'reasoning': 'XID age', 'recommendations': ['VACUUM']},
+                             'data': {'age': Decimal('1.5e9')}}],
+        'high_priority_issues': [],
+        'medium_priority_issues': [{'rule_config_name': 'unused_index', 'metric': 'unused_indexes',
+                                    'analysis': {'level': 'medium'}, 'data': {'index': f"idx_{i}"}} for i in range(medium)],
+    }
+
+
+@unittest.skipUnless(PSYCOPG2_AVAILABLE, "psycopg2 is not installed")
+class TestInsertTriggeredRules(unittest.TestCase):
+    def test_rows_keep_the_per_issue_defaults(self):
+        rows = triggered_rules.triggered_rule_rows(7, _analysis_results(medium=1))
+
+        self.assertEqual(rows[0][:6], (7, 'wraparound', 'xid_age', 'critical', 10, 'XID age'))
+        self.assertEqual(json.loads(rows[0][7]), {'age': 1500000000.0})
+        self.assertEqual(rows[1][:6], (7, 'unused_index', 'unused_indexes', 'medium', 5, ''))
+        self.assertEqual(json.loads(rows[1][6]), [])
+
+    def test_small_batches_use_one_execute_values_call(self):
+        cursor = mock.Mock()
+        with mock.patch.object(triggered_rules, 'execute_values') as execute_values:
+            stored = triggered_rules.insert_triggered_rules(cursor, 7, _analysis_results())
+
+        self.assertEqual(stored, 4)
+        execute_values.assert_called_once()
+        self.assertEqual(len(execute_values.call_args.args[2]), 4)
+        cursor.copy_expert.assert_not_called()
+
+    def test_large_batches_use_copy(self):
+        cursor = mock.Mock()
+        copied = []
+        cursor.copy_expert.side_effect = lambda sql, buffer: copied.append(buffer.getvalue())
+        count = triggered_rules.COPY_MIN_ROWS
+
+        stored = triggered_rules.insert_triggered_rules(cursor, 7, _analysis_results(medium=count))
+
+        self.assertEqual(stored, count + 1)
+        rows = list(csv.reader(io.StringIO(copied[0])))
+        self.assertEqual(len(rows), count + 1)
+        self.assertEqual(rows[1][:4], ['7', 'unused_index', 'unused_indexes', 'medium'])
+        self.assertIn('"",', copied[0].splitlines()[1])  # An empty reasoning is not written as NULL
+
+    def test_batch_failure_falls_back_to_row_by_row(self):
+        cursor = mock.Mock()
+
+        def execute(sql, params=None):
+            if params and params[1] == 'wraparound':
+                raise psycopg2.Error("bad row")
+        cursor.execute.side_effect = execute
+        warnings = []
+
+        with mock.patch.object(triggered_rules, 'execute_values', side_effect=psycopg2.Error("batch failed")):
+            stored = triggered_rules.insert_triggered_rules(cursor, 7, _analysis_results(), warn=warnings.append)
+
+        self.assertEqual(stored, 3)
+        self.assertEqual(len(warnings), 2)
+        self.assertIn("wraparound", warnings[1])
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertIn("ROLLBACK TO SAVEPOINT triggered_rules", statements)
+        self.assertEqual(statements[-1], "RELEASE SAVEPOINT triggered_rules")
+
+    def test_nothing_to_store(self):
+        cursor = mock.Mock()
+        self.assertEqual(triggered_rules.insert_triggered_rules(cursor, 7, None), 0)
+        self.assertEqual(triggered_rules.insert_triggered_rules(cursor, 7, {'critical_issues': []}), 0)
+        cursor.execute.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,8 @@ from werkzeug.security import generate_password_hash
 import psycopg2
 from .database import load_user
 from .utils import load_trends_config
+from .db_pool import get_db_connection
+from .metrics import invalidate_metrics_cache
 
 # The url_prefix makes all routes in this file start with /admin
 bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -22,7 +24,7 @@ def list_users():
     conn = None
     users_with_status = [] # MODIFIED: Create a new list for users and their status
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Fetch all user data
         cursor.execute("SELECT id, username FROM users ORDER BY username;")
@@ -66,7 +68,7 @@ def create_user():
         
         conn = None
         try:
-            conn = psycopg2.connect(**db_config)
+            conn = get_db_connection(db_config)
             cursor = conn.cursor()
             cursor.execute("INSERT INTO users (username, password_hash, is_admin) VALUES (%s, %s, %s) RETURNING id;", (username, password_hash, is_admin))
             new_user_id = cursor.fetchone()[0]
@@ -94,7 +96,7 @@ def create_user():
     all_groups = []
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT id, company_name FROM companies ORDER BY company_name;")
         all_companies = [{"id": row[0], "company_name": row[1]} for row in cursor.fetchall()]
@@ -132,7 +134,7 @@ def edit_user(user_id):
         
         conn = None
         try:
-            conn = psycopg2.connect(**db_config)
+            conn = get_db_connection(db_config)
             cursor = conn.cursor()
             cursor.execute("UPDATE users SET username = %s, is_admin = %s WHERE id = %s;", (username, is_admin, user_id))
 
@@ -165,7 +167,7 @@ def edit_user(user_id):
     user_group_ids = []
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         
         cursor.execute("SELECT id, company_name FROM companies ORDER BY company_name;")
@@ -209,7 +211,7 @@ def disable_user(user_id):
 
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Call the database function to set the 'active' preference to 'f'
         cursor.execute("SELECT setuserpreference(%s, 'active', 'f');", (user_to_disable.username,))
@@ -241,7 +243,7 @@ def enable_user(user_id):
 
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Call the database function to set the 'active' preference to 't'
         cursor.execute("SELECT setuserpreference(%s, 'active', 't');", (user_to_enable.username,))
@@ -270,7 +272,7 @@ def list_roles():
     conn = None
     roles = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("""
             SELECT g.grp_id, g.grp_name, g.grp_descrip, COUNT(ug.usrgrp_id)
@@ -306,7 +308,7 @@ def create_role():
         privilege_ids = request.form.getlist('privileges', type=int)
         conn = None
         try:
-            conn = psycopg2.connect(**db_config)
+            conn = get_db_connection(db_config)
             cursor = conn.cursor()
             cursor.execute("INSERT INTO grp (grp_name, grp_descrip) VALUES (%s, %s) RETURNING grp_id;", (name, description))
             new_role_id = cursor.fetchone()[0]
@@ -327,7 +329,7 @@ def create_role():
     all_privileges = []
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT priv_id, priv_name FROM priv ORDER BY priv_name;")
         all_privileges = [{"id": row[0], "name": row[1]} for row in cursor.fetchall()]
@@ -354,7 +356,7 @@ def edit_role(role_id):
         privilege_ids = request.form.getlist('privileges', type=int)
         conn = None
         try:
-            conn = psycopg2.connect(**db_config)
+            conn = get_db_connection(db_config)
             cursor = conn.cursor()
             cursor.execute("UPDATE grp SET grp_name = %s, grp_descrip = %s WHERE grp_id = %s;", (name, description, role_id))
             
@@ -377,7 +379,7 @@ def edit_role(role_id):
     role_priv_ids = []
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT grp_id, grp_name, grp_descrip FROM grp WHERE grp_id = %s;", (role_id,))
         role_data = cursor.fetchone()
@@ -411,7 +413,7 @@ def list_ai_providers():
     providers = []
     
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -454,7 +456,7 @@ def create_ai_provider():
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         provider_name = request.form.get('provider_name')
@@ -503,7 +505,7 @@ def delete_ai_provider(provider_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("DELETE FROM ai_providers WHERE id = %s;", (provider_id,))
         conn.commit()
@@ -531,7 +533,7 @@ def list_privileges():
     conn = None
     privileges = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT priv_id, priv_module, priv_name, priv_descrip FROM priv ORDER BY priv_module, priv_name;")
         privileges = [{
@@ -565,7 +567,7 @@ def upsert_privilege():
 
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Call the database function to perform the upsert
         cursor.execute("SELECT createpriv(%s, %s, %s);", (module, name, description))
@@ -594,7 +596,7 @@ def list_template_assets():
     conn = None
     assets = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT id, asset_name, mime_type, created_at FROM template_assets ORDER BY asset_name;")
         for row in cursor.fetchall():
@@ -629,7 +631,7 @@ def upload_template_asset():
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO template_assets (asset_name, mime_type, asset_data) VALUES (%s, %s, %s);",
@@ -656,7 +658,7 @@ def delete_template_asset(asset_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("DELETE FROM template_assets WHERE id = %s;", (asset_id,))
         conn.commit()
@@ -677,7 +679,7 @@ def get_template_asset(asset_name):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT asset_data, mime_type FROM template_assets WHERE asset_name = %s;", (asset_name,))
         asset = cursor.fetchone()
@@ -705,7 +707,7 @@ def refresh_provider_models(provider_id):
     conn = None
     
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         
         # Reset last_refreshed to force re-discovery
@@ -746,7 +748,7 @@ def list_metrics():
     conn = None
     metrics = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("""
             SELECT metric_id, metric_name, metric_value, metric_module
@@ -790,7 +792,7 @@ def create_metric():
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Check if metric already exists (setmetric will update if exists)
@@ -802,6 +804,7 @@ def create_metric():
         # Use setmetric() stored procedure
         cursor.execute("SELECT setmetric(%s, %s, %s);", (metric_name, metric_value, metric_module))
         conn.commit()
+        invalidate_metrics_cache()
         flash(f"Metric '{metric_name}' created successfully.", "success")
     except psycopg2.Error as e:
         if conn:
@@ -828,7 +831,7 @@ def update_metric(metric_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Get metric name from ID
@@ -843,6 +846,7 @@ def update_metric(metric_id):
         # Use setmetric() stored procedure (upsert behavior)
         cursor.execute("SELECT setmetric(%s, %s, %s);", (metric_name, metric_value, metric_module))
         conn.commit()
+        invalidate_metrics_cache()
         flash("Metric updated successfully.", "success")
     except psycopg2.Error as e:
         if conn:
@@ -866,7 +870,7 @@ def delete_metric(metric_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Get metric name for confirmation message
         cursor.execute("SELECT metric_name FROM metric WHERE metric_id = %s;", (metric_id,))
@@ -875,6 +879,7 @@ def delete_metric(metric_id):
             metric_name = result[0]
             cursor.execute("DELETE FROM metric WHERE metric_id = %s;", (metric_id,))
             conn.commit()
+            invalidate_metrics_cache()
             flash(f"Metric '{metric_name}' deleted successfully.", "success")
         else:
             flash("Metric not found.", "danger")
@@ -905,7 +910,7 @@ def list_technologies():
     conn = None
     technologies = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Use stored procedure to fetch all technologies
         cursor.execute("SELECT * FROM fetchtechtypes(FALSE) ORDER BY order_num, descrip")
@@ -956,7 +961,7 @@ def create_technology():
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Use stored procedure to create/update technology
@@ -1009,7 +1014,7 @@ def update_technology(tech_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Use stored procedure (settechtype is upsert - it will update existing)
@@ -1046,7 +1051,7 @@ def delete_technology(tech_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # First get the code to delete by code (stored procedure uses code, not ID)
@@ -1094,7 +1099,7 @@ def list_api_key_types():
     conn = None
     key_types = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Use stored procedure to fetch all key types
         cursor.execute("SELECT * FROM fetch_api_key_types(FALSE) ORDER BY key_type_order, key_type_name")
@@ -1194,7 +1199,7 @@ def create_api_key_type():
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Use stored procedure to create/update key type
@@ -1287,7 +1292,7 @@ def update_api_key_type(key_type_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Use stored procedure (set_api_key_type is upsert - it will update existing)
@@ -1322,7 +1327,7 @@ def delete_api_key_type(key_type_id):
     db_config = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # First get the code to delete by code (stored procedure uses code, not ID)
@@ -3,6 +3,7 @@ import json
 import psycopg2
 from flask import current_app
 from .utils import load_trends_config
+from .db_pool import get_db_connection
 
 def get_ai_recommendation(prompt, profile_id):
     """
@@ -26,7 +27,7 @@ def get_ai_recommendation(prompt, profile_id):
 
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Fetch provider details and user preferences
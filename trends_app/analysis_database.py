@@ -8,6 +8,7 @@ following the patterns established in database.py.
 import psycopg2
 import psycopg2.extras
 from flask import current_app
+from .db_pool import get_db_connection
 
 
 def get_accessible_schemas(db_config):
@@ -22,7 +23,7 @@ def get_accessible_schemas(db_config):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute("SELECT * FROM get_accessible_analysis_schemas()")
         schemas = cursor.fetchall()
@@ -50,7 +51,7 @@ def get_migration_candidates(db_config, limit=50, min_frequency=50000, days=30):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute(
             "SELECT * FROM get_migration_candidates(%s, %s, %s)",
@@ -80,7 +81,7 @@ def get_write_volume_trends(db_config, company_id, days=90):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute(
             "SELECT * FROM get_write_volume_trends(%s, %s)",
@@ -108,7 +109,7 @@ def get_migration_pipeline_summary(db_config):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute("SELECT * FROM get_migration_pipeline_summary()")
         summary = cursor.fetchone()
@@ -134,7 +135,7 @@ def get_customer_technology_footprint(db_config, days=90):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute(
             "SELECT * FROM get_customer_technology_footprint(%s)",
@@ -164,7 +165,7 @@ def get_query_details(db_config, run_id, query_text):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute(
             "SELECT * FROM get_query_details(%s, %s)",
@@ -192,7 +193,7 @@ def get_consulting_opportunities_summary(db_config):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute("SELECT * FROM get_consulting_opportunities_summary()")
         summary = cursor.fetchone()
@@ -218,7 +219,7 @@ def get_consulting_opportunities(db_config, limit=50):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute(
             """
@@ -258,7 +259,7 @@ def get_consulting_executive_summary(db_config):
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute("SELECT * FROM consulting_analysis.executive_consulting_summary")
         summary = cursor.fetchall()
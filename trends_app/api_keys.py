@@ -14,6 +14,7 @@ from datetime import datetime, timedelta
 from flask import Blueprint, render_template, request, jsonify, abort, flash, redirect, url_for
 from flask_login import login_required, current_user
 from .utils import load_trends_config
+from .db_pool import get_db_connection
 
 bp = Blueprint('api_keys', __name__, url_prefix='/profile/api-keys')
 
@@ -48,7 +49,7 @@ def list_keys():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         # Get API keys - either for one company or all accessible companies
@@ -136,7 +137,7 @@ def generate_key():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         # Generate API key using unified stored procedure
@@ -200,7 +201,7 @@ def revoke_key(key_id):
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         # Revoke the key using stored procedure
@@ -245,7 +246,7 @@ def key_usage(key_id):
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         # Get key details using stored procedure (includes access control)
@@ -305,7 +306,7 @@ def activate_key(key_id):
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         # Activate the key using stored procedure
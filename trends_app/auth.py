@@ -4,6 +4,7 @@ from werkzeug.security import check_password_hash, generate_password_hash
 import psycopg2
 from .database import check_db_connection, load_user
 from .utils import load_trends_config
+from .db_pool import get_db_connection
 
 bp = Blueprint('auth', __name__)
 
@@ -16,7 +17,7 @@ def login():
         db_config = config.get('database')
         conn = None
         try:
-            conn = psycopg2.connect(**db_config)
+            conn = get_db_connection(db_config)
             cursor = conn.cursor()
 
             # Check maintenance mode
@@ -76,7 +77,7 @@ def change_password():
         db_config = config.get('database')
         conn = None
         try:
-            conn = psycopg2.connect(**db_config)
+            conn = get_db_connection(db_config)
             cursor = conn.cursor()
             cursor.execute("UPDATE users SET password_hash = %s, password_change_required = FALSE WHERE id = %s;", (new_password_hash, current_user.id))
             conn.commit()
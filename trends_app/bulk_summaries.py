@@ -0,0 +1,182 @@
+"""
+Per-run issue summaries for bulk AI reports.
+
+The bulk report and its token estimate used to fetch every selected run with
+its full decrypted findings, only to look up each run's triggered rules one
+query at a time. `load_run_summaries()` instead:
+
+- checks access and reads the runs' metadata in one query, without findings;
+- reads the triggered rules of all the runs in one query
+  (health_check_triggered_rules);
+- for runs stored without triggered rules, decrypts the findings and runs
+  the technology's analysis rules over them, several runs concurrently;
+- caches each run's summary, so the estimate and the report that follows it
+  (or a second estimate for the same selection) reuse the work. Summaries
+  built from stored triggered rules never change; those built from findings
+  are reused only while the rule set they came from is unchanged.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from .database import fetch_runs_by_ids
+from .db_pool import get_db_connection
+from .findings_cache import FindingsCache
+from .prompt_generator import find_metric_issues
+from .utils import load_trends_config
+
+SEVERITY_LEVELS = ('critical', 'high', 'medium')
+
+# Runs whose findings are analyzed at the same time
+MAX_SUMMARY_WORKERS = 4
+
+RUNS_SQL = """
+    SELECT hcr.id, hcr.run_timestamp, c.company_name, hcr.target_host, hcr.target_port,
+           hcr.target_db_name, hcr.db_technology
+    FROM health_check_runs hcr
+    JOIN companies c ON hcr.company_id = c.id
+    WHERE hcr.id = ANY(%s) AND hcr.company_id = ANY(%s)
+    ORDER BY hcr.run_timestamp DESC, hcr.id DESC;
+"""
+
+TRIGGERED_RULES_SQL = """
+    SELECT run_id, rule_config_name, metric_name, severity_level, reasoning, recommendations
+    FROM health_check_triggered_rules
+    WHERE run_id = ANY(%s)
+    ORDER BY run_id,
+        CASE severity_level
+            WHEN 'critical' THEN 1
+            WHEN 'high' THEN 2
+            WHEN 'medium' THEN 3
+            ELSE 4
+        END,
+        rule_config_name, id;
+"""
+
+# The first rule set of each technology, as used for runs without triggered rules
+RULE_SETS_SQL = """
+    SELECT DISTINCT ON (lower(technology)) lower(technology), id, updated_at, rules_json
+    FROM analysis_rules
+    ORDER BY lower(technology), id;
+"""
+
+# run_id -> {'issues', 'source', 'rule_set'}; the issues are small, so many runs fit
+_summary_cache = FindingsCache(max_runs=4096, max_bytes=64 * 1024 * 1024)
+
+
+def _cache_summary(run_id, summary):
+    _summary_cache.put(run_id, summary, len(json.dumps(summary['issues'], default=str)))
+
+
+def _rule_set_version(rule_set):
+    return None if rule_set is None else (rule_set['id'], str(rule_set['updated_at']))
+
+
+def _analyze_findings(app, db_config, run, accessible_company_ids, rule_set):
+    """Issues of a run without triggered rules, from its findings (runs in a worker thread)."""
+    with app.app_context():
+        fetched = fetch_runs_by_ids(db_config, [run['id']], accessible_company_ids)
+        findings = fetched[0].get('findings') if fetched else None
+        if not isinstance(findings, dict) or set(findings) == {'error'}:
+            return None
+        found = find_metric_issues(findings, rule_set['rules'], levels=SEVERITY_LEVELS,
+                                   settings=load_trends_config() or {})
+        return [{
+            "check": issue['analysis'].get('rule_config_name'),
+            "metric": issue['metric'],
+            "severity": level,
+            "issue": issue['analysis'].get('reasoning'),
+            "recommendations": issue['analysis'].get('recommendations')
+        } for level in SEVERITY_LEVELS for issue in found[level]]
+
+
+def load_run_summaries(db_config, run_ids, accessible_company_ids):
+    """
+    The accessible runs among run_ids, newest first, each with its issues.
+
+    Returns:
+        list[dict]: Run metadata (id, run_timestamp, company_name, target_host,
+        target_port, target_db_name, db_technology), 'issues' (check, metric,
+        severity, issue, recommendations), the critical/high/medium counts and
+        'issues_source': 'triggered_rules', 'findings' or 'unavailable'.
+    """
+    if not run_ids or not accessible_company_ids:
+        return []
+
+    conn = None
+    try:
+        conn = get_db_connection(db_config)
+        cursor = conn.cursor()
+        cursor.execute(RUNS_SQL, (list(run_ids), accessible_company_ids))
+        columns = [column[0] for column in cursor.description]
+        runs = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        summaries = {run['id']: _summary_cache.get(run['id']) for run in runs}
+        missing_ids = [run_id for run_id, summary in summaries.items() if summary is None]
+        if missing_ids:
+            cursor.execute(TRIGGERED_RULES_SQL, (missing_ids,))
+            for run_id, check, metric, severity, reasoning, recommendations in cursor.fetchall():
+                summary = summaries.get(run_id)
+                if summary is None:
+                    summary = summaries[run_id] = {'issues': [], 'source': 'triggered_rules', 'rule_set': None}
+                summary['issues'].append({
+                    "check": check,
+                    "metric": metric,
+                    "severity": severity,
+                    "issue": reasoning,
+                    "recommendations": recommendations
+                })
+            for run_id in missing_ids:
+                if summaries[run_id] is not None:
+                    _cache_summary(run_id, summaries[run_id])
+
+        # Runs without stored triggered rules are analyzed from their findings
+        unanalyzed = [run for run in runs
+                      if summaries[run['id']] is None or summaries[run['id']]['source'] == 'findings']
+        rule_sets = {}
+        if unanalyzed:
+            cursor.execute(RULE_SETS_SQL)
+            rule_sets = {technology: {'id': rule_set_id, 'updated_at': updated_at, 'rules': rules}
+                         for technology, rule_set_id, updated_at, rules in cursor.fetchall()}
+    finally:
+        if conn: conn.close()
+
+    pending = []
+    for run in unanalyzed:
+        rule_set = rule_sets.get((run['db_technology'] or '').lower())
+        summary = summaries[run['id']]
+        if summary is not None and summary['rule_set'] == _rule_set_version(rule_set):
+            continue
+        if rule_set is None:
+            summaries[run['id']] = {'issues': [], 'source': 'unavailable', 'rule_set': None}
+        else:
+            pending.append((run, rule_set))
+
+    if pending:
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=min(MAX_SUMMARY_WORKERS, len(pending))) as pool:
+            futures = [(run, rule_set, pool.submit(_analyze_findings, app, db_config, run, accessible_company_ids,
+                                                   rule_set))
+                       for run, rule_set in pending]
+            for run, rule_set, future in futures:
+                try:
+                    issues = future.result()
+                except Exception as e:
+                    current_app.logger.error(f"Error analyzing the findings of run {run['id']}: {e}")
+                    issues = None
+                if issues is None:
+                    summaries[run['id']] = {'issues': [], 'source': 'unavailable', 'rule_set': None}
+                else:
+                    summaries[run['id']] = {'issues': issues, 'source': 'findings',
+                                            'rule_set': _rule_set_version(rule_set)}
+                    _cache_summary(run['id'], summaries[run['id']])
+
+    result = []
+    for run in runs:
+        summary = summaries[run['id']]
+        counts = {f"{level}_count": sum(1 for issue in summary['issues'] if issue['severity'] == level)
+                  for level in SEVERITY_LEVELS}
+        result.append({**run, **counts, 'issues': summary['issues'], 'issues_source': summary['source']})
+    return result
@@ -1,11 +1,15 @@
 import psycopg2
 import psycopg2.extras
 import json
+import threading
+import time
 import boto3
 from cryptography.fernet import Fernet
 from flask import current_app
 from .models import User
 from .utils import load_trends_config
+from .db_pool import get_db_connection
+from .findings_cache import get_findings_cache
 
 def check_db_connection():
     """Checks if a connection can be made to the database."""
@@ -28,7 +32,7 @@ def load_user(db_config, user_id):
     """Loads a user and their associated companies and privileges."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT id, username, is_admin, password_change_required FROM users WHERE id = %s;", (user_id,))
         user_data = cursor.fetchone()
@@ -59,16 +63,49 @@ def load_user(db_config, user_id):
         if conn: conn.close()
     return None
 
+# Plaintext data keys are reused for this long (encryption.data_key_cache_seconds)
+DATA_KEY_CACHE_SECONDS = 300
+DATA_KEY_CACHE_MAX_KEYS = 256
+
+_kms_client = None
+_kms_lock = threading.Lock()
+_data_keys = {}  # encrypted key -> (plaintext key, expires_at)
+
+
+def get_kms_client():
+    """The KMS client of this process; boto3 clients are thread-safe and costly to create."""
+    global _kms_client
+    if _kms_client is None:
+        with _kms_lock:
+            if _kms_client is None:
+                _kms_client = boto3.client('kms')
+    return _kms_client
+
+
 def decrypt_kms_data_key(encrypted_key_blob, config):
-    """Uses AWS KMS to decrypt a data key."""
-    kms_client = boto3.client('kms')
-    kms_key_arn = config.get('encryption', {}).get('aws_kms_key_arn')
-    
-    response = kms_client.decrypt(
+    """Uses AWS KMS to decrypt a data key, reusing recently decrypted keys."""
+    encryption = config.get('encryption', {})
+    ttl = encryption.get('data_key_cache_seconds', DATA_KEY_CACHE_SECONDS)
+    now = time.monotonic()
+    with _kms_lock:
+        cached = _data_keys.get(encrypted_key_blob)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    response = get_kms_client().decrypt(
         CiphertextBlob=encrypted_key_blob,
-        KeyId=kms_key_arn
+        KeyId=encryption.get('aws_kms_key_arn')
     )
-    return response['Plaintext']
+    plaintext_key = response['Plaintext']
+    if ttl > 0:
+        with _kms_lock:
+            if len(_data_keys) >= DATA_KEY_CACHE_MAX_KEYS:
+                for key in [key for key, (_, expires_at) in _data_keys.items() if expires_at <= now]:
+                    del _data_keys[key]
+                while len(_data_keys) >= DATA_KEY_CACHE_MAX_KEYS:
+                    del _data_keys[next(iter(_data_keys))]
+            _data_keys[encrypted_key_blob] = (plaintext_key, now + ttl)
+    return plaintext_key
 
 def get_unique_targets(db_config, accessible_company_ids):
     """Fetches unique targets accessible by the user to populate filters."""
@@ -78,7 +115,7 @@ def get_unique_targets(db_config, accessible_company_ids):
     conn = None
     targets = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         # Use stored procedure for analytics abstraction
         query = "SELECT get_unique_targets(%s);"
@@ -99,7 +136,7 @@ def save_user_preference(db_config, username, pref_name, pref_value):
     """Saves a user preference by calling the setuserpreference database function."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT setuserpreference(%s, %s, %s);",
@@ -117,7 +154,7 @@ def fetch_template_asset(db_settings, asset_name):
     """Fetches a single template asset's raw data from the database."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT asset_data FROM template_assets WHERE asset_name = %s;",
@@ -136,7 +173,7 @@ def fetch_prompt_template_content(db_settings, template_id):
     """Fetches the content of a specific prompt template from the database."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT template_content FROM prompt_templates WHERE id = %s;",
@@ -156,7 +193,7 @@ def load_user_preferences(db_config, username):
     conn = None
     prefs = {}
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         query = "SELECT usrpref_name, usrpref_value FROM usrpref WHERE usrpref_username = %s;"
         cursor.execute(query, (username,))
@@ -172,26 +209,44 @@ def fetch_runs_by_ids(db_config, run_ids, accessible_company_ids):
     """
     Fetches and decrypts runs by leveraging the new database functions for
     pgcrypto and handling KMS decryption in the application layer.
+
+    Access is checked on every call; runs that were decrypted recently are
+    then served from the findings cache (findings_cache.py), whose findings
+    must not be modified.
     """
     conn = None
     runs = []
     config = load_trends_config()
+    cache = get_findings_cache()
 
     if not accessible_company_ids or not run_ids:
         return []
 
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
-        # Use stored procedure for analytics abstraction
-        query = "SELECT get_runs_by_ids(%s, %s);"
-        cursor.execute(query, (run_ids, accessible_company_ids))
-        result = cursor.fetchone()[0]
-
-        # Parse JSONB result: array of run objects
-        if result:
-            for run_obj in result:
+        cursor.execute(
+            "SELECT id FROM health_check_runs WHERE id = ANY(%s) AND company_id = ANY(%s);",
+            (list(run_ids), accessible_company_ids)
+        )
+        missing_ids = []
+        for (run_id,) in cursor.fetchall():
+            cached_run = cache.get(run_id)
+            if cached_run is not None:
+                runs.append(dict(cached_run))
+            else:
+                missing_ids.append(run_id)
+
+        if missing_ids:
+            # Use stored procedure for analytics abstraction
+            query = "SELECT get_runs_by_ids(%s, %s);"
+            cursor.execute(query, (missing_ids, accessible_company_ids))
+            result = cursor.fetchone()[0]
+
+            # Parse JSONB result: array of run objects
+            for run_obj in result or []:
                 findings_data = run_obj['decrypted_findings']
+                findings_size = None
 
                 # Handle KMS decryption at application layer
                 if run_obj.get('encryption_mode') == 'kms':
@@ -201,17 +256,25 @@ def fetch_runs_by_ids(db_config, run_ids, accessible_company_ids):
                         cipher_suite = Fernet(plaintext_key)
                         decrypted_json_text = cipher_suite.decrypt(encrypted_blob).decode('utf-8')
                         findings_data = json.loads(decrypted_json_text)
+                        findings_size = len(decrypted_json_text)
                     except Exception as e:
                         current_app.logger.error(f"Failed to decrypt KMS data for run {run_obj['id']}: {e}")
                         findings_data = {"error": "Failed to decrypt KMS data."}
 
-                runs.append({
+                run = {
+                    "id": run_obj['id'],
                     "run_timestamp": run_obj['run_timestamp'],
                     "findings": findings_data,
                     "target_host": run_obj['target_host'],
                     "target_port": run_obj['target_port'],
                     "target_db_name": run_obj['target_db_name']
-                })
+                }
+                decrypted = run_obj.get('encryption_mode') != 'kms' or findings_size is not None
+                if decrypted and cache.max_runs > 0:
+                    if findings_size is None:
+                        findings_size = len(json.dumps(findings_data, default=str))
+                    cache.put(run['id'], run, findings_size)
+                runs.append(dict(run))
 
     except Exception as e:
         current_app.logger.error(f"Error fetching or decrypting runs: {e}")
@@ -225,7 +288,7 @@ def get_enabled_technologies(db_config):
     """Fetch enabled technologies for dropdown population."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         cursor.execute("""
@@ -251,7 +314,7 @@ def get_all_technologies(db_config):
     """Fetch all technologies (for admin management)."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         cursor.execute("""
@@ -279,7 +342,7 @@ def get_technology_by_id(db_config, tech_id):
     """Fetch a single technology by ID."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         cursor.execute("""
@@ -307,7 +370,7 @@ def create_technology(db_config, code, description, order_num, enabled, notes):
     """Create a new technology."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -333,7 +396,7 @@ def update_technology(db_config, tech_id, code, description, order_num, enabled,
     """Update an existing technology."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -361,7 +424,7 @@ def delete_technology(db_config, tech_id):
     """Delete a technology."""
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         cursor.execute("DELETE FROM techtype WHERE techtype_id = %s", (tech_id,))
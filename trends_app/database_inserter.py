@@ -6,14 +6,19 @@ submission API. It does NOT depend on output_handlers/trend_shipper.py, making
 trends_app fully independent.
 
 This is essentially a copy of the core database insertion logic from trend_shipper.py,
-adapted to work within the Flask app context.
+adapted to work within the Flask app context. Triggered rules are the exception:
+both use the bulk loader in utils/triggered_rules.py.
 """
 
 import json
 import re
-import psycopg2
 from datetime import datetime
 from flask import current_app
+from .db_pool import get_db_connection
+
+from utils.execution_profiles import insert_execution_profile
+from utils.run_metrics import insert_run_metrics
+from utils.triggered_rules import insert_triggered_rules
 
 
 def insert_health_check(db_config, target_info, findings_json,
@@ -48,7 +53,7 @@ def insert_health_check(db_config, target_info, findings_json,
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         current_app.logger.info(
@@ -148,7 +153,17 @@ def insert_health_check(db_config, target_info, findings_json,
         run_id = cursor.fetchone()[0]
         current_app.logger.info(f"Inserted health check run with ID: {run_id}")
 
-        # 8. Insert triggered rules (CRITICAL for trend analysis)
+        # 8. Insert the per-check execution profile
+        profiles_stored = _insert_execution_profile(cursor, run_id, structured_findings)
+        if profiles_stored > 0:
+            current_app.logger.info(
+                f"Stored execution profiles of {profiles_stored} check modules for run {run_id}"
+            )
+
+        # 9. Insert the scalar metrics read by the consulting and write volume views
+        _insert_run_metrics(cursor, run_id, structured_findings)
+
+        # 10. Insert triggered rules (CRITICAL for trend analysis)
         # Extract rules from critical_issues, high_priority_issues, medium_priority_issues
         if analysis_results:
             rules_stored = _insert_triggered_rules_from_analysis(
@@ -378,12 +393,50 @@ def _extract_infrastructure_metadata(structured_findings):
     return metadata if metadata else None
 
 
+def _insert_execution_profile(cursor, run_id, structured_findings):
+    """
+    Insert the per-check execution profile into health_check_execution_profiles.
+
+    The rows come from the 'execution_profile' block of the structured
+    findings (see utils/execution_profiles.py).
+
+    Args:
+        cursor: Database cursor
+        run_id (int): Health check run ID
+        structured_findings (dict): The submitted structured findings
+
+    Returns:
+        int: Number of module profiles inserted
+    """
+    return insert_execution_profile(cursor, run_id, structured_findings, warn=current_app.logger.warning)
+
+
+def _insert_run_metrics(cursor, run_id, structured_findings):
+    """
+    Insert the scalar metrics of a run into health_check_run_metrics.
+
+    See utils/run_metrics.py. A savepoint keeps the run when the table does
+    not exist yet.
+
+    Args:
+        cursor: Database cursor
+        run_id (int): Health check run ID
+        structured_findings (dict): The submitted structured findings
+
+    Returns:
+        int: Number of metrics inserted
+    """
+    return insert_run_metrics(cursor, run_id, structured_findings, warn=current_app.logger.warning)
+
+
 def _insert_triggered_rules_from_analysis(cursor, run_id, analysis_results):
     """
     Insert triggered rules from analysis_results into health_check_triggered_rules table.
 
     This function extracts the triggered rules from the analysis_results dictionary
     (output from generate_dynamic_prompt()) and stores them for trend analysis.
+    All issues are sent in one batch, with the bulk loader shared with
+    trend_shipper.py (utils/triggered_rules.py).
 
     Args:
         cursor: Database cursor
@@ -396,81 +449,7 @@ def _insert_triggered_rules_from_analysis(cursor, run_id, analysis_results):
     Returns:
         int: Total number of rules stored
     """
-    if not analysis_results:
-        return 0
-
-    total_stored = 0
-    insert_sql = """
-        INSERT INTO health_check_triggered_rules (
-            run_id,
-            rule_config_name,
-            metric_name,
-            severity_level,
-            severity_score,
-            reasoning,
-            recommendations,
-            triggered_data
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-    """
-
-    # Process critical issues
-    for issue in analysis_results.get('critical_issues', []):
-        try:
-            cursor.execute(insert_sql, (
-                run_id,
-                issue.get('rule_config_name', 'unknown'),
-                issue.get('metric', 'unknown'),
-                'critical',
-                issue.get('analysis', {}).get('score', 10),
-                issue.get('analysis', {}).get('reasoning', ''),
-                json.dumps(issue.get('analysis', {}).get('recommendations', [])),
-                json.dumps(issue.get('data', {}))
-            ))
-            total_stored += 1
-        except Exception as e:
-            current_app.logger.warning(
-                f"Failed to store critical issue for run {run_id}: {e}"
-            )
-
-    # Process high priority issues
-    for issue in analysis_results.get('high_priority_issues', []):
-        try:
-            cursor.execute(insert_sql, (
-                run_id,
-                issue.get('rule_config_name', 'unknown'),
-                issue.get('metric', 'unknown'),
-                'high',
-                issue.get('analysis', {}).get('score', 7),
-                issue.get('analysis', {}).get('reasoning', ''),
-                json.dumps(issue.get('analysis', {}).get('recommendations', [])),
-                json.dumps(issue.get('data', {}))
-            ))
-            total_stored += 1
-        except Exception as e:
-            current_app.logger.warning(
-                f"Failed to store high priority issue for run {run_id}: {e}"
-            )
-
-    # Process medium priority issues
-    for issue in analysis_results.get('medium_priority_issues', []):
-        try:
-            cursor.execute(insert_sql, (
-                run_id,
-                issue.get('rule_config_name', 'unknown'),
-                issue.get('metric', 'unknown'),
-                'medium',
-                issue.get('analysis', {}).get('score', 5),
-                issue.get('analysis', {}).get('reasoning', ''),
-                json.dumps(issue.get('analysis', {}).get('recommendations', [])),
-                json.dumps(issue.get('data', {}))
-            ))
-            total_stored += 1
-        except Exception as e:
-            current_app.logger.warning(
-                f"Failed to store medium priority issue for run {run_id}: {e}"
-            )
-
-    return total_stored
+    return insert_triggered_rules(cursor, run_id, analysis_results, warn=current_app.logger.warning)
 
 
 def _insert_triggered_rules(cursor, run_id, triggered_rules):
@@ -0,0 +1,193 @@
+"""
+Pooled PostgreSQL connections for the web app.
+
+Request handlers used to open a new connection per request (and some per
+lookup). `get_db_connection(db_config)` is a drop-in replacement for
+`psycopg2.connect(**db_config)`: it returns a connection from a per-process
+pool, and calling `close()` on it hands it back to the pool instead of
+closing it. Existing `try ... finally: conn.close()` code needs no other
+change.
+
+A returned connection is reset first (rollback, RESET ALL, SET SESSION
+AUTHORIZATION DEFAULT, and the default isolation level, read-only,
+deferrable and autocommit settings), so every borrower starts outside a
+transaction with a fresh session state; one that cannot be reset is
+discarded. Connections that are closed, broken, older than
+`recycle_seconds` or beyond `max_idle` are discarded, and one that has been
+idle longer than `ping_after_seconds` is checked before it is reused. The
+pool never refuses a connection: when none is idle, a new one is opened.
+
+Configuration (config/trends.yaml, all optional):
+
+    database_pool:
+      max_idle: 10             # idle connections kept per worker process
+      recycle_seconds: 1800    # connections older than this are replaced
+      ping_after_seconds: 60   # idle connections older than this are checked with SELECT 1
+"""
+
+import os
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+DEFAULTS = {
+    'max_idle': 10,
+    'recycle_seconds': 1800,
+    'ping_after_seconds': 60,
+}
+
+
+class PooledConnection:
+    """A pooled psycopg2 connection whose close() returns it to the pool."""
+
+    def __init__(self, pool, conn, created_at):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_created_at', created_at)
+
+    def __getattr__(self, name):
+        conn = self._conn
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already closed")
+        return getattr(conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    @property
+    def closed(self):
+        return 1 if self._conn is None else self._conn.closed
+
+    def close(self):
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, '_conn', None)
+            self._pool.release(conn, self._created_at)
+
+    def __del__(self):
+        # A connection that was never closed still goes back to the pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Idle connections to one database, shared by the threads of one process."""
+
+    def __init__(self, db_config, max_idle=DEFAULTS['max_idle'], recycle_seconds=DEFAULTS['recycle_seconds'],
+                 ping_after_seconds=DEFAULTS['ping_after_seconds']):
+        self.db_config = dict(db_config)
+        self.max_idle = max_idle
+        self.recycle_seconds = recycle_seconds
+        self.ping_after_seconds = ping_after_seconds
+        self._idle = []  # (connection, created_at, returned_at), most recently returned last
+        self._lock = threading.Lock()
+
+    def connect(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, created_at, returned_at = self._idle.pop()
+            if conn.closed or now - created_at > self.recycle_seconds:
+                self._discard(conn)
+                continue
+            if now - returned_at > self.ping_after_seconds and not self._ping(conn):
+                self._discard(conn)
+                continue
+            return PooledConnection(self, conn, created_at)
+        return PooledConnection(self, psycopg2.connect(**self.db_config), now)
+
+    def release(self, conn, created_at):
+        if conn.closed or time.monotonic() - created_at > self.recycle_seconds:
+            self._discard(conn)
+            return
+        try:
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+            # search_path, SET ROLE and other session settings must not leak to the next borrower
+            conn.reset()
+            conn.set_session(isolation_level='DEFAULT', readonly='DEFAULT', deferrable='DEFAULT', autocommit=False)
+        except psycopg2.Error:
+            self._discard(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((conn, created_at, time.monotonic()))
+                return
+        self._discard(conn)
+
+    def _ping(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = None
+
+
+def _pool_settings():
+    from .utils import load_trends_config
+    return {**DEFAULTS, **((load_trends_config() or {}).get('database_pool') or {})}
+
+
+def get_pool(db_config):
+    """The pool for a database configuration, created on first use in each process."""
+    global _pools, _pools_pid
+    key = tuple(sorted((k, str(v)) for k, v in db_config.items()))
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Connections must not be shared with a forked parent or sibling
+            _pools, _pools_pid = {}, os.getpid()
+        pool = _pools.get(key)
+    if pool is None:
+        settings = _pool_settings()
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(db_config, settings['max_idle'], settings['recycle_seconds'],
+                                                         settings['ping_after_seconds']))
+    return pool
+
+
+def get_db_connection(db_config):
+    """A pooled connection to the database; close() returns it to the pool."""
+    return get_pool(db_config).connect()
+
+
+def close_all_pools():
+    """Closes every idle connection of this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
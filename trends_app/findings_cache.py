@@ -0,0 +1,94 @@
+"""
+In-process cache of decrypted and parsed run findings.
+
+The comparison page, slides, bulk reports and token estimation all load
+the same runs through `database.fetch_runs_by_ids`, which decrypted
+(pgcrypto in SQL, or KMS + Fernet here) and parsed each run's full findings
+every time. A stored run never changes, so each worker process keeps the
+most recently used runs, bounded both by count and by the approximate size
+of their findings. Access to a run is still checked against the database
+on every request; only the decryption and parsing are skipped.
+
+Cached findings are shared between requests and must be treated as
+read-only.
+
+Configuration (config/trends.yaml, all optional):
+
+    findings_cache:
+      max_runs: 64             # runs kept per worker process (0 disables the cache)
+      max_megabytes: 256       # approximate size of their findings as JSON
+"""
+
+import threading
+from collections import OrderedDict
+
+DEFAULTS = {
+    'max_runs': 64,
+    'max_megabytes': 256,
+}
+
+
+class FindingsCache:
+    """Thread-safe LRU cache of runs, bounded by count and by total size."""
+
+    def __init__(self, max_runs=DEFAULTS['max_runs'], max_bytes=DEFAULTS['max_megabytes'] * 1024 * 1024):
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        self._runs = OrderedDict()  # run_id -> (run, size), most recently used last
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, run_id):
+        with self._lock:
+            entry = self._runs.get(run_id)
+            if entry is None:
+                return None
+            self._runs.move_to_end(run_id)
+            return entry[0]
+
+    def put(self, run_id, run, size):
+        """Caches a run whose findings take about `size` bytes; runs larger than the whole cache are not kept."""
+        if self.max_runs <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(run_id)
+            self._runs[run_id] = (run, size)
+            self._bytes += size
+            while len(self._runs) > self.max_runs or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._runs.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def _discard(self, run_id):
+        entry = self._runs.pop(run_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def discard(self, run_id):
+        with self._lock:
+            self._discard(run_id)
+
+    def clear(self):
+        with self._lock:
+            self._runs.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'runs': len(self._runs), 'bytes': self._bytes}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_findings_cache():
+    """The findings cache of this process, sized from the `findings_cache` configuration section."""
+    global _cache
+    if _cache is None:
+        from .utils import load_trends_config
+        settings = {**DEFAULTS, **((load_trends_config() or {}).get('findings_cache') or {})}
+        with _cache_lock:
+            if _cache is None:
+                _cache = FindingsCache(int(settings['max_runs']),
+                                       int(float(settings['max_megabytes']) * 1024 * 1024))
+    return _cache
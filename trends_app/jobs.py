@@ -0,0 +1,291 @@
+"""
+Background jobs for long-running report generation.
+
+Generating an AI report, a bulk AI report, a trend analysis or a slide deck
+waits on the AI provider (and on `marp-cli` for slides), often for tens of
+seconds. Running that inside the request held a web worker for the whole
+time, so a few concurrent users could exhaust the worker pool. These
+requests now only validate their input and submit a job:
+
+- `JobQueue.submit()` records the job and hands it to a bounded thread pool
+  of the current process; when that process already has `max_pending` jobs
+  queued or running, the submission is refused with `JobQueueFull`.
+- The job function runs in an application context. It returns a
+  JSON-serializable result, or raises `JobError` with a message for the user.
+- The browser polls `/api/jobs/<job_id>` until the job has succeeded or
+  failed.
+
+Job state lives in a store shared by all worker processes, so a poll can be
+answered by any of them: the `background_jobs` table by default
+(migration 11, results encrypted like generated reports), or memory for a
+single-process development server and for tests. Jobs still queued or
+running for longer than `stale_after_minutes` (e.g. their process was
+restarted) are reported as failed; a running job is measured from when it
+started, a queued one from when it was submitted.
+
+Job functions receive everything they need as arguments: `current_user` and
+the request are not available in the worker threads.
+
+Configuration (config/trends.yaml, all optional):
+
+    jobs:
+      store: database          # or 'memory' for a single-process server
+      workers: 4               # jobs run at the same time per worker process
+      max_pending: 32          # queued and running jobs per worker process
+      retention_hours: 24      # finished jobs are deleted after this
+      stale_after_minutes: 30  # queued or running this long, a job is reported as failed
+"""
+
+import json
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from .db_pool import get_db_connection
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+DEFAULTS = {
+    'store': 'database',
+    'workers': 4,
+    'max_pending': 32,
+    'retention_hours': 24,
+    'stale_after_minutes': 30,
+}
+
+UNEXPECTED_ERROR = "An unexpected error occurred while running the job."
+INTERRUPTED_ERROR = "The job was interrupted before it finished. Please try again."
+
+
+class JobError(Exception):
+    """Raised by a job function to fail the job with a message for the user."""
+
+
+class JobQueueFull(Exception):
+    """Raised when this process cannot accept more jobs."""
+
+
+class MemoryJobStore:
+    """Job state in memory; only visible to the process that holds it."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id, job_type, user_id):
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id, 'job_type': job_type, 'user_id': user_id, 'status': QUEUED,
+                'created_at': datetime.now(timezone.utc), 'started_at': None, 'finished_at': None,
+                'result': None, 'error': None,
+            }
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(changes)
+
+    def start(self, job_id):
+        self._update(job_id, status=RUNNING, started_at=datetime.now(timezone.utc))
+
+    def finish(self, job_id, result):
+        # Stored as JSON, like the database store, so both hand out the same values
+        self._update(job_id, status=SUCCEEDED, finished_at=datetime.now(timezone.utc),
+                     result=json.dumps(result, default=str))
+
+    def fail(self, job_id, error):
+        self._update(job_id, status=FAILED, finished_at=datetime.now(timezone.utc), error=error)
+
+    def get(self, job_id, user_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['user_id'] != user_id:
+                return None
+            job = dict(job)
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def purge(self, older_than):
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job['created_at'] < older_than]:
+                del self._jobs[job_id]
+
+
+class DatabaseJobStore:
+    """Job state in the background_jobs table, shared by all worker processes."""
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+
+    def _execute(self, sql, params):
+        conn = None
+        try:
+            conn = get_db_connection(self.db_config)
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            row = cursor.fetchone() if cursor.description else None
+            conn.commit()
+            return row
+        except Exception:
+            if conn: conn.rollback()
+            raise
+        finally:
+            if conn: conn.close()
+
+    def create(self, job_id, job_type, user_id):
+        self._execute("INSERT INTO background_jobs (id, job_type, user_id) VALUES (%s, %s, %s);",
+                      (job_id, job_type, user_id))
+
+    def start(self, job_id):
+        self._execute("UPDATE background_jobs SET status = %s, started_at = NOW() WHERE id = %s;",
+                      (RUNNING, job_id))
+
+    def finish(self, job_id, result):
+        self._execute(
+            "UPDATE background_jobs SET status = %s, finished_at = NOW(), "
+            "result = pgp_sym_encrypt(%s, get_encryption_key()) WHERE id = %s;",
+            (SUCCEEDED, json.dumps(result, default=str), job_id))
+
+    def fail(self, job_id, error):
+        self._execute("UPDATE background_jobs SET status = %s, finished_at = NOW(), error = %s WHERE id = %s;",
+                      (FAILED, error, job_id))
+
+    def get(self, job_id, user_id):
+        row = self._execute("""
+            SELECT id, job_type, user_id, status, created_at, started_at, finished_at,
+                   CASE WHEN result IS NULL THEN NULL ELSE pgp_sym_decrypt(result, get_encryption_key()) END,
+                   error
+            FROM background_jobs
+            WHERE id = %s AND user_id = %s;
+        """, (job_id, user_id))
+        if row is None:
+            return None
+        job = dict(zip(('id', 'job_type', 'user_id', 'status', 'created_at', 'started_at', 'finished_at',
+                        'result', 'error'), row))
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def purge(self, older_than):
+        self._execute("DELETE FROM background_jobs WHERE created_at < %s;", (older_than,))
+
+
+class JobQueue:
+    """Runs jobs in a bounded pool of threads, recording their state in a job store."""
+
+    def __init__(self, store, workers=DEFAULTS['workers'], max_pending=DEFAULTS['max_pending'],
+                 retention=timedelta(hours=DEFAULTS['retention_hours']),
+                 stale_after=timedelta(minutes=DEFAULTS['stale_after_minutes']), executor=None):
+        """
+        Args:
+            store: MemoryJobStore, DatabaseJobStore or an object with the same methods.
+            executor: Anything with a concurrent.futures-style submit(fn, *args);
+                a ThreadPoolExecutor of `workers` threads by default.
+        """
+        self.store = store
+        self.max_pending = max_pending
+        self.retention = retention
+        self.stale_after = stale_after
+        self._executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix='trends-job')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, job_type, user_id, func, *args, **kwargs):
+        """
+        Queues func(*args, **kwargs) as a job of user_id.
+
+        Returns:
+            str: The job id.
+
+        Raises:
+            JobQueueFull: When this process already has max_pending unfinished jobs.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs are already queued or running.")
+            self._pending += 1
+
+        try:
+            self.store.purge(datetime.now(timezone.utc) - self.retention)
+            job_id = secrets.token_urlsafe(16)
+            self.store.create(job_id, job_type, user_id)
+            app = current_app._get_current_object()
+            self._executor.submit(self._run, app, job_id, job_type, func, args, kwargs)
+        except Exception:
+            self._release()
+            raise
+        return job_id
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, app, job_id, job_type, func, args, kwargs):
+        try:
+            with app.app_context():
+                try:
+                    self.store.start(job_id)
+                    result = func(*args, **kwargs)
+                except JobError as e:
+                    self._record(app, job_id, self.store.fail, str(e))
+                except Exception as e:
+                    app.logger.error(f"Job {job_id} ({job_type}) failed: {e}")
+                    self._record(app, job_id, self.store.fail, UNEXPECTED_ERROR)
+                else:
+                    self._record(app, job_id, self.store.finish, result)
+        finally:
+            self._release()
+
+    @staticmethod
+    def _record(app, job_id, method, value):
+        try:
+            method(job_id, value)
+        except Exception as e:
+            # The job is reported as failed once it is stale
+            app.logger.error(f"Could not record the outcome of job {job_id}: {e}")
+
+    def get(self, job_id, user_id):
+        """The job of user_id with this id, or None; unfinished jobs past `stale_after` are reported as failed."""
+        job = self.store.get(job_id, user_id)
+        if job and job['status'] not in FINISHED_STATUSES:
+            # Time spent queued does not count against a running job
+            since = job['started_at'] if job['status'] == RUNNING and job['started_at'] else job['created_at']
+            if since < datetime.now(timezone.utc) - self.stale_after:
+                job.update(status=FAILED, error=INTERRUPTED_ERROR)
+        return job
+
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """The job queue of this process, configured from the `jobs` configuration section."""
+    global _queue
+    if _queue is None:
+        from .utils import load_trends_config
+        config = load_trends_config() or {}
+        settings = {**DEFAULTS, **(config.get('jobs') or {})}
+        with _queue_lock:
+            if _queue is None:
+                if settings['store'] == 'memory':
+                    store = MemoryJobStore()
+                elif settings['store'] == 'database':
+                    store = DatabaseJobStore(config.get('database'))
+                else:
+                    raise ValueError(f"Unknown job store: {settings['store']}. Valid stores: ['database', 'memory']")
+                _queue = JobQueue(store, workers=int(settings['workers']), max_pending=int(settings['max_pending']),
+                                  retention=timedelta(hours=float(settings['retention_hours'])),
+                                  stale_after=timedelta(minutes=float(settings['stale_after_minutes'])))
+    return _queue
@@ -6,6 +6,8 @@ dashboard, all API endpoints for the frontend to fetch data and perform
 actions, and server-side report generation logic.
 """
 
+import base64
+import binascii
 import io
 import json
 import os
@@ -15,9 +17,8 @@ import psycopg2
 
 from datetime import datetime
 
-from deepdiff import DeepDiff
 from flask import (Blueprint, render_template, request, jsonify, current_app,
-                   redirect, url_for, abort, send_file, Response)
+                   redirect, url_for, abort, send_file, Response, make_response)
 from flask_login import login_required, current_user
 
 
@@ -27,15 +28,22 @@ from .database import (get_unique_targets, load_user_preferences,
 from . import analysis_database
 
 from .utils import load_trends_config, format_path
+from .db_pool import get_db_connection
+from .findings_cache import get_findings_cache
 from .ai_connector import get_ai_recommendation
 from .prompt_generator import generate_web_prompt, generate_slides_prompt
 from .submission_backends import get_submission_backend, DisabledBackend
 from .security import (
-    secure_api_endpoint, validate_submission_payload,
-    log_failed_authentication, enforce_https_middleware
+    secure_api_endpoint, validate_submission_payload, decode_submission_body,
+    get_security_config, log_failed_authentication, enforce_https_middleware
 )
+from .submission_uploads import UploadError, get_upload_store, owner_token
+from .jobs import JobError, JobQueueFull, get_job_queue, SUCCEEDED, FAILED
 from functools import wraps
 
+from utils.findings_diff import FindingsDiffCache, ITEM_ADDED, VALUE_CHANGED, format_change_path
+from utils.submission_protocol import accepted_encodings
+
 bp = Blueprint('main', __name__)
 
 
@@ -62,7 +70,7 @@ def require_api_key(f):
 
         conn = None
         try:
-            conn = psycopg2.connect(**db_settings)
+            conn = get_db_connection(db_settings)
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Use validate_api_key() stored procedure for comprehensive validation
@@ -213,14 +221,42 @@ def dashboard():
                            unique_targets=unique_targets,
                            technologies=technologies)
 
+def _summarize_changes(changes):
+    """check -> the comparison page's summary lines of its changes."""
+    changes_by_check = {}
+    for change in changes:
+        path_str = format_change_path(change.path)
+        if change.kind == VALUE_CHANGED:
+            summary = f"🔄 Value at `{path_str}` changed from **'{change.old}'** to **'{change.new}'**"
+        elif change.kind == ITEM_ADDED:
+            summary = f"➕ Item added to `{path_str}`: `{json.dumps(change.new)}`"
+        else:
+            summary = f"➖ Item removed from `{path_str}`: `{json.dumps(change.old)}`"
+        changes_by_check.setdefault(change.path[0], []).append(summary)
+    return changes_by_check
+
+
+# Rendered changes per pair of runs, for the comparison page; they do not reference the findings
+_comparison_cache = FindingsDiffCache(summarize=_summarize_changes)
+
+
+def _cacheable_run_id(run):
+    """The run's ID, or None if its findings are a decryption failure that must not be cached."""
+    findings = run.get('findings')
+    if isinstance(findings, dict) and set(findings) == {'error'}:
+        return None
+    return run.get('id')
+
+
 @bp.route('/compare')
 @login_required
 def compare_runs():
     """Compare multiple health check runs and display differences.
 
     This route is designed to open in a new browser window from the dashboard.
-    It accepts a comma-separated list of run IDs and performs DeepDiff analysis
-    between consecutive runs.
+    It accepts a comma-separated list of run IDs and diffs the findings of
+    consecutive runs (utils/findings_diff.py). Stored runs never change, so
+    the rendered changes of each pair of runs are cached in the worker process.
 
     Query parameters:
         run_ids: Comma-separated list of run IDs to compare (e.g., "1,2,3")
@@ -260,25 +296,8 @@ def compare_runs():
 
         changes_by_check = {}
         if isinstance(findings1, dict) and isinstance(findings2, dict):
-            diff = DeepDiff(findings2, findings1, ignore_order=True, view='tree')
-            if diff:
-                for change_type, items in diff.items():
-                    for item in items:
-                        top_level_check = item.path(output_format='list')[0]
-                        if top_level_check not in changes_by_check:
-                            changes_by_check[top_level_check] = []
-
-                        path_str = format_path(item.path())
-                        summary = ""
-                        if change_type == 'values_changed':
-                            summary = f"🔄 Value at `{path_str}` changed from **'{item.t1}'** to **'{item.t2}'**"
-                        elif change_type == 'iterable_item_added':
-                            summary = f"➕ Item added to `{path_str}`: `{json.dumps(item.t2)}`"
-                        elif change_type == 'iterable_item_removed':
-                            summary = f"➖ Item removed from `{path_str}`: `{json.dumps(item.t1)}`"
-
-                        if summary:
-                            changes_by_check[top_level_check].append(summary)
+            changes_by_check = _comparison_cache.diff(_cacheable_run_id(runs[i + 1]), findings2,
+                                                      _cacheable_run_id(runs[i]), findings1)
 
         comparisons.append({
             'run1': runs[i],
@@ -292,23 +311,55 @@ def compare_runs():
 
 # --- API Routes ---
 
+# Runs per /api/runs page, unless the client asks for fewer (or more, up to the maximum).
+# get_health_check_runs_page() caps its limit at RUNS_MAX_PAGE_SIZE + 1, the extra run telling there is a next page.
+RUNS_PAGE_SIZE = 200
+RUNS_MAX_PAGE_SIZE = 1000
+
+
+def _encode_runs_cursor(run_obj):
+    """Opaque keyset position after a run: its (run_timestamp, id)."""
+    position = json.dumps([run_obj['run_timestamp'], run_obj['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(position).decode('ascii')
+
+
+def _decode_runs_cursor(cursor_str):
+    """(run_timestamp, id) from a cursor returned by /api/runs; raises ValueError if it is not one."""
+    try:
+        run_timestamp, run_id = json.loads(base64.urlsafe_b64decode(cursor_str.encode('ascii')))
+    except (TypeError, ValueError, UnicodeEncodeError, binascii.Error) as e:
+        raise ValueError(f"invalid cursor: {e}")
+    if not isinstance(run_timestamp, str) or not isinstance(run_id, int):
+        raise ValueError("invalid cursor")
+    return run_timestamp, run_id
+
+
 @bp.route('/api/runs')
 @login_required
 def get_all_runs():
-    """API endpoint to fetch all accessible health check runs.
+    """API endpoint to fetch the accessible health check runs, one page at a time.
 
-    This endpoint returns a list of all runs the current user has permission
-    to view. It supports filtering by target system and by a date range. It
-    also indicates whether each run has been marked as a "favorite" by the user.
+    This endpoint returns the runs the current user has permission to view,
+    newest first, in pages ordered by (run_timestamp, id). Each response
+    carries the cursor of the next page, or null after the last one. Filters
+    are applied by the database (get_health_check_runs_page), and only the
+    run summary is read, never the findings. It also indicates whether each
+    run has been marked as a "favorite" by the user.
 
     Args:
         target (str, optional): A filter string in the format
             'company:host:port:dbname'.
         start_time (str, optional): A start date string (e.g., 'YYYY-MM-DD').
         end_time (str, optional): An end date string (e.g., 'YYYY-MM-DD').
+        technology (str, optional): Only runs of this database technology.
+        favorites (str, optional): 'true' for the user's favorite runs only.
+        include_deleted (str, optional): 'true' to include soft-deleted runs.
+        order (str, optional): 'desc' (newest first, default) or 'asc'.
+        limit (int, optional): Runs per page (default 200, at most 1000).
+        cursor (str, optional): The next_cursor of the previous page.
 
     Returns:
-        JSON: A JSON array of run objects.
+        JSON: {"runs": [...], "next_cursor": str or null}.
     """
 
     config = load_trends_config()
@@ -316,17 +367,29 @@ def get_all_runs():
     
     accessible_company_ids = [c['id'] for c in current_user.accessible_companies]
     if not accessible_company_ids:
-        return jsonify([])
+        return jsonify({"runs": [], "next_cursor": None})
 
     target_filter = request.args.get('target')
-    start_time_str = request.args.get('start_time')
-    end_time_str = request.args.get('end_time')
+    start_time_str = request.args.get('start_time') or None
+    end_time_str = request.args.get('end_time') or None
+    technology = request.args.get('technology') or None
+    favorites_only = request.args.get('favorites', 'false').lower() == 'true'
     include_deleted = request.args.get('include_deleted', 'false').lower() == 'true'
+    ascending = request.args.get('order', 'desc').lower() == 'asc'
+
+    try:
+        limit = min(max(int(request.args.get('limit', RUNS_PAGE_SIZE)), 1), RUNS_MAX_PAGE_SIZE)
+        after_timestamp, after_id = None, None
+        if request.args.get('cursor'):
+            after_timestamp, after_id = _decode_runs_cursor(request.args['cursor'])
+    except ValueError as e:
+        return jsonify({"error": f"Invalid pagination parameters: {e}"}), 400
 
     conn = None
     all_runs = []
+    next_cursor = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Parse target filter if provided
@@ -341,8 +404,8 @@ def get_all_runs():
             except (ValueError, IndexError) as e:
                 current_app.logger.warning(f"Invalid target filter format: {target_filter}. Error: {e}")
 
-        # Use stored procedure for analytics abstraction
-        query = "SELECT get_health_check_runs(%s, %s, %s, %s, %s, %s, %s, %s, %s);"
+        # Use stored procedure for analytics abstraction; one extra run tells whether there is a next page
+        query = "SELECT get_health_check_runs_page(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);"
         cursor.execute(query, (
             accessible_company_ids,
             current_user.id,
@@ -352,31 +415,40 @@ def get_all_runs():
             target_db_name,
             start_time_str,
             end_time_str,
-            include_deleted  # NEW: include deleted runs parameter
+            include_deleted,
+            technology,
+            favorites_only,
+            ascending,
+            after_timestamp,
+            after_id,
+            limit + 1
         ))
-        result = cursor.fetchone()[0]
+        result = cursor.fetchone()[0] or []
+
+        if len(result) > limit:
+            result = result[:limit]
+            next_cursor = _encode_runs_cursor(result[-1])
 
         # Parse JSONB result and format for API response
-        if result:
-            for run_obj in result:
-                all_runs.append({
-                    "id": run_obj['id'],
-                    "timestamp": run_obj['run_timestamp'],
-                    "company_name": run_obj.get('company_name', 'Unknown'),
-                    "target_system": f"{run_obj['target_host']}:{run_obj['target_port']} ({run_obj['target_db_name']})",
-                    "db_technology": run_obj.get('db_technology', 'Unknown'),
-                    "critical_count": run_obj.get('critical_count', 0),
-                    "high_count": run_obj.get('high_count', 0),
-                    "medium_count": run_obj.get('medium_count', 0),
-                    "is_favorite": run_obj.get('is_favorite', False),
-                    "deleted_at": run_obj.get('deleted_at'),  # Soft delete support
-                    "deleted_by": run_obj.get('deleted_by')   # Soft delete support
-                })
+        for run_obj in result:
+            all_runs.append({
+                "id": run_obj['id'],
+                "timestamp": run_obj['run_timestamp'],
+                "company_name": run_obj.get('company_name', 'Unknown'),
+                "target_system": f"{run_obj['target_host']}:{run_obj['target_port']} ({run_obj['target_db_name']})",
+                "db_technology": run_obj.get('db_technology', 'Unknown'),
+                "critical_count": run_obj.get('critical_count', 0),
+                "high_count": run_obj.get('high_count', 0),
+                "medium_count": run_obj.get('medium_count', 0),
+                "is_favorite": run_obj.get('is_favorite', False),
+                "deleted_at": run_obj.get('deleted_at'),  # Soft delete support
+                "deleted_by": run_obj.get('deleted_by')   # Soft delete support
+            })
     except psycopg2.Error as e:
         current_app.logger.error(f"Database error fetching all runs with filters: {e}")
     finally:
         if conn: conn.close()
-    return jsonify({"runs": all_runs})
+    return jsonify({"runs": all_runs, "next_cursor": next_cursor})
 
 @bp.route('/api/runs/toggle-favorite', methods=['POST'])
 @login_required
@@ -392,7 +464,7 @@ def toggle_favorite():
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         cursor.execute("SELECT 1 FROM user_favorite_runs WHERE user_id = %s AND run_id = %s;", (current_user.id, run_id))
@@ -436,7 +508,7 @@ def delete_run(run_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Verify run exists and user has access to it
@@ -469,6 +541,7 @@ def delete_run(run_id):
             cursor.execute("DELETE FROM health_check_runs WHERE id = %s", (run_id,))
 
             conn.commit()
+            get_findings_cache().discard(run_id)
             current_app.logger.info(f"User {current_user.username} permanently deleted run {run_id}")
             return jsonify({'status': 'success', 'message': 'Run permanently deleted.'})
         else:
@@ -503,7 +576,7 @@ def restore_run(run_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Verify run exists and user has access to it
@@ -604,7 +677,7 @@ def save_filter():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Call stored procedure to save filter
@@ -645,7 +718,7 @@ def list_filters():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -687,7 +760,7 @@ def get_selected_filter():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -742,7 +815,7 @@ def set_selected_filter():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -789,7 +862,7 @@ def delete_filter():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -837,7 +910,7 @@ def clear_selected_filter():
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -873,7 +946,7 @@ def get_user_ai_profiles():
     conn = None
     profiles = []
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id, profile_name FROM user_ai_profiles WHERE user_id = %s ORDER BY profile_name;",
@@ -897,7 +970,7 @@ def get_analysis_rules():
     conn = None
     rules = []
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute("SELECT id, rule_set_name FROM analysis_rules ORDER BY rule_set_name;")
         for row in cursor.fetchall():
@@ -921,7 +994,7 @@ def get_prompt_templates():
     conn = None
     templates = []
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id, template_name FROM prompt_templates WHERE user_id IS NULL OR user_id = %s ORDER BY template_name;",
@@ -936,15 +1009,100 @@ def get_prompt_templates():
         if conn: conn.close()
     return jsonify(templates)
 
+# ============================================================================
+# BACKGROUND JOBS (AI reports, bulk AI reports, trend analyses, slides)
+# ============================================================================
+
+JOB_QUEUE_FULL_MESSAGE = "Too many reports are being generated right now. Please try again in a minute."
+
+
+def _submit_job(job_type, func, *args):
+    """Queues a job of the current user (see jobs.py) and returns the 202 response with its status URL."""
+    try:
+        job_id = get_job_queue().submit(job_type, current_user.id, func, *args)
+    except JobQueueFull as e:
+        current_app.logger.warning(f"Refusing {job_type} job: {e}")
+        return jsonify({"error": JOB_QUEUE_FULL_MESSAGE}), 503, {'Retry-After': '30'}
+    except psycopg2.Error as e:
+        current_app.logger.error(f"DB error queueing {job_type} job: {e}")
+        return jsonify({"error": "DB error queueing the job."}), 500
+
+    status_url = url_for('main.get_job_status', job_id=job_id)
+    return jsonify({"status": "queued", "job_id": job_id, "status_url": status_url}), 202, {'Location': status_url}
+
+
+def _job_result_links(job):
+    """The result of a succeeded job as returned to the browser, with the URLs to open it."""
+    result = job['result'] or {}
+    if job['job_type'] in ('ai_report', 'bulk_ai_report'):
+        return {**result, "download_url": url_for('main.download_report', report_type='generated',
+                                                  report_id=result['report_id'])}
+    if job['job_type'] == 'trend_analysis':
+        return {**result, "view_url": url_for('profile.view_report', report_type='trend_analysis',
+                                              report_id=result['analysis_id'])}
+    if job['job_type'] == 'slides':
+        # The slide HTML can be large; it is only sent to the viewer
+        return {"view_url": url_for('main.view_job_slides', job_id=job['id'])}
+    return result
+
+
+@bp.route('/api/jobs/<job_id>')
+@login_required
+def get_job_status(job_id):
+    """API endpoint polled by the browser for the state of one of the user's report generation jobs.
+
+    Returns JSON with the job's status ('queued', 'running', 'succeeded' or
+    'failed'); a failed job includes its error message, a succeeded job its
+    result and the URLs to download or view it.
+    """
+    try:
+        job = get_job_queue().get(job_id, current_user.id)
+    except psycopg2.Error as e:
+        current_app.logger.error(f"DB error reading job {job_id}: {e}")
+        return jsonify({"error": "DB error reading the job."}), 500
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    response = {
+        "job_id": job['id'],
+        "job_type": job['job_type'],
+        "status": job['status'],
+        "created_at": job['created_at'].isoformat(),
+        "finished_at": job['finished_at'].isoformat() if job['finished_at'] else None,
+    }
+    if job['status'] == FAILED:
+        response["error"] = job['error']
+    elif job['status'] == SUCCEEDED:
+        response["result"] = _job_result_links(job)
+    return jsonify(response)
+
+
+@bp.route('/jobs/<job_id>/slides')
+@login_required
+def view_job_slides(job_id):
+    """Renders the slides generated by a succeeded slides job of the user."""
+    try:
+        job = get_job_queue().get(job_id, current_user.id)
+    except psycopg2.Error as e:
+        current_app.logger.error(f"DB error reading job {job_id}: {e}")
+        return render_template('error.html', error_message="DB error reading the slides."), 500
+    if job is None or job['job_type'] != 'slides':
+        return render_template('error.html', error_message="Slides not found. They are kept for a limited time only."), 404
+    if job['status'] != SUCCEEDED:
+        return render_template('error.html', error_message=job['error'] or "The slides are not ready yet."), 409
+    return render_template('profile/view_slides.html', slides_html=job['result']['slides_html'])
+
+
 @bp.route('/api/generate-ai-report', methods=['POST'])
 @login_required
 def generate_ai_report():
     """API endpoint to generate an on-demand AI report.
 
     This is a privileged action. It takes the IDs for a run, AI profile,
-    template, and rule set, generates a prompt, gets the AI recommendation,
-    saves the encrypted report to the database, and returns the report
-    as a downloadable file.
+    template, and rule set, and queues a job that generates a prompt, gets
+    the AI recommendation and saves the encrypted report to the database.
+    Returns 202 with the job's status URL; once the job has succeeded, its
+    status includes the report's download URL.
     """
 
     if not current_user.has_privilege('GenerateReports'):
@@ -967,28 +1125,36 @@ def generate_ai_report():
     if not isinstance(findings_json, dict):
         return jsonify({"error": "Invalid findings data."}), 500
 
+    return _submit_job('ai_report', _generate_ai_report_job, db_settings, current_user.id, run_id, findings_json,
+                       profile_id, template_id, rule_set_id, report_name, report_description)
+
+
+def _generate_ai_report_job(db_settings, user_id, run_id, findings_json, profile_id, template_id, rule_set_id,
+                            report_name, report_description):
+    """Background job of generate_ai_report()."""
     prompt = generate_web_prompt(findings_json, rule_set_id, template_id)
-    if prompt.startswith("Error:"): return jsonify({"error": prompt}), 500
+    if prompt.startswith("Error:"): raise JobError(prompt)
     ai_response = get_ai_recommendation(prompt, profile_id)
-    if ai_response.startswith("Error:"): return jsonify({"error": ai_response}), 500
+    if ai_response.startswith("Error:"): raise JobError(ai_response)
 
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO generated_ai_reports (run_id, rule_set_id, ai_profile_id, generated_by_user_id, report_name, report_description, template_id, report_content) VALUES (%s, %s, %s, %s, %s, %s, %s, pgp_sym_encrypt(%s, get_encryption_key()));",
-            (run_id, rule_set_id, profile_id, current_user.id, report_name, report_description, template_id, ai_response)
+            "INSERT INTO generated_ai_reports (run_id, rule_set_id, ai_profile_id, generated_by_user_id, report_name, report_description, template_id, report_content) VALUES (%s, %s, %s, %s, %s, %s, %s, pgp_sym_encrypt(%s, get_encryption_key())) RETURNING id;",
+            (run_id, rule_set_id, profile_id, user_id, report_name, report_description, template_id, ai_response)
         )
+        report_id = cursor.fetchone()[0]
         conn.commit()
     except psycopg2.Error as e:
         if conn: conn.rollback()
         current_app.logger.error(f"DB error saving report: {e}")
-        return jsonify({"error": "DB error saving report."}), 500
+        raise JobError("DB error saving report.")
     finally:
         if conn: conn.close()
 
-    return send_file(io.BytesIO(ai_response.encode('utf-8')), mimetype='text/plain', as_attachment=True, download_name=f"ai_report_run_{run_id}.adoc")
+    return {"report_id": report_id, "run_id": run_id}
 
 @bp.route('/api/estimate-bulk-report-tokens', methods=['POST'])
 @login_required
@@ -1018,8 +1184,13 @@ def estimate_bulk_report_tokens():
     db_settings = config.get('database')
     accessible_company_ids = [c['id'] for c in current_user.accessible_companies]
 
-    # Fetch all selected runs
-    runs_data = fetch_runs_by_ids(db_settings, run_ids, accessible_company_ids)
+    # Summarize the selected runs (shared with, and cached for, the report itself)
+    from .bulk_summaries import load_run_summaries
+    try:
+        runs_data = load_run_summaries(db_settings, run_ids, accessible_company_ids)
+    except psycopg2.Error as e:
+        current_app.logger.error(f"Database error summarizing runs {run_ids}: {e}")
+        return jsonify({"error": "Database error loading the selected runs."}), 500
 
     if not runs_data:
         return jsonify({"error": "No runs found or permission denied."}), 404
@@ -1040,7 +1211,7 @@ def estimate_bulk_report_tokens():
 
     if profile_id:
         try:
-            conn = psycopg2.connect(**db_settings)
+            conn = get_db_connection(db_settings)
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT up.max_output_tokens,
@@ -1153,7 +1324,9 @@ def generate_bulk_ai_report():
         }
 
     Returns:
-        JSON with report_id and download URL, or error message
+        202 with the status URL of the job that generates and saves the
+        report; once it has succeeded, the job's status includes the
+        report_id and download URL. Or an error message.
     """
     if not current_user.has_privilege('GenerateReports'):
         abort(403)
@@ -1176,28 +1349,39 @@ def generate_bulk_ai_report():
     db_settings = config.get('database')
     accessible_company_ids = [c['id'] for c in current_user.accessible_companies]
 
-    # Fetch all selected runs
-    runs_data = fetch_runs_by_ids(db_settings, run_ids, accessible_company_ids)
+    return _submit_job('bulk_ai_report', _generate_bulk_ai_report_job, db_settings, current_user.id,
+                       accessible_company_ids, run_ids, profile_id, report_name, report_description, analysis_style)
+
+
+def _generate_bulk_ai_report_job(db_settings, user_id, accessible_company_ids, run_ids, profile_id, report_name,
+                                 report_description, analysis_style):
+    """Background job of generate_bulk_ai_report()."""
+    # Summarize the selected runs (usually already cached by the token estimate)
+    from .bulk_summaries import load_run_summaries
+    try:
+        runs_data = load_run_summaries(db_settings, run_ids, accessible_company_ids)
+    except psycopg2.Error as e:
+        current_app.logger.error(f"Database error summarizing runs {run_ids}: {e}")
+        raise JobError("Database error loading the selected runs.")
 
     if not runs_data:
-        return jsonify({"error": "No runs found or permission denied."}), 404
+        raise JobError("No runs found or permission denied.")
 
     if len(runs_data) != len(run_ids):
-        return jsonify({"error": f"Only {len(runs_data)} of {len(run_ids)} runs found. Check permissions."}), 404
+        raise JobError(f"Only {len(runs_data)} of {len(run_ids)} runs found. Check permissions.")
 
     # Generate bulk analysis prompt
     from .prompt_generator import generate_bulk_analysis_prompt
     prompt = generate_bulk_analysis_prompt(runs_data, analysis_style=analysis_style)
 
     if prompt.startswith("Error:"):
-        return jsonify({"error": prompt}), 500
+        raise JobError(prompt)
 
     # Get AI response
-    from .ai_connector import get_ai_recommendation
     ai_response = get_ai_recommendation(prompt, profile_id)
 
     if ai_response.startswith("Error:"):
-        return jsonify({"error": ai_response}), 500
+        raise JobError(ai_response)
 
     # Save the bulk report to database
     # Note: We'll store the first run_id as the primary run, and include all run_ids in description
@@ -1205,7 +1389,7 @@ def generate_bulk_ai_report():
     report_id = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Store with the first run_id, but include all run_ids in description
@@ -1224,7 +1408,7 @@ def generate_bulk_ai_report():
         """, (
             run_ids[0],  # Primary run (first in list)
             profile_id,
-            current_user.id,
+            user_id,
             report_name,
             full_description,
             ai_response
@@ -1233,19 +1417,17 @@ def generate_bulk_ai_report():
         report_id = cursor.fetchone()[0]
         conn.commit()
 
-        return jsonify({
-            "status": "success",
+        return {
             "message": f"Bulk analysis report generated for {len(run_ids)} runs.",
             "report_id": report_id,
-            "download_url": f"/api/download-report/generated/{report_id}",
             "runs_analyzed": len(run_ids)
-        })
+        }
 
     except psycopg2.Error as e:
         if conn:
             conn.rollback()
         current_app.logger.error(f"DB error saving bulk report: {e}")
-        return jsonify({"error": "Database error saving report."}), 500
+        raise JobError("Database error saving report.")
     finally:
         if conn:
             conn.close()
@@ -1259,13 +1441,9 @@ def generate_slides():
 
     This is a privileged action that orchestrates a complex workflow:
     1. Fetches health check findings from the database.
-    2. Generates a markdown-based prompt for an AI to create slide content.
-    3. Fetches template assets (backgrounds, logos) from the database.
-    4. Post-processes the AI's markdown response to inject Marp directives
-       for theming and layout.
-    5. Calls the external `marp-cli` tool to convert the final markdown into
-       a standalone HTML slide presentation.
-    6. Renders the resulting HTML in a viewer template.
+    2. Queues a job (_generate_slides_job) that generates the slides.
+    3. Renders a progress page that polls the job and, once it has
+       succeeded, opens the slides in a viewer (view_job_slides).
     """
 
     if not current_user.has_privilege('GenerateReports'):
@@ -1292,6 +1470,29 @@ def generate_slides():
     if not isinstance(findings_json, dict):
         return render_template('error.html', error_message="Invalid findings data."), 500
 
+    try:
+        job_id = get_job_queue().submit('slides', current_user.id, _generate_slides_job, db_settings, findings_json,
+                                        profile_id, rule_set_id, template_id)
+    except JobQueueFull as e:
+        current_app.logger.warning(f"Refusing slides job: {e}")
+        return render_template('error.html', error_message=JOB_QUEUE_FULL_MESSAGE), 503
+    except psycopg2.Error as e:
+        current_app.logger.error(f"DB error queueing slides job: {e}")
+        return render_template('error.html', error_message="DB error queueing the slide generation."), 500
+
+    return render_template('profile/slides_progress.html', status_url=url_for('main.get_job_status', job_id=job_id))
+
+
+def _generate_slides_job(db_settings, findings_json, profile_id, rule_set_id, template_id):
+    """Background job of generate_slides().
+
+    1. Generates a markdown-based prompt for an AI to create slide content.
+    2. Fetches template assets (backgrounds, logos) from the database.
+    3. Post-processes the AI's markdown response to inject Marp directives
+       for theming and layout.
+    4. Calls the external `marp-cli` tool to convert the final markdown into
+       a standalone HTML slide presentation.
+    """
     temp_files = {}
     md_file_path = None
     html_output_path = None
@@ -1299,11 +1500,11 @@ def generate_slides():
         # Step 1: Get AI content
         prompt = generate_slides_prompt(findings_json, rule_set_id, template_id, assets={})
         if prompt.startswith("Error:"):
-            return render_template('error.html', error_message=prompt), 500
+            raise JobError(prompt)
 
         ai_content_md = get_ai_recommendation(prompt, profile_id)
         if ai_content_md.startswith("Error:"):
-            return render_template('error.html', error_message=ai_content_md), 500
+            raise JobError(ai_content_md)
 
         # Step 2: Prepare temporary image files
         bg_path = None
@@ -1363,15 +1564,17 @@ def generate_slides():
         with open(html_output_path, 'r') as html_file:
             slides_html = html_file.read()
         
-        return render_template('profile/view_slides.html', slides_html=slides_html)
+        return {"slides_html": slides_html}
 
     except FileNotFoundError:
-        return render_template('error.html', error_message="`marp-cli` not found. Please ensure it is installed and in your system's PATH."), 500
+        raise JobError("`marp-cli` not found. Please ensure it is installed and in your system's PATH.")
     except subprocess.CalledProcessError as e:
-        return render_template('error.html', error_message=f"Error running marp-cli: {e.stderr}"), 500
+        raise JobError(f"Error running marp-cli: {e.stderr}")
+    except JobError:
+        raise
     except Exception as e:
         current_app.logger.error(f"An unexpected error occurred during slide generation: {e}")
-        return render_template('error.html', error_message="An unexpected error occurred during slide generation."), 500
+        raise JobError("An unexpected error occurred during slide generation.")
     finally:
         # Step 5: Re-enabled cleanup logic
         for f in temp_files.values():
@@ -1397,7 +1600,7 @@ def get_all_reports():
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Call the stored function get_all_reports(user_id)
@@ -1430,7 +1633,7 @@ def download_report(report_type, report_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         if report_type in ['generated', 'trend_analysis']:
@@ -1488,7 +1691,7 @@ def update_report_metadata(report_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "UPDATE generated_ai_reports SET report_name = %s, report_description = %s, annotations = %s WHERE id = %s AND generated_by_user_id = %s;",
@@ -1558,7 +1761,7 @@ def get_trend_analysis_templates():
     
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         
         query = """
@@ -1613,7 +1816,7 @@ def get_trend_preview():
 @bp.route('/api/generate-trend-analysis', methods=['POST'])
 @login_required
 def generate_trend_analysis_api():
-    """Generate trend analysis."""
+    """Generate trend analysis in a background job; returns 202 with the job's status URL."""
     if not current_user.has_privilege('ViewTrendAnalysis'):
         abort(403)
 
@@ -1630,6 +1833,13 @@ def generate_trend_analysis_api():
     db_settings = config.get('database')
     accessible_company_ids = [c['id'] for c in current_user.accessible_companies]
 
+    return _submit_job('trend_analysis', _generate_trend_analysis_job, db_settings, current_user.id,
+                       accessible_company_ids, company_id, days, profile_id, template_id)
+
+
+def _generate_trend_analysis_job(db_settings, user_id, accessible_company_ids, company_id, days, profile_id,
+                                 template_id):
+    """Background job of generate_trend_analysis_api()."""
     from . import trends_analysis
     success, result = trends_analysis.generate_trend_analysis(
         db_config=db_settings,
@@ -1638,17 +1848,12 @@ def generate_trend_analysis_api():
         profile_id=profile_id,
         template_id=template_id,
         accessible_company_ids=accessible_company_ids,
-        user_id=current_user.id
+        user_id=user_id
     )
 
-    if success:
-        return jsonify({
-            "status": "success",
-            "analysis_id": result['analysis_id'],
-            "view_url": url_for('profile.view_report', report_type='trend_analysis', report_id=result['analysis_id'])
-        })
-    else:
-        return jsonify({"error": result}), 500
+    if not success:
+        raise JobError(result)
+    return {"analysis_id": result['analysis_id']}
 
 
 # ============================================================================
@@ -1809,7 +2014,7 @@ def kafka_capacity_upgrades():
     try:
         import psycopg2
         import psycopg2.extras
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute("""
             SELECT *
@@ -1843,7 +2048,7 @@ def cassandra_performance_upgrades():
     try:
         import psycopg2
         import psycopg2.extras
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute("""
             SELECT *
@@ -1877,7 +2082,7 @@ def opensearch_capacity_upgrades():
     try:
         import psycopg2
         import psycopg2.extras
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute("""
             SELECT *
@@ -1919,6 +2124,12 @@ def submit_health_check():
     Authentication:
         Requires X-API-Key header with valid API key
 
+    Compression:
+        The body may be gzip or zstd compressed, named by the Content-Encoding
+        header; responses list the accepted codings in Accept-Encoding. Bodies
+        larger than security.max_request_size_mb can be sent as a chunked
+        upload (POST /api/submit-health-check/uploads).
+
     Request Body (JSON):
         {
             "target_info": {
@@ -1949,6 +2160,8 @@ def submit_health_check():
         202 Accepted: For async_queue mode (includes task_id)
         400 Bad Request: Invalid payload
         401 Unauthorized: Missing/invalid API key
+        413 Payload Too Large: Body (or decompressed body) over the size limit
+        415 Unsupported Media Type: Unknown Content-Encoding
         500 Internal Server Error: Processing failed
         503 Service Unavailable: Endpoint disabled
 
@@ -1962,14 +2175,35 @@ def submit_health_check():
 
     # If disabled, reject immediately
     if isinstance(backend, DisabledBackend):
-        return jsonify({
-            "error": "Service unavailable",
-            "message": "Health check submission is disabled on this instance",
-            "hint": "This deployment accepts data through direct database insertion only"
-        }), 503
+        return _submission_disabled_response()
 
-    # Validate request payload
-    data = request.get_json()
+    # Validate request payload (optionally gzip/zstd compressed)
+    data, error_response = decode_submission_body(
+        request.get_data(cache=False), request.headers.get('Content-Encoding')
+    )
+    if error_response:
+        return _with_accepted_encodings(error_response)
+
+    return _with_accepted_encodings(_process_submission(backend, data))
+
+
+def _with_accepted_encodings(rv):
+    """Adds the Accept-Encoding header, telling senders this receiver decoded their Content-Encoding."""
+    response = make_response(rv)
+    response.headers['Accept-Encoding'] = accepted_encodings()
+    return response
+
+
+def _submission_disabled_response():
+    return jsonify({
+        "error": "Service unavailable",
+        "message": "Health check submission is disabled on this instance",
+        "hint": "This deployment accepts data through direct database insertion only"
+    }), 503
+
+
+def _process_submission(backend, data):
+    """Validates a decoded submission and hands it to the submission backend."""
     if not data:
         return jsonify({
             "error": "Invalid request",
@@ -2036,6 +2270,170 @@ def submit_health_check():
         }), 500
 
 
+@bp.route('/api/submit-health-check/uploads', methods=['POST'])
+@secure_api_endpoint
+@require_api_key
+def create_submission_upload():
+    """
+    Start a chunked submission upload.
+
+    For submissions too large for one request (see utils/submission_protocol.py).
+    The chunks are then sent with PUT .../uploads/<upload_id>/chunks/<index>
+    and the upload is submitted with POST .../uploads/<upload_id>/complete.
+    Chunk, status and complete requests must carry the same X-API-Key; only
+    this request counts as a use of the key.
+
+    Request Body (JSON):
+        {
+            "total_size": 41943040,          # bytes of the (compressed) body
+            "sha256": "9f86d0...",           # of the whole (compressed) body
+            "content_encoding": "gzip",      # identity, gzip or zstd
+            "chunk_size": 8388608
+        }
+
+    Returns:
+        201 Created: {"upload_id": ..., "chunks": 5, "chunk_size": 8388608}
+        400/413/415: Invalid upload parameters
+        503 Service Unavailable: Endpoint disabled
+    """
+    if isinstance(get_submission_backend(), DisabledBackend):
+        return _submission_disabled_response()
+
+    params = request.get_json(silent=True) or {}
+    max_size = get_security_config()['max_decompressed_size_mb'] * 1024 * 1024
+    try:
+        meta = get_upload_store().create(
+            owner_token(request.headers['X-API-Key']),
+            params.get('total_size'), params.get('sha256'),
+            params.get('content_encoding', 'identity'), params.get('chunk_size'), max_size,
+            submitter={
+                'key_id': request.api_key_id,
+                'key_name': request.api_key_name,
+                'company_id': request.api_company_id,
+                'company_name': request.api_company_name,
+            }
+        )
+    except UploadError as e:
+        return jsonify({"error": "Invalid upload", "message": str(e)}), e.status
+
+    current_app.logger.info(
+        f"Chunked upload {meta['upload_id']} started by API key '{request.api_key_name}' "
+        f"({meta['total_size']} bytes in {meta['chunks']} chunks)"
+    )
+    return jsonify({
+        "upload_id": meta['upload_id'],
+        "chunks": meta['chunks'],
+        "chunk_size": meta['chunk_size']
+    }), 201
+
+
+def _load_upload(upload_id):
+    """The upload's metadata for the request's API key, or an error response."""
+    api_key = request.headers.get('X-API-Key')
+    if not api_key:
+        return None, (jsonify({
+            "error": "Missing API key",
+            "message": "Provide API key in X-API-Key header"
+        }), 401)
+    try:
+        return get_upload_store().load(upload_id, owner_token(api_key)), None
+    except UploadError as e:
+        return None, (jsonify({"error": "Invalid upload", "message": str(e)}), e.status)
+
+
+@bp.route('/api/submit-health-check/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+@secure_api_endpoint
+def put_submission_upload_chunk(upload_id, index):
+    """
+    Store one chunk of a chunked upload (raw bytes; sending a chunk again replaces it).
+
+    Authenticated by the upload ID together with the X-API-Key that
+    created the upload, so chunks do not count as separate API key uses.
+
+    Returns:
+        200 OK: {"received": index}
+        400 Bad Request: Wrong chunk index or size
+        404 Not Found: Unknown upload
+    """
+    meta, error_response = _load_upload(upload_id)
+    if error_response:
+        return error_response
+    try:
+        get_upload_store().write_chunk(meta, index, request.get_data(cache=False))
+    except UploadError as e:
+        return jsonify({"error": "Invalid chunk", "message": str(e)}), e.status
+    return jsonify({"received": index})
+
+
+@bp.route('/api/submit-health-check/uploads/<upload_id>', methods=['GET'])
+@secure_api_endpoint
+def get_submission_upload(upload_id):
+    """
+    Report which chunks of an upload have been received, to resume it.
+
+    Returns:
+        200 OK: {"upload_id": ..., "chunks": 5, "received_chunks": [0, 1, 3]}
+        404 Not Found: Unknown or expired upload
+    """
+    meta, error_response = _load_upload(upload_id)
+    if error_response:
+        return error_response
+    return jsonify({
+        "upload_id": upload_id,
+        "chunks": meta['chunks'],
+        "chunk_size": meta['chunk_size'],
+        "received_chunks": get_upload_store().received_chunks(meta)
+    })
+
+
+@bp.route('/api/submit-health-check/uploads/<upload_id>/complete', methods=['POST'])
+@secure_api_endpoint
+def complete_submission_upload(upload_id):
+    """
+    Assemble a chunked upload and submit it.
+
+    Authenticated like the chunk requests, by the upload ID together with
+    the X-API-Key that created the upload; the submission is made for the
+    API key identity recorded when the upload was created, so a chunked
+    submission counts as one API key use, like a single POST.
+
+    Returns the same responses as POST /api/submit-health-check, plus
+    409 Conflict when chunks are missing and 422 when the checksum of the
+    assembled body does not match.
+    """
+    backend = get_submission_backend()
+    if isinstance(backend, DisabledBackend):
+        return _submission_disabled_response()
+
+    meta, error_response = _load_upload(upload_id)
+    if error_response:
+        return error_response
+    submitter = meta.get('submitter')
+    if not submitter:
+        return jsonify({
+            "error": "Invalid upload",
+            "message": "Upload has no recorded submitter; start the upload again"
+        }), 409
+    request.api_key_id = submitter['key_id']
+    request.api_key_name = submitter['key_name']
+    request.api_company_id = submitter['company_id']
+    request.api_company_name = submitter['company_name']
+    store = get_upload_store()
+    try:
+        body = store.assemble(meta)
+    except UploadError as e:
+        return jsonify({"error": "Incomplete upload", "message": str(e)}), e.status
+
+    data, error_response = decode_submission_body(body, meta['content_encoding'])
+    if error_response:
+        store.discard(meta)
+        return error_response
+    response = _process_submission(backend, data)
+    if response[1] < 500:
+        store.discard(meta)  # Kept after a server error so completing can be retried
+    return response
+
+
 @bp.route('/api/submission-status', methods=['GET'])
 @login_required
 def submission_status():
@@ -2110,7 +2508,7 @@ def api_health():
 
     # Database check
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute("SELECT 1;")
         conn.close()
@@ -2,7 +2,8 @@
 System Metrics Utility
 
 Provides easy access to system configuration stored in the metric table.
-Uses database stored procedures for type-safe metric retrieval.
+Lookups are served from an in-process cache of the whole table, so they
+are cheap enough for hot request paths (token estimation, feature flags).
 
 Usage:
     from trends_app.metrics import get_metric_int, get_metric_bool, get_metric_text
@@ -12,14 +13,65 @@ Usage:
     api_key = get_metric_text('aws_kms_key_arn')
 """
 
-import psycopg2
+import threading
+import time
+
 from flask import current_app
 from .utils import load_trends_config
+from .db_pool import get_db_connection
+
+# Metric values are read from one bulk load of the metric table and kept
+# this long. set_metric() and the admin metric pages invalidate the cache of
+# their own process at once; other worker processes see a change within the TTL.
+METRIC_CACHE_TTL_SECONDS = 30
+
+# Text values PostgreSQL accepts as booleans (metric_value::boolean)
+_TRUE_VALUES = {'t', 'true', 'y', 'yes', 'on', '1'}
+_FALSE_VALUES = {'f', 'false', 'n', 'no', 'off', '0'}
+
+_cache_lock = threading.Lock()
+_cached_values = None
+_cached_at = 0.0
+_cache_generation = 0
+
+
+def invalidate_metrics_cache():
+    """Makes the next metric lookup reload the metric table."""
+    global _cached_values, _cache_generation
+    with _cache_lock:
+        _cached_values = None
+        _cache_generation += 1
+
+
+def _metric_values():
+    """All metric values by name, from the cache or a fresh bulk load."""
+    global _cached_values, _cached_at
+    values = _cached_values
+    if values is not None and time.monotonic() - _cached_at < METRIC_CACHE_TTL_SECONDS:
+        return values
+    with _cache_lock:
+        if _cached_values is not None and time.monotonic() - _cached_at < METRIC_CACHE_TTL_SECONDS:
+            return _cached_values
+        generation = _cache_generation
+    # Loaded outside the lock; an invalidation during the load discards the result
+    values = {metric['name']: metric['value'] for metric in _fetch_metrics()}
+    with _cache_lock:
+        if generation == _cache_generation:
+            _cached_values, _cached_at = values, time.monotonic()
+    return values
+
+
+def _lookup(metric_name):
+    try:
+        return _metric_values().get(metric_name)
+    except Exception as e:
+        current_app.logger.warning(f"Error fetching metric '{metric_name}': {e}")
+        return None
 
 
 def get_metric_int(metric_name, default=None):
     """
-    Fetch an integer metric from the database.
+    Fetch an integer metric (cached, see METRIC_CACHE_TTL_SECONDS).
 
     Args:
         metric_name (str): Name of the metric
@@ -28,25 +80,19 @@ def get_metric_int(metric_name, default=None):
     Returns:
         int: Metric value or default
     """
-    config = load_trends_config()
-    db_config = config.get('database')
-
+    result = _lookup(metric_name)
+    if result is None:
+        return default
     try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-        cursor.execute("SELECT fetchmetricvalue(%s);", (metric_name,))
-        result = cursor.fetchone()[0]
-        conn.close()
-
-        return int(result) if result is not None else default
-    except Exception as e:
-        current_app.logger.warning(f"Error fetching metric '{metric_name}': {e}")
+        return int(result)
+    except ValueError:
+        current_app.logger.warning(f"Metric '{metric_name}' is not an integer: {result!r}")
         return default
 
 
 def get_metric_bool(metric_name, default=False):
     """
-    Fetch a boolean metric from the database.
+    Fetch a boolean metric (cached, see METRIC_CACHE_TTL_SECONDS).
 
     Args:
         metric_name (str): Name of the metric
@@ -55,25 +101,21 @@ def get_metric_bool(metric_name, default=False):
     Returns:
         bool: Metric value or default
     """
-    config = load_trends_config()
-    db_config = config.get('database')
-
-    try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-        cursor.execute("SELECT fetchmetricbool(%s);", (metric_name,))
-        result = cursor.fetchone()[0]
-        conn.close()
-
-        return result if result is not None else default
-    except Exception as e:
-        current_app.logger.warning(f"Error fetching metric '{metric_name}': {e}")
+    result = _lookup(metric_name)
+    if result is None:
         return default
+    value = str(result).strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    current_app.logger.warning(f"Metric '{metric_name}' is not a boolean: {result!r}")
+    return default
 
 
 def get_metric_text(metric_name, default=None):
     """
-    Fetch a text metric from the database.
+    Fetch a text metric (cached, see METRIC_CACHE_TTL_SECONDS).
 
     Args:
         metric_name (str): Name of the metric
@@ -82,20 +124,8 @@ def get_metric_text(metric_name, default=None):
     Returns:
         str: Metric value or default
     """
-    config = load_trends_config()
-    db_config = config.get('database')
-
-    try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-        cursor.execute("SELECT fetchmetrictext(%s);", (metric_name,))
-        result = cursor.fetchone()[0]
-        conn.close()
-
-        return result if result is not None else default
-    except Exception as e:
-        current_app.logger.warning(f"Error fetching metric '{metric_name}': {e}")
-        return default
+    result = _lookup(metric_name)
+    return result if result is not None else default
 
 
 def set_metric(metric_name, metric_value):
@@ -113,11 +143,12 @@ def set_metric(metric_name, metric_value):
     db_config = config.get('database')
 
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
         cursor.execute("SELECT setmetric(%s, %s);", (metric_name, str(metric_value)))
         conn.commit()
         conn.close()
+        invalidate_metrics_cache()
         return True
     except Exception as e:
         current_app.logger.error(f"Error setting metric '{metric_name}': {e}")
@@ -134,11 +165,19 @@ def get_all_metrics(module=None):
     Returns:
         list[dict]: List of metric dictionaries with keys: name, value, module
     """
+    try:
+        return _fetch_metrics(module)
+    except Exception as e:
+        current_app.logger.error(f"Error fetching all metrics: {e}")
+        return []
+
+
+def _fetch_metrics(module=None):
     config = load_trends_config()
     db_config = config.get('database')
 
+    conn = get_db_connection(db_config)
     try:
-        conn = psycopg2.connect(**db_config)
         cursor = conn.cursor()
 
         if module:
@@ -155,16 +194,12 @@ def get_all_metrics(module=None):
                 ORDER BY metric_module NULLS FIRST, metric_name;
             """)
 
-        metrics = [
+        return [
             {'name': row[0], 'value': row[1], 'module': row[2]}
             for row in cursor.fetchall()
         ]
-
+    finally:
         conn.close()
-        return metrics
-    except Exception as e:
-        current_app.logger.error(f"Error fetching all metrics: {e}")
-        return []
 
 
 # Convenience constants for commonly used metrics
@@ -28,10 +28,11 @@ def _load_tech_map():
 
     try:
         from .utils import load_trends_config
+        from .db_pool import get_db_connection
         config = load_trends_config()
         db_config = config.get('database')
 
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
         # Use stored procedure to fetch all technologies
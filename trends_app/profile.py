@@ -5,6 +5,7 @@ from flask import Blueprint, render_template, request, jsonify, current_app, red
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from .utils import load_trends_config
+from .db_pool import get_db_connection
 
 bp = Blueprint('profile', __name__, url_prefix='/profile')
 
@@ -50,7 +51,7 @@ def upload_report_form():
             db_settings = config.get('database')
             conn = None
             try:
-                conn = psycopg2.connect(**db_settings)
+                conn = get_db_connection(db_settings)
                 cursor = conn.cursor()
 
                 # Encrypt the content and insert into the new table
@@ -101,7 +102,7 @@ def ai_settings():
     profiles = []
     providers = []
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Fetch user's existing profiles with model name
@@ -147,7 +148,7 @@ def create_ai_profile():
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         profile_name = request.form.get('profile_name')
@@ -198,7 +199,7 @@ def get_ai_profile(profile_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -237,7 +238,7 @@ def edit_ai_profile(profile_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         profile_name = request.form.get('profile_name')
@@ -288,7 +289,7 @@ def delete_ai_profile(profile_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "DELETE FROM user_ai_profiles WHERE id = %s AND user_id = %s;",
@@ -328,7 +329,7 @@ def view_report(report_type, report_id):
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         if report_type in ['generated', 'trend_analysis']:
@@ -422,7 +423,7 @@ def save_report(report_type, report_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Determine the correct table and columns
@@ -503,7 +504,7 @@ def get_report_versions(report_type, report_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Verify user owns the report
@@ -565,7 +566,7 @@ def restore_version(report_type, report_id, version_number):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Determine FK column
@@ -661,7 +662,7 @@ def pin_version(report_type, report_id, version_number):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Determine FK column and verify ownership
@@ -721,7 +722,7 @@ def prompt_templates():
     conn = None
     user_templates = []
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id, template_name, technology FROM prompt_templates WHERE user_id = %s ORDER BY template_name;",
@@ -756,7 +757,7 @@ def create_prompt_template():
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO prompt_templates (template_name, technology, template_content, user_id) VALUES (%s, %s, %s, %s);",
@@ -783,7 +784,7 @@ def get_prompt_template_content(template_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "SELECT template_name, technology, template_content FROM prompt_templates WHERE id = %s AND user_id = %s;",
@@ -817,7 +818,7 @@ def edit_prompt_template(template_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute(
             "UPDATE prompt_templates SET template_name = %s, technology = %s, template_content = %s WHERE id = %s AND user_id = %s;",
@@ -844,7 +845,7 @@ def delete_prompt_template(template_id):
     db_settings = config.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
         cursor.execute("DELETE FROM prompt_templates WHERE id = %s AND user_id = %s;", (template_id, current_user.id))
         conn.commit()
@@ -866,7 +867,7 @@ def get_provider_models(provider_id):
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Get provider details
@@ -1076,7 +1077,7 @@ def refresh_provider_models(provider_id):
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_settings)
+        conn = get_db_connection(db_settings)
         cursor = conn.cursor()
 
         # Reset last_refreshed to force re-discovery
@@ -1,8 +1,8 @@
 import json
-import psycopg2
 import jinja2
 from flask import current_app
 from .utils import load_trends_config
+from .db_pool import get_db_connection
 
 def estimate_tokens(text):
     """
@@ -31,7 +31,7 @@ def estimate_tokens(text):
 
     return len(text) // chars_per_token
 
-def analyze_metric_severity(metric_name, data_row, all_findings, analysis_rules):
+def analyze_metric_severity(metric_name, data_row, all_findings, analysis_rules, settings=None):
     """
     Analyzes the severity of a single row of metric data based on rules
     fetched from the database.
@@ -39,21 +39,52 @@ def analyze_metric_severity(metric_name, data_row, all_findings, analysis_rules)
     for config_name, config in analysis_rules.items():
         if any(keyword in metric_name.lower() for keyword in config.get('metric_keywords', [])):
             if all(cond.get('key') in data_row for cond in config.get('data_conditions', []) if cond.get('exists')):
+                if settings is None:
+                    settings = load_trends_config() or {}
                 for rule in config.get('rules', []):
                     try:
-                        settings = load_trends_config() or {}
                         if eval(rule['expression'], {"data": data_row, "all_structured_findings": all_findings, "settings": settings}):
                             evaluated_reasoning = eval(f"f\"{rule['reasoning']}\"", {"data": data_row, "settings": settings})
                             return {
                                 'level': rule.get('level', 'info'),
                                 'score': rule.get('score', 0),
                                 'reasoning': evaluated_reasoning,
-                                'recommendations': rule.get('recommendations', [])
+                                'recommendations': rule.get('recommendations', []),
+                                'rule_config_name': config_name
                             }
                     except Exception as e:
                         current_app.logger.warning(f"Warning: Error evaluating rule for metric '{metric_name}': {e}")
     return None
 
+def find_metric_issues(findings_json, analysis_rules, levels=('critical', 'high'), settings=None):
+    """
+    Runs the analysis rules over every data row of the successful checks.
+
+    Returns:
+        dict: level -> list of {'metric', 'analysis', 'data'}, for the given levels.
+    """
+    if settings is None:
+        settings = load_trends_config() or {}
+    issues = {level: [] for level in levels}
+    for module_name, module_findings in findings_json.items():
+        if not isinstance(module_findings, dict) or module_findings.get("status") != "success":
+            continue
+        data_to_scan = module_findings.get("data", {})
+        if isinstance(data_to_scan, dict):
+            for data_key, data_value in data_to_scan.items():
+                data_list = []
+                if isinstance(data_value, dict) and isinstance(data_value.get('data'), list):
+                    data_list = data_value['data']
+                elif isinstance(data_value, list):
+                    data_list = data_value
+                for row in data_list:
+                    if isinstance(row, dict):
+                        metric = f"{module_name}_{data_key}"
+                        analysis = analyze_metric_severity(metric, row, findings_json, analysis_rules, settings)
+                        if analysis and analysis['level'] in issues:
+                            issues[analysis['level']].append({'metric': metric, 'analysis': analysis, 'data': row})
+    return issues
+
 def generate_web_prompt(findings_json, rule_set_id, template_id):
     """
     Generates a dynamic AI prompt by analyzing findings and rendering a Jinja2
@@ -66,7 +97,7 @@ def generate_web_prompt(findings_json, rule_set_id, template_id):
 
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         cursor.execute("SELECT rules_json, technology FROM analysis_rules WHERE id = %s;", (rule_set_id,))
@@ -81,27 +112,8 @@ def generate_web_prompt(findings_json, rule_set_id, template_id):
             return f"Error: Prompt Template with ID {template_id} not found."
         template_content = template_data[0]
 
-        critical_issues, high_priority_issues = [], []
-        for module_name, module_findings in findings_json.items():
-            if not isinstance(module_findings, dict) or module_findings.get("status") != "success":
-                continue
-            data_to_scan = module_findings.get("data", {})
-            if isinstance(data_to_scan, dict):
-                for data_key, data_value in data_to_scan.items():
-                    data_list = []
-                    if isinstance(data_value, dict) and isinstance(data_value.get('data'), list):
-                        data_list = data_value['data']
-                    elif isinstance(data_value, list):
-                        data_list = data_value
-                    for row in data_list:
-                        if isinstance(row, dict):
-                            analysis = analyze_metric_severity(f"{module_name}_{data_key}", row, findings_json, analysis_rules)
-                            if analysis and analysis['level'] in ['critical', 'high']:
-                                issue_details = {'metric': f"{module_name}_{data_key}", 'analysis': analysis, 'data': row}
-                                if analysis['level'] == 'critical':
-                                    critical_issues.append(issue_details)
-                                else:
-                                    high_priority_issues.append(issue_details)
+        issues = find_metric_issues(findings_json, analysis_rules, settings=settings)
+        critical_issues, high_priority_issues = issues['critical'], issues['high']
         
         template = jinja2.Template(template_content)
         
@@ -147,9 +159,10 @@ def generate_bulk_analysis_prompt(runs_data, analysis_style='default'):
     Generates a prompt for analyzing multiple health check runs.
 
     Args:
-        runs_data: List of run dictionaries with keys: id, company_name, target_host,
-                   target_port, target_db_name, db_technology, run_timestamp,
-                   critical_count, high_count, medium_count, findings
+        runs_data: List of run summaries from bulk_summaries.load_run_summaries(),
+                   with keys: id, company_name, target_host, target_port,
+                   target_db_name, db_technology, run_timestamp, critical_count,
+                   high_count, medium_count, issues, issues_source
         analysis_style: Style of analysis - 'default', 'technical', 'executive', 'troubleshooting'
 
     Returns:
@@ -160,7 +173,7 @@ def generate_bulk_analysis_prompt(runs_data, analysis_style='default'):
     conn = None
 
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # Fetch the Dashboard Bulk Analysis template
@@ -200,62 +213,25 @@ def generate_bulk_analysis_prompt(runs_data, analysis_style='default'):
         # This reduces token usage from ~300K to ~5-10K per run
         findings_data_parts = []
         for idx, run in enumerate(runs_data, 1):
-            run_id = run.get('id')
-
-            # Fetch triggered rules for this run from database
-            triggered_rules = []
-            try:
-                cursor.execute("""
-                    SELECT check_name, metric_name, severity_level, reasoning, recommendations
-                    FROM health_check_triggered_rules
-                    WHERE run_id = %s
-                    ORDER BY
-                        CASE severity_level
-                            WHEN 'critical' THEN 1
-                            WHEN 'high' THEN 2
-                            WHEN 'medium' THEN 3
-                            ELSE 4
-                        END,
-                        check_name;
-                """, (run_id,))
-                triggered_rules = cursor.fetchall()
-            except Exception as e:
-                current_app.logger.error(f"Error fetching triggered rules for run {run_id}: {e}")
-
-            # Format triggered rules as a concise summary
-            if triggered_rules:
-                rules_summary = []
-                for rule in triggered_rules:
-                    check_name, metric_name, severity, reasoning, recommendations = rule
-                    rules_summary.append({
-                        "check": check_name,
-                        "metric": metric_name,
-                        "severity": severity,
-                        "issue": reasoning,
-                        "recommendations": recommendations
-                    })
+            issues = run.get('issues') or []
+            if issues:
+                findings_data_parts.append(
+                    f"## Run {idx} - Triggered Rules ({len(issues)} issues)\n"
+                    f"```json\n{json.dumps(issues, indent=2, default=str)}\n```\n"
+                )
+            elif run.get('issues_source') == 'unavailable':
                 findings_data_parts.append(
-                    f"## Run {idx} - Triggered Rules ({len(rules_summary)} issues)\n"
-                    f"```json\n{json.dumps(rules_summary, indent=2)}\n```\n"
+                    f"## Run {idx} - Issues Unavailable\n"
+                    f"**Note:** No triggered rules are stored for this run, and its findings could not be "
+                    f"analyzed. This may indicate:\n"
+                    f"1. This run was created before triggered rules tracking was implemented\n"
+                    f"2. No analysis rule set exists for its technology ({run.get('db_technology', 'Unknown')})\n"
+                    f"3. Its findings could not be decrypted\n\n"
+                    f"**Recommendation:** Re-run this health check to populate triggered rules, "
+                    f"or review the complete findings data for this run ID: {run.get('id')}\n"
                 )
             else:
-                # Check if the run summary indicates issues exist
-                total_issues = run.get('critical_count', 0) + run.get('high_count', 0) + run.get('medium_count', 0)
-                if total_issues > 0:
-                    findings_data_parts.append(
-                        f"## Run {idx} - Issues Summary\n"
-                        f"**Note:** Run summary indicates {total_issues} total issues "
-                        f"({run.get('critical_count', 0)} critical, {run.get('high_count', 0)} high, "
-                        f"{run.get('medium_count', 0)} medium), but detailed triggered rules are not available "
-                        f"in the database. This may indicate:\n"
-                        f"1. This run was created before triggered rules tracking was implemented\n"
-                        f"2. The health check analysis rules may need to be updated\n"
-                        f"3. The issues may be in the raw findings data but weren't categorized\n\n"
-                        f"**Recommendation:** Re-run this health check to populate triggered rules, "
-                        f"or review the complete findings data for this run ID: {run_id}\n"
-                    )
-                else:
-                    findings_data_parts.append(f"## Run {idx} - No Issues Found\n")
+                findings_data_parts.append(f"## Run {idx} - No Issues Found\n")
 
         if not findings_data_parts:
             findings_data_parts.append("No triggered rules found across all selected runs.")
@@ -323,7 +299,7 @@ def generate_slides_prompt(findings_json, rule_set_id, template_id, assets=None)
     db_config = settings.get('database')
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         cursor.execute("SELECT rules_json, technology FROM analysis_rules WHERE id = %s;", (rule_set_id,))
@@ -342,27 +318,8 @@ def generate_slides_prompt(findings_json, rule_set_id, template_id, assets=None)
         # This function now relies entirely on the 'assets' dictionary passed in from main.py.
 
         # Use the same rich data processing as generate_web_prompt for high-quality AI output
-        critical_issues, high_priority_issues = [], []
-        for module_name, module_findings in findings_json.items():
-            if not isinstance(module_findings, dict) or module_findings.get("status") != "success": continue
-            data_to_scan = module_findings.get("data", {})
-            if isinstance(data_to_scan, dict):
-                for data_key, data_value in data_to_scan.items():
-                    data_list = data_value.get('data', []) if isinstance(data_value, dict) else data_value if isinstance(data_value, list) else []
-                    for row in data_list:
-                        if isinstance(row, dict):
-                            analysis = analyze_metric_severity(f"{module_name}_{data_key}", row, findings_json, analysis_rules)
-                            if analysis and analysis['level'] in ['critical', 'high']:
-                                # Create a rich issue dictionary, including the raw data
-                                issue_details = {
-                                    'metric': f"{module_name}_{data_key}",
-                                    'analysis': analysis,
-                                    'data': row
-                                }
-                                if analysis['level'] == 'critical':
-                                    critical_issues.append(issue_details)
-                                else:
-                                    high_priority_issues.append(issue_details)
+        issues = find_metric_issues(findings_json, analysis_rules, settings=settings)
+        critical_issues, high_priority_issues = issues['critical'], issues['high']
 
         template = jinja2.Template(template_content)
         template_context = {
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Backfill health_check_run_metrics for runs stored before it existed.
+
+New runs get their metrics when they are stored (utils/run_metrics.py).
+This script extracts them for older runs, a batch at a time, decrypting
+each run's findings once. Runs that already have metrics are skipped
+unless --all is given (e.g. after a metric definition changed).
+
+Usage:
+    python trends_app/scripts/backfill_run_metrics.py [--all] [--batch-size 200]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import psycopg2
+import yaml
+
+# Add the project root to the path for correct module imports
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.run_metrics import insert_run_metrics
+
+RUNS_SQL = """
+    SELECT hcr.id,
+           CASE
+             WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
+             ELSE hcr.findings::jsonb
+           END
+    FROM public.health_check_runs hcr
+    WHERE hcr.id > %(after)s
+      AND (%(all)s OR NOT EXISTS (SELECT 1 FROM public.health_check_run_metrics rm WHERE rm.run_id = hcr.id))
+    ORDER BY hcr.id
+    LIMIT %(limit)s
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract the scalar metrics of stored health check runs')
+    parser.add_argument('--config', default=str(PROJECT_ROOT / 'config' / 'trends.yaml'),
+                        help='Trends configuration file with the database settings')
+    parser.add_argument('--all', action='store_true', help='Re-extract runs that already have metrics')
+    parser.add_argument('--batch-size', type=int, default=200, help='Runs per transaction (default: 200)')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        db_settings = yaml.safe_load(f).get('database')
+
+    conn = psycopg2.connect(**db_settings)
+    runs = metrics = 0
+    last_id = 0
+    try:
+        while True:
+            with conn.cursor() as cursor:
+                cursor.execute(RUNS_SQL, {'after': last_id, 'all': args.all, 'limit': args.batch_size})
+                batch = cursor.fetchall()
+                if not batch:
+                    break
+                for run_id, findings in batch:
+                    metrics += insert_run_metrics(cursor, run_id, findings or {},
+                                                  warn=lambda message: print(f"⚠️  {message}"))
+                last_id = batch[-1][0]
+            conn.commit()
+            runs += len(batch)
+            print(f"Processed {runs} runs ({metrics} metrics), up to run {last_id}")
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"❌ Database error after run {last_id}: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(f"✅ Extracted {metrics} metrics from {runs} runs")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ from functools import wraps
 from flask import request, jsonify, current_app, redirect
 from datetime import datetime, timedelta
 
+from utils.submission_protocol import PayloadTooLarge, UnsupportedEncoding, decompress
+
 
 # ============================================================================
 # CONFIGURATION DEFAULTS
@@ -19,6 +21,7 @@ from datetime import datetime, timedelta
 SECURITY_DEFAULTS = {
     'enforce_https': False,              # HTTPS enforcement (disable for dev)
     'max_request_size_mb': 16,           # Maximum request payload size
+    'max_decompressed_size_mb': 256,     # Maximum submission size after decompression (and of a chunked upload)
     'max_json_depth': 10,                # Maximum JSON nesting depth
     'max_json_keys': 50000,              # Maximum total keys in JSON (increased for large databases)
     'rate_limit_enabled': False,         # Rate limiting (requires redis)
@@ -39,6 +42,7 @@ def get_security_config():
     security:
       enforce_https: false  # true for production
       max_request_size_mb: 16
+      max_decompressed_size_mb: 256
       max_json_depth: 10
       rate_limit_enabled: true
       rate_limit_per_minute: 100
@@ -121,15 +125,62 @@ def validate_request_size():
         current_app.logger.warning(
             f"Request size too large: {content_length} bytes from {request.remote_addr}"
         )
-        return False, jsonify({
+        return False, (jsonify({
             "error": "Payload too large",
             "message": f"Request must be smaller than {security_config['max_request_size_mb']}MB",
-            "received_mb": round(content_length / (1024 * 1024), 2)
-        }), 413
+            "received_mb": round(content_length / (1024 * 1024), 2),
+            "hint": "Large submissions can be sent compressed or as a chunked upload"
+        }), 413)
 
     return True, None
 
 
+def decode_submission_body(body, content_encoding):
+    """
+    Decompress and parse a submission body.
+
+    Bodies may be gzip or zstd compressed (Content-Encoding header); the
+    decompressed size is capped by security.max_decompressed_size_mb so a
+    small compressed request cannot expand without bound.
+
+    Returns:
+        tuple: (data, error_response)
+        - data: The parsed JSON, or None if invalid
+        - error_response: Flask response tuple if invalid, None otherwise
+    """
+    security_config = get_security_config()
+    max_size_mb = security_config['max_decompressed_size_mb']
+
+    try:
+        raw = decompress(body, content_encoding, max_size_mb * 1024 * 1024)
+    except PayloadTooLarge:
+        current_app.logger.warning(
+            f"Decompressed submission too large from {request.remote_addr}"
+        )
+        return None, (jsonify({
+            "error": "Payload too large",
+            "message": f"Decompressed submission must be smaller than {max_size_mb}MB"
+        }), 413)
+    except UnsupportedEncoding as e:
+        return None, (jsonify({
+            "error": "Unsupported Content-Encoding",
+            "message": str(e)
+        }), 415)
+    except ValueError as e:
+        return None, (jsonify({
+            "error": "Invalid request",
+            "message": str(e)
+        }), 400)
+
+    try:
+        return json.loads(raw), None
+    except ValueError:
+        return None, (jsonify({
+            "error": "Invalid request",
+            "message": "Request body must be valid JSON"
+        }), 400)
+
+
 # ============================================================================
 # JSON COMPLEXITY VALIDATION
 # ============================================================================
@@ -450,7 +501,8 @@ def get_security_status():
         },
         "request_size_limits": {
             "enabled": True,  # Always enabled
-            "max_size_mb": security_config['max_request_size_mb']
+            "max_size_mb": security_config['max_request_size_mb'],
+            "max_decompressed_size_mb": security_config['max_decompressed_size_mb']
         },
         "json_complexity_limits": {
             "enabled": True,  # Always enabled
@@ -13,6 +13,8 @@ const state = {
     sortColumn: 'timestamp',
     sortDirection: 'desc',
     showDeleted: false,  // Toggle for showing deleted runs
+    nextCursor: null,    // Keyset cursor of the next /api/runs page, null once all runs are loaded
+    fillingGeneration: null,
     filters: {
         company: '',
         target: '',
@@ -59,17 +61,22 @@ function setupEventListeners() {
         } else {
             document.getElementById('custom-dates').classList.add('hidden');
         }
-        applyFilters();
+        fetchRuns();
     });
 
     document.getElementById('technology-filter').addEventListener('change', (e) => {
         state.filters.technology = e.target.value;
-        applyFilters();
+        fetchRuns();
     });
 
     document.getElementById('status-filter').addEventListener('change', (e) => {
+        const favoritesChanged = (e.target.value === 'favorites') !== (state.filters.status === 'favorites');
         state.filters.status = e.target.value;
-        applyFilters();
+        if (favoritesChanged) {
+            fetchRuns();
+        } else {
+            applyFilters();
+        }
     });
 
     document.getElementById('search-filter').addEventListener('input', debounce((e) => {
@@ -79,12 +86,12 @@ function setupEventListeners() {
 
     document.getElementById('start-date').addEventListener('change', (e) => {
         state.filters.startDate = e.target.value;
-        applyFilters();
+        fetchRuns();
     });
 
     document.getElementById('end-date').addEventListener('change', (e) => {
         state.filters.endDate = e.target.value;
-        applyFilters();
+        fetchRuns();
     });
 
     // Select all checkbox
@@ -154,25 +161,70 @@ function setupEventListeners() {
 }
 
 // Data Fetching
-async function fetchRuns() {
-    try {
-        // Build query string with show deleted parameter
-        const params = new URLSearchParams();
-        if (state.showDeleted) {
-            params.set('include_deleted', 'true');
+let fetchGeneration = 0;
+
+// Earliest run date to ask the server for: the time range filter is applied by the database
+function serverDateRange() {
+    const range = {};
+    if (state.filters.timerange !== 'custom') {
+        const days = parseInt(state.filters.timerange);
+        if (!isNaN(days)) {
+            const cutoff = new Date(Date.now() - days * 24 * 60 * 60 * 1000);
+            range.start_time = cutoff.toISOString().slice(0, 10);
         }
+    } else {
+        if (state.filters.startDate) range.start_time = state.filters.startDate;
+        if (state.filters.endDate) range.end_time = state.filters.endDate;
+    }
+    return range;
+}
 
-        const url = '/api/runs' + (params.toString() ? '?' + params.toString() : '');
-        const response = await fetch(url);
-        if (!response.ok) throw new Error('Failed to fetch runs');
+// Query parameters of /api/runs for the filters the database applies
+function runsQueryParams() {
+    const params = new URLSearchParams(serverDateRange());
+    if (state.showDeleted) {
+        params.set('include_deleted', 'true');
+    }
+    if (state.filters.technology) {
+        params.set('technology', state.filters.technology);
+    }
+    if (state.filters.status === 'favorites') {
+        params.set('favorites', 'true');
+    }
+    params.set('limit', String(RUNS_FETCH_SIZE));
+    return params;
+}
 
-        const data = await response.json();
-        state.runs = data.runs || [];
+// Runs per /api/runs request
+const RUNS_FETCH_SIZE = 200;
+
+// Appends the next page of runs (keyset cursor); false if a newer fetchRuns() superseded this one
+async function fetchRunsPage(generation) {
+    const params = runsQueryParams();
+    if (state.nextCursor) params.set('cursor', state.nextCursor);
+
+    const response = await fetch('/api/runs?' + params.toString());
+    if (!response.ok) throw new Error('Failed to fetch runs');
+
+    const data = await response.json();
+    if (generation !== fetchGeneration) return false;
+
+    state.runs = state.runs.concat(data.runs || []);
+    state.nextCursor = data.next_cursor || null;
+    return true;
+}
+
+// Loads the first page of runs; later pages are loaded when the table needs them (fillVisiblePage)
+async function fetchRuns() {
+    const generation = ++fetchGeneration;
+    state.runs = [];
+    state.nextCursor = null;
+    try {
+        if (!await fetchRunsPage(generation)) return;
 
         // Populate filter dropdowns
         populateCompanyFilter();
         populateTargetFilter();
-
         applyFilters();
     } catch (error) {
         console.error('Error fetching runs:', error);
@@ -180,6 +232,33 @@ async function fetchRuns() {
     }
 }
 
+// Loads further pages of runs until the current table page is full or every run is loaded
+async function fillVisiblePage() {
+    const generation = fetchGeneration;
+    if (state.fillingGeneration === generation) return; // Already filling; the loop re-checks after each page
+    state.fillingGeneration = generation;
+    try {
+        while (state.nextCursor && state.filteredRuns.length < state.currentPage * state.pageSize) {
+            if (!await fetchRunsPage(generation)) return;
+
+            populateCompanyFilter();
+            populateTargetFilter();
+
+            // Loading more runs must not move the user back to the first page of the table
+            const currentPage = state.currentPage;
+            applyFilters();
+            state.currentPage = Math.min(currentPage, Math.max(1, Math.ceil(state.filteredRuns.length / state.pageSize)));
+            renderTable();
+            renderPagination();
+        }
+    } catch (error) {
+        console.error('Error fetching runs:', error);
+        showError('Failed to load health check runs');
+    } finally {
+        if (state.fillingGeneration === generation) state.fillingGeneration = null;
+    }
+}
+
 // Populate company filter with unique companies
 function populateCompanyFilter() {
     const companies = new Set();
@@ -357,6 +436,7 @@ function applyFilters() {
     updateStats();
     renderTable();
     renderPagination();
+    fillVisiblePage();
 }
 
 // Stats Update
@@ -375,12 +455,13 @@ function updateStats() {
         (run.critical_count || 0) > 0
     ).length;
 
-    document.getElementById('stat-total').textContent = total;
+    // Counts cover the runs loaded so far; '+' while more can be loaded
+    document.getElementById('stat-total').textContent = state.nextCursor ? `${total}+` : total;
     document.getElementById('stat-healthy').textContent = healthy;
     document.getElementById('stat-warnings').textContent = warnings;
     document.getElementById('stat-critical').textContent = critical;
 
-    document.getElementById('visible-count').textContent = total;
+    document.getElementById('visible-count').textContent = state.nextCursor ? `${total}+` : total;
 }
 
 // Helper: Check if user can edit based on technology
@@ -585,7 +666,9 @@ function renderTable() {
 
 // Pagination Rendering
 function renderPagination() {
-    const totalPages = Math.ceil(state.filteredRuns.length / state.pageSize);
+    // While more runs can be loaded, there is always a next page to go to
+    const loadedPages = Math.ceil(state.filteredRuns.length / state.pageSize);
+    const totalPages = state.nextCursor ? Math.max(loadedPages, state.currentPage) + 1 : loadedPages;
     const controls = document.getElementById('pagination-controls');
 
     if (totalPages <= 1) {
@@ -654,6 +737,7 @@ function goToPage(page) {
     state.currentPage = page;
     renderTable();
     renderPagination();
+    fillVisiblePage();
     window.scrollTo({ top: 0, behavior: 'smooth' });
 }
 
@@ -664,7 +748,7 @@ function updatePaginationInfo() {
 
     document.getElementById('page-start').textContent = total === 0 ? 0 : start;
     document.getElementById('page-end').textContent = end;
-    document.getElementById('total-runs').textContent = total;
+    document.getElementById('total-runs').textContent = state.nextCursor ? `${total}+` : total;
 }
 
 // Selection Management
@@ -1083,12 +1167,13 @@ async function submitAiReportGeneration(runIds, modal) {
             })
         });
 
+        const job = await response.json();
         if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.error || 'Failed to generate AI report');
+            throw new Error(job.error || 'Failed to generate AI report');
         }
 
-        const data = await response.json();
+        // The report is generated in a background job (jobs.js)
+        const data = await waitForJob(job.status_url);
 
         // Hide generation modal
         modal.classList.add('hidden');
@@ -1298,7 +1383,8 @@ async function applyFilterFromData(filter) {
         })
     });
 
-    applyFilters();
+    // The time range may have changed, and it is applied by the server
+    await fetchRuns();
 }
 
 async function loadSelectedFilter() {
@@ -0,0 +1,26 @@
+/**
+ * Polling of background report generation jobs (trends_app/jobs.py).
+ *
+ * The AI report, bulk AI report and trend analysis endpoints answer
+ * 202 Accepted with the status_url of the job doing the work. waitForJob()
+ * polls it until the job has finished, then resolves with the job's result
+ * (report ids and the URLs to download or view it), or rejects with the
+ * job's error message.
+ */
+async function waitForJob(statusUrl, intervalMs = 2000) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.error || `HTTP error! status: ${response.status}`);
+        }
+        if (job.status === 'succeeded') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error);
+        }
+    }
+}
@@ -225,7 +225,7 @@ class PooledBackend(SubmissionBackend):
             _encrypt_findings_pgcrypto, _extract_db_version,
             _parse_version_components, _extract_cluster_name,
             _extract_node_count, _extract_infrastructure_metadata,
-            _insert_triggered_rules
+            _insert_run_metrics, _insert_triggered_rules
         )
 
         cursor = conn.cursor()
@@ -302,6 +302,8 @@ class PooledBackend(SubmissionBackend):
 
             run_id = cursor.fetchone()[0]
 
+            _insert_run_metrics(cursor, run_id, structured_findings)
+
             # Insert triggered rules
             if analysis_results and 'triggered_rules' in analysis_results:
                 _insert_triggered_rules(cursor, run_id, analysis_results['triggered_rules'])
@@ -0,0 +1,165 @@
+"""
+Chunked, resumable uploads for /api/submit-health-check.
+
+Large submissions (see utils/submission_protocol.py) can be sent as a
+series of chunks instead of one request, so no single request exceeds
+`security.max_request_size_mb` and a dropped connection only costs the
+chunk in flight. Chunks are spooled to disk so every worker process of the
+deployment sees the same uploads; the directory must be shared if workers
+run on different hosts.
+
+Configuration (config/trends.yaml):
+
+    submission_uploads:
+      directory: /var/lib/health_trends/uploads   # default: <tmp>/health_trends_uploads
+      expiry_hours: 24                             # unfinished uploads are removed after this
+"""
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from utils.submission_protocol import CONTENT_ENCODINGS, chunk_count
+
+UPLOAD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{32}$')
+
+DEFAULT_EXPIRY_HOURS = 24
+
+# Chunks smaller than this are refused (except the last one), to bound the chunk count
+MIN_CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """An upload request that cannot be honoured; `status` is the HTTP status to return."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def owner_token(api_key):
+    """The value stored with an upload to recognise the API key that created it."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+class UploadStore:
+    """Spools upload chunks under one directory per upload."""
+
+    def __init__(self, directory, expiry_hours=DEFAULT_EXPIRY_HOURS):
+        self.directory = Path(directory)
+        self.expiry_seconds = expiry_hours * 3600
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+            raise UploadError("Unknown upload", status=404)
+        return self.directory / upload_id
+
+    def create(self, owner, total_size, sha256, content_encoding, chunk_size, max_size, submitter=None):
+        """Registers a new upload and returns its metadata.
+
+        `submitter` is the API key identity the upload was authenticated with
+        (key_id, key_name, company_id, company_name); completing the upload
+        submits on its behalf without using the key again.
+        """
+        self.purge_expired()
+        if content_encoding not in CONTENT_ENCODINGS:
+            raise UploadError(f"Unsupported content_encoding '{content_encoding}'", status=415)
+        if not isinstance(total_size, int) or total_size <= 0:
+            raise UploadError("total_size must be a positive integer")
+        if total_size > max_size:
+            raise UploadError(f"Upload must be smaller than {max_size // (1024 * 1024)}MB", status=413)
+        if not isinstance(chunk_size, int) or chunk_size < min(MIN_CHUNK_SIZE, total_size):
+            raise UploadError(f"chunk_size must be an integer of at least {MIN_CHUNK_SIZE} bytes")
+        if not isinstance(sha256, str) or not re.fullmatch(r'[0-9a-f]{64}', sha256):
+            raise UploadError("sha256 must be a lowercase hex SHA-256 digest")
+
+        upload_id = secrets.token_urlsafe(24)
+        path = self.directory / upload_id
+        path.mkdir()
+        meta = {
+            'upload_id': upload_id,
+            'owner': owner,
+            'submitter': submitter,
+            'total_size': total_size,
+            'sha256': sha256,
+            'content_encoding': content_encoding,
+            'chunk_size': chunk_size,
+            'chunks': chunk_count(total_size, chunk_size),
+            'created_at': time.time(),
+        }
+        (path / 'meta.json').write_text(json.dumps(meta))
+        return meta
+
+    def load(self, upload_id, owner):
+        """The metadata of an upload created by `owner`."""
+        path = self._path(upload_id)
+        try:
+            meta = json.loads((path / 'meta.json').read_text())
+        except (OSError, ValueError):
+            raise UploadError("Unknown upload", status=404)
+        if not secrets.compare_digest(meta['owner'], owner):
+            raise UploadError("Unknown upload", status=404)  # Not revealed to other keys
+        return meta
+
+    def write_chunk(self, meta, index, data):
+        """Stores one chunk (sending a chunk again replaces it)."""
+        if not 0 <= index < meta['chunks']:
+            raise UploadError(f"Chunk index must be between 0 and {meta['chunks'] - 1}")
+        expected = min(meta['chunk_size'], meta['total_size'] - index * meta['chunk_size'])
+        if len(data) != expected:
+            raise UploadError(f"Chunk {index} must be {expected} bytes, received {len(data)}")
+        path = self._path(meta['upload_id'])
+        # Written under a temporary name so a half-written chunk never counts as received
+        fd, tmp_name = tempfile.mkstemp(dir=path, prefix=f"{index}.", suffix='.partial')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_name, path / f"{index}.chunk")
+
+    def received_chunks(self, meta):
+        path = self._path(meta['upload_id'])
+        return sorted(int(p.stem) for p in path.glob('*.chunk'))
+
+    def assemble(self, meta):
+        """Joins the chunks of a complete upload and verifies its checksum."""
+        missing = sorted(set(range(meta['chunks'])) - set(self.received_chunks(meta)))
+        if missing:
+            raise UploadError(f"Upload is missing chunks {missing[:20]}", status=409)
+        path = self._path(meta['upload_id'])
+        body = b''.join((path / f"{index}.chunk").read_bytes() for index in range(meta['chunks']))
+        if hashlib.sha256(body).hexdigest() != meta['sha256']:
+            raise UploadError("Upload checksum does not match; send the chunks again", status=422)
+        return body
+
+    def discard(self, meta):
+        shutil.rmtree(self._path(meta['upload_id']), ignore_errors=True)
+
+    def purge_expired(self):
+        """Removes uploads older than the expiry."""
+        cutoff = time.time() - self.expiry_seconds
+        for path in self.directory.iterdir():
+            try:
+                if path.is_dir() and path.stat().st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+
+_store_instance = None
+
+
+def get_upload_store():
+    """Get or create the upload store singleton (configured from config/trends.yaml)."""
+    global _store_instance
+    if _store_instance is None:
+        from .utils import load_trends_config
+        settings = load_trends_config().get('submission_uploads') or {}
+        directory = settings.get('directory') or os.path.join(tempfile.gettempdir(), 'health_trends_uploads')
+        _store_instance = UploadStore(directory, settings.get('expiry_hours', DEFAULT_EXPIRY_HOURS))
+    return _store_instance
@@ -5,6 +5,7 @@ Generates AI-powered engagement recommendations from historical health check dat
 
 import json
 from flask import current_app
+from .db_pool import get_db_connection
 import psycopg2
 import psycopg2.extras
 from datetime import datetime
@@ -21,7 +22,7 @@ def get_accessible_companies_list(db_config, accessible_company_ids):
     conn = None
     companies = []
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor() # No DictCursor needed
 
         # Call the new database function
@@ -52,7 +53,7 @@ def get_trend_data(db_config, company_id, days, accessible_company_ids):
      
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         # We don't need DictCursor since we're just getting one JSON field,
         # but it's fine to leave it. psycopg2 handles JSON decoding automatically.
         cursor = conn.cursor() 
@@ -206,7 +207,7 @@ def save_trend_analysis(db_config, user_id, company_id, analysis_period_days, pe
     """
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor()
 
         # The logic for report_name, report_type, and encryption
@@ -246,7 +247,7 @@ def get_trend_analyses_history(db_config, accessible_company_ids, limit=50):
      
     conn = None
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = get_db_connection(db_config)
         cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
 
         # Call the PostgreSQL function directly
@@ -132,28 +132,29 @@ BEGIN
     RETURN;
   END IF;
 
+  -- Per-run write metrics from public.health_check_run_metrics (utils/run_metrics.py)
   RETURN QUERY
   SELECT
     hcr.run_timestamp::DATE,
-    SUM((query_data->>'calls_per_hour')::NUMERIC),
-    COUNT(DISTINCT query_data->>'query'),
-    AVG((query_data->>'percent_of_total_cluster_cpu')::NUMERIC),
-    MAX((query_data->>'calls_per_hour')::NUMERIC)
+    SUM(m.write_calls_per_hour),
+    SUM(m.write_queries)::BIGINT,
+    SUM(m.write_cpu_percent_sum) / NULLIF(SUM(m.write_cpu_percent_count), 0),
+    MAX(m.write_max_calls_per_hour)
   FROM public.health_check_runs hcr
-  CROSS JOIN LATERAL jsonb_array_elements(
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-  ) AS query_data
+  CROSS JOIN LATERAL (
+    SELECT
+      MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_queries') AS write_queries,
+      MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_calls_per_hour') AS write_calls_per_hour,
+      MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_max_calls_per_hour') AS write_max_calls_per_hour,
+      MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_cpu_percent_sum') AS write_cpu_percent_sum,
+      MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_cpu_percent_count') AS write_cpu_percent_count
+    FROM public.health_check_run_metrics rm
+    WHERE rm.run_id = hcr.id
+  ) m
   WHERE
     hcr.company_id = p_company_id
     AND hcr.db_technology = 'postgres'
-    AND (
-      query_data->>'query' ILIKE '%INSERT INTO%' OR
-      query_data->>'query' ILIKE '%UPDATE %' OR
-      query_data->>'query' ILIKE '%DELETE FROM%'
-    )
+    AND m.write_queries IS NOT NULL
     AND hcr.run_timestamp > NOW() - (p_days_lookback || ' days')::INTERVAL
   GROUP BY hcr.run_timestamp::DATE
   ORDER BY hcr.run_timestamp::DATE DESC;
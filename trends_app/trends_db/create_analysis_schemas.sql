@@ -130,36 +130,38 @@ COMMENT ON VIEW postgres_analysis.high_frequency_write_candidates IS
 Requires ViewPostgreSQLAnalysis or ViewAllTechnologies privilege.';
 
 -- View: Write volume growth trends per customer
+-- Reads the per-run write metrics of public.health_check_run_metrics (utils/run_metrics.py)
 CREATE OR REPLACE VIEW postgres_analysis.write_volume_growth_trends AS
 SELECT
   co.company_name,
   co.id as company_id,
   hcr.run_timestamp::date as check_date,
-  SUM((query_data->>'calls_per_hour')::numeric) as total_writes_per_hour,
-  COUNT(DISTINCT query_data->>'query') as unique_write_queries,
-  AVG((query_data->>'percent_of_total_cluster_cpu')::numeric) as avg_cpu_percent,
-  MAX((query_data->>'calls_per_hour')::numeric) as max_single_query_rate
+  SUM(m.write_calls_per_hour) as total_writes_per_hour,
+  SUM(m.write_queries)::bigint as unique_write_queries,
+  SUM(m.write_cpu_percent_sum) / NULLIF(SUM(m.write_cpu_percent_count), 0) as avg_cpu_percent,
+  MAX(m.write_max_calls_per_hour) as max_single_query_rate
 FROM public.health_check_runs hcr
 JOIN public.companies co ON (co.id = hcr.company_id)
-CROSS JOIN LATERAL jsonb_array_elements(
-  CASE
-    WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-    ELSE hcr.findings::jsonb
-  END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-) AS query_data
+CROSS JOIN LATERAL (
+  SELECT
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_queries') as write_queries,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_calls_per_hour') as write_calls_per_hour,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_max_calls_per_hour') as write_max_calls_per_hour,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_cpu_percent_sum') as write_cpu_percent_sum,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_write_cpu_percent_count') as write_cpu_percent_count
+  FROM public.health_check_run_metrics rm
+  WHERE rm.run_id = hcr.id
+) m
 WHERE
   (checkprivilege('ViewPostgreSQLAnalysis') OR checkprivilege('ViewAllTechnologies'))
   AND hcr.db_technology = 'postgres'
-  AND (
-    query_data->>'query' ILIKE '%INSERT INTO%' OR
-    query_data->>'query' ILIKE '%UPDATE %' OR
-    query_data->>'query' ILIKE '%DELETE FROM%'
-  )
+  AND m.write_queries IS NOT NULL
 GROUP BY co.company_name, co.id, check_date
 ORDER BY check_date DESC, total_writes_per_hour DESC;
 
 COMMENT ON VIEW postgres_analysis.write_volume_growth_trends IS
 'Daily aggregated write volume per customer. Use to identify growth trends and project capacity limits.
+unique_write_queries counts the distinct write queries of each run, summed over the day.
 Requires ViewPostgreSQLAnalysis or ViewAllTechnologies privilege.';
 
 \echo '✓ PostgreSQL analysis views created'
@@ -15,6 +15,8 @@
 --   - Capacity Planning: Growth trends, scaling recommendations
 --   - Security Audits: SSL/TLS config, authentication, encryption
 --
+-- Requires: public.health_check_run_metrics (migrations/09_add_run_metrics.sql)
+--
 -- Usage:
 --   psql -h <host> -p <port> -U <user> -d health_trends -f create_consulting_analysis_views.sql
 --
@@ -52,6 +54,10 @@ COMMENT ON SCHEMA consulting_analysis IS 'Professional services and consulting e
 
 \echo 'Step 3: Creating PostgreSQL consulting opportunity views...'
 
+-- The per-run numbers come from public.health_check_run_metrics, which is
+-- filled when a run is stored (utils/run_metrics.py). Counts of runs that
+-- have no such metric read as 0, like COUNT(*) over a missing array did.
+
 -- View: Query optimization consulting opportunities
 CREATE OR REPLACE VIEW consulting_analysis.postgres_query_optimization_opps AS
 SELECT
@@ -62,137 +68,51 @@ SELECT
   hcr.target_host,
   hcr.target_port,
   -- Count of slow queries
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-    ) AS query
-    WHERE (query->>'avg_duration_ms')::numeric > 1000
-  ) as slow_query_count,
+  m.slow_query_count,
   -- Count of queries with low cache hit rate
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-    ) AS query
-    WHERE (query->>'cache_hit_rate_percent')::numeric < 90
-  ) as low_cache_hit_count,
-  -- Count of queries doing sequential scans
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_missing_indexes' -> 'data' -> 'tables_missing_indexes'
-    ) AS table_data
-  ) as missing_index_count,
+  m.low_cache_hit_count,
+  -- Count of tables missing indexes
+  m.missing_index_count,
   -- Overall CPU consumption from inefficient queries
-  (
-    SELECT SUM((query->>'percent_of_total_cluster_cpu')::numeric)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-    ) AS query
-    WHERE (query->>'avg_duration_ms')::numeric > 500
-  ) as inefficient_query_cpu_percent,
+  m.inefficient_query_cpu_percent,
   -- Determine consulting priority
   CASE
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-      ) AS query
-      WHERE (query->>'avg_duration_ms')::numeric > 5000
-    ) > 5 THEN 'critical'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-      ) AS query
-      WHERE (query->>'avg_duration_ms')::numeric > 1000
-    ) > 3 THEN 'high'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-      ) AS query
-      WHERE (query->>'avg_duration_ms')::numeric > 500
-    ) > 2 THEN 'medium'
+    WHEN m.queries_over_5000ms > 5 THEN 'critical'
+    WHEN m.slow_query_count > 3 THEN 'high'
+    WHEN m.queries_over_500ms > 2 THEN 'medium'
     ELSE 'low'
   END as consulting_priority,
   -- Recommendation
   '🔧 Query Optimization Consulting: Identify and optimize slow queries, add missing indexes, improve query plans' as engagement_type,
   -- Estimated engagement value
   CASE
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-      ) AS query
-      WHERE (query->>'avg_duration_ms')::numeric > 5000
-    ) > 5 THEN '$15,000-$25,000'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-      ) AS query
-      WHERE (query->>'avg_duration_ms')::numeric > 1000
-    ) > 3 THEN '$10,000-$15,000'
+    WHEN m.queries_over_5000ms > 5 THEN '$15,000-$25,000'
+    WHEN m.slow_query_count > 3 THEN '$10,000-$15,000'
     ELSE '$5,000-$10,000'
   END as estimated_value
 FROM public.health_check_runs hcr
 JOIN public.companies co ON (co.id = hcr.company_id)
+CROSS JOIN LATERAL (
+  SELECT
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_queries_over_1000ms'), 0)::bigint as slow_query_count,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_low_cache_hit_queries'), 0)::bigint as low_cache_hit_count,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_missing_index_tables'), 0)::bigint as missing_index_count,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_inefficient_query_cpu_percent') as inefficient_query_cpu_percent,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_queries_over_500ms'), 0)::bigint as queries_over_500ms,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_queries_over_5000ms'), 0)::bigint as queries_over_5000ms
+  FROM public.health_check_run_metrics rm
+  WHERE rm.run_id = hcr.id
+) m
 WHERE
   (checkprivilege('ViewConsultingOpportunities') OR checkprivilege('ViewAllTechnologies'))
   AND hcr.db_technology = 'postgres'
   AND hcr.run_timestamp > NOW() - INTERVAL '30 days'
   AND (
     -- Has slow queries
-    (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_comprehensive_query_analysis' -> 'data' -> 'queries'
-      ) AS query
-      WHERE (query->>'avg_duration_ms')::numeric > 500
-    ) > 0
+    m.queries_over_500ms > 0
     OR
     -- Has missing indexes
-    (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_missing_indexes' -> 'data' -> 'tables_missing_indexes'
-      ) AS table_data
-    ) > 0
+    m.missing_index_count > 0
   )
 ORDER BY consulting_priority DESC, inefficient_query_cpu_percent DESC NULLS LAST;
 
@@ -211,128 +131,50 @@ SELECT
   hcr.target_host,
   hcr.target_port,
   -- Count of bloated tables
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-    ) AS bloat
-    WHERE (bloat->>'bloat_percent')::numeric > 20
-  ) as bloated_table_count,
+  m.bloated_table_count,
   -- Total wasted space (GB)
-  (
-    SELECT SUM((bloat->>'wasted_gb')::numeric)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-    ) AS bloat
-  ) as total_wasted_gb,
+  m.total_wasted_gb,
   -- Autovacuum configuration issues
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_autovacuum_config' -> 'data' -> 'issues_found'
-  )::boolean as has_autovacuum_issues,
+  m.has_autovacuum_issues,
   -- Long-running transactions blocking vacuum
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_long_running_transactions' -> 'data' -> 'long_transactions'
-    ) AS txn
-    WHERE (txn->>'duration_hours')::numeric > 2
-  ) as blocking_transaction_count,
+  m.blocking_transaction_count,
   -- Determine consulting priority
   CASE
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-      ) AS bloat
-      WHERE (bloat->>'bloat_percent')::numeric > 50
-    ) > 3 THEN 'critical'
-    WHEN (
-      SELECT SUM((bloat->>'wasted_gb')::numeric)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-      ) AS bloat
-    ) > 100 THEN 'high'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-      ) AS bloat
-      WHERE (bloat->>'bloat_percent')::numeric > 20
-    ) > 1 THEN 'medium'
+    WHEN m.severely_bloated_table_count > 3 THEN 'critical'
+    WHEN m.total_wasted_gb > 100 THEN 'high'
+    WHEN m.bloated_table_count > 1 THEN 'medium'
     ELSE 'low'
   END as consulting_priority,
   -- Recommendation
   '🔧 Vacuum & Bloat Tuning: Configure autovacuum, implement bloat reduction strategy, optimize maintenance windows' as engagement_type,
   -- Estimated engagement value
   CASE
-    WHEN (
-      SELECT SUM((bloat->>'wasted_gb')::numeric)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-      ) AS bloat
-    ) > 100 THEN '$12,000-$20,000'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-      ) AS bloat
-      WHERE (bloat->>'bloat_percent')::numeric > 20
-    ) > 3 THEN '$8,000-$12,000'
+    WHEN m.total_wasted_gb > 100 THEN '$12,000-$20,000'
+    WHEN m.bloated_table_count > 3 THEN '$8,000-$12,000'
     ELSE '$5,000-$8,000'
   END as estimated_value
 FROM public.health_check_runs hcr
 JOIN public.companies co ON (co.id = hcr.company_id)
+CROSS JOIN LATERAL (
+  SELECT
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_bloated_tables_over_20pct'), 0)::bigint as bloated_table_count,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_total_wasted_gb') as total_wasted_gb,
+    (MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_autovacuum_issues')) <> 0 as has_autovacuum_issues,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_blocking_transactions'), 0)::bigint as blocking_transaction_count,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_bloated_tables_over_50pct'), 0)::bigint as severely_bloated_table_count
+  FROM public.health_check_run_metrics rm
+  WHERE rm.run_id = hcr.id
+) m
 WHERE
   (checkprivilege('ViewConsultingOpportunities') OR checkprivilege('ViewAllTechnologies'))
   AND hcr.db_technology = 'postgres'
   AND hcr.run_timestamp > NOW() - INTERVAL '30 days'
   AND (
     -- Has bloated tables
-    (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_table_bloat' -> 'data' -> 'bloated_tables'
-      ) AS bloat
-      WHERE (bloat->>'bloat_percent')::numeric > 20
-    ) > 0
+    m.bloated_table_count > 0
     OR
     -- Has autovacuum issues
-    (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_autovacuum_config' -> 'data' -> 'issues_found'
-    )::boolean = true
+    m.has_autovacuum_issues = true
   )
 ORDER BY consulting_priority DESC, total_wasted_gb DESC NULLS LAST;
 
@@ -351,59 +193,17 @@ SELECT
   hcr.target_host,
   hcr.target_port,
   -- Configuration issues
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_configuration_best_practices' -> 'data' -> 'recommendations'
-    ) AS config
-  ) as config_recommendation_count,
+  m.config_recommendation_count,
   -- Connection pool issues
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_connection_pooling' -> 'data' -> 'needs_pooling'
-  )::boolean as needs_connection_pooling,
+  m.needs_connection_pooling,
   -- Replication lag issues
-  (
-    SELECT MAX((replica->>'replication_lag_mb')::numeric)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_replication_status' -> 'data' -> 'replicas'
-    ) AS replica
-  ) as max_replication_lag_mb,
+  m.max_replication_lag_mb,
   -- Checkpoint tuning needs
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_checkpoint_tuning' -> 'data' -> 'needs_tuning'
-  )::boolean as needs_checkpoint_tuning,
+  m.needs_checkpoint_tuning,
   -- Determine consulting priority
   CASE
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_configuration_best_practices' -> 'data' -> 'recommendations'
-      ) AS config
-    ) > 10 THEN 'high'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_configuration_best_practices' -> 'data' -> 'recommendations'
-      ) AS config
-    ) > 5 THEN 'medium'
+    WHEN m.config_recommendation_count > 10 THEN 'high'
+    WHEN m.config_recommendation_count > 5 THEN 'medium'
     ELSE 'low'
   END as consulting_priority,
   -- Recommendation
@@ -412,29 +212,25 @@ SELECT
   '$8,000-$15,000' as estimated_value
 FROM public.health_check_runs hcr
 JOIN public.companies co ON (co.id = hcr.company_id)
+CROSS JOIN LATERAL (
+  SELECT
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_config_recommendations'), 0)::bigint as config_recommendation_count,
+    (MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_needs_connection_pooling')) <> 0 as needs_connection_pooling,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_max_replication_lag_mb') as max_replication_lag_mb,
+    (MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'pg_needs_checkpoint_tuning')) <> 0 as needs_checkpoint_tuning
+  FROM public.health_check_run_metrics rm
+  WHERE rm.run_id = hcr.id
+) m
 WHERE
   (checkprivilege('ViewConsultingOpportunities') OR checkprivilege('ViewAllTechnologies'))
   AND hcr.db_technology = 'postgres'
   AND hcr.run_timestamp > NOW() - INTERVAL '30 days'
   AND (
     -- Has configuration recommendations
-    (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_configuration_best_practices' -> 'data' -> 'recommendations'
-      ) AS config
-    ) > 3
+    m.config_recommendation_count > 3
     OR
     -- Needs connection pooling
-    (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_connection_pooling' -> 'data' -> 'needs_pooling'
-    )::boolean = true
+    m.needs_connection_pooling = true
   )
 ORDER BY consulting_priority DESC, config_recommendation_count DESC NULLS LAST;
 
@@ -461,59 +257,17 @@ SELECT
   hcr.target_host,
   hcr.target_port,
   -- Partition imbalance issues
-  (
-    SELECT MAX((broker->>'partition_count')::numeric) - MIN((broker->>'partition_count')::numeric)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_partition_balance' -> 'data' -> 'brokers'
-    ) AS broker
-  ) as partition_imbalance,
+  m.partition_imbalance,
   -- Under-replicated partitions
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'kafka_overview' -> 'data' -> 'under_replicated_partitions'
-  )::integer as under_replicated_partitions,
+  m.under_replicated_partitions,
   -- Topic configuration issues
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_topic_configuration' -> 'data' -> 'topics_with_issues'
-    ) AS topic
-  ) as topic_config_issue_count,
+  m.topic_config_issue_count,
   -- GC pause issues
-  (
-    SELECT AVG((broker->>'max_gc_pause_ms')::numeric)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_gc_pauses' -> 'data' -> 'brokers'
-    ) AS broker
-  ) as avg_max_gc_pause_ms,
+  m.avg_max_gc_pause_ms,
   -- Determine consulting priority
   CASE
-    WHEN (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'kafka_overview' -> 'data' -> 'under_replicated_partitions'
-    )::integer > 10 THEN 'critical'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_topic_configuration' -> 'data' -> 'topics_with_issues'
-      ) AS topic
-    ) > 5 THEN 'high'
+    WHEN m.under_replicated_partitions > 10 THEN 'critical'
+    WHEN m.topic_config_issue_count > 5 THEN 'high'
     ELSE 'medium'
   END as consulting_priority,
   -- Recommendation
@@ -522,29 +276,25 @@ SELECT
   '$10,000-$18,000' as estimated_value
 FROM public.health_check_runs hcr
 JOIN public.companies co ON (co.id = hcr.company_id)
+CROSS JOIN LATERAL (
+  SELECT
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'kafka_partition_imbalance') as partition_imbalance,
+    (MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'kafka_under_replicated_partitions'))::integer as under_replicated_partitions,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'kafka_topic_config_issues'), 0)::bigint as topic_config_issue_count,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'kafka_avg_max_gc_pause_ms') as avg_max_gc_pause_ms
+  FROM public.health_check_run_metrics rm
+  WHERE rm.run_id = hcr.id
+) m
 WHERE
   (checkprivilege('ViewConsultingOpportunities') OR checkprivilege('ViewAllTechnologies'))
   AND hcr.db_technology = 'kafka'
   AND hcr.run_timestamp > NOW() - INTERVAL '30 days'
   AND (
     -- Has under-replicated partitions
-    (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'kafka_overview' -> 'data' -> 'under_replicated_partitions'
-    )::integer > 0
+    m.under_replicated_partitions > 0
     OR
     -- Has topic configuration issues
-    (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_topic_configuration' -> 'data' -> 'topics_with_issues'
-      ) AS topic
-    ) > 0
+    m.topic_config_issue_count > 0
   )
 ORDER BY consulting_priority DESC, under_replicated_partitions DESC NULLS LAST;
 
@@ -571,52 +321,16 @@ SELECT
   hcr.target_host,
   hcr.target_port,
   -- Compaction strategy issues
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_compaction_strategy' -> 'data' -> 'tables_with_issues'
-    ) AS table_data
-  ) as compaction_issue_count,
+  m.compaction_issue_count,
   -- Read/write latency
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_read_write_latency' -> 'data' -> 'read_p99_ms'
-  )::numeric as read_p99_ms,
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_read_write_latency' -> 'data' -> 'write_p99_ms'
-  )::numeric as write_p99_ms,
+  m.read_p99_ms,
+  m.write_p99_ms,
   -- GC pressure
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_memory_pressure' -> 'data' -> 'heap_used_percent'
-  )::numeric as heap_used_percent,
+  m.heap_used_percent,
   -- Determine consulting priority
   CASE
-    WHEN (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_read_write_latency' -> 'data' -> 'read_p99_ms'
-    )::numeric > 100 THEN 'high'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_compaction_strategy' -> 'data' -> 'tables_with_issues'
-      ) AS table_data
-    ) > 3 THEN 'medium'
+    WHEN m.read_p99_ms > 100 THEN 'high'
+    WHEN m.compaction_issue_count > 3 THEN 'medium'
     ELSE 'low'
   END as consulting_priority,
   -- Recommendation
@@ -625,29 +339,25 @@ SELECT
   '$12,000-$20,000' as estimated_value
 FROM public.health_check_runs hcr
 JOIN public.companies co ON (co.id = hcr.company_id)
+CROSS JOIN LATERAL (
+  SELECT
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'cassandra_compaction_issue_tables'), 0)::bigint as compaction_issue_count,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'cassandra_read_p99_ms') as read_p99_ms,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'cassandra_write_p99_ms') as write_p99_ms,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'cassandra_heap_used_percent') as heap_used_percent
+  FROM public.health_check_run_metrics rm
+  WHERE rm.run_id = hcr.id
+) m
 WHERE
   (checkprivilege('ViewConsultingOpportunities') OR checkprivilege('ViewAllTechnologies'))
   AND hcr.db_technology = 'cassandra'
   AND hcr.run_timestamp > NOW() - INTERVAL '30 days'
   AND (
     -- Has compaction issues
-    (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_compaction_strategy' -> 'data' -> 'tables_with_issues'
-      ) AS table_data
-    ) > 0
+    m.compaction_issue_count > 0
     OR
     -- Has high latency
-    (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_read_write_latency' -> 'data' -> 'read_p99_ms'
-    )::numeric > 50
+    m.read_p99_ms > 50
   )
 ORDER BY consulting_priority DESC, read_p99_ms DESC NULLS LAST;
 
@@ -674,53 +384,17 @@ SELECT
   hcr.target_host,
   hcr.target_port,
   -- Shard allocation issues
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_shard_allocation' -> 'data' -> 'unassigned_shards'
-  )::integer as unassigned_shards,
+  m.unassigned_shards,
   -- Total shard count
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_shard_allocation' -> 'data' -> 'total_shards'
-  )::integer as total_shards,
+  m.total_shards,
   -- JVM heap usage
-  (
-    CASE
-      WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-      ELSE hcr.findings::jsonb
-    END -> 'check_jvm_memory' -> 'data' -> 'heap_used_percent'
-  )::numeric as heap_used_percent,
+  m.heap_used_percent,
   -- Query performance issues
-  (
-    SELECT COUNT(*)
-    FROM jsonb_array_elements(
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_slow_queries' -> 'data' -> 'slow_queries'
-    ) AS query
-  ) as slow_query_count,
+  m.slow_query_count,
   -- Determine consulting priority
   CASE
-    WHEN (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_shard_allocation' -> 'data' -> 'unassigned_shards'
-    )::integer > 10 THEN 'critical'
-    WHEN (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_slow_queries' -> 'data' -> 'slow_queries'
-      ) AS query
-    ) > 5 THEN 'high'
+    WHEN m.unassigned_shards > 10 THEN 'critical'
+    WHEN m.slow_query_count > 5 THEN 'high'
     ELSE 'medium'
   END as consulting_priority,
   -- Recommendation
@@ -729,29 +403,25 @@ SELECT
   '$10,000-$16,000' as estimated_value
 FROM public.health_check_runs hcr
 JOIN public.companies co ON (co.id = hcr.company_id)
+CROSS JOIN LATERAL (
+  SELECT
+    (MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'opensearch_unassigned_shards'))::integer as unassigned_shards,
+    (MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'opensearch_total_shards'))::integer as total_shards,
+    MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'opensearch_heap_used_percent') as heap_used_percent,
+    COALESCE(MAX(rm.metric_value) FILTER (WHERE rm.metric_name = 'opensearch_slow_queries'), 0)::bigint as slow_query_count
+  FROM public.health_check_run_metrics rm
+  WHERE rm.run_id = hcr.id
+) m
 WHERE
   (checkprivilege('ViewConsultingOpportunities') OR checkprivilege('ViewAllTechnologies'))
   AND hcr.db_technology = 'opensearch'
   AND hcr.run_timestamp > NOW() - INTERVAL '30 days'
   AND (
     -- Has unassigned shards
-    (
-      CASE
-        WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-        ELSE hcr.findings::jsonb
-      END -> 'check_shard_allocation' -> 'data' -> 'unassigned_shards'
-    )::integer > 0
+    m.unassigned_shards > 0
     OR
     -- Has slow queries
-    (
-      SELECT COUNT(*)
-      FROM jsonb_array_elements(
-        CASE
-          WHEN hcr.encryption_mode = 'pgcrypto' THEN public.decrypt_run_findings(hcr.id)
-          ELSE hcr.findings::jsonb
-        END -> 'check_slow_queries' -> 'data' -> 'slow_queries'
-      ) AS query
-    ) > 0
+    m.slow_query_count > 0
   )
 ORDER BY consulting_priority DESC, unassigned_shards DESC NULLS LAST;
 
@@ -0,0 +1,47 @@
+-- Migration 08: Add per-check execution profiles
+-- Date: 2026-10-16
+-- Purpose: Track the cost of each check module (wall time, queries, rows, bytes, SSH commands)
+--          across tool releases and clusters, from the execution_profile block of the findings
+
+CREATE TABLE IF NOT EXISTS health_check_execution_profiles (
+    id SERIAL PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES health_check_runs(id) ON DELETE CASCADE,
+    module_name TEXT NOT NULL,
+    wall_time_seconds DOUBLE PRECISION NOT NULL,
+    query_count INTEGER NOT NULL DEFAULT 0,
+    rows_returned BIGINT NOT NULL DEFAULT 0,
+    bytes_serialized BIGINT NOT NULL DEFAULT 0,
+    ssh_commands INTEGER NOT NULL DEFAULT 0,
+    reused BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_execution_profiles_run_id ON health_check_execution_profiles(run_id);
+CREATE INDEX IF NOT EXISTS idx_execution_profiles_module ON health_check_execution_profiles(module_name);
+
+COMMENT ON TABLE health_check_execution_profiles IS 'Per-check execution cost of each health check run, from the execution_profile findings block';
+COMMENT ON COLUMN health_check_execution_profiles.rows_returned IS 'Rows of raw (list) query results; formatted-only results are not counted';
+COMMENT ON COLUMN health_check_execution_profiles.reused IS 'True when the check was not executed because --incremental reused the previous result';
+
+-- Check cost by tool version and technology, for spotting slow checks and regressions
+CREATE OR REPLACE VIEW check_execution_cost_trends AS
+SELECT
+    r.db_technology,
+    r.tool_version,
+    r.cluster_name,
+    p.module_name,
+    COUNT(*) AS runs,
+    AVG(p.wall_time_seconds) AS avg_wall_time_seconds,
+    MAX(p.wall_time_seconds) AS max_wall_time_seconds,
+    AVG(p.query_count) AS avg_query_count,
+    AVG(p.bytes_serialized) AS avg_bytes_serialized,
+    AVG(p.ssh_commands) AS avg_ssh_commands
+FROM health_check_execution_profiles p
+JOIN health_check_runs r ON r.id = p.run_id
+WHERE NOT p.reused
+GROUP BY r.db_technology, r.tool_version, r.cluster_name, p.module_name;
+
+GRANT SELECT ON check_execution_cost_trends TO PUBLIC;
+
+-- Migration complete
+SELECT 'Check execution profiles migration completed successfully' AS status;
@@ -0,0 +1,30 @@
+-- Migration 09: Add per-run scalar metrics
+-- Date: 2026-10-16
+-- Purpose: Store the numbers the consulting and write volume views need (slow query
+--          counts, bloat totals, write volumes, lag, ...) once per run at ingestion
+--          (utils/run_metrics.py), so the views no longer decrypt and parse the
+--          findings of every run several times per query
+--
+-- After this migration:
+--   1. Re-create the views and functions that read the table:
+--        psql -d health_trends -f trends_app/trends_db/create_consulting_analysis_views.sql
+--        psql -d health_trends -f trends_app/trends_db/create_analysis_schemas.sql
+--        psql -d health_trends -f trends_app/trends_db/analysis_functions.sql
+--   2. Extract the metrics of the runs stored before it:
+--        python trends_app/scripts/backfill_run_metrics.py
+
+CREATE TABLE IF NOT EXISTS health_check_run_metrics (
+    run_id INTEGER NOT NULL REFERENCES health_check_runs(id) ON DELETE CASCADE,
+    metric_name TEXT NOT NULL,
+    metric_value NUMERIC NOT NULL,
+    PRIMARY KEY (run_id, metric_name)
+);
+
+-- For queries across runs on one metric (e.g. all runs with replication lag)
+CREATE INDEX IF NOT EXISTS idx_run_metrics_name_value ON health_check_run_metrics(metric_name, metric_value);
+
+COMMENT ON TABLE health_check_run_metrics IS 'Scalar metrics extracted from the findings of each run when it is stored (utils/run_metrics.py)';
+COMMENT ON COLUMN health_check_run_metrics.metric_value IS 'Counts, totals and measurements; booleans are stored as 1 or 0';
+
+-- Migration complete
+SELECT 'Run metrics migration completed successfully' AS status;
@@ -0,0 +1,117 @@
+-- Migration 10: Keyset pagination for the runs list
+-- Date: 2026-10-16
+-- Purpose: /api/runs returned every accessible run in one JSONB array from
+--          get_health_check_runs(), with three correlated COUNT(*) subqueries
+--          per run. get_health_check_runs_page() returns one page of runs in
+--          (run_timestamp, id) order, starting after the last run of the
+--          previous page, with the filters applied in the query. The severity
+--          counts are computed only for the runs of the page, and findings are
+--          never read.
+--
+-- get_health_check_runs() is left in place for other callers.
+
+-- Serves the keyset order per accessible company
+CREATE INDEX IF NOT EXISTS idx_health_check_runs_company_timestamp
+ON health_check_runs(company_id, run_timestamp DESC, id DESC);
+
+CREATE OR REPLACE FUNCTION get_health_check_runs_page(
+    p_company_ids INT[],
+    p_user_id INT,
+    p_company_name TEXT DEFAULT NULL,
+    p_target_host TEXT DEFAULT NULL,
+    p_target_port INT DEFAULT NULL,
+    p_target_db_name TEXT DEFAULT NULL,
+    p_start_date DATE DEFAULT NULL,
+    p_end_date DATE DEFAULT NULL,
+    p_include_deleted BOOLEAN DEFAULT FALSE,
+    p_db_technology TEXT DEFAULT NULL,
+    p_favorites_only BOOLEAN DEFAULT FALSE,
+    p_ascending BOOLEAN DEFAULT FALSE,       -- Oldest first instead of newest first
+    p_after_timestamp TIMESTAMPTZ DEFAULT NULL,  -- Keyset: (run_timestamp, id) of the last run of the previous page
+    p_after_id INT DEFAULT NULL,
+    p_limit INT DEFAULT 200                  -- At most 1001: a full /api/runs page plus the run telling there is a next one
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_result JSONB;
+    v_direction TEXT := CASE WHEN p_ascending THEN 'ASC' ELSE 'DESC' END;
+    v_after TEXT := CASE WHEN p_ascending THEN '>' ELSE '<' END;
+BEGIN
+    -- Dynamic only in the sort direction, so each direction can walk the index
+    EXECUTE format($query$
+        WITH page AS (
+            SELECT
+                hcr.id,
+                hcr.run_timestamp,
+                c.company_name,
+                hcr.target_host,
+                hcr.target_port,
+                hcr.target_db_name,
+                hcr.db_technology,
+                hcr.deleted_at,
+                hcr.deleted_by,
+                ufr.user_id IS NOT NULL AS is_favorite
+            FROM health_check_runs hcr
+            JOIN companies c ON hcr.company_id = c.id
+            LEFT JOIN user_favorite_runs ufr
+                ON hcr.id = ufr.run_id AND ufr.user_id = $2
+            WHERE hcr.company_id = ANY($1)
+              AND ($9 OR hcr.deleted_at IS NULL)
+              AND ($3 IS NULL OR c.company_name = $3)
+              AND ($4 IS NULL OR hcr.target_host = $4)
+              AND ($5 IS NULL OR hcr.target_port = $5)
+              AND ($6 IS NULL OR hcr.target_db_name = $6)
+              AND ($7 IS NULL OR hcr.run_timestamp >= $7)
+              AND ($8 IS NULL OR hcr.run_timestamp < ($8 + INTERVAL '1 day'))
+              AND ($10 IS NULL OR lower(hcr.db_technology) = lower($10))
+              AND (NOT $11 OR ufr.user_id IS NOT NULL)
+              AND ($12 IS NULL OR (hcr.run_timestamp, hcr.id) %2$s ($12, $13))
+            ORDER BY hcr.run_timestamp %1$s, hcr.id %1$s
+            LIMIT $14
+        )
+        SELECT COALESCE(jsonb_agg(
+            jsonb_build_object(
+                'id', p.id,
+                'run_timestamp', p.run_timestamp,
+                'company_name', p.company_name,
+                'target_host', p.target_host,
+                'target_port', p.target_port,
+                'target_db_name', p.target_db_name,
+                'db_technology', p.db_technology,
+                'critical_count', COALESCE(s.critical_count, 0),
+                'high_count', COALESCE(s.high_count, 0),
+                'medium_count', COALESCE(s.medium_count, 0),
+                'is_favorite', p.is_favorite,
+                'deleted_at', p.deleted_at,
+                'deleted_by', p.deleted_by
+            )
+            ORDER BY p.run_timestamp %1$s, p.id %1$s
+        ), '[]'::jsonb)
+        FROM page p
+        LEFT JOIN LATERAL (
+            SELECT
+                COUNT(*) FILTER (WHERE tr.severity_level = 'critical') AS critical_count,
+                COUNT(*) FILTER (WHERE tr.severity_level = 'high') AS high_count,
+                COUNT(*) FILTER (WHERE tr.severity_level = 'medium') AS medium_count
+            FROM health_check_triggered_rules tr
+            WHERE tr.run_id = p.id
+        ) s ON true
+    $query$, v_direction, v_after)
+    INTO v_result
+    USING p_company_ids, p_user_id, p_company_name, p_target_host, p_target_port, p_target_db_name,
+          p_start_date, p_end_date, p_include_deleted, p_db_technology, p_favorites_only,
+          p_after_timestamp, p_after_id, LEAST(GREATEST(p_limit, 1), 1001);
+
+    RETURN v_result;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_health_check_runs_page(INT[], INT, TEXT, TEXT, INT, TEXT, DATE, DATE, BOOLEAN, TEXT, BOOLEAN, BOOLEAN, TIMESTAMPTZ, INT, INT) IS
+'One page (at most 1001 runs) of the runs list in (run_timestamp, id) order, after the given keyset position, with filters, favorite status and severity counts. Never reads findings.';
+
+-- Example:
+--   SELECT get_health_check_runs_page(ARRAY[1], 5, p_limit => 50);
+--   SELECT get_health_check_runs_page(ARRAY[1], 5, p_after_timestamp => '2026-01-31T02:00:00+00', p_after_id => 4711, p_limit => 50);
+
+-- Migration complete
+SELECT 'Runs list pagination migration completed successfully' AS status;
@@ -0,0 +1,28 @@
+-- Migration 11: Background jobs for report generation
+-- Date: 2026-10-16
+-- Purpose: AI reports, bulk AI reports, trend analyses and slides are generated
+--          in background jobs (trends_app/jobs.py) instead of inside the request.
+--          The job state is kept here so that any web worker process can answer
+--          the browser's status polls, whichever process runs the job.
+
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id TEXT PRIMARY KEY,                   -- Random token, also used in the status URL
+    job_type TEXT NOT NULL,                -- ai_report, bulk_ai_report, trend_analysis, slides
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    status TEXT NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    result BYTEA,                          -- JSON result, encrypted with pgp_sym_encrypt
+    error TEXT                             -- Message shown to the user when the job failed
+);
+
+-- Finished jobs are purged by age
+CREATE INDEX IF NOT EXISTS idx_background_jobs_created_at ON background_jobs(created_at);
+
+COMMENT ON TABLE background_jobs IS 'State and results of report generation jobs, polled by the web UI (trends_app/jobs.py)';
+COMMENT ON COLUMN background_jobs.result IS 'The JSON result of a succeeded job (report ids, slide HTML), encrypted using pgcrypto.';
+
+-- Migration complete
+SELECT 'Background jobs migration completed successfully' AS status;
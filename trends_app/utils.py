@@ -1,16 +1,32 @@
 # trends_app/utils.py
+import copy
 import yaml
 from pathlib import Path
 import re
 from flask import current_app
 
+# Parsed configuration files: path -> ((mtime_ns, size), config)
+_config_cache = {}
+
+
 def load_trends_config(config_path='config/trends.yaml'):
-    """Loads the trend shipper configuration for the web app."""
+    """Loads the trend shipper configuration for the web app.
+
+    The parsed file is cached per process and re-read only when its
+    modification time or size changes, so request handlers can call this on
+    every request. Each call returns its own copy.
+    """
     try:
         # The project root is two levels up from this file's directory
-        project_root = Path(__file__).parent.parent
-        with open(project_root / config_path, 'r') as f:
-            return yaml.safe_load(f)
+        path = Path(__file__).parent.parent / config_path
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = _config_cache.get(path)
+        if cached is None or cached[0] != signature:
+            with open(path, 'r') as f:
+                cached = (signature, yaml.safe_load(f))
+            _config_cache[path] = cached
+        return copy.deepcopy(cached[1])
     except Exception as e:
         # Use Flask's logger for better integration
         current_app.logger.error(f"Error loading trends.yaml: {e}")
@@ -0,0 +1,212 @@
+"""
+Columnar (batched) evaluation of simple rule expressions.
+
+Checks such as index_bloat_analysis or Kafka's per-partition log dir
+listings return thousands of homogeneous rows. For those, simple comparison
+rules like
+
+    data['bloat_ratio'] > 50 and data.get('size_bytes') >= 104857600
+
+are evaluated once per column instead of once per row: the referenced
+values are gathered into column arrays (NumPy when installed, the `array`
+module otherwise) and each comparison becomes a boolean mask.
+
+Only expressions built from numeric comparisons of data columns against
+numeric constants, combined with and/or/not, are planned; anything else
+(and any column holding non-numeric values) is evaluated row by row by the
+caller, exactly as before.
+"""
+
+import ast
+import operator
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Values beyond this magnitude lose precision as float64, so they are not batched
+_MAX_EXACT_FLOAT_INT = 2 ** 53
+
+_COMPARE_OPERATORS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+
+def _column_key(node) -> Optional[str]:
+    """Return the key for data['key'] or data.get('key'), else None."""
+    if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == 'data'
+            and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str)):
+        return node.slice.value
+    # data.get('key', default) only reads the row value when the key is present,
+    # which ColumnBatch guarantees before using a column
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'get'
+            and isinstance(node.func.value, ast.Name) and node.func.value.id == 'data'
+            and not node.keywords and 1 <= len(node.args) <= 2
+            and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)
+            and all(isinstance(arg, ast.Constant) for arg in node.args[1:])):
+        return node.args[0].value
+    return None
+
+
+def _numeric_constant(node):
+    """Return the value of a numeric literal (including -N), else None."""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _numeric_constant(node.operand)
+        if value is None:
+            return None
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float) and abs(node.value) < _MAX_EXACT_FLOAT_INT:
+        return node.value
+    return None
+
+
+def _plan_operand(node):
+    key = _column_key(node)
+    if key is not None:
+        return ('column', key)
+    value = _numeric_constant(node)
+    if value is not None:
+        return ('constant', value)
+    return None
+
+
+def _plan(node):
+    if isinstance(node, ast.BoolOp):
+        children = [_plan(value) for value in node.values]
+        if any(child is None for child in children):
+            return None
+        return ('and' if isinstance(node.op, ast.And) else 'or', children)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        child = _plan(node.operand)
+        return None if child is None else ('not', child)
+
+    if isinstance(node, ast.Compare):
+        operands = [_plan_operand(node.left)] + [_plan_operand(comparator) for comparator in node.comparators]
+        if any(operand is None for operand in operands):
+            return None
+        if not any(operand[0] == 'column' for operand in operands):
+            return None
+        comparisons = []
+        # a < b < c is (a < b) and (b < c)
+        for left, op, right in zip(operands, node.ops, operands[1:]):
+            compare = _COMPARE_OPERATORS.get(type(op))
+            if compare is None:
+                return None
+            comparisons.append(('compare', compare, left, right))
+        return comparisons[0] if len(comparisons) == 1 else ('and', comparisons)
+
+    return None
+
+
+def plan_expression(expression: Optional[str]):
+    """
+    Translate a rule expression into a columnar evaluation plan.
+
+    Returns:
+        A plan tuple for ColumnBatch.evaluate(), or None when the expression
+        is not a simple numeric comparison (it is then evaluated per row).
+    """
+    if not isinstance(expression, str):
+        return None
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError:
+        return None
+    return _plan(tree.body)
+
+
+def plan_columns(plan) -> List[str]:
+    """The data keys a plan reads."""
+    kind = plan[0]
+    if kind in ('and', 'or'):
+        return [key for child in plan[1] for key in plan_columns(child)]
+    if kind == 'not':
+        return plan_columns(plan[1])
+    return [operand[1] for operand in plan[2:] if operand[0] == 'column']
+
+
+class ColumnBatch:
+    """
+    A homogeneous list of data rows viewed as numeric columns.
+
+    Use ColumnBatch.from_rows(); columns are built lazily, the first time a
+    rule needs them.
+    """
+
+    def __init__(self, rows: Sequence[Dict[str, Any]], keys):
+        self.rows = rows
+        self.keys = keys
+        self._columns = {}
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Any]) -> Optional['ColumnBatch']:
+        """Return a batch when every row is a dict with the same keys, else None."""
+        if not rows or not isinstance(rows[0], dict):
+            return None
+        keys = rows[0].keys()
+        for row in rows:
+            if not isinstance(row, dict) or row.keys() != keys:
+                return None
+        return cls(rows, set(keys))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, key: str):
+        """The column for `key`, or None when any value is missing or not a plain number."""
+        if key not in self._columns:
+            column = None
+            if key in self.keys:
+                values = [row[key] for row in self.rows]
+                if all(type(value) in (int, float, bool) and (type(value) is float or abs(value) < _MAX_EXACT_FLOAT_INT)
+                       for value in values):
+                    column = np.array(values, dtype=np.float64) if np is not None else array('d', values)
+            self._columns[key] = column
+        return self._columns[key]
+
+    def supports(self, plan) -> bool:
+        """True when every column the plan reads is numeric in this batch."""
+        return all(self.column(key) is not None for key in plan_columns(plan))
+
+    def evaluate(self, plan):
+        """Evaluate a plan (see supports()) to a boolean mask with one entry per row."""
+        kind = plan[0]
+        if kind in ('and', 'or'):
+            masks = [self.evaluate(child) for child in plan[1]]
+            if np is not None:
+                return (np.logical_and if kind == 'and' else np.logical_or).reduce(masks)
+            combine = all if kind == 'and' else any
+            return [combine(values) for values in zip(*masks)]
+        if kind == 'not':
+            mask = self.evaluate(plan[1])
+            return ~mask if np is not None else [not value for value in mask]
+
+        _, compare, left, right = plan
+        left_values = self._operand(left)
+        right_values = self._operand(right)
+        if np is not None:
+            return compare(left_values, right_values)
+        if left[0] == 'constant':
+            return [compare(left_values, value) for value in right_values]
+        if right[0] == 'constant':
+            return [compare(value, right_values) for value in left_values]
+        return [compare(a, b) for a, b in zip(left_values, right_values)]
+
+    def _operand(self, operand):
+        return self.column(operand[1]) if operand[0] == 'column' else operand[1]
+
+
+def mask_indices(mask) -> List[int]:
+    """Row positions where a mask is true."""
+    if np is not None and isinstance(mask, np.ndarray):
+        return np.flatnonzero(mask).tolist()
+    return [index for index, value in enumerate(mask) if value]
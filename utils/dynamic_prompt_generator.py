@@ -8,13 +8,13 @@ It uses a weighted token budgeting strategy to ensure the prompt fits within
 the AI model's context window.
 """
 
-import json
-import copy
 from decimal import Decimal
 from datetime import datetime, timedelta
 import jinja2
 from pathlib import Path
-from utils.json_utils import convert_to_json_serializable
+from utils.json_utils import SerializedFindings, encode_object
+from utils.prompt_budget import PromptBudget, load_tokenizer, row_severities
+from utils.rule_compiler import COLUMNAR_MIN_ROWS, get_compiled_rules
 
 
 # Metadata keys added by main.py that are NOT check modules
@@ -28,25 +28,32 @@ METADATA_KEYS = {
     'high_priority_issues',
     'medium_priority_issues',
     'total_issues',
-    'rule_application_stats'
+    'rule_application_stats',
+    'prompt_tokens',
+    'incremental_run',
+    'execution_profile'
 }
 
 
 def analyze_metric_severity(metric_name, data_row, settings, all_findings, analysis_rules, rule_stats, verbose=False):
     """Analyzes a metric against rules and returns the highest severity finding.
 
-    This function iterates through all defined analysis rules, checking if a
-    given metric and its data match the rule's keywords and conditions. If they
-    match, it evaluates the rule's expression to see if an issue is triggered.
-    It tracks all triggered rules and returns only the one with the highest
-    'score'. The `rule_stats` dict is updated in-place.
+    Every rule config whose keywords match the metric name and whose data
+    conditions hold for the row has its rules evaluated. It tracks all
+    triggered rules and returns only the one with the highest 'score'. The
+    `rule_stats` dict is updated in-place.
+
+    Evaluation uses the compiled rule set (see utils/rule_compiler.py), so
+    expressions and reasoning templates are not re-parsed for every row and
+    keyword matching is done once per metric name.
 
     Args:
         metric_name (str): The name of the metric being analyzed (e.g., 'cache_hit_rate').
         data_row (dict): A single dictionary representing one row of data for the metric.
         settings (dict): The main application settings dictionary.
         all_findings (dict): The complete findings structure for contextual checks.
-        analysis_rules (dict): The loaded JSON rules to evaluate against.
+        analysis_rules (dict or CompiledRuleSet): The rules from get_rules_config()
+            (compiled when loaded), or an already compiled rule set.
         rule_stats (dict): A dictionary to be updated with rule execution statistics.
         verbose (bool, optional): If True, prints detailed debugging information.
 
@@ -55,60 +62,8 @@ def analyze_metric_severity(metric_name, data_row, settings, all_findings, analy
               like 'level', 'score', 'reasoning', 'recommendations', and 
               'rule_config_name'.
     """
-
-    highest_severity_finding = {
-        'level': 'info', 
-        'score': 0, 
-        'reasoning': '', 
-        'recommendations': [],
-        'rule_config_name': None  # NEW: Track which rule config triggered
-    }
-
-    for config_name, config in analysis_rules.items():
-        keyword_match = any(keyword in metric_name.lower() for keyword in config.get('metric_keywords', []))
-        
-        if verbose and keyword_match:
-            print(f"\n[DEBUG] METRIC: '{metric_name}' | RULE_CONFIG: '{config_name}'")
-            print(f"  - Keywords: {config.get('metric_keywords', [])} -> MATCH")
-
-        if keyword_match:
-            conditions_met = all(cond.get('key') in data_row for cond in config.get('data_conditions', []) if cond.get('exists'))
-            if verbose:
-                 print(f"  - Conditions: {config.get('data_conditions', [])} -> {'MET' if conditions_met else 'NOT MET'}")
-
-            if conditions_met:
-                for rule in config.get('rules', []):
-                    if config_name not in rule_stats:
-                        rule_stats[config_name] = {'checked': 0, 'triggered': 0, 'errors': 0}
-                    
-                    try:
-                        rule_stats[config_name]['checked'] += 1
-                        expression_result = eval(rule['expression'], {"data": data_row, "settings": settings, "all_structured_findings": all_findings})
-                        
-                        if verbose:
-                            print(f"    - Evaluating Rule: level='{rule.get('level')}'")
-                            print(f"      - Expression: {rule['expression']}")
-                            print(f"      - DATA_ROW: {json.dumps(data_row, indent=2, default=str)}")
-                            print(f"      - RESULT: {'TRIGGERED' if expression_result else 'NOT TRIGGERED'}")
-
-                        if expression_result:
-                            rule_stats[config_name]['triggered'] += 1
-                            evaluated_reasoning = eval(f"f\"{rule['reasoning']}\"", {"data": data_row, "settings": settings})
-                            current_finding = {
-                                'level': rule.get('level', 'info'),
-                                'score': rule.get('score', 0),
-                                'reasoning': evaluated_reasoning,
-                                'recommendations': rule.get('recommendations', []),
-                                'rule_config_name': config_name  # NEW: Include the rule config name
-                            }
-                            if current_finding['score'] > highest_severity_finding['score']:
-                                highest_severity_finding = current_finding
-                                
-                    except Exception as e:
-                        rule_stats[config_name]['errors'] += 1
-                        print(f"Warning: Error evaluating rule '{config_name}' for metric '{metric_name}': {e}")
-
-    return highest_severity_finding
+    compiled_rules = get_compiled_rules(analysis_rules)
+    return compiled_rules.evaluate(metric_name, data_row, settings, all_findings, rule_stats, verbose=verbose)
 
 
 def _process_findings_recursively(current_findings, settings, analysis_rules, all_findings, rule_stats, issue_lists, module_issue_map, parent_key='', verbose=False):
@@ -122,7 +77,7 @@ def _process_findings_recursively(current_findings, settings, analysis_rules, al
     Args:
         current_findings (dict): The current level of the findings to process.
         settings (dict): The main application settings dictionary.
-        analysis_rules (dict): The loaded rule configurations.
+        analysis_rules (CompiledRuleSet): The compiled rule configurations.
         all_findings (dict): The complete findings structure for context.
         rule_stats (dict): A dictionary to be updated with rule execution stats.
         issue_lists (tuple): A tuple of lists (`critical`, `high`, `medium`) to
@@ -159,30 +114,36 @@ def _process_findings_recursively(current_findings, settings, analysis_rules, al
                     _process_findings_recursively(data, settings, analysis_rules, all_findings, rule_stats, issue_lists, module_issue_map, parent_key=metric_name, verbose=verbose)
                     continue
 
-            for row in data_list:
-                if isinstance(row, dict):
-                    analysis = analyze_metric_severity(metric_name, row, settings, all_findings, analysis_rules, rule_stats, verbose=verbose)
-                    if analysis['level'] in ['critical', 'high', 'medium']:
-                        module_name = parent_key or key
-                        if module_name not in module_issue_map:
-                             module_issue_map[module_name] = {'critical': 0, 'high': 0, 'medium': 0}
-                        
-                        issue_details = {
-                            'metric': metric_name, 
-                            'analysis': analysis, 
-                            'data': row,
-                            'rule_config_name': analysis.get('rule_config_name')  # NEW: Pass through rule name
-                        }
-                        module_issue_map[module_name][analysis['level']] += 1
-                        
-                        if analysis['level'] == 'critical': critical_issues.append(issue_details)
-                        elif analysis['level'] == 'high': high_priority_issues.append(issue_details)
-                        elif analysis['level'] == 'medium': medium_priority_issues.append(issue_details)
+            # Large lists are evaluated column-wise; only rows that trigger a rule come back
+            if not verbose and len(data_list) >= COLUMNAR_MIN_ROWS and settings.get('columnar_rule_evaluation', True):
+                row_analyses = get_compiled_rules(analysis_rules).evaluate_batch(metric_name, data_list, settings, all_findings, rule_stats)
+            else:
+                row_analyses = ((row, analyze_metric_severity(metric_name, row, settings, all_findings, analysis_rules, rule_stats, verbose=verbose))
+                                for row in data_list if isinstance(row, dict))
+
+            for row, analysis in row_analyses:
+                if analysis['level'] in ['critical', 'high', 'medium']:
+                    module_name = parent_key or key
+                    if module_name not in module_issue_map:
+                         module_issue_map[module_name] = {'critical': 0, 'high': 0, 'medium': 0}
+                    
+                    issue_details = {
+                        'metric': metric_name, 
+                        'analysis': analysis, 
+                        'data': row,
+                        'rule_config_name': analysis.get('rule_config_name')  # NEW: Pass through rule name
+                    }
+                    module_issue_map[module_name][analysis['level']] += 1
+                    
+                    if analysis['level'] == 'critical': critical_issues.append(issue_details)
+                    elif analysis['level'] == 'high': high_priority_issues.append(issue_details)
+                    elif analysis['level'] == 'medium': medium_priority_issues.append(issue_details)
 
         elif 'status' not in value:
             _process_findings_recursively(value, settings, analysis_rules, all_findings, rule_stats, issue_lists, module_issue_map, parent_key=metric_name, verbose=verbose)
 
-def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, db_metadata, active_plugin, verbose=False):
+def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, db_metadata, active_plugin, verbose=False,
+                            serialized_findings=None):
     """Orchestrates the analysis of findings to generate a final AI prompt.
 
     This is the main function of the module. It performs several key steps:
@@ -191,7 +152,8 @@ def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, d
         and the severity of issues found within it.
     3.  Applies a token budget to intelligently select or trim the findings data,
         prioritizing modules with critical issues to ensure the most important
-        information is included in the prompt.
+        information is included in the prompt. Trimmed lists keep the rows
+        that triggered the most severe rules (see utils/prompt_budget.py).
     4.  Renders the final prompt using a Jinja2 template.
 
     Args:
@@ -203,6 +165,9 @@ def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, d
         active_plugin (object): The active plugin instance, used to get module
             weights and template paths.
         verbose (bool, optional): Enables detailed debug printing.
+        serialized_findings (SerializedFindings, optional): The run's shared
+            serialization stage. Its normalized tree and cached per-module
+            sizes are reused instead of converting and re-encoding the findings.
 
     Returns:
         dict: A dictionary containing the final rendered 'prompt' and other
@@ -211,25 +176,27 @@ def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, d
               'rule_application_stats'.
     """
 
-    findings_for_analysis = convert_to_json_serializable(all_structured_findings)
+    if serialized_findings is None:
+        serialized_findings = SerializedFindings(all_structured_findings)
+    else:
+        serialized_findings.refresh(all_structured_findings)
+    findings_for_analysis = serialized_findings.data
     rule_stats = {}
     critical_issues, high_priority_issues, medium_priority_issues = [], [], []
     issue_lists = (critical_issues, high_priority_issues, medium_priority_issues)
     module_issue_map = {}
 
-    _process_findings_recursively(findings_for_analysis, settings, analysis_rules, findings_for_analysis, rule_stats, issue_lists, module_issue_map, verbose=verbose)
+    # Compiled once at get_rules_config() time; plain dicts are compiled here, once per run
+    compiled_rules = get_compiled_rules(analysis_rules)
+    _process_findings_recursively(findings_for_analysis, settings, compiled_rules, findings_for_analysis, rule_stats, issue_lists, module_issue_map, verbose=verbose)
 
 
 # --- Weighted Token Budgeting Logic ---
-    TOKEN_CHARACTER_RATIO = 4
-    # Reserve 4000 characters (~1000 tokens) for prompt instructions, headers, and summaries.
-    RESERVED_BUFFER_FOR_PROMPT_OVERHEAD = 4000 
-    
+    # Module and row costs are counted once, from the cached encodings (see utils/prompt_budget.py)
     max_prompt_tokens = settings.get('ai_max_prompt_tokens', 8000)
-    # The total budget for the entire prompt string
-    total_character_budget = max_prompt_tokens * TOKEN_CHARACTER_RATIO
-    # The budget for just the findings_json part is the total minus our buffer
-    token_budget = total_character_budget - RESERVED_BUFFER_FOR_PROMPT_OVERHEAD
+    count_tokens = load_tokenizer(settings.get('ai_tokenizer'))
+    budget = PromptBudget(serialized_findings, max_prompt_tokens, count_tokens=count_tokens,
+                          severities=row_severities(issue_lists))
 
     
     # Create a single list of all modules with a calculated priority score
@@ -256,38 +223,14 @@ def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, d
     sorted_modules = sorted(all_modules_with_priority, key=lambda x: x['priority'], reverse=True)
 
     # --- Single Loop for Prompt Assembly ---
-    current_size = 0
     findings_for_prompt = {}
-    trimmed_modules_log = {}
 
     for module in sorted_modules:
-        module_name = module['name']
-        # Use a deep copy to ensure original findings aren't modified
-        module_data = copy.deepcopy(module['data'])
-
-        # First, check if the UNTRIMMED module fits
-        original_module_size = len(json.dumps(module_data))
-        if (current_size + original_module_size) <= token_budget:
-            findings_for_prompt[module_name] = module_data
-            current_size += original_module_size
-            continue
-
-        # If it doesn't fit, try to trim it
-        trim_details = []
-        for sub_report_name, sub_report_data in module_data.items():
-            if isinstance(sub_report_data, dict) and 'data' in sub_report_data and isinstance(sub_report_data['data'], list) and len(sub_report_data['data']) > 1:
-                original_len = len(sub_report_data['data'])
-                sub_report_data['data'] = sub_report_data['data'][:1]
-                trim_details.append(f"  - List '{sub_report_name}' trimmed from {original_len} to 1 items.")
-        
-        trimmed_module_size = len(json.dumps(module_data))
-
-        # Check if the TRIMMED version now fits
-        if (current_size + trimmed_module_size) <= token_budget:
-            findings_for_prompt[module_name] = module_data
-            current_size += trimmed_module_size
-            if trim_details:
-                trimmed_modules_log[module_name] = trim_details
+        # Included whole when it fits, else with the highest-severity rows of each list that fit
+        module_data = budget.add(module['name'], module['data'])
+        if module_data is not None:
+            findings_for_prompt[module['name']] = module_data
+    trimmed_modules_log = {name: details for name, details in budget.trimmed.items() if details}
     
     # Log the results of trimming actions
     if trimmed_modules_log:
@@ -308,8 +251,14 @@ def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, d
 
     analysis_timestamp = datetime.utcnow().isoformat() + "Z"
 
+    # Compact JSON, as budgeted; modules included whole reuse their cached encoding
+    findings_json = encode_object(
+        (name, serialized_findings.encoded(name) if data is findings_for_analysis.get(name) else data)
+        for name, data in findings_for_prompt.items()
+    ).decode('utf-8')
+
     prompt = template.render(
-        findings_json=json.dumps(findings_for_prompt, indent=2),
+        findings_json=findings_json,
         settings=settings,
         db_version=db_metadata.get('version', 'N/A'),
         database_name=db_metadata.get('db_name', 'N/A'),
@@ -328,5 +277,6 @@ def generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, d
         'high_priority_issues': high_priority_issues,
         'medium_priority_issues': medium_priority_issues,
         'total_issues': len(critical_issues) + len(high_priority_issues) + len(medium_priority_issues),
-        'rule_application_stats': rule_stats
+        'rule_application_stats': rule_stats,
+        'prompt_tokens': count_tokens(prompt)
     }
@@ -0,0 +1,161 @@
+"""
+Per-check execution profiling for the ReportBuilder.
+
+While the report is built, every check module is timed and the work it
+causes is attributed to it:
+
+- wall time of the module (including any incremental-mode fingerprint),
+- database round trips, i.e. calls to the connector's execute_query(),
+- rows returned (the length of list results of return_raw calls),
+- bytes of its structured findings as written to the findings file
+  (`FindingsWriter.encode_entry()`; 0 when findings are not streamed),
+- SSH commands issued through SSHConnectionManager.
+
+Attribution is per thread, so it stays correct when checks run in parallel.
+The result is stored as the `execution_profile` block of the structured
+findings and can be rendered as an AsciiDoc appendix.
+"""
+
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+# Top-level findings key holding the profile
+FINDINGS_KEY = 'execution_profile'
+
+PROFILE_COUNTERS = ('queries', 'rows', 'bytes', 'ssh_commands')
+
+
+def _ssh_manager_class():
+    """SSHConnectionManager, or None when the plugin helpers cannot be imported."""
+    try:
+        from plugins.common.ssh_handler import SSHConnectionManager
+    except Exception:
+        return None
+    return SSHConnectionManager
+
+
+def _result_rows(result):
+    """Rows in an execute_query() result; only raw list results can be counted."""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], list):
+        return len(result[1])
+    return 0
+
+
+class ExecutionProfiler:
+    """Collects per-module timings and counters during ReportBuilder.build().
+
+    Usage:
+        profiler.start(connector)
+        with profiler.profile_module('module_key') as profile:
+            ...
+        profiler.stop()
+        findings['execution_profile'] = profiler.to_dict()
+    """
+
+    def __init__(self):
+        self.modules = {}
+        self.connectors = []
+        self.wall_time_seconds = 0.0
+        self.parallel_workers = 1
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_at = None
+
+    def start(self, connector):
+        """Starts profiling and instruments the primary connector."""
+        self._started_at = time.perf_counter()
+        self.instrument(connector)
+        ssh_manager_class = _ssh_manager_class()
+        if ssh_manager_class is not None:
+            ssh_manager_class.command_observers.append(self._record_ssh_command)
+
+    def stop(self):
+        """Stops profiling and restores every instrumented connector."""
+        if self._started_at is not None:
+            self.wall_time_seconds = round(time.perf_counter() - self._started_at, 4)
+        for connector in self.connectors:
+            connector.__dict__.pop('execute_query', None)
+        self.connectors = []
+        ssh_manager_class = _ssh_manager_class()
+        if ssh_manager_class is not None and self._record_ssh_command in ssh_manager_class.command_observers:
+            ssh_manager_class.command_observers.remove(self._record_ssh_command)
+
+    def instrument(self, connector):
+        """Counts the execute_query() calls of a connector (primary or worker).
+
+        The wrapper is set on the instance and always wraps the class method
+        bound to this connector, so worker connectors copied from an already
+        instrumented primary still query through their own connection.
+        """
+        if not hasattr(type(connector), 'execute_query'):
+            return
+        execute_query = types.MethodType(type(connector).execute_query, connector)
+
+        def profiled_execute_query(*args, **kwargs):
+            profile = self._current()
+            result = execute_query(*args, **kwargs)
+            if profile is not None:
+                profile['queries'] += 1
+                profile['rows'] += _result_rows(result)
+            return result
+
+        connector.execute_query = profiled_execute_query
+        with self._lock:
+            self.connectors.append(connector)
+
+    def _current(self):
+        return getattr(self._local, 'profile', None)
+
+    def _record_ssh_command(self, host, command):
+        profile = self._current()
+        if profile is not None:
+            profile['ssh_commands'] += 1
+
+    @contextmanager
+    def profile_module(self, key):
+        """Attributes everything the current thread does to `key` until the block exits."""
+        profile = {'wall_time_seconds': 0.0, 'queries': 0, 'rows': 0, 'bytes': 0, 'ssh_commands': 0}
+        self._local.profile = profile
+        start = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            profile['wall_time_seconds'] = round(time.perf_counter() - start, 4)
+            self._local.profile = None
+            with self._lock:
+                self.modules[key] = profile
+
+    def totals(self):
+        totals = {counter: sum(profile[counter] for profile in self.modules.values()) for counter in PROFILE_COUNTERS}
+        totals['module_wall_time_seconds'] = round(sum(p['wall_time_seconds'] for p in self.modules.values()), 4)
+        return totals
+
+    def to_dict(self):
+        """The `execution_profile` findings block."""
+        return {
+            'wall_time_seconds': self.wall_time_seconds,
+            'parallel_workers': self.parallel_workers,
+            'totals': self.totals(),
+            'modules': self.modules,
+        }
+
+    def to_adoc(self):
+        """An AsciiDoc appendix listing the modules, slowest first."""
+        totals = self.totals()
+        lines = [
+            "== Appendix: Check Execution Profile",
+            f"Report built in {self.wall_time_seconds:.2f}s with {self.parallel_workers} worker(s); "
+            f"{len(self.modules)} check modules issued {totals['queries']} queries and "
+            f"{totals['ssh_commands']} SSH commands.\n",
+            '[cols="4,1,1,1,1,1",options="header"]',
+            "|===",
+            "|Module |Wall Time (s) |Queries |Rows |Bytes |SSH Commands",
+        ]
+        for key, profile in sorted(self.modules.items(), key=lambda item: item[1]['wall_time_seconds'], reverse=True):
+            reused = " (reused)" if profile.get('reused') else ""
+            lines.append(f"|{key}{reused} |{profile['wall_time_seconds']:.3f} |{profile['queries']} |{profile['rows']} "
+                         f"|{profile['bytes']} |{profile['ssh_commands']}")
+        lines.append("|===")
+        return "\n".join(lines)
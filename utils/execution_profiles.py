@@ -0,0 +1,68 @@
+"""
+Storage of the per-check execution profile of a run.
+
+The ReportBuilder adds an `execution_profile` block to the structured
+findings (see utils/execution_profiler.py); its modules are stored one row
+each in health_check_execution_profiles. Shared by the trend shipper
+(output_handlers/trend_shipper.py) and the trends_app submission API
+(trends_app/database_inserter.py).
+"""
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+EXECUTION_PROFILE_COLUMNS = (
+    'run_id', 'module_name', 'wall_time_seconds', 'query_count',
+    'rows_returned', 'bytes_serialized', 'ssh_commands', 'reused',
+)
+
+INSERT_SQL = f"INSERT INTO health_check_execution_profiles ({', '.join(EXECUTION_PROFILE_COLUMNS)}) VALUES %s"
+
+
+def execution_profile_rows(run_id, findings):
+    """Builds one row per check module from the `execution_profile` block.
+
+    Args:
+        run_id (int): The ID of the health check run.
+        findings (dict): The structured findings of the run.
+
+    Returns:
+        list[tuple]: Rows in EXECUTION_PROFILE_COLUMNS order.
+    """
+    modules = (findings.get('execution_profile') or {}).get('modules') or {}
+    return [
+        (run_id, module_name, profile.get('wall_time_seconds', 0), profile.get('queries', 0),
+         profile.get('rows', 0), profile.get('bytes', 0), profile.get('ssh_commands', 0),
+         bool(profile.get('reused', False)))
+        for module_name, profile in modules.items()
+    ]
+
+
+def insert_execution_profile(cursor, run_id, findings, warn=print):
+    """Stores the execution profile of a run.
+
+    A savepoint keeps the caller's transaction usable when the
+    health_check_execution_profiles table has not been created yet.
+
+    Args:
+        cursor: psycopg2 cursor inside the caller's transaction.
+        run_id (int): The ID of the health check run.
+        findings (dict): The structured findings of the run.
+        warn (callable, optional): Receives a message if the profile cannot be stored.
+
+    Returns:
+        int: Number of module profiles stored.
+    """
+    rows = execution_profile_rows(run_id, findings)
+    if not rows:
+        return 0
+
+    cursor.execute("SAVEPOINT execution_profile")
+    try:
+        execute_values(cursor, INSERT_SQL, rows)
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT execution_profile")
+        warn(f"Failed to store the execution profile for run {run_id}: {e}")
+        return 0
+    cursor.execute("RELEASE SAVEPOINT execution_profile")
+    return len(rows)
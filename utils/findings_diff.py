@@ -0,0 +1,306 @@
+"""
+Structural diff of the findings of two health check runs.
+
+The run comparison page used to hand both runs' full findings to
+DeepDiff(ignore_order=True), which hashes and pairs every item of every
+list against every other: seconds of CPU per pair for large clusters,
+spent mostly on modules that did not change at all. This diff is built for
+the shape of findings instead:
+
+- Each top-level check (module) is hashed first; modules whose content hash
+  is unchanged are skipped without being walked.
+- Lists of rows are matched by the rows' natural identity, e.g.
+  (schemaname, relname) or (topic, partition), in one linear pass. The keys
+  are declared per check in NATURAL_KEYS, with DEFAULT_KEYS tried for every
+  list; a key is used only if every row has it and it is unique on both
+  sides. Other lists are compared as multisets of rows.
+- FindingsDiffCache keeps the module hashes per run and the result of each
+  pair of runs, since a stored run never changes. The result is what the
+  caller's `summarize` makes of the changes (by default the changes
+  themselves, which reference the compared rows), and the cache is bounded
+  by the approximate size of these results as well as by pair count.
+"""
+
+import hashlib
+import json
+import threading
+from collections import Counter, OrderedDict, namedtuple
+
+# Change kinds
+VALUE_CHANGED = 'values_changed'
+ITEM_ADDED = 'item_added'
+ITEM_REMOVED = 'item_removed'
+
+Change = namedtuple('Change', ['kind', 'path', 'old', 'new'])
+
+# Natural keys of the rows of the lists of a check, tried in order before DEFAULT_KEYS
+NATURAL_KEYS = {
+    'check_comprehensive_query_analysis': (('queryid',), ('query',)),
+    'check_table_bloat': (('schemaname', 'tablename'), ('schemaname', 'relname'), ('table_name',)),
+    'check_missing_indexes': (('schemaname', 'relname'), ('schemaname', 'tablename'), ('table_name',)),
+    'check_replication_status': (('application_name', 'client_addr'), ('client_addr',)),
+    'check_long_running_transactions': (('pid',),),
+    'check_topic_configuration': (('topic',),),
+    'check_partition_balance': (('broker_id',), ('broker',)),
+    'check_gc_pauses': (('broker_id',), ('broker',)),
+    'check_compaction_strategy': (('keyspace', 'table'), ('keyspace_name', 'table_name')),
+    'check_slow_queries': (('index', 'query'),),
+}
+
+# Natural keys tried for the lists of every check
+DEFAULT_KEYS = (
+    ('schemaname', 'relname'),
+    ('schemaname', 'tablename'),
+    ('schemaname', 'indexrelname'),
+    ('schema_name', 'table_name'),
+    ('schema_name', 'function_name'),
+    ('keyspace_name', 'table_name'),
+    ('topic', 'partition'),
+    ('index_name',),
+    ('indexrelname',),
+    ('schemarelname',),
+    ('foreign_key_name',),
+    ('table_name',),
+    ('queryid',),
+    ('query',),
+    ('name',),
+    ('datname',),
+    ('rolname',),
+    ('extname',),
+    ('topic',),
+    ('node_id',),
+    ('host',),
+)
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def content_hash(value):
+    """A hash of a JSON value that does not depend on the order of its keys."""
+    return hashlib.sha1(_canonical(value).encode('utf-8')).hexdigest()
+
+
+def module_hashes(findings):
+    """check -> content hash, for every top-level check of a run's findings."""
+    return {check: content_hash(value) for check, value in findings.items()}
+
+
+def _same(old, new):
+    # 1 == 1.0 == True in Python, but not in the findings
+    return type(old) is type(new) and old == new
+
+
+def _row_key(candidates, old_rows, new_rows):
+    """The first candidate key that identifies each row on both sides, or None."""
+    for fields in candidates:
+        usable = True
+        for rows in (old_rows, new_rows):
+            seen = set()
+            for row in rows:
+                if not isinstance(row, dict) or any(field not in row for field in fields):
+                    usable = False
+                    break
+                try:
+                    value = tuple(row[field] for field in fields)
+                    hash(value)
+                except TypeError:
+                    usable = False
+                    break
+                if value in seen:
+                    usable = False
+                    break
+                seen.add(value)
+            if not usable:
+                break
+        if usable:
+            return fields
+    return None
+
+
+def _key_label(fields, row):
+    return ', '.join(f"{field}={row[field]}" for field in fields)
+
+
+class _Differ:
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.changes = []
+
+    def diff(self, old, new, path):
+        if isinstance(old, dict) and isinstance(new, dict):
+            self._diff_dicts(old, new, path)
+        elif isinstance(old, list) and isinstance(new, list):
+            self._diff_lists(old, new, path)
+        elif not _same(old, new):
+            self.changes.append(Change(VALUE_CHANGED, path, old, new))
+
+    def _diff_dicts(self, old, new, path):
+        for key, old_value in old.items():
+            if key not in new:
+                self.changes.append(Change(ITEM_REMOVED, path + (key,), old_value, None))
+            elif not _same(old_value, new[key]):
+                self.diff(old_value, new[key], path + (key,))
+        for key, new_value in new.items():
+            if key not in old:
+                self.changes.append(Change(ITEM_ADDED, path + (key,), None, new_value))
+
+    def _diff_lists(self, old, new, path):
+        if old == new:
+            return
+        fields = _row_key(self.candidates, old, new) if old and new else None
+        if fields is None:
+            self._diff_multisets(old, new, path)
+            return
+        new_rows = {tuple(row[field] for field in fields): row for row in new}
+        for row in old:
+            key = tuple(row[field] for field in fields)
+            match = new_rows.pop(key, None)
+            if match is None:
+                self.changes.append(Change(ITEM_REMOVED, path + (_key_label(fields, row),), row, None))
+            elif not _same(row, match):
+                self.diff(row, match, path + (_key_label(fields, row),))
+        for row in new_rows.values():
+            self.changes.append(Change(ITEM_ADDED, path + (_key_label(fields, row),), None, row))
+
+    def _diff_multisets(self, old, new, path):
+        unmatched = Counter(_canonical(item) for item in new)
+        for item in old:
+            encoded = _canonical(item)
+            if unmatched[encoded] > 0:
+                unmatched[encoded] -= 1
+            else:
+                self.changes.append(Change(ITEM_REMOVED, path, item, None))
+        for item in new:
+            encoded = _canonical(item)
+            if unmatched[encoded] > 0:
+                unmatched[encoded] -= 1
+                self.changes.append(Change(ITEM_ADDED, path, None, item))
+
+
+def diff_findings(old, new, old_hashes=None, new_hashes=None, natural_keys=None):
+    """The changes from the findings of one run to those of a later run.
+
+    Args:
+        old (dict): Findings of the earlier run.
+        new (dict): Findings of the later run.
+        old_hashes (dict, optional): module_hashes(old), if already known.
+        new_hashes (dict, optional): module_hashes(new), if already known.
+        natural_keys (dict, optional): check -> candidate row keys; defaults to NATURAL_KEYS.
+
+    Returns:
+        list[Change]: In the order of the checks. Change.path is a tuple whose
+        first element is the check; rows matched by their natural key appear
+        in it as 'field=value, ...'.
+    """
+    natural_keys = NATURAL_KEYS if natural_keys is None else natural_keys
+    old_hashes = module_hashes(old) if old_hashes is None else old_hashes
+    new_hashes = module_hashes(new) if new_hashes is None else new_hashes
+    changes = []
+    for check in list(old) + [check for check in new if check not in old]:
+        if check not in new:
+            changes.append(Change(ITEM_REMOVED, (check,), old[check], None))
+        elif check not in old:
+            changes.append(Change(ITEM_ADDED, (check,), None, new[check]))
+        elif old_hashes.get(check) != new_hashes.get(check):
+            differ = _Differ(tuple(natural_keys.get(check, ())) + DEFAULT_KEYS)
+            differ.diff(old[check], new[check], (check,))
+            changes.extend(differ.changes)
+    return changes
+
+
+def format_change_path(path):
+    """'check[data][table_sizes][schemaname=public, relname=orders][size]'"""
+    return str(path[0]) + ''.join(f"[{element}]" for element in path[1:])
+
+
+class FindingsDiffCache:
+    """Thread-safe LRU caches of module hashes per run and of diff results per pair of runs.
+
+    Results are bounded by count and by their approximate size as JSON; a
+    result larger than the whole cache is returned without being kept.
+    """
+
+    def __init__(self, max_pairs=256, max_bytes=64 * 1024 * 1024, summarize=None):
+        """Initializes the cache.
+
+        Args:
+            max_pairs (int, optional): Pairs of runs whose results are kept.
+            max_bytes (int, optional): Approximate total size of the kept results.
+            summarize (callable, optional): Turns a list of changes into the
+                result to return and cache, e.g. rendered summaries, so the
+                cache does not keep the compared rows alive.
+        """
+        self.max_pairs = max_pairs
+        self.max_bytes = max_bytes
+        self.summarize = summarize
+        self._pairs = OrderedDict()  # (old_run_id, new_run_id) -> (result, size), most recently used last
+        self._pair_bytes = 0
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _put(self, cache, key, value, limit):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > limit:
+                cache.popitem(last=False)
+
+    def _put_pair(self, key, result):
+        size = len(_canonical(result))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._pairs.pop(key, None)
+            if previous is not None:
+                self._pair_bytes -= previous[1]
+            self._pairs[key] = (result, size)
+            self._pair_bytes += size
+            while len(self._pairs) > self.max_pairs or self._pair_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._pairs.popitem(last=False)
+                self._pair_bytes -= evicted_size
+
+    def _module_hashes(self, run_id, findings):
+        hashes = self._get(self._hashes, run_id)
+        if hashes is None:
+            hashes = module_hashes(findings)
+            self._put(self._hashes, run_id, hashes, 2 * self.max_pairs)
+        return hashes
+
+    def _result(self, changes):
+        return changes if self.summarize is None else self.summarize(changes)
+
+    def diff(self, old_run_id, old, new_run_id, new):
+        """summarize(diff_findings(old, new)) for two stored runs, computed once per pair.
+
+        Findings that may not be final (e.g. a failed decryption) must not be
+        passed with a run ID: with a run ID of None nothing is cached.
+        """
+        if old_run_id is None or new_run_id is None:
+            return self._result(diff_findings(old, new))
+        key = (old_run_id, new_run_id)
+        entry = self._get(self._pairs, key)
+        if entry is not None:
+            return entry[0]
+        result = self._result(diff_findings(old, new, self._module_hashes(old_run_id, old),
+                                            self._module_hashes(new_run_id, new)))
+        self._put_pair(key, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._pairs.clear()
+            self._pair_bytes = 0
+            self._hashes.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'pairs': len(self._pairs), 'bytes': self._pair_bytes}
@@ -0,0 +1,274 @@
+"""
+Streaming reader and writer for structured_health_check_findings.json.
+
+The findings file is a JSON object whose top-level entries (check modules and
+metadata blocks) each start on their own line. `FindingsWriter` appends an
+entry as soon as a check module produces it, so the whole document is never
+built in memory; `FindingsReader` indexes the entries in one pass and only
+parses the ones that are accessed.
+
+Settings:
+
+    findings_compression: gzip   # none (default), gzip or zstd
+    findings_compact: false      # true writes each entry on one line instead of indent=2
+
+Compressed files get a .gz or .zst suffix. zstd needs the optional
+`zstandard` package; without it gzip is used. Files written by
+`json.dump(..., indent=2)` (earlier releases) have the same line layout and
+are read lazily as well; any other valid JSON file is simply loaded in full.
+"""
+
+import gzip
+import io
+import json
+import os
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+from utils.json_utils import dumps_bytes
+
+FINDINGS_FILENAME = 'structured_health_check_findings.json'
+
+COMPRESSION_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def resolve_compression(settings):
+    """The compression to use for the findings file, from the settings."""
+    compression = str(settings.get('findings_compression') or 'none').lower()
+    if compression not in COMPRESSION_SUFFIXES:
+        print(f"⚠️ Warning: Unknown findings_compression '{compression}'. Writing uncompressed findings.")
+        return 'none'
+    if compression == 'zstd' and zstandard is None:
+        print("⚠️ Warning: findings_compression 'zstd' needs the zstandard package. Using gzip instead.")
+        return 'gzip'
+    return compression
+
+
+def findings_path(output_dir, compression='none'):
+    """The findings file path in an output directory for a compression."""
+    return Path(output_dir) / (FINDINGS_FILENAME + COMPRESSION_SUFFIXES[compression])
+
+
+def find_findings_file(output_dir):
+    """The most recently written findings file in an output directory, or None."""
+    candidates = [findings_path(output_dir, compression) for compression in COMPRESSION_SUFFIXES]
+    existing = [path for path in candidates if path.is_file()]
+    return max(existing, key=lambda path: path.stat().st_mtime) if existing else None
+
+
+def _open_read(path):
+    """Opens a findings file for binary reading, detecting its compression."""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(path, 'rb'), True
+    if magic.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; install the zstandard package to read it")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.BufferedReader(reader), True
+    return open(path, 'rb'), False
+
+
+class FindingsWriter:
+    """Writes findings entries to disk as they are produced.
+
+    The file is written under a temporary name and renamed into place by
+    `close()`, so an interrupted run never leaves a truncated findings file
+    behind. `write_entry()` is thread-safe and may be called from the
+    ReportBuilder's parallel workers.
+
+    `write_missing()` appends the entries not written yet and those replaced
+    by another object since. An entry changed in place after it was written
+    must be marked with `touch()` to be written again.
+    """
+
+    def __init__(self, path, compact=False):
+        """Opens the writer.
+
+        Args:
+            path (str | Path): The final file path; a .gz or .zst suffix
+                selects compression.
+            compact (bool, optional): Write each entry on one line instead
+                of indenting it.
+        """
+        self.path = Path(path)
+        self.compact = compact
+        self.written = {}  # key -> the value object written, to detect replaced entries
+        self._touched = set()  # Keys changed in place since they were written
+        self._lock = threading.Lock()
+        self._tmp_path = self.path.with_name(self.path.name + '.partial')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        raw = open(self._tmp_path, 'wb')
+        if self.path.suffix == '.gz':
+            self._file = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+        elif self.path.suffix == '.zst':
+            self._file = zstandard.ZstdCompressor().stream_writer(raw)
+        else:
+            self._file = raw
+        self._raw = raw
+        self._file.write(b'{')
+
+    def encode_entry(self, key, value):
+        """The bytes `write_entry()` writes for an entry, before compression."""
+        encoded_key = json.dumps(str(key)).encode('utf-8')
+        if self.compact:
+            return encoded_key + b': ' + dumps_bytes(value)
+        # Same layout as json.dump(findings, indent=2)
+        body = dumps_bytes(value, indent=True).replace(b'\n', b'\n  ')
+        return b'  ' + encoded_key + b': ' + body
+
+    def write_entry(self, key, value, entry=None):
+        """Appends one top-level entry (a key written again replaces the earlier one on read).
+
+        Args:
+            key (str): The top-level key.
+            value: The entry's value.
+            entry (bytes, optional): The value already encoded by `encode_entry()`.
+
+        Returns:
+            int: Size of the encoded entry in bytes, before compression.
+        """
+        if entry is None:
+            entry = self.encode_entry(key, value)  # Encoded outside the lock
+        with self._lock:
+            self._file.write(b',\n' if self.written else b'\n')
+            self._file.write(entry)
+            # The reference keeps the object alive, so its identity cannot be reused by another value
+            self.written[key] = value
+            self._touched.discard(key)
+        return len(entry)
+
+    def touch(self, key):
+        """Marks an entry as changed in place, so `write_missing()` writes it again."""
+        with self._lock:
+            self._touched.add(key)
+
+    def write_missing(self, findings):
+        """Writes the entries of `findings` that were not written yet, were replaced or were touched since."""
+        for key, value in findings.items():
+            if key not in self.written or self.written[key] is not value or key in self._touched:
+                self.write_entry(key, value)
+
+    def close(self):
+        """Finishes the document and moves it into place."""
+        with self._lock:
+            self._file.write(b'\n}\n')
+            self._file.close()
+            if self._raw is not self._file and not self._raw.closed:
+                self._raw.close()
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discards a partially written file."""
+        try:
+            self._file.close()
+            if not self._raw.closed:
+                self._raw.close()
+        finally:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+class FindingsReader(Mapping):
+    """A read-only mapping over a findings file that parses entries on access.
+
+    Opening the reader scans the file once to index its top-level entries;
+    each entry is parsed the first time it is read and then cached.
+    Uncompressed files are indexed by offset, so unread entries are never
+    held in memory; for compressed files the raw bytes of each entry are kept.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._index = {}   # key -> (offset, length) or raw bytes
+        self._parsed = {}
+        self._seekable = True
+        self._build_index()
+
+    @staticmethod
+    def _entry_key(line):
+        """The key of a line that starts a top-level entry, or None."""
+        stripped = line[2:] if line.startswith(b'  "') else line
+        if not stripped.startswith(b'"'):
+            return None
+        # The key is the first JSON string on the line
+        return json.JSONDecoder().raw_decode(stripped.decode('utf-8'))[0]
+
+    def _build_index(self):
+        f, compressed = _open_read(self.path)
+        self._seekable = not compressed
+        with f:
+            first = f.readline()
+            if first.strip() != b'{':
+                # Not line-per-entry (e.g. a single-line document): load it in full
+                rest = f.read()
+                self._parsed = json.loads(first + rest)
+                self._index = {key: None for key in self._parsed}
+                return
+
+            offset = len(first)
+            current_key, start, chunks = None, 0, []
+
+            def finish(end):
+                if current_key is None:
+                    return
+                self._parsed.pop(current_key, None)  # A later duplicate replaces the earlier entry
+                self._index.pop(current_key, None)
+                self._index[current_key] = (start, end - start) if self._seekable else b''.join(chunks)
+
+            for line in f:
+                key = self._entry_key(line)
+                if key is not None or line.rstrip(b'\r\n') == b'}':  # The document's closing brace is unindented
+                    finish(offset)
+                    current_key, start, chunks = key, offset, []
+                if current_key is not None and not self._seekable:
+                    chunks.append(line)
+                offset += len(line)
+            finish(offset)
+
+    def _read_raw(self, key):
+        location = self._index[key]
+        if not self._seekable:
+            return location
+        offset, length = location
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def __getitem__(self, key):
+        if key not in self._parsed:
+            if key not in self._index:
+                raise KeyError(key)
+            raw = self._read_raw(key).strip()
+            if raw.endswith(b','):
+                raw = raw[:-1]
+            self._parsed[key] = json.loads(b'{' + raw + b'}')[key]
+        return self._parsed[key]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def to_dict(self, exclude=()):
+        """Parses every entry except `exclude` into a plain dict."""
+        return {key: self[key] for key in self._index if key not in exclude}
+
+
+def load_findings(path):
+    """Loads a whole findings file (any layout or compression) into a dict."""
+    return FindingsReader(path).to_dict()
@@ -0,0 +1,184 @@
+"""
+Incremental re-run support for the ReportBuilder.
+
+With `main.py --incremental`, a check module whose fingerprint is unchanged
+since the previous run is not executed again; its previous AsciiDoc and
+structured results are reused and clearly marked as such.
+
+A check module opts in by defining
+
+    def get_fingerprint(connector, settings):
+        return <cheap, JSON-serializable value>
+
+e.g. the pg_stat_statements reset/deallocation state or the Kafka cluster
+metadata. Returning None (or raising) means the module always runs. The
+stored fingerprint also covers the module's source, the tool version and the
+settings, so code or configuration changes always force a re-run, and
+results older than `incremental_max_age_hours` are never reused.
+
+Previous structured results are read lazily from
+structured_health_check_findings.json (or its compressed variant), so only
+reused modules are parsed; the per-module AsciiDoc and fingerprints are kept
+next to it in incremental_cache.json.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from utils.findings_stream import FINDINGS_FILENAME, FindingsReader, find_findings_file
+
+CACHE_FILENAME = 'incremental_cache.json'
+DEFAULT_MAX_AGE_HOURS = 24
+
+# Top-level findings key describing what an incremental run reused
+FINDINGS_KEY = 'incremental_run'
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class IncrementalCache:
+    """Previous per-module results and the fingerprints of the current run.
+
+    Lookups and records are thread-safe, so the cache can be shared by the
+    ReportBuilder's parallel workers.
+    """
+
+    def __init__(self, settings, app_version, previous_findings=None, previous_modules=None, now=None):
+        """Initializes the cache.
+
+        Args:
+            settings (dict): The main application settings.
+            app_version (str): The current version of the application.
+            previous_findings (Mapping, optional): The previous run's structured findings.
+            previous_modules (dict, optional): The previous run's cache entries,
+                keyed by findings key.
+            now (datetime, optional): The current time (UTC); used by tests.
+        """
+        self.app_version = app_version
+        self.previous_findings = previous_findings or {}
+        self.previous_modules = previous_modules or {}
+        self.now = now or datetime.now(timezone.utc)
+        self.max_age = timedelta(hours=float(settings.get('incremental_max_age_hours', DEFAULT_MAX_AGE_HOURS)))
+        self.settings_digest = _digest(settings)
+        self.modules = {}
+        self.reused = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, output_dir, settings, app_version):
+        """Loads the previous run's results from an output directory.
+
+        Missing or unreadable files yield an empty cache, in which case every
+        module runs and the cache is seeded for the next run.
+        """
+        output_dir = Path(output_dir)
+        previous_findings, previous_modules = {}, {}
+        try:
+            findings_file = find_findings_file(output_dir)
+            if findings_file is None:
+                raise FileNotFoundError(output_dir / FINDINGS_FILENAME)
+            previous_findings = FindingsReader(findings_file)
+            with open(output_dir / CACHE_FILENAME, 'r') as f:
+                previous_modules = json.load(f).get('modules', {})
+        except FileNotFoundError:
+            print("ℹ️  No previous incremental results found; running all checks.")
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"⚠️ Warning: Could not read previous results ({e}); running all checks.")
+            previous_findings, previous_modules = {}, {}
+        return cls(settings, app_version, previous_findings, previous_modules)
+
+    def fingerprint(self, module_name, function_name, connector, settings):
+        """Computes the current fingerprint of a check module.
+
+        Returns:
+            str | None: A digest of the module's declared fingerprint, its
+            source, the tool version and the settings, or None when the module
+            declares no fingerprint or it could not be computed.
+        """
+        try:
+            module = importlib.import_module(module_name)
+        except Exception:
+            return None  # Reported when the module is executed
+        if not hasattr(module, 'get_fingerprint'):
+            return None
+        try:
+            value = module.get_fingerprint(connector, settings)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not compute the fingerprint of '{module_name}' ({e}); running it.")
+            return None
+        if value is None:
+            return None
+        try:
+            source_digest = hashlib.sha256(inspect.getsource(module).encode('utf-8')).hexdigest()
+        except (OSError, TypeError):
+            source_digest = None
+        return _digest([value, function_name, source_digest, self.app_version, self.settings_digest])
+
+    def lookup(self, key, fingerprint):
+        """Returns `(adoc_content, structured_data, collected_at)` for a reusable module, else None."""
+        if fingerprint is None:
+            return None
+        entry = self.previous_modules.get(key)
+        if not entry or entry.get('fingerprint') != fingerprint or key not in self.previous_findings:
+            return None
+        try:
+            collected_at = datetime.fromisoformat(entry['collected_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if self.now - collected_at > self.max_age:
+            return None
+        return entry.get('adoc', ''), self.previous_findings[key], entry['collected_at']
+
+    def record(self, key, fingerprint, adoc_content, collected_at=None):
+        """Records a module result of this run so the next run can reuse it.
+
+        Args:
+            collected_at (str, optional): When the result was collected; set
+                for reused results so their age keeps counting from the
+                original run.
+        """
+        if fingerprint is None:
+            return
+        with self._lock:
+            self.modules[key] = {
+                'fingerprint': fingerprint,
+                'adoc': adoc_content,
+                'collected_at': collected_at or self.now.isoformat(),
+            }
+            if collected_at:
+                self.reused[key] = collected_at
+
+    def summary(self):
+        """The findings block that marks the modules reused by this run."""
+        return {
+            'reused_modules': {key: {'collected_at': self.reused[key]} for key in sorted(self.reused)},
+            'max_age_hours': self.max_age.total_seconds() / 3600,
+        }
+
+    def save(self, output_dir):
+        """Writes this run's cache entries next to the structured findings."""
+        output_path = Path(output_dir) / CACHE_FILENAME
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w') as f:
+            json.dump({'tool_version': self.app_version, 'modules': self.modules}, f, indent=2)
+
+
+def mark_reused(adoc_content, collected_at):
+    """Adds a note under the module's heading saying its results were reused."""
+    note = (
+        "[NOTE]\n====\n"
+        f"Results reused from the run at {collected_at}: this check's fingerprint has not changed, "
+        "so it was not re-executed (incremental mode).\n"
+        "====\n"
+    )
+    heading, separator, body = adoc_content.partition('\n')
+    if heading.startswith('='):
+        return f"{heading}\n{note}{body}" if separator else f"{heading}\n{note}"
+    return f"{note}\n{adoc_content}"
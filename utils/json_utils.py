@@ -5,12 +5,123 @@ Centralized JSON serialization utilities.
 This module provides technology-agnostic JSON encoding and conversion utilities
 that work with objects from any database technology (Cassandra, PostgreSQL, 
 MongoDB, ClickHouse, etc.) without requiring technology-specific code.
+
+Conversion is dispatched on the exact type of each value through a table
+(`_CONVERTERS`). The first value of an unknown type (a Cassandra
+OrderedMapSerializedKey, a UUID, ...) is resolved with the duck-typing rules
+below, and the resulting converter is cached for that type, so millions of
+values never go through the isinstance/hasattr chain. When the optional
+`orjson` package is installed, `dumps_bytes()` uses it for encoding.
 """
 
 import json
 from decimal import Decimal
 from datetime import datetime, timedelta
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+# Values of these exact types are already JSON-serializable
+_PRIMITIVE_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def _identity(obj):
+    return obj
+
+
+def _decode_bytes(obj):
+    try:
+        return obj.decode('utf-8')
+    except UnicodeDecodeError:
+        return str(obj)
+
+
+def _convert_mapping(obj):
+    return {k: v if type(v) in _PRIMITIVE_TYPES else convert_to_json_serializable(v) for k, v in obj.items()}
+
+
+def _convert_iterable(obj):
+    return [item if type(item) in _PRIMITIVE_TYPES else convert_to_json_serializable(item) for item in obj]
+
+
+def _to_string(obj):
+    try:
+        return str(obj)
+    except Exception:
+        return repr(obj)
+
+
+# Exact type -> converter. Extended at runtime with the converters resolved
+# for other types by _resolve_converter().
+_CONVERTERS = {
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+    dict: _convert_mapping,
+    list: _convert_iterable,
+    tuple: _convert_iterable,
+    set: _convert_iterable,
+    frozenset: _convert_iterable,
+    Decimal: float,
+    datetime: datetime.isoformat,
+    timedelta: timedelta.total_seconds,
+    bytes: _decode_bytes,
+}
+
+
+def _resolve_converter(obj):
+    """
+    Find the converter for a value whose type is not in the dispatch table.
+
+    Subclasses of known types use their base type's converter; other
+    mapping-like objects (dict-like but not dict) are converted to dicts,
+    other iterables to lists, and anything else to its string form. The
+    converter is cached for the type once it has worked for a value.
+    """
+    obj_type = type(obj)
+    for base in obj_type.__mro__[1:]:
+        if base in _CONVERTERS and base is not object:
+            converter = _CONVERTERS[base]
+            break
+    else:
+        converter = None
+        # This catches Cassandra OrderedMap, MongoDB SON, etc.
+        if hasattr(obj, 'items') and callable(getattr(obj, 'items')):
+            converter = _convert_mapping
+        elif hasattr(obj, '__iter__'):
+            converter = _convert_iterable
+
+    if converter is not None:
+        try:
+            result = converter(obj)
+        except Exception:
+            return _to_string(obj)  # Not cached: another value of this type may convert
+        _CONVERTERS[obj_type] = converter
+        return result
+
+    # Last resort: convert to string
+    # This catches any custom database objects from any technology
+    _CONVERTERS[obj_type] = _to_string
+    return _to_string(obj)
+
+
+def register_converter(obj_type, converter):
+    """
+    Register how values of a type are converted to JSON-compatible values.
+
+    Args:
+        obj_type (type): The exact type to handle
+        converter (callable): Called with the value; must return a
+            JSON-serializable value
+    """
+    _CONVERTERS[obj_type] = converter
+
 
 class UniversalJSONEncoder(json.JSONEncoder):
     """
@@ -28,65 +139,19 @@ class UniversalJSONEncoder(json.JSONEncoder):
         """
         Convert non-JSON-serializable objects to JSON-compatible formats.
         
-        This method handles common Python types and database-specific types
-        in a technology-agnostic way using duck typing and introspection.
+        The conversion is looked up in the type dispatch table; see
+        convert_to_json_serializable().
         
         Args:
             obj: The object to serialize
             
         Returns:
             JSON-serializable representation of the object
-            
-        Raises:
-            TypeError: If the object cannot be serialized (rare due to fallbacks)
         """
-        # Handle None explicitly
-        if obj is None:
-            return None
-        
-        # Handle standard Python numeric/time types
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, timedelta):
-            return obj.total_seconds()
-        
-        # Handle bytes
-        if isinstance(obj, bytes):
-            try:
-                return obj.decode('utf-8')
-            except:
-                return str(obj)
-        
-        # Handle any mapping-like objects (dict-like but not dict)
-        # This catches Cassandra OrderedMap, MongoDB SON, etc.
-        if hasattr(obj, 'items') and callable(getattr(obj, 'items')):
-            try:
-                return {k: self.default(v) if not isinstance(v, (str, int, float, bool, type(None))) 
-                        else v for k, v in obj.items()}
-            except:
-                pass
-        
-        # Handle any iterable objects (list-like but not list/str/bytes/dict)
-        if hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes, dict)):
-            try:
-                return [self.default(item) if not isinstance(item, (str, int, float, bool, type(None))) 
-                        else item for item in obj]
-            except:
-                pass
-        
-        # Handle sets explicitly
-        if isinstance(obj, set):
-            return [self.default(item) if not isinstance(item, (str, int, float, bool, type(None))) 
-                    else item for item in obj]
-        
-        # Last resort: convert to string
-        # This catches any custom database objects from any technology
-        try:
-            return str(obj)
-        except:
-            return repr(obj)
+        converter = _CONVERTERS.get(type(obj))
+        if converter is None:
+            return _resolve_converter(obj)
+        return converter(obj)
 
 
 def convert_to_json_serializable(obj):
@@ -112,58 +177,37 @@ def convert_to_json_serializable(obj):
         clean_data = convert_to_json_serializable(raw_data)
         json_str = json.dumps(clean_data)
     """
-    # Handle None explicitly
-    if obj is None:
-        return None
-    
-    # Handle standard Python types that need conversion
-    if isinstance(obj, Decimal): 
-        return float(obj)
-    if isinstance(obj, datetime): 
-        return obj.isoformat()
-    if isinstance(obj, timedelta): 
-        return obj.total_seconds()
-    
-    # Handle bytes
-    if isinstance(obj, bytes):
-        try:
-            return obj.decode('utf-8')
-        except:
-            return str(obj)
-    
-    # Recursively handle standard collections
-    if isinstance(obj, dict): 
-        return {k: convert_to_json_serializable(v) for k, v in obj.items()}
-    if isinstance(obj, list): 
-        return [convert_to_json_serializable(item) for item in obj]
-    if isinstance(obj, tuple):
-        return [convert_to_json_serializable(item) for item in obj]
-    if isinstance(obj, set):
-        return [convert_to_json_serializable(item) for item in obj]
-    
-    # Handle any mapping-like objects (dict-like but not dict)
-    if hasattr(obj, 'items') and callable(getattr(obj, 'items')):
-        try:
-            return {k: convert_to_json_serializable(v) for k, v in obj.items()}
-        except:
-            pass
-    
-    # Handle any iterable objects (list-like but not list)
-    if hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes)):
+    converter = _CONVERTERS.get(type(obj))
+    if converter is None:
+        return _resolve_converter(obj)
+    return converter(obj)
+
+
+def dumps_bytes(obj, indent=False):
+    """
+    Serialize any object to UTF-8 JSON bytes with the fastest backend.
+
+    Uses orjson when it is installed (falling back to the standard library
+    for values it rejects, such as integers wider than 64 bits), otherwise
+    json.dumps() with UniversalJSONEncoder.
+
+    Args:
+        obj: Any Python object to serialize
+        indent (bool, optional): Indent with two spaces instead of writing
+            compact JSON
+
+    Returns:
+        bytes: JSON with non-ASCII characters unescaped
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
         try:
-            return [convert_to_json_serializable(item) for item in obj]
-        except:
+            return orjson.dumps(obj, default=convert_to_json_serializable, option=option)
+        except (TypeError, orjson.JSONEncodeError):
             pass
-    
-    # Primitive types that are already JSON-serializable
-    if isinstance(obj, (str, int, float, bool)):
-        return obj
-    
-    # Last resort: convert to string
-    try:
-        return str(obj)
-    except:
-        return repr(obj)
+    if indent:
+        return json.dumps(obj, cls=UniversalJSONEncoder, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, cls=UniversalJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
 
 
 def safe_json_dumps(obj, **kwargs):
@@ -208,3 +252,133 @@ def safe_json_loads(json_str):
         json.JSONDecodeError: If the string is not valid JSON
     """
     return json.loads(json_str)
+
+
+class EncodedJSON(bytes):
+    """UTF-8 JSON text that `encode_object()` splices in without re-encoding."""
+
+
+def _encode(value):
+    """Encodes an already normalized value as compact UTF-8 JSON."""
+    return dumps_bytes(value)
+
+
+def encoded_size(value):
+    """The size in bytes of a value's compact JSON encoding."""
+    return len(dumps_bytes(value))
+
+
+def encode_object(items):
+    """
+    Encode a JSON object from (key, value) pairs without re-serializing
+    values that are already encoded.
+
+    `EncodedJSON` values are copied as-is; anything else is serialized with
+    UniversalJSONEncoder. Used to embed pre-encoded findings in larger
+    payloads (e.g., the trend API submission).
+
+    Args:
+        items: Iterable of (key, value) pairs, or a dict
+
+    Returns:
+        EncodedJSON: The encoded object
+    """
+    if isinstance(items, dict):
+        items = items.items()
+    parts = []
+    for key, value in items:
+        if not isinstance(value, EncodedJSON):
+            value = dumps_bytes(value)
+        parts.append(_encode(str(key)) + b':' + value)
+    return EncodedJSON(b'{' + b','.join(parts) + b'}')
+
+
+class SerializedFindings:
+    """
+    A findings dictionary normalized once, with each top-level entry encoded once.
+
+    A single run used to convert and serialize the same findings tree several
+    times: the prompt budgeter, the trend shipper, the API payload and the
+    findings file each made their own full copy. This stage normalizes each
+    top-level entry (check module or metadata block) with
+    convert_to_json_serializable() once, encodes it to compact JSON once on
+    first use, and lets every consumer reuse those buffers.
+
+    Top-level entries are expected to be replaced, not mutated in place:
+    `refresh()` re-normalizes only entries whose value object changed.
+
+    Usage:
+        serialized = SerializedFindings(findings)
+        serialized.size('postgres_overview')   # encoded bytes, cached
+        serialized.dumps()                     # whole document from the buffers
+        serialized.write(f)                    # stream it to a binary file
+    """
+
+    def __init__(self, findings):
+        self._sources = {}
+        self.data = {}
+        self._encoded = {}
+        self.refresh(findings)
+
+    def refresh(self, findings):
+        """
+        Bring the normalized tree up to date with `findings`.
+
+        Entries whose value is the same object as last time keep their
+        normalized form and encoded buffer; new or replaced entries are
+        normalized again, and removed entries are dropped.
+
+        Returns:
+            SerializedFindings: self, for chaining
+        """
+        for key in list(self._sources):
+            if key not in findings:
+                del self._sources[key]
+                del self.data[key]
+                self._encoded.pop(key, None)
+        for key, value in findings.items():
+            if key in self._sources and self._sources[key] is value:
+                continue
+            self._sources[key] = value
+            self.data[key] = convert_to_json_serializable(value)
+            self._encoded.pop(key, None)
+        return self
+
+    def encoded(self, key):
+        """The compact JSON encoding of one top-level entry (cached)."""
+        buffer = self._encoded.get(key)
+        if buffer is None:
+            buffer = self._encoded[key] = EncodedJSON(_encode(self.data[key]))
+        return buffer
+
+    def size(self, key):
+        """The encoded size of one top-level entry, in bytes."""
+        return len(self.encoded(key))
+
+    def keys(self):
+        return self.data.keys()
+
+    def dumps(self, exclude=()):
+        """
+        The whole findings document as compact JSON, assembled from the cached buffers.
+
+        Args:
+            exclude: Top-level keys to leave out
+
+        Returns:
+            EncodedJSON: UTF-8 JSON that can be embedded with encode_object()
+        """
+        return encode_object((key, self.encoded(key)) for key in self.data if key not in exclude)
+
+    def write(self, f):
+        """
+        Write the findings document to a binary file, one top-level entry per line.
+
+        Args:
+            f: A file object opened in binary mode
+        """
+        f.write(b'{')
+        for index, key in enumerate(self.data):
+            f.write(b',\n' if index else b'\n')
+            f.write(_encode(str(key)) + b': ' + self.encoded(key))
+        f.write(b'\n}\n')
@@ -0,0 +1,106 @@
+"""
+Check module weight registry.
+
+Check modules declare their importance for AI token budgeting with a
+module-level `get_weight()` function. Weights are read once per process and
+cached here, for every plugin:
+
+- The ReportBuilder records each check module it imports, so after a run the
+  weights of every executed module are already known.
+- When nothing has been recorded for a plugin (the offline processor, the
+  rules tester), its default report definition is loaded once and its check
+  modules are imported normally. A module that is already imported is never
+  executed again.
+
+    weights = weights_for_plugin(active_plugin)   # {'postgres_overview': 10, ...}
+
+Weights are keyed by the module's short name, like the structured findings.
+"""
+
+import importlib
+import sys
+import threading
+
+_lock = threading.Lock()
+
+# Full module name -> weight, or None when the module defines no get_weight()
+_weights = {}
+
+# Plugin packages whose default report definition has already been loaded
+_loaded_definitions = set()
+
+
+def _read_weight(module):
+    """Calls a module's `get_weight()`, if it has one."""
+    get_weight = getattr(module, 'get_weight', None)
+    if get_weight is None:
+        return None
+    try:
+        return get_weight()
+    except Exception as e:
+        print(f"⚠️ Warning: Could not read weight for module '{module.__name__}'. Error: {e}")
+        return None
+
+
+def record_module(module):
+    """Caches the weight of an imported check module (a no-op if already known)."""
+    if module.__name__ in _weights:
+        return
+    weight = _read_weight(module)
+    with _lock:
+        _weights.setdefault(module.__name__, weight)
+
+
+def record_report_modules(report_sections):
+    """Imports (at most once) and records every check module of a report definition."""
+    for section in report_sections:
+        for action in section.get('actions', []):
+            if action.get('type') != 'module' or action['module'] in _weights:
+                continue
+            module = sys.modules.get(action['module'])
+            if module is None:
+                try:
+                    module = importlib.import_module(action['module'])
+                except Exception as e:
+                    print(f"⚠️ Warning: Could not import module '{action['module']}' to read its weight. Error: {e}")
+                    with _lock:
+                        _weights.setdefault(action['module'], None)
+                    continue
+            record_module(module)
+
+
+def weights_for_package(package):
+    """The known weights of the check modules under a package, keyed by short name."""
+    prefix = f"{package}."
+    with _lock:
+        return {name.split('.')[-1]: weight for name, weight in _weights.items()
+                if name.startswith(prefix) and weight is not None}
+
+
+def weights_for_plugin(plugin):
+    """The weights of a plugin's check modules.
+
+    Uses the modules recorded so far; when none of the plugin's modules have
+    been recorded, its default report definition is loaded (once per
+    process) to find them.
+    """
+    package = '.'.join(type(plugin).__module__.split('.')[:2])  # e.g. 'plugins.postgres'
+    prefix = f"{package}."
+    with _lock:
+        known = any(name.startswith(prefix) for name in _weights)
+        needs_definition = not known and package not in _loaded_definitions
+        if needs_definition:
+            _loaded_definitions.add(package)
+    if needs_definition:
+        try:
+            record_report_modules(plugin.get_report_definition())
+        except Exception as e:
+            print(f"⚠️ Warning: Could not load the report definition of '{package}' for module weights. Error: {e}")
+    return weights_for_package(package)
+
+
+def clear():
+    """Forgets every cached weight (for tests)."""
+    with _lock:
+        _weights.clear()
+        _loaded_definitions.clear()
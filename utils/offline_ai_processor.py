@@ -7,53 +7,18 @@ debugging the analysis process without needing to re-connect to the database
 and re-run the entire health check.
 """
 
-import json
 import argparse
 from pathlib import Path
 import sys
 import yaml
-import pkgutil
-import importlib
 
 # Add the project root to the path to allow for correct module imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.dynamic_prompt_generator import generate_dynamic_prompt
 from utils.run_recommendation import run_recommendation
-from plugins.base import BasePlugin
-
-def discover_plugins():
-    """Finds and loads all available plugins from the 'plugins' directory.
-
-    This function iterates through the subdirectories of the 'plugins' folder,
-    imports them as modules, and looks for classes that inherit from BasePlugin.
-    It instantiates each found plugin and returns a dictionary mapping the
-    plugin's technology name to its instance.
-
-    Returns:
-        dict: A dictionary of loaded plugin instances, keyed by technology name.
-    """
-
-    plugins_path = Path(__file__).parent.parent / "plugins"
-    discovered_plugins = {}
-    for _, name, _ in pkgutil.iter_modules([str(plugins_path)]):
-        if name != "base":
-            try:
-                module = importlib.import_module(f'plugins.{name}')
-                for item_name in dir(module):
-                    item = getattr(module, item_name)
-                    if isinstance(item, type) and issubclass(item, BasePlugin) and item is not BasePlugin:
-                        try:
-                            plugin_instance = item()
-                            discovered_plugins[plugin_instance.technology_name] = plugin_instance
-                            print(f"✅ Discovered and loaded plugin: {plugin_instance.technology_name}")
-                        except Exception as e:
-                            print(f"⚠️  Warning: Could not instantiate plugin '{name}'. Error: {e}. Skipping.")
-            except ImportError as e:
-                print(f"⚠️  Warning: Could not import plugin '{name}'. Missing dependency: {e}. Skipping.")
-            except Exception as e:
-                print(f"⚠️  Warning: Failed to load plugin '{name}' due to an unexpected error: {e}. Skipping.")
-    return discovered_plugins
+from utils.findings_stream import FindingsReader
+from plugins.registry import PluginRegistry
 
 def main():
     """Executes the offline AI analysis process.
@@ -77,8 +42,8 @@ def main():
     try:
         with open(args.config, 'r') as f:
             settings = yaml.safe_load(f)
-        with open(args.findings, 'r') as f:
-            all_structured_findings = json.load(f)
+        # Modules are indexed here and parsed only when accessed
+        all_structured_findings = FindingsReader(args.findings)
     except Exception as e:
         print(f"Error loading files: {e}")
         sys.exit(1)
@@ -86,7 +51,7 @@ def main():
     if args.template:
         settings['prompt_template'] = Path(args.template).name
 
-    available_plugins = discover_plugins()
+    available_plugins = PluginRegistry()
     active_tech = settings.get('db_type')
     active_plugin = available_plugins.get(active_tech)
 
@@ -111,7 +76,9 @@ def main():
 
     settings['ai_run_integrated'] = True
 
-    dynamic_analysis = generate_dynamic_prompt(all_structured_findings, settings, analysis_rules, db_metadata, active_plugin)
+    # The stored prompt summary is regenerated, so its copy of the module data is never parsed
+    findings_for_analysis = all_structured_findings.to_dict(exclude={'summarized_findings'})
+    dynamic_analysis = generate_dynamic_prompt(findings_for_analysis, settings, analysis_rules, db_metadata, active_plugin)
     full_prompt = dynamic_analysis['prompt']
 
     ai_adoc, _ = run_recommendation(settings, full_prompt)
@@ -0,0 +1,182 @@
+"""
+Token budgeting for AI prompt assembly.
+
+`PromptBudget` decides how much of each check module fits into
+`ai_max_prompt_tokens`. Costs are computed once, from the buffers of the
+run's `SerializedFindings` stage, and never by re-serializing whole modules:
+
+- A module that fits is included as-is and costs its cached encoding.
+- A module that does not fit is trimmed: the rows of each of its data lists
+  are ranked by the severity of the rules they triggered (critical, high,
+  medium, then untriggered rows in their original order), and a binary search
+  finds the largest number of rows per list that still fits. Each row's cost
+  is computed once, so every probe is a sum of prefix costs.
+
+Token counting is pluggable through the `ai_tokenizer` setting:
+
+    ai_tokenizer: chars                      # default: 4 characters per token
+    ai_tokenizer: tiktoken:cl100k_base       # needs the optional tiktoken package
+    ai_tokenizer: my_package.tokens:count    # any function str -> int
+"""
+
+import importlib
+import json
+
+from utils.json_utils import dumps_bytes
+
+CHARS_PER_TOKEN = 4
+
+# Tokens kept free for the prompt's instructions, headers and issue summaries
+RESERVED_PROMPT_TOKENS = 1000
+
+SEVERITY_RANKS = {'critical': 3, 'high': 2, 'medium': 1}
+
+
+def count_tokens_by_chars(text):
+    """Estimates tokens as one per CHARS_PER_TOKEN characters, rounded up."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def load_tokenizer(spec=None):
+    """
+    Returns a function counting the tokens of a string for an `ai_tokenizer` setting.
+
+    Unknown or unavailable tokenizers fall back to the character estimate
+    (a warning is printed).
+    """
+    if not spec or spec == 'chars':
+        return count_tokens_by_chars
+    try:
+        if spec == 'tiktoken' or spec.startswith('tiktoken:'):
+            import tiktoken
+            encoding = tiktoken.get_encoding(spec.partition(':')[2] or 'cl100k_base')
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        module_name, _, function_name = spec.partition(':')
+        counter = getattr(importlib.import_module(module_name), function_name)
+        if not callable(counter):
+            raise TypeError(f"{spec} is not callable")
+        return counter
+    except Exception as e:
+        print(f"⚠️ Warning: Could not load tokenizer '{spec}' ({e}). Estimating {CHARS_PER_TOKEN} characters per token.")
+        return count_tokens_by_chars
+
+
+def row_severities(issue_lists):
+    """Maps id() of every data row that triggered a rule to its highest severity rank."""
+    severities = {}
+    for issues in issue_lists:
+        for issue in issues:
+            rank = SEVERITY_RANKS.get(issue.get('analysis', {}).get('level'), 0)
+            row_id = id(issue.get('data'))
+            if rank > severities.get(row_id, 0):
+                severities[row_id] = rank
+    return severities
+
+
+class PromptBudget:
+    """Packs check modules into a token budget.
+
+    Attributes:
+        available (int): Tokens left for findings.
+        used (int): Tokens taken by the modules accepted so far.
+        trimmed (dict): Module name -> list of trim descriptions.
+    """
+
+    def __init__(self, serialized_findings, max_prompt_tokens, count_tokens=count_tokens_by_chars,
+                 reserved_tokens=RESERVED_PROMPT_TOKENS, severities=None):
+        """Initializes the budget.
+
+        Args:
+            serialized_findings (SerializedFindings): The run's serialization
+                stage; module costs come from its cached buffers.
+            max_prompt_tokens (int): The `ai_max_prompt_tokens` setting.
+            count_tokens (callable, optional): Counts the tokens of a string.
+            reserved_tokens (int, optional): Tokens kept for the template.
+            severities (dict, optional): id() of a data row -> severity rank,
+                from `row_severities()`.
+        """
+        self.serialized_findings = serialized_findings
+        self.count_tokens = count_tokens
+        self.available = max_prompt_tokens - reserved_tokens
+        self.severities = severities or {}
+        self.used = 0
+        self.trimmed = {}
+        self._module_costs = {}
+        # Per entry: the key, the ':' and the ',' separating it from the next one
+        self._separator_cost = count_tokens(',:')
+
+    def _cost(self, value):
+        return self.count_tokens(dumps_bytes(value).decode('utf-8'))
+
+    def module_cost(self, module_name):
+        """The tokens of a whole module, including its key (cached)."""
+        cost = self._module_costs.get(module_name)
+        if cost is None:
+            encoded = self.serialized_findings.encoded(module_name).decode('utf-8')
+            cost = self._module_costs[module_name] = (self.count_tokens(encoded) + self.count_tokens(json.dumps(module_name))
+                                                      + self._separator_cost)
+        return cost
+
+    def _rank_rows(self, rows):
+        """Orders rows by severity (highest first), keeping the original order within a severity."""
+        return sorted(rows, key=lambda row: -self.severities.get(id(row), 0))
+
+    def add(self, module_name, module_data):
+        """
+        Fits a module into the remaining budget.
+
+        Returns:
+            dict | None: The module data to include (the original or a trimmed
+            copy), or None when not even one row per list fits.
+        """
+        remaining = self.available - self.used
+        cost = self.module_cost(module_name)
+        if cost <= remaining:
+            self.used += cost
+            return module_data
+
+        # Lists that can be trimmed: the data of the module's sub-reports
+        lists = {name: sub_report['data'] for name, sub_report in module_data.items()
+                 if isinstance(sub_report, dict) and isinstance(sub_report.get('data'), list) and len(sub_report['data']) > 1}
+        if not lists:
+            return None
+
+        ranked = {name: self._rank_rows(rows) for name, rows in lists.items()}
+        prefix_costs = {}
+        for name, rows in ranked.items():
+            total, prefix = 0, [0]
+            for row in rows:
+                total += self._cost(row) + self._separator_cost
+                prefix.append(total)
+            prefix_costs[name] = prefix
+
+        # The module with its trimmable lists emptied, plus its key
+        skeleton = {name: ({**sub_report, 'data': []} if name in lists else sub_report)
+                    for name, sub_report in module_data.items()}
+        base_cost = self._cost(skeleton) + self.count_tokens(json.dumps(module_name)) + self._separator_cost
+
+        def cost_with(rows_per_list):
+            return base_cost + sum(prefix[min(rows_per_list, len(prefix) - 1)] for prefix in prefix_costs.values())
+
+        if cost_with(1) > remaining:
+            return None
+        low, high = 1, max(len(rows) for rows in lists.values())
+        while low < high:
+            middle = (low + high + 1) // 2
+            if cost_with(middle) <= remaining:
+                low = middle
+            else:
+                high = middle - 1
+
+        trimmed_data, details = {}, []
+        for name, sub_report in module_data.items():
+            if name in ranked and len(ranked[name]) > low:
+                trimmed_data[name] = {**sub_report, 'data': ranked[name][:low]}
+                triggered = sum(1 for row in ranked[name] if id(row) in self.severities)
+                details.append(f"  - List '{name}' trimmed from {len(ranked[name])} to {low} items "
+                               f"({min(low, triggered)} of {triggered} rule-triggering rows kept).")
+            else:
+                trimmed_data[name] = sub_report
+        self.used += cost_with(low)
+        self.trimmed[module_name] = details
+        return trimmed_data
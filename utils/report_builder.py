@@ -3,11 +3,18 @@ Defines the ReportBuilder class, which is responsible for constructing
 health check reports by executing a series of predefined actions.
 """
 
+import heapq
 import importlib
 import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from datetime import datetime
 
+from utils.execution_profiler import ExecutionProfiler
+from utils.incremental_cache import mark_reused
+from utils.module_weights import record_module
+
 class ReportBuilder:
     """Handles the construction of the health check report.
 
@@ -15,6 +22,30 @@ class ReportBuilder:
     check modules, reads static template parts, and assembles the final
     AsciiDoc report content and structured JSON data.
 
+    Check modules are executed through a `CheckScheduler`, which honours the
+    dependencies modules declare with `get_dependencies()` and skips modules
+    whose prerequisites are missing. When `max_parallel_checks` is greater
+    than 1 in the settings and the connector provides
+    `create_worker_connector()`, independent modules run concurrently in a
+    thread pool, each worker using its own connector. The results are always
+    assembled in report-definition order.
+
+    When an `IncrementalCache` is given, modules whose `get_fingerprint()` is
+    unchanged since the previous run reuse that run's results instead of
+    being executed (see utils/incremental_cache.py).
+
+    Unless `execution_profile` is false in the settings, every module's wall
+    time, queries, rows, serialized bytes and SSH commands are recorded in
+    `execution_profile` after the build (stored by main.py as the findings
+    block of that name), and `execution_profile_appendix: true` adds them to
+    the report as an appendix (see utils/execution_profiler.py).
+
+    When a `FindingsWriter` is given, each module's structured findings are
+    encoded as soon as the module completes and streamed to it in
+    report-definition order; modules finishing ahead of an earlier one wait
+    for it, so serial and parallel runs write the same file (see
+    utils/findings_stream.py).
+
     Attributes:
         connector (object): The active database connector instance.
         settings (dict): The main application settings.
@@ -24,9 +55,16 @@ class ReportBuilder:
         adoc_content (list): A list of AsciiDoc strings that are built up during the process.
         all_structured_findings (dict): A dictionary that collects all structured
             data from the executed check modules.
+        incremental_cache (IncrementalCache): The previous run's results, or
+            None when every module is executed.
+        execution_profile (dict): The per-module execution profile of the
+            last build, or None when profiling is disabled.
+        findings_writer (FindingsWriter): Receives each module's findings as
+            it completes, or None.
     """
 
-    def __init__(self, connector, settings, active_plugin, report_sections, app_version):
+    def __init__(self, connector, settings, active_plugin, report_sections, app_version, incremental_cache=None,
+                 findings_writer=None):
         """Initializes the ReportBuilder.
 
         Args:
@@ -37,6 +75,10 @@ class ReportBuilder:
                 list of section dictionaries.
             app_version (str): The current version of the application, used for
                 populating placeholders in report templates.
+            incremental_cache (IncrementalCache, optional): Enables reuse of
+                unchanged module results from the previous run.
+            findings_writer (FindingsWriter, optional): Streams each module's
+                structured findings to disk as it completes.
         """
 
         self.connector = connector
@@ -46,6 +88,14 @@ class ReportBuilder:
         self.app_version = app_version # <-- Store the app version
         self.adoc_content = []
         self.all_structured_findings = {}
+        self.incremental_cache = incremental_cache
+        self.profiler = ExecutionProfiler() if settings.get('execution_profile', True) else None
+        self.execution_profile = None
+        self.findings_writer = findings_writer
+        self._encoded_findings = {}  # key -> findings entry encoded by the worker that ran the module
+        self._encoded_lock = threading.Lock()
+        self._stream_pending = {}  # Position -> result completed ahead of an earlier module
+        self._stream_next = 0  # Position of the next module to stream
 
     def build(self):
         """Builds the full report by iterating through sections and actions.
@@ -60,20 +110,151 @@ class ReportBuilder:
             dictionary containing all structured findings from the checks.
         """
 
+        module_actions = [
+            action
+            for section in self.report_sections
+            for action in section['actions']
+            if action.get('type') == 'module'
+        ]
+        scheduler = CheckScheduler(module_actions, self._get_connector_capabilities())
+
+        max_workers = self._get_max_parallel_checks()
+        if self.profiler is not None:
+            self.profiler.start(self.connector)
+        try:
+            if max_workers > 1 and module_actions:
+                module_results = self._run_modules_parallel(scheduler, max_workers)
+            else:
+                module_results = scheduler.run(
+                    lambda action: self._execute_module(action['module'], action['function'], self.connector),
+                    on_complete=self._stream_in_order,
+                )
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+
+        if scheduler.pruned:
+            print(f"⏭️  Skipped {len(scheduler.pruned)} check module(s) with missing prerequisites: {', '.join(scheduler.pruned)}")
+
+        module_index = 0
         for section in self.report_sections:
             if section.get('title'):
                 self.adoc_content.append(f"== {section['title']}")
             for action in section['actions']:
                 action_type = action.get('type')
                 if action_type == 'module':
-                    content = self._run_module(action['module'], action['function'])
+                    key, content, structured_data = module_results[module_index]
+                    self.all_structured_findings[key] = structured_data
+                    module_index += 1
                     self.adoc_content.append(content)
                 elif action_type in ['header', 'comments']:
                     content = self._read_report_part(action['file'])
                     self.adoc_content.append(content)
+
+        if self.profiler is not None:
+            self.execution_profile = self.profiler.to_dict()
+            if self.settings.get('execution_profile_appendix', False):
+                self.adoc_content.append(self.profiler.to_adoc())
         
         return "\n\n".join(self.adoc_content), self.all_structured_findings
 
+    def _get_connector_capabilities(self):
+        """Returns the capabilities the connector detected during connect().
+
+        Returns:
+            set | None: The capability names, or None if the connector does not
+            report capabilities (requirements are then assumed to be met).
+        """
+        if not hasattr(self.connector, 'get_capabilities'):
+            return None
+        try:
+            return set(self.connector.get_capabilities())
+        except Exception as e:
+            print(f"⚠️ Warning: Could not read connector capabilities: {e}. Prerequisite pruning disabled.")
+            return None
+
+    def _get_max_parallel_checks(self):
+        """Determines how many check modules may run concurrently.
+
+        Parallel execution requires the connector to provide
+        `create_worker_connector()`; otherwise checks run serially.
+
+        Returns:
+            int: The number of workers to use (1 means serial execution).
+        """
+        try:
+            max_workers = int(self.settings.get('max_parallel_checks', 1) or 1)
+        except (TypeError, ValueError):
+            print(f"⚠️ Warning: Invalid max_parallel_checks value '{self.settings.get('max_parallel_checks')}'. Running checks serially.")
+            return 1
+
+        if max_workers > 1 and not hasattr(self.connector, 'create_worker_connector'):
+            print(f"⚠️ Warning: The {self.active_plugin.technology_name} connector does not support parallel checks. Running checks serially.")
+            return 1
+        return max(max_workers, 1)
+
+    def _run_modules_parallel(self, scheduler, max_workers):
+        """Executes the scheduled check modules concurrently using a thread pool.
+
+        Each worker thread lazily creates its own connector through
+        `create_worker_connector()` and reuses it for every module it runs.
+        Worker connectors are closed once the scheduler finishes. After the
+        first failure to open one (e.g. the server is at max_connections),
+        no further worker connections are attempted: threads without one run
+        their modules on the primary connection, one at a time.
+
+        Args:
+            scheduler (CheckScheduler): The scheduler holding the module DAG.
+            max_workers (int): The maximum number of concurrent workers.
+
+        Returns:
+            dict: Maps the position of each module action in the report
+            definition to a `(key, adoc_content, structured_data)` tuple.
+        """
+        thread_state = threading.local()
+        worker_connectors = []
+        primary_lock = threading.Lock()  # The primary connection runs one module at a time
+        connect_lock = threading.Lock()
+        connect_failed = threading.Event()
+
+        def get_worker_connector():
+            """The thread's worker connector, or None once opening worker connections has failed."""
+            if not hasattr(thread_state, 'connector'):
+                thread_state.connector = None  # Remembered, so a failed thread does not try again
+                # Connections are opened one at a time, so only one attempt waits for a refusing server
+                with connect_lock:
+                    if connect_failed.is_set():
+                        return None
+                    try:
+                        connector = self.connector.create_worker_connector()
+                    except Exception as e:
+                        connect_failed.set()
+                        print(f"⚠️ Warning: Could not open a worker connection ({e}). "
+                              f"Remaining checks without one use the primary connection.")
+                        return None
+                    worker_connectors.append(connector)
+                if self.profiler is not None:
+                    self.profiler.instrument(connector)
+                thread_state.connector = connector
+            return thread_state.connector
+
+        def run_action(action):
+            connector = get_worker_connector()
+            if connector is None:
+                with primary_lock:
+                    return self._execute_module(action['module'], action['function'], self.connector)
+            return self._execute_module(action['module'], action['function'], connector)
+
+        workers = min(max_workers, len(scheduler.nodes))
+        if self.profiler is not None:
+            self.profiler.parallel_workers = workers
+        print(f"--- Running {len(scheduler.nodes)} check modules with {workers} parallel workers ---")
+        try:
+            return scheduler.run(run_action, max_workers=workers, on_complete=self._stream_in_order)
+        finally:
+            for connector in worker_connectors:
+                connector.close_worker_connector()
+
     def _run_module(self, module_name, function_name):
         """Dynamically imports and executes a function from a check module.
 
@@ -91,18 +272,112 @@ class ReportBuilder:
                  or a formatted error string if the module fails.
         """
 
+        key, adoc_content, structured_data = self._execute_module(module_name, function_name, self.connector)
+        self.all_structured_findings[key] = structured_data
+        return adoc_content
+
+    def _execute_module(self, module_name, function_name, connector):
+        """Executes a check function without touching shared builder state.
+
+        Args:
+            module_name (str): The full, importable path to the module.
+            function_name (str): The name of the function to execute within the module.
+            connector (object): The connector to pass to the check function.
+
+        Returns:
+            tuple[str, str, dict]: The findings key (the module's short name),
+            the AsciiDoc content, and the structured data. On failure the
+            content is a formatted error string and the data is an error dict.
+        """
+
+        if self.profiler is None:
+            key, adoc_content, structured_data = self._run_check(module_name, function_name, connector)
+            self._encode_findings(key, structured_data)
+        else:
+            with self.profiler.profile_module(module_name.split('.')[-1]) as profile:
+                key, adoc_content, structured_data = self._run_check(module_name, function_name, connector)
+                # The size as encoded for the findings writer; findings are not serialized twice
+                profile['bytes'] = self._encode_findings(key, structured_data)
+                if self.incremental_cache is not None and key in self.incremental_cache.reused:
+                    profile['reused'] = True
+        return key, adoc_content, structured_data
+
+    def _encode_findings(self, key, structured_data):
+        """Encodes a module's findings for the findings writer, if any, on the calling worker.
+
+        Returns:
+            int: Size of the encoded entry in bytes, or 0 when nothing will be written.
+        """
+        if self.findings_writer is None:
+            return 0
+        try:
+            entry = self.findings_writer.encode_entry(key, structured_data)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not stream findings for module '{key}': {e}")
+            return 0
+        with self._encoded_lock:
+            self._encoded_findings[key] = entry
+        return len(entry)
+
+    def _stream_in_order(self, index, result):
+        """Streams completed modules to the findings writer in report-definition order.
+
+        Called by the scheduler as each module completes. A result that
+        completes ahead of an earlier module is held until that module is
+        written.
+        """
+        if self.findings_writer is None:
+            return
+        self._stream_pending[index] = result
+        while self._stream_next in self._stream_pending:
+            key, _, structured_data = self._stream_pending.pop(self._stream_next)
+            self._stream_next += 1
+            with self._encoded_lock:
+                entry = self._encoded_findings.pop(key, None)  # None for skipped modules: encoded here
+            try:
+                self.findings_writer.write_entry(key, structured_data, entry=entry)
+            except Exception as e:
+                print(f"⚠️ Warning: Could not stream findings for module '{key}': {e}")
+
+    def _run_check(self, module_name, function_name, connector):
+        """Runs a module, or reuses its previous result in incremental mode."""
+        if self.incremental_cache is not None:
+            return self._execute_module_incremental(module_name, function_name, connector)
+        return self._invoke_module(module_name, function_name, connector)
+
+    def _invoke_module(self, module_name, function_name, connector):
+        """Imports and runs a check function; see `_execute_module()`."""
+        key = module_name.split('.')[-1]
         try:
             module = importlib.import_module(module_name)
             func = getattr(module, function_name)
-            adoc_content, structured_data = func(self.connector, self.settings)
-            key = module_name.split('.')[-1]
-            self.all_structured_findings[key] = structured_data
-            return adoc_content
+            adoc_content, structured_data = func(connector, self.settings)
+            return key, adoc_content, structured_data
         except Exception as e:
-            key = module_name.split('.')[-1]
             error_msg = f"[ERROR]\n====\nModule {module_name}.{function_name} failed: {e}\n====\n"
-            self.all_structured_findings[key] = {"status": "error", "error": str(e)}
-            return error_msg
+            return key, error_msg, {"status": "error", "error": str(e)}
+
+    def _execute_module_incremental(self, module_name, function_name, connector):
+        """Reuses a module's previous result when its fingerprint is unchanged, else executes it.
+
+        Returns:
+            tuple[str, str, dict]: As `_execute_module()`; reused content is
+            marked with a note saying so.
+        """
+        cache = self.incremental_cache
+        key = module_name.split('.')[-1]
+        fingerprint = cache.fingerprint(module_name, function_name, connector, self.settings)
+        cached = cache.lookup(key, fingerprint)
+        if cached is not None:
+            adoc_content, structured_data, collected_at = cached
+            cache.record(key, fingerprint, adoc_content, collected_at=collected_at)
+            print(f"♻️  Reusing results of {key} from {collected_at} (fingerprint unchanged)")
+            return key, mark_reused(adoc_content, collected_at), structured_data
+
+        key, adoc_content, structured_data = self._invoke_module(module_name, function_name, connector)
+        if CheckScheduler._result_succeeded(structured_data):
+            cache.record(key, fingerprint, adoc_content)
+        return key, adoc_content, structured_data
 
     def _read_report_part(self, filename):
         """Reads a static text file from the plugin's template directory.
@@ -140,3 +415,244 @@ class ReportBuilder:
             return f"[ERROR]\n====\nReport part file '{filename}' not found in plugin's templates/report_parts/ directory.\n====\n"
         except Exception as e:
             return f"[ERROR]\n====\nCould not read report part file '{filename}': {e}\n====\n"
+
+
+# Top-level 'status' values that mean a module did not produce its capabilities
+UNSUCCESSFUL_STATUSES = {'error', 'skipped', 'unavailable'}
+
+
+class CheckScheduler:
+    """Builds a dependency DAG of check modules and executes it.
+
+    Check modules may declare their dependencies next to `get_weight()`:
+
+        def get_dependencies():
+            return {
+                'requires': ['patroni'],   # capabilities that must be available
+                'provides': [],            # capabilities produced on success
+                'provides_if': None,       # optional: result -> bool, instead of "on success"
+                'after': [],               # module names ('*' = all others) to wait for
+            }
+
+    A required capability is satisfied by the connector's `get_capabilities()`
+    or by another module in the report that `provides` it and completed
+    successfully (or whose result `provides_if` accepts, e.g. a detection
+    module that found what it looked for); modules wait for such providers
+    before they start. Modules
+    with an unsatisfied requirement are skipped without running, and because
+    a skipped module provides nothing, everything that depends on it is
+    skipped too.
+
+    Attributes:
+        nodes (list): One dict per module action, in report-definition order.
+        capabilities (set | None): Capabilities reported by the connector, or
+            None when unknown (connector-level requirements are then assumed met).
+        pruned (list): Keys of modules skipped because of missing prerequisites.
+    """
+
+    def __init__(self, module_actions, capabilities=None):
+        """Initializes the scheduler and builds the dependency graph.
+
+        Args:
+            module_actions (list): The `{'type': 'module'}` actions from the
+                report definition, in order.
+            capabilities (set, optional): Capabilities reported by the connector.
+        """
+        self.capabilities = capabilities
+        self.pruned = []
+        self.nodes = []
+        self.providers = {}
+
+        for index, action in enumerate(module_actions):
+            dependencies = self._load_dependencies(action['module'])
+            self.nodes.append({
+                'action': action,
+                'key': action['module'].split('.')[-1],
+                'requires': list(dependencies.get('requires', [])),
+                'provides': list(dependencies.get('provides', [])),
+                'provides_if': dependencies.get('provides_if') or self._result_succeeded,
+                'after': list(dependencies.get('after', [])),
+            })
+            for capability in dependencies.get('provides', []):
+                self.providers.setdefault(capability, []).append(index)
+
+        self.prerequisites = {index: set() for index in range(len(self.nodes))}
+        self._build_edges()
+        self._break_cycles()
+
+    @staticmethod
+    def _load_dependencies(module_name):
+        """Reads a module's `get_dependencies()` declaration, if any."""
+        try:
+            module = importlib.import_module(module_name)
+        except Exception:
+            return {}  # Reported when the module is executed
+        record_module(module)  # Every module is imported here first, so weights are free later
+        if not hasattr(module, 'get_dependencies'):
+            return {}
+        try:
+            return module.get_dependencies() or {}
+        except Exception as e:
+            print(f"⚠️ Warning: Could not read dependencies for module '{module_name}'. Error: {e}")
+            return {}
+
+    def _build_edges(self):
+        """Adds an edge from every provider or 'after' target to its dependents."""
+        keys = {}
+        for index, node in enumerate(self.nodes):
+            keys.setdefault(node['key'], []).append(index)
+
+        for index, node in enumerate(self.nodes):
+            for capability in node['requires']:
+                self.prerequisites[index].update(p for p in self.providers.get(capability, []) if p != index)
+            for target in node['after']:
+                if target == '*':
+                    self.prerequisites[index].update(
+                        other for other, other_node in enumerate(self.nodes)
+                        if other != index and '*' not in other_node['after']
+                    )
+                else:
+                    self.prerequisites[index].update(p for p in keys.get(target, []) if p != index)
+
+    def _break_cycles(self):
+        """Drops edges between modules that form a dependency cycle."""
+        remaining = {index: len(prereqs) for index, prereqs in self.prerequisites.items()}
+        dependents = self._dependents()
+        ready = [index for index, count in remaining.items() if count == 0]
+        visited = set()
+        while ready:
+            index = ready.pop()
+            visited.add(index)
+            for dependent in dependents[index]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        cyclic = set(self.prerequisites) - visited
+        if cyclic:
+            names = ', '.join(sorted(self.nodes[index]['key'] for index in cyclic))
+            print(f"⚠️ Warning: Dependency cycle between check modules ({names}). Running them in report order.")
+            for index in cyclic:
+                self.prerequisites[index] -= cyclic
+
+    def _dependents(self):
+        """Returns the reverse edges of the graph."""
+        dependents = {index: set() for index in self.prerequisites}
+        for index, prereqs in self.prerequisites.items():
+            for prereq in prereqs:
+                dependents[prereq].add(index)
+        return dependents
+
+    def _missing_requirements(self, index, succeeded):
+        """Returns the required capabilities that are not available for a module."""
+        missing = []
+        for capability in self.nodes[index]['requires']:
+            providers = [p for p in self.providers.get(capability, []) if p != index]
+            if self.capabilities is not None and capability in self.capabilities:
+                available = True
+            elif providers:
+                available = any(p in succeeded for p in providers)
+            else:
+                available = self.capabilities is None
+            if not available:
+                missing.append(capability)
+        return missing
+
+    def _skipped_result(self, index, missing):
+        """Builds the result recorded for a module skipped by the scheduler."""
+        key = self.nodes[index]['key']
+        self.pruned.append(key)
+        reason = f"Missing prerequisite(s): {', '.join(missing)}"
+        adoc_content = f"[NOTE]\n====\nSkipped `{key}`. {reason}.\n====\n"
+        return key, adoc_content, {'status': 'skipped', 'reason': reason, 'missing_prerequisites': missing}
+
+    def _provides(self, index, structured_data):
+        """Decides whether a completed module makes its `provides` capabilities available."""
+        try:
+            return bool(self.nodes[index]['provides_if'](structured_data))
+        except Exception as e:
+            print(f"⚠️ Warning: Could not evaluate provides_if of module '{self.nodes[index]['key']}'. Error: {e}")
+            return False
+
+    @staticmethod
+    def _result_succeeded(structured_data):
+        """Decides whether a module's result makes its capabilities available.
+
+        The module's top-level 'status' is used when present; otherwise the
+        statuses of its sub-results must include a success and no failures.
+        """
+        if not isinstance(structured_data, dict):
+            return False
+        if 'status' in structured_data:
+            return structured_data.get('status') == 'success'
+        statuses = [v.get('status') for v in structured_data.values() if isinstance(v, dict) and 'status' in v]
+        return 'success' in statuses and not UNSUCCESSFUL_STATUSES.intersection(statuses)
+
+    def run(self, execute, max_workers=1, on_complete=None):
+        """Executes every module in dependency order.
+
+        Ready modules are started in report-definition order. With one worker
+        they run inline on the calling thread; otherwise independent modules
+        run concurrently in a thread pool.
+
+        Args:
+            execute (callable): Called with a module action; must return a
+                `(key, adoc_content, structured_data)` tuple.
+            max_workers (int, optional): The maximum number of concurrent modules.
+            on_complete (callable, optional): Called on the calling thread with
+                each module's position and result as it completes, skipped
+                modules included.
+
+        Returns:
+            dict: Maps each module's position in the report definition to its
+            `(key, adoc_content, structured_data)` result.
+        """
+        results = {}
+        succeeded = set()
+        remaining = {index: len(prereqs) for index, prereqs in self.prerequisites.items()}
+        dependents = self._dependents()
+        ready = [index for index, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+
+        def complete(index, result, ran=True):
+            results[index] = result
+            if on_complete is not None:
+                on_complete(index, result)
+            if ran and self._provides(index, result[2]):
+                succeeded.add(index)
+            for dependent in dependents[index]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+
+        def next_runnable():
+            # Pops ready modules, completing those with missing prerequisites immediately
+            while ready:
+                index = heapq.heappop(ready)
+                missing = self._missing_requirements(index, succeeded)
+                if missing:
+                    complete(index, self._skipped_result(index, missing), ran=False)
+                    continue
+                return index
+            return None
+
+        if max_workers <= 1:
+            index = next_runnable()
+            while index is not None:
+                complete(index, execute(self.nodes[index]['action']))
+                index = next_runnable()
+            return results
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='check') as executor:
+            running = {}
+            while True:
+                index = next_runnable()
+                while index is not None:
+                    running[executor.submit(execute, self.nodes[index]['action'])] = index
+                    index = next_runnable()
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    complete(running.pop(future), future.result())
+        return results
@@ -0,0 +1,306 @@
+"""
+Compiled rule engine for health check analysis rules.
+
+The expression-based rule configs (see utils/rule_validator.py) are compiled
+once when a plugin loads them:
+
+- Each rule's `expression` is compiled to a code object, and its `reasoning`
+  to a code object for the equivalent f-string, instead of re-parsing the
+  source with eval() for every data row.
+- Configs are indexed by keyword, and the configs matching a metric name are
+  resolved once per metric rather than once per row.
+
+Evaluation semantics match the original analyze_metric_severity(): configs
+are tried in definition order, the highest 'score' wins (first one on ties),
+and rule errors are counted in rule_stats and reported with a warning.
+
+Large homogeneous data lists can be evaluated with evaluate_batch(), which
+runs simple comparison rules as column masks (see utils/columnar_rules.py).
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.columnar_rules import ColumnBatch, mask_indices, plan_expression
+
+logger = logging.getLogger(__name__)
+
+# Data lists at least this long are evaluated with evaluate_batch()
+COLUMNAR_MIN_ROWS = 256
+
+
+def _compile(source: str, label: str) -> Tuple[Optional[Any], Optional[Exception]]:
+    """Compile an eval-mode expression, returning (code, None) or (None, error)."""
+    try:
+        return compile(source, label, 'eval'), None
+    except Exception as e:
+        return None, e
+
+
+class CompiledRule:
+    """A single rule with its expression and reasoning template precompiled."""
+
+    __slots__ = ('level', 'score', 'recommendations', 'expression', 'expression_code',
+                 'expression_error', 'reasoning_code', 'reasoning_error', 'vector_plan')
+
+    def __init__(self, config_name: str, rule: Dict[str, Any]):
+        self.level = rule.get('level', 'info')
+        self.score = rule.get('score', 0)
+        self.recommendations = rule.get('recommendations', [])
+        self.expression = rule.get('expression')
+        self.expression_code, self.expression_error = _compile(
+            self.expression if self.expression is not None else '', f"<rule {config_name}>"
+        )
+        if self.expression is None:
+            self.expression_error = KeyError('expression')
+        # The reasoning text is an f-string body, e.g. "{data['pct']}% of ..."
+        self.reasoning_code, self.reasoning_error = _compile(
+            f"f\"{rule.get('reasoning', '')}\"", f"<reasoning {config_name}>"
+        )
+        if 'reasoning' not in rule:
+            self.reasoning_error = KeyError('reasoning')
+        # Column-mask form of simple comparison expressions, None otherwise
+        self.vector_plan = plan_expression(self.expression) if self.expression_error is None else None
+
+    def evaluate(self, namespace: Dict[str, Any]) -> Any:
+        """Evaluate the rule expression, raising its compile error if it had one."""
+        if self.expression_error is not None:
+            raise self.expression_error
+        return eval(self.expression_code, namespace)
+
+    def render_reasoning(self, namespace: Dict[str, Any]) -> str:
+        """Render the cached reasoning template for a triggered row."""
+        if self.reasoning_error is not None:
+            raise self.reasoning_error
+        return eval(self.reasoning_code, namespace)
+
+
+class CompiledRuleConfig:
+    """A rule config: its keywords, required data keys and compiled rules."""
+
+    __slots__ = ('name', 'keywords', 'data_conditions', 'required_keys', 'rules')
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.keywords = config.get('metric_keywords', [])
+        self.data_conditions = config.get('data_conditions', [])
+        self.required_keys = tuple(cond.get('key') for cond in self.data_conditions if cond.get('exists'))
+        self.rules = tuple(CompiledRule(name, rule) for rule in config.get('rules', []))
+
+    def conditions_met(self, data_row: Dict[str, Any]) -> bool:
+        return all(key in data_row for key in self.required_keys)
+
+
+class CompiledRuleSet:
+    """
+    All rule configs of a plugin, compiled and indexed by keyword.
+
+    Build it once per loaded rules dict (CompiledRules does this in
+    get_rules_config()) and reuse it for every row of every finding.
+    """
+
+    def __init__(self, analysis_rules: Dict[str, Any]):
+        self.configs = [CompiledRuleConfig(name, config)
+                        for name, config in analysis_rules.items() if isinstance(config, dict)]
+
+        # keyword -> positions of the configs that list it
+        self.keyword_index: Dict[str, List[int]] = {}
+        for position, config in enumerate(self.configs):
+            for keyword in config.keywords:
+                positions = self.keyword_index.setdefault(keyword, [])
+                if position not in positions:
+                    positions.append(position)
+
+        self._metric_cache: Dict[str, Tuple[CompiledRuleConfig, ...]] = {}
+        self._metric_cache_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.configs)
+
+    def configs_for_metric(self, metric_name: str) -> Tuple[CompiledRuleConfig, ...]:
+        """The configs whose keywords occur in the metric name, in definition order (cached)."""
+        matched = self._metric_cache.get(metric_name)
+        if matched is None:
+            name = metric_name.lower()
+            positions = set()
+            for keyword, keyword_positions in self.keyword_index.items():
+                if keyword in name:
+                    positions.update(keyword_positions)
+            matched = tuple(self.configs[position] for position in sorted(positions))
+            with self._metric_cache_lock:
+                self._metric_cache[metric_name] = matched
+        return matched
+
+    def evaluate(self, metric_name: str, data_row: Dict[str, Any], settings: Dict[str, Any],
+                 all_findings: Dict[str, Any], rule_stats: Dict[str, Dict[str, int]],
+                 verbose: bool = False) -> Dict[str, Any]:
+        """
+        Analyze one data row of a metric and return the highest severity finding.
+
+        Args and return value are those of
+        dynamic_prompt_generator.analyze_metric_severity(); `rule_stats` is
+        updated in-place.
+        """
+        highest_severity_finding = {
+            'level': 'info',
+            'score': 0,
+            'reasoning': '',
+            'recommendations': [],
+            'rule_config_name': None
+        }
+
+        for config in self.configs_for_metric(metric_name):
+            if verbose:
+                print(f"\n[DEBUG] METRIC: '{metric_name}' | RULE_CONFIG: '{config.name}'")
+                print(f"  - Keywords: {config.keywords} -> MATCH")
+
+            conditions_met = config.conditions_met(data_row)
+            if verbose:
+                print(f"  - Conditions: {config.data_conditions} -> {'MET' if conditions_met else 'NOT MET'}")
+
+            if not conditions_met or not config.rules:
+                continue
+
+            stats = rule_stats.setdefault(config.name, {'checked': 0, 'triggered': 0, 'errors': 0})
+
+            for rule in config.rules:
+                try:
+                    stats['checked'] += 1
+                    expression_result = rule.evaluate({"data": data_row, "settings": settings, "all_structured_findings": all_findings})
+
+                    if verbose:
+                        print(f"    - Evaluating Rule: level='{rule.level}'")
+                        print(f"      - Expression: {rule.expression}")
+                        print(f"      - DATA_ROW: {json.dumps(data_row, indent=2, default=str)}")
+                        print(f"      - RESULT: {'TRIGGERED' if expression_result else 'NOT TRIGGERED'}")
+
+                    if expression_result:
+                        stats['triggered'] += 1
+                        current_finding = {
+                            'level': rule.level,
+                            'score': rule.score,
+                            'reasoning': rule.render_reasoning({"data": data_row, "settings": settings}),
+                            'recommendations': rule.recommendations,
+                            'rule_config_name': config.name
+                        }
+                        if current_finding['score'] > highest_severity_finding['score']:
+                            highest_severity_finding = current_finding
+
+                except Exception as e:
+                    stats['errors'] += 1
+                    print(f"Warning: Error evaluating rule '{config.name}' for metric '{metric_name}': {e}")
+
+        return highest_severity_finding
+
+    def evaluate_batch(self, metric_name: str, rows: Sequence[Any], settings: Dict[str, Any],
+                       all_findings: Dict[str, Any], rule_stats: Dict[str, Dict[str, int]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Analyze every row of a metric's data list at once.
+
+        When the rows are dicts sharing the same keys, each rule is evaluated
+        over the whole list: simple numeric comparisons as column masks, other
+        expressions row by row. Reasoning is rendered, and finding dicts
+        built, only for rows a rule triggered on. Findings and `rule_stats`
+        are the same as calling evaluate() on each row.
+
+        Returns:
+            list: (row, finding) pairs, in row order, for the rows on which at
+            least one rule triggered; the remaining rows have the default
+            'info' finding.
+        """
+        configs = self.configs_for_metric(metric_name)
+        batch = ColumnBatch.from_rows(rows) if configs else None
+        if batch is None:
+            results = []
+            for row in rows:
+                if isinstance(row, dict):
+                    finding = self.evaluate(metric_name, row, settings, all_findings, rule_stats)
+                    if finding['rule_config_name'] is not None:
+                        results.append((row, finding))
+            return results
+
+        best_findings = {}
+        for config in configs:
+            # Rows share their keys, so data conditions hold for all rows or none
+            if not config.rules or not all(key in batch.keys for key in config.required_keys):
+                continue
+
+            stats = rule_stats.setdefault(config.name, {'checked': 0, 'triggered': 0, 'errors': 0})
+
+            for rule in config.rules:
+                stats['checked'] += len(batch)
+
+                if rule.vector_plan is not None and batch.supports(rule.vector_plan):
+                    triggered = mask_indices(batch.evaluate(rule.vector_plan))
+                else:
+                    triggered = []
+                    for index, row in enumerate(rows):
+                        try:
+                            if rule.evaluate({"data": row, "settings": settings, "all_structured_findings": all_findings}):
+                                triggered.append(index)
+                        except Exception as e:
+                            stats['errors'] += 1
+                            print(f"Warning: Error evaluating rule '{config.name}' for metric '{metric_name}': {e}")
+
+                stats['triggered'] += len(triggered)
+
+                for index in triggered:
+                    try:
+                        reasoning = rule.render_reasoning({"data": rows[index], "settings": settings})
+                    except Exception as e:
+                        stats['errors'] += 1
+                        print(f"Warning: Error evaluating rule '{config.name}' for metric '{metric_name}': {e}")
+                        continue
+
+                    current_best = best_findings.get(index)
+                    if rule.score > (current_best['score'] if current_best else 0):
+                        best_findings[index] = {
+                            'level': rule.level,
+                            'score': rule.score,
+                            'reasoning': reasoning,
+                            'recommendations': rule.recommendations,
+                            'rule_config_name': config.name
+                        }
+
+        return [(rows[index], best_findings[index]) for index in sorted(best_findings)]
+
+
+class CompiledRules(dict):
+    """
+    The rules dict returned by a plugin's get_rules_config(), with its
+    compiled form attached as `.compiled`.
+
+    It is still a plain mapping of config name -> config (it serializes with
+    json.dumps as before); code that mutates it afterwards must call
+    compile_rules() again.
+    """
+
+    def __init__(self, analysis_rules: Dict[str, Any]):
+        super().__init__(analysis_rules)
+        self.compiled = CompiledRuleSet(self)
+
+
+def compile_rules(analysis_rules: Dict[str, Any]) -> CompiledRules:
+    """Compile a loaded rules dict; called at the end of get_rules_config()."""
+    compiled_rules = CompiledRules(analysis_rules)
+    logger.debug(f"Compiled {len(compiled_rules.compiled)} rule configs "
+                 f"({len(compiled_rules.compiled.keyword_index)} keywords)")
+    return compiled_rules
+
+
+def get_compiled_rules(analysis_rules) -> CompiledRuleSet:
+    """
+    Return the CompiledRuleSet for rules from get_rules_config().
+
+    Accepts a CompiledRules dict, an already compiled CompiledRuleSet, or a
+    plain rules dict (e.g. loaded from the trends database), which is
+    compiled on the spot.
+    """
+    if isinstance(analysis_rules, CompiledRuleSet):
+        return analysis_rules
+    compiled = getattr(analysis_rules, 'compiled', None)
+    if isinstance(compiled, CompiledRuleSet):
+        return compiled
+    return CompiledRuleSet(analysis_rules or {})
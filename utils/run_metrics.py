@@ -0,0 +1,226 @@
+"""
+Scalar metrics extracted from the findings of a run when it is stored.
+
+The consulting opportunity views and the write volume reports need a few
+numbers per run (slow query counts, bloat totals, write volumes, lag, ...).
+They used to decrypt and re-parse the run's full findings in several
+correlated subqueries per row. Instead, the numbers are extracted once at
+ingestion, into the narrow health_check_run_metrics table
+(run_id, metric_name, metric_value), and read back with index lookups.
+
+Shared by the trend shipper (output_handlers/trend_shipper.py) and the
+trends_app submission API (trends_app/database_inserter.py). Each metric
+mirrors the SQL expression it replaces: counts of a missing array are not
+stored (the views read them as 0), aggregates and scalars that have no
+value are not stored (NULL), and values that SQL could not cast are
+skipped instead of failing the query. Runs stored before the table existed
+are filled in by trends_app/scripts/backfill_run_metrics.py.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+DELETE_SQL = "DELETE FROM health_check_run_metrics WHERE run_id = %s"
+INSERT_SQL = "INSERT INTO health_check_run_metrics (run_id, metric_name, metric_value) VALUES %s"
+
+# Queries counted as writes by the write volume reports (query ILIKE ...)
+WRITE_QUERY_MARKERS = ('insert into', 'update ', 'delete from')
+
+
+def _data(findings, check):
+    data = (findings.get(check) or {}) if isinstance(findings, dict) else {}
+    data = data.get('data') if isinstance(data, dict) else None
+    return data if isinstance(data, dict) else {}
+
+
+def _items(findings, check, key):
+    """findings -> check -> 'data' -> key, if it is a JSON array."""
+    items = _data(findings, check).get(key)
+    return items if isinstance(items, list) else None
+
+
+def _text_number(value):
+    """Like (item->>'key')::numeric: numbers and numeric strings, else None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    try:
+        number = Decimal(value.strip())
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def _json_number(value):
+    """Like (data -> 'key')::numeric: JSON numbers only."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return _text_number(value)
+
+
+def _json_boolean(value):
+    """Like (data -> 'key')::boolean, stored as 1 or 0."""
+    return int(value) if isinstance(value, bool) else None
+
+
+def _field(item, key):
+    return _text_number(item.get(key)) if isinstance(item, dict) else None
+
+
+def _values(items, key, where=None):
+    values = []
+    for item in items:
+        if where is not None and not where(item):
+            continue
+        value = _field(item, key)
+        if value is not None:
+            values.append(value)
+    return values
+
+
+def _count(items, key=None, above=None, below=None):
+    """COUNT(*) of the items, optionally WHERE (item->>key)::numeric > above (or < below)."""
+    if items is None:
+        return None
+    if key is None:
+        return len(items)
+    values = _values(items, key)
+    if above is not None:
+        return sum(1 for value in values if value > above)
+    return sum(1 for value in values if value < below)
+
+
+def _sum(values):
+    return sum(values) if values else None
+
+
+def _is_write_query(item):
+    query = str(item.get('query') or '').lower() if isinstance(item, dict) else ''
+    return any(marker in query for marker in WRITE_QUERY_MARKERS)
+
+
+def _postgres_metrics(findings):
+    queries = _items(findings, 'check_comprehensive_query_analysis', 'queries')
+    bloat = _items(findings, 'check_table_bloat', 'bloated_tables')
+    metrics = {
+        'pg_queries_over_500ms': _count(queries, 'avg_duration_ms', above=500),
+        'pg_queries_over_1000ms': _count(queries, 'avg_duration_ms', above=1000),
+        'pg_queries_over_5000ms': _count(queries, 'avg_duration_ms', above=5000),
+        'pg_low_cache_hit_queries': _count(queries, 'cache_hit_rate_percent', below=90),
+        'pg_missing_index_tables': _count(_items(findings, 'check_missing_indexes', 'tables_missing_indexes')),
+        'pg_bloated_tables_over_20pct': _count(bloat, 'bloat_percent', above=20),
+        'pg_bloated_tables_over_50pct': _count(bloat, 'bloat_percent', above=50),
+        'pg_autovacuum_issues': _json_boolean(_data(findings, 'check_autovacuum_config').get('issues_found')),
+        'pg_blocking_transactions': _count(_items(findings, 'check_long_running_transactions', 'long_transactions'),
+                                           'duration_hours', above=2),
+        'pg_config_recommendations': _count(_items(findings, 'check_configuration_best_practices', 'recommendations')),
+        'pg_needs_connection_pooling': _json_boolean(_data(findings, 'check_connection_pooling').get('needs_pooling')),
+        'pg_needs_checkpoint_tuning': _json_boolean(_data(findings, 'check_checkpoint_tuning').get('needs_tuning')),
+    }
+    replicas = _items(findings, 'check_replication_status', 'replicas')
+    if replicas:
+        lags = _values(replicas, 'replication_lag_mb')
+        metrics['pg_max_replication_lag_mb'] = max(lags) if lags else None
+    if bloat:
+        metrics['pg_total_wasted_gb'] = _sum(_values(bloat, 'wasted_gb'))
+    if queries:
+        slow = [query for query in queries if (_field(query, 'avg_duration_ms') or 0) > 500]
+        metrics['pg_inefficient_query_cpu_percent'] = _sum(_values(slow, 'percent_of_total_cluster_cpu'))
+        writes = [query for query in queries if _is_write_query(query)]
+        if writes:
+            rates = _values(writes, 'calls_per_hour')
+            cpu = _values(writes, 'percent_of_total_cluster_cpu')
+            metrics.update({
+                'pg_write_queries': len({str(query.get('query')) for query in writes}),
+                'pg_write_calls_per_hour': _sum(rates),
+                'pg_write_max_calls_per_hour': max(rates) if rates else None,
+                'pg_write_cpu_percent_sum': _sum(cpu),
+                'pg_write_cpu_percent_count': len(cpu),
+            })
+    return metrics
+
+
+def _kafka_metrics(findings):
+    metrics = {
+        'kafka_under_replicated_partitions': _json_number(
+            _data(findings, 'kafka_overview').get('under_replicated_partitions')),
+        'kafka_topic_config_issues': _count(_items(findings, 'check_topic_configuration', 'topics_with_issues')),
+    }
+    partitions = _values(_items(findings, 'check_partition_balance', 'brokers') or [], 'partition_count')
+    if partitions:
+        metrics['kafka_partition_imbalance'] = max(partitions) - min(partitions)
+    gc_pauses = _values(_items(findings, 'check_gc_pauses', 'brokers') or [], 'max_gc_pause_ms')
+    if gc_pauses:
+        metrics['kafka_avg_max_gc_pause_ms'] = sum(gc_pauses) / len(gc_pauses)
+    return metrics
+
+
+def _cassandra_metrics(findings):
+    latency = _data(findings, 'check_read_write_latency')
+    return {
+        'cassandra_compaction_issue_tables': _count(_items(findings, 'check_compaction_strategy', 'tables_with_issues')),
+        'cassandra_read_p99_ms': _json_number(latency.get('read_p99_ms')),
+        'cassandra_write_p99_ms': _json_number(latency.get('write_p99_ms')),
+        'cassandra_heap_used_percent': _json_number(_data(findings, 'check_memory_pressure').get('heap_used_percent')),
+    }
+
+
+def _opensearch_metrics(findings):
+    shards = _data(findings, 'check_shard_allocation')
+    return {
+        'opensearch_unassigned_shards': _json_number(shards.get('unassigned_shards')),
+        'opensearch_total_shards': _json_number(shards.get('total_shards')),
+        'opensearch_heap_used_percent': _json_number(_data(findings, 'check_jvm_memory').get('heap_used_percent')),
+        'opensearch_slow_queries': _count(_items(findings, 'check_slow_queries', 'slow_queries')),
+    }
+
+
+def extract_run_metrics(findings):
+    """The scalar metrics of a run.
+
+    Args:
+        findings (dict): The structured findings of the run.
+
+    Returns:
+        dict: metric_name -> number, without the metrics that have no value.
+    """
+    if not isinstance(findings, dict):
+        return {}
+    metrics = {}
+    for extract in (_postgres_metrics, _kafka_metrics, _cassandra_metrics, _opensearch_metrics):
+        metrics.update(extract(findings))
+    return {name: value for name, value in metrics.items() if value is not None}
+
+
+def insert_run_metrics(cursor, run_id, findings, warn=print):
+    """Stores (or replaces) the scalar metrics of a run.
+
+    A savepoint keeps the caller's transaction usable when the
+    health_check_run_metrics table has not been created yet.
+
+    Args:
+        cursor: psycopg2 cursor inside the caller's transaction.
+        run_id (int): The ID of the health check run.
+        findings (dict): The structured findings of the run.
+        warn (callable, optional): Receives a message if the metrics cannot be stored.
+
+    Returns:
+        int: Number of metrics stored.
+    """
+    rows = [(run_id, name, value) for name, value in sorted(extract_run_metrics(findings).items())]
+    cursor.execute("SAVEPOINT run_metrics")
+    try:
+        cursor.execute(DELETE_SQL, (run_id,))
+        if rows:
+            execute_values(cursor, INSERT_SQL, rows)
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT run_metrics")
+        warn(f"Failed to store the run metrics for run {run_id}: {e}")
+        return 0
+    cursor.execute("RELEASE SAVEPOINT run_metrics")
+    return len(rows)
@@ -0,0 +1,144 @@
+"""
+Wire format of health check submissions to the trends API.
+
+Shared by the sender (output_handlers/trend_shipper.py) and the receiver
+(trends_app, /api/submit-health-check):
+
+- The JSON body may be compressed. The `Content-Encoding` header names the
+  codec: gzip, or zstd with the optional `zstandard` package. Requests
+  without the header are plain JSON, as before. The receiver lists the
+  codings it decodes in the `Accept-Encoding` header of its responses
+  (RFC 7694); receivers that predate compression send none.
+- A compressed body larger than one chunk can be uploaded in chunks:
+
+      POST {UPLOADS_PATH}                          {"total_size", "sha256", "content_encoding", "chunk_size"}
+                                                   -> 201 {"upload_id"}
+      PUT  {UPLOADS_PATH}/<upload_id>/chunks/<n>   raw bytes of chunk n
+      GET  {UPLOADS_PATH}/<upload_id>              -> {"received_chunks": [...]}   (to resume)
+      POST {UPLOADS_PATH}/<upload_id>/complete     -> same response as a single POST
+
+- Parts of the payload the receiver never reads are stripped before
+  sending: the rendered prompt and the summarized findings (a trimmed copy
+  of the findings themselves).
+"""
+
+import gzip
+import hashlib
+import io
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUBMIT_PATH = '/api/submit-health-check'
+UPLOADS_PATH = SUBMIT_PATH + '/uploads'
+
+CONTENT_ENCODINGS = ('identity', 'gzip', 'zstd')
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Keys of analysis_results and of the findings that duplicate other parts of the payload
+REDUNDANT_ANALYSIS_KEYS = ('prompt', 'summarized_findings')
+REDUNDANT_FINDINGS_KEYS = ('summarized_findings',)
+
+_READ_SIZE = 1024 * 1024
+
+_CORRUPT_BODY_ERRORS = (OSError, EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+class PayloadTooLarge(ValueError):
+    """The decompressed body exceeds the receiver's limit."""
+
+
+class UnsupportedEncoding(ValueError):
+    """The body uses a Content-Encoding the receiver cannot decode."""
+
+
+def resolve_content_encoding(name):
+    """The codec to send with, from a `compression` setting (zstd falls back to gzip)."""
+    encoding = str(name or 'identity').lower()
+    if encoding == 'none':
+        encoding = 'identity'
+    if encoding not in CONTENT_ENCODINGS:
+        print(f"⚠️ Warning: Unknown compression '{encoding}'. Sending uncompressed submissions.")
+        return 'identity'
+    if encoding == 'zstd' and zstandard is None:
+        print("⚠️ Warning: compression 'zstd' needs the zstandard package. Using gzip instead.")
+        return 'gzip'
+    return encoding
+
+
+def accepted_encodings():
+    """The receiver's `Accept-Encoding` response header value."""
+    return ', '.join(e for e in CONTENT_ENCODINGS if e != 'zstd' or zstandard is not None)
+
+
+def receiver_decodes(accept_encoding, encoding):
+    """Whether a response's `Accept-Encoding` header value lists `encoding`."""
+    listed = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+    return encoding in listed
+
+
+def compress(body, encoding):
+    """Compresses a request body for a Content-Encoding."""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return bytes(body)
+
+
+def decompress(body, encoding, max_size):
+    """Decompresses a request body, refusing to expand it beyond `max_size` bytes.
+
+    Raises:
+        UnsupportedEncoding: For an encoding the receiver cannot decode.
+        ValueError: For a corrupt body.
+        PayloadTooLarge: When the decompressed body exceeds `max_size`.
+    """
+    encoding = (encoding or 'identity').strip().lower()
+    if encoding == 'identity':
+        if len(body) > max_size:
+            raise PayloadTooLarge(f"body exceeds {max_size} bytes")
+        return body
+    if encoding == 'gzip':
+        reader = gzip.GzipFile(fileobj=io.BytesIO(body))
+    elif encoding == 'zstd':
+        if zstandard is None:
+            raise UnsupportedEncoding("zstd bodies are not supported by this server (zstandard is not installed)")
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body))
+    else:
+        raise UnsupportedEncoding(f"unsupported Content-Encoding '{encoding}'")
+
+    out = io.BytesIO()
+    try:
+        with reader:
+            while True:
+                block = reader.read(_READ_SIZE)
+                if not block:
+                    break
+                out.write(block)
+                if out.tell() > max_size:
+                    raise PayloadTooLarge(f"decompressed body exceeds {max_size} bytes")
+    except _CORRUPT_BODY_ERRORS as e:
+        raise ValueError(f"corrupt {encoding} body: {e}") from e
+    return out.getvalue()
+
+
+def sha256_hex(body):
+    """The checksum a chunked upload is verified against."""
+    return hashlib.sha256(body).hexdigest()
+
+
+def chunk_count(total_size, chunk_size):
+    """Number of chunks of at most `chunk_size` bytes in `total_size` bytes."""
+    return max(1, -(-total_size // chunk_size))
+
+
+def strip_analysis_results(analysis_results):
+    """A shallow copy of analysis_results without the keys the receiver never reads."""
+    if not analysis_results:
+        return analysis_results
+    return {key: value for key, value in analysis_results.items() if key not in REDUNDANT_ANALYSIS_KEYS}
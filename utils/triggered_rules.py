@@ -0,0 +1,130 @@
+"""
+Bulk loading of triggered rules into health_check_triggered_rules.
+
+Shared by the trend shipper (output_handlers/trend_shipper.py) and the
+trends_app submission API (trends_app/database_inserter.py). The issues of
+a run are sent in one batch instead of one INSERT per issue: small runs use
+`execute_values`, large ones `COPY FROM STDIN` with a CSV buffer. If the
+batch fails, the rows are inserted one by one so a single bad issue only
+loses itself; savepoints keep the caller's transaction (and the run row)
+usable either way.
+"""
+
+import csv
+import io
+import json
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from utils.json_utils import UniversalJSONEncoder
+
+TRIGGERED_RULE_COLUMNS = (
+    'run_id', 'rule_config_name', 'metric_name', 'severity_level',
+    'severity_score', 'reasoning', 'recommendations', 'triggered_data',
+)
+
+# (analysis_results key, severity_level, default severity_score)
+ISSUE_LISTS = (
+    ('critical_issues', 'critical', 10),
+    ('high_priority_issues', 'high', 7),
+    ('medium_priority_issues', 'medium', 5),
+)
+
+# Batches at least this large are loaded with COPY
+COPY_MIN_ROWS = 1000
+
+EXECUTE_VALUES_PAGE_SIZE = 1000
+
+_COLUMN_LIST = ', '.join(TRIGGERED_RULE_COLUMNS)
+INSERT_SQL = f"INSERT INTO health_check_triggered_rules ({_COLUMN_LIST}) VALUES %s"
+ROW_INSERT_SQL = (f"INSERT INTO health_check_triggered_rules ({_COLUMN_LIST}) "
+                  f"VALUES ({', '.join(['%s'] * len(TRIGGERED_RULE_COLUMNS))})")
+COPY_SQL = f"COPY health_check_triggered_rules ({_COLUMN_LIST}) FROM STDIN WITH (FORMAT csv)"
+
+
+def triggered_rule_rows(run_id, analysis_results):
+    """Builds one row per issue from the output of generate_dynamic_prompt().
+
+    Args:
+        run_id (int): The ID of the health check run.
+        analysis_results (dict): Contains the critical_issues,
+            high_priority_issues and medium_priority_issues lists.
+
+    Returns:
+        list[tuple]: Rows in TRIGGERED_RULE_COLUMNS order.
+    """
+    rows = []
+    for list_key, severity_level, default_score in ISSUE_LISTS:
+        for issue in analysis_results.get(list_key) or []:
+            analysis = issue.get('analysis', {})
+            rows.append((
+                run_id,
+                issue.get('rule_config_name', 'unknown'),
+                issue.get('metric', 'unknown'),
+                severity_level,
+                analysis.get('score', default_score),
+                analysis.get('reasoning', ''),
+                json.dumps(analysis.get('recommendations', []), cls=UniversalJSONEncoder),
+                json.dumps(issue.get('data', {}), cls=UniversalJSONEncoder),
+            ))
+    return rows
+
+
+def _copy_rows(cursor, rows):
+    """Loads rows with COPY FROM STDIN."""
+    buffer = io.StringIO()
+    # Strings are quoted so '' stays an empty string; only None becomes NULL
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(COPY_SQL, buffer)
+
+
+def _insert_row_by_row(cursor, run_id, rows, warn):
+    """Inserts rows individually, skipping (and reporting) the ones that fail."""
+    stored = 0
+    for row in rows:
+        cursor.execute("SAVEPOINT triggered_rule")
+        try:
+            cursor.execute(ROW_INSERT_SQL, row)
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT triggered_rule")
+            warn(f"Failed to store {row[3]} issue '{row[1]}' for run {run_id}: {e}")
+            continue
+        cursor.execute("RELEASE SAVEPOINT triggered_rule")
+        stored += 1
+    return stored
+
+
+def insert_triggered_rules(cursor, run_id, analysis_results, warn=print):
+    """Stores the triggered rules of a run in one batch.
+
+    Args:
+        cursor: psycopg2 cursor inside the caller's transaction.
+        run_id (int): The ID of the health check run.
+        analysis_results (dict): The results from generate_dynamic_prompt().
+        warn (callable, optional): Receives a message for a failed batch
+            and for every row that could not be stored.
+
+    Returns:
+        int: Number of triggered rules stored.
+    """
+    if not analysis_results:
+        return 0
+    rows = triggered_rule_rows(run_id, analysis_results)
+    if not rows:
+        return 0
+
+    cursor.execute("SAVEPOINT triggered_rules")
+    try:
+        if len(rows) >= COPY_MIN_ROWS:
+            _copy_rows(cursor, rows)
+        else:
+            execute_values(cursor, INSERT_SQL, rows, page_size=EXECUTE_VALUES_PAGE_SIZE)
+        stored = len(rows)
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT triggered_rules")
+        warn(f"Batch insert of {len(rows)} triggered rules for run {run_id} failed ({e}). Inserting them one by one.")
+        stored = _insert_row_by_row(cursor, run_id, rows, warn)
+    cursor.execute("RELEASE SAVEPOINT triggered_rules")
+    return stored